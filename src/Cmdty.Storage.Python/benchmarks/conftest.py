@@ -0,0 +1,67 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+pytest-benchmark suite for the Python wrapper layer. Run from the src/Cmdty.Storage.Python directory with:
+
+    pip install -r benchmarks/requirements.txt
+    python -m pytest benchmarks --benchmark-autosave
+
+Benchmarks are grouped so that each table can be read on its own:
+* Groups starting 'wrapper' time the Python to .NET conversion functions on their own.
+* Groups starting 'intrinsic' and 'lsmc' each contain an 'engine' benchmark, which times only the .NET calculation with
+  inputs already converted, and an 'end_to_end' benchmark, which times the public valuation function. For 'lsmc' the
+  engine includes all the .NET work of the valuation: basis function parsing, the intrinsic valuation and the LSMC
+  calculation. The difference is the wrapper and interop overhead, which is also saved as 'wrapper_overhead' in the
+  benchmark JSON.
+
+Engine times include the calls from .NET back into the Python settlement rule, which are benchmarked on their own in
+the 'wrapper: settlement rule callbacks' groups. Use -k to select sizes, e.g. -k "freq_D and sims_1k" for daily with
+1,000 simulations.
+"""
+
+import pytest
+from benchmarks.utils import FREQS, NUM_SIMS, Market, create_market
+
+
+@pytest.fixture(scope='module', params=FREQS, ids=lambda freq: 'freq_' + freq)
+def market(request) -> Market:
+    return create_market(request.param)
+
+
+@pytest.fixture(params=NUM_SIMS, ids=lambda num_sims: 'sims_{}k'.format(num_sims // 1000))
+def num_sims(request) -> int:
+    return request.param
+
+
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    """Adds the wrapper overhead, end_to_end median minus engine median, of each group to the saved JSON."""
+    medians = {}
+    for bench in output_json['benchmarks']:
+        layer = bench['extra_info'].get('layer')
+        if layer in ('engine', 'end_to_end'):
+            medians.setdefault(bench['group'], {})[layer] = bench['stats']['median']
+    output_json['wrapper_overhead'] = [
+        {'group': group, 'engine_median': layers['engine'], 'end_to_end_median': layers['end_to_end'],
+         'wrapper_median': layers['end_to_end'] - layers['engine']}
+        for group, layers in medians.items() if len(layers) == 2]
@@ -0,0 +1,120 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import pytest
+from cmdty_storage import utils, intrinsic, multi_factor, intrinsic_value, three_factor_seasonal_value, \
+    SimulationDataReturned, DiscountCurve
+from benchmarks.utils import BASIS_FUNCS
+
+NUM_INVENTORY_GRID_POINTS = 100
+NUMERICAL_TOLERANCE = 1E-12
+SPOT_MEAN_REVERSION = 45.0
+SPOT_VOL = 0.75
+LONG_TERM_VOL = 0.15
+SEASONAL_VOL = 0.18
+SEED = 12
+FWD_SIM_SEED = 13
+LSMC_ROUNDS = 3
+
+
+def _layer(benchmark, layer, group, market, **extra_info):
+    benchmark.group = group
+    benchmark.extra_info.update(layer=layer, freq=market.freq, **extra_info)
+
+
+def _net_inputs(market):
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[market.freq]
+    net_current_period = utils.from_datetime_like(market.val_date, time_period_type)
+    net_forward_curve = utils.series_to_double_time_series(market.fwd_curve, time_period_type)
+    net_discounter = DiscountCurve(market.interest_rates).net_discounter
+    net_settlement_rule = utils.wrap_settle_for_dotnet(market.settlement_rule, market.freq)
+    return time_period_type, net_current_period, net_forward_curve, net_discounter, net_settlement_rule
+
+
+def test_intrinsic_engine(benchmark, market):
+    _layer(benchmark, 'engine', 'intrinsic freq={}'.format(market.freq), market)
+    time_period_type, net_current_period, net_forward_curve, net_discounter, net_settlement_rule = \
+        _net_inputs(market)
+    benchmark(intrinsic._net_intrinsic_results, market.storage, net_current_period, net_discounter,
+              market.inventory, net_forward_curve, net_settlement_rule, NUM_INVENTORY_GRID_POINTS,
+              NUMERICAL_TOLERANCE, time_period_type)
+
+
+def test_intrinsic_end_to_end(benchmark, market):
+    _layer(benchmark, 'end_to_end', 'intrinsic freq={}'.format(market.freq), market)
+    benchmark(intrinsic_value, market.storage, market.val_date, market.inventory, market.fwd_curve,
+              market.interest_rates, market.settlement_rule, num_inventory_grid_points=NUM_INVENTORY_GRID_POINTS,
+              numerical_tolerance=NUMERICAL_TOLERANCE)
+
+
+def _lsmc_group(market, num_sims, sim_data_returned):
+    return 'lsmc freq={} sims={} sim_data_returned={}'.format(market.freq, num_sims, sim_data_returned.name)
+
+
+@pytest.mark.parametrize('sim_data_returned', [SimulationDataReturned.NONE, SimulationDataReturned.ALL],
+                         ids=lambda sim_data_returned: 'sim_data_' + sim_data_returned.name)
+def test_lsmc_engine(benchmark, market, num_sims, sim_data_returned):
+    _layer(benchmark, 'engine', _lsmc_group(market, num_sims, sim_data_returned), market, num_sims=num_sims)
+    time_period_type, net_current_period, net_forward_curve, net_discounter, net_settlement_rule = \
+        _net_inputs(market)
+    net_multi_factor_params = multi_factor.net_mf.MultiFactorParameters.For3FactorSeasonal[time_period_type](
+        SPOT_MEAN_REVERSION, SPOT_VOL, LONG_TERM_VOL, SEASONAL_VOL, net_current_period,
+        market.storage.net_storage.EndPeriod)
+
+    def add_multi_factor_sim(net_lsmc_params_builder):
+        net_lsmc_params_builder.SimulateWithMultiFactorModelAndMersenneTwister(net_multi_factor_params, num_sims,
+                                                                               SEED, FWD_SIM_SEED)
+
+    net_grid_calc = multi_factor.net_cs.FixedSpacingStateSpaceGridCalc.CreateForFixedNumberOfPointsOnGlobalInventoryRange[
+        time_period_type](market.storage.net_storage, NUM_INVENTORY_GRID_POINTS)
+    basis_funcs = multi_factor._transform_three_factor_basis_funcs(BASIS_FUNCS)
+    lsmc = multi_factor.net_cs.LsmcStorageValuation(
+        utils.create_net_log_adapter(multi_factor.logger, multi_factor.net_cs.LsmcStorageValuation))
+
+    # The same .NET work as three_factor_seasonal_value, so that the end_to_end difference is only wrapper overhead
+    def engine_valuation():
+        net_basis_functions = multi_factor.net_cs.BasisFunctionsBuilder.Parse(basis_funcs)
+        net_lsmc_params = multi_factor._create_net_lsmc_params(
+            market.storage, net_current_period, market.inventory, net_forward_curve, net_settlement_rule,
+            net_discounter, net_grid_calc, NUMERICAL_TOLERANCE, net_basis_functions, sim_data_returned, None, None,
+            True, None, add_multi_factor_sim, time_period_type)
+        intrinsic._net_intrinsic_results(market.storage, net_current_period, net_discounter, market.inventory,
+                                         net_forward_curve, net_settlement_rule, NUM_INVENTORY_GRID_POINTS,
+                                         NUMERICAL_TOLERANCE, time_period_type)
+        return lsmc.Calculate[time_period_type](net_lsmc_params)
+
+    benchmark.pedantic(engine_valuation, rounds=LSMC_ROUNDS, warmup_rounds=1)
+
+
+@pytest.mark.parametrize('sim_data_returned', [SimulationDataReturned.NONE, SimulationDataReturned.ALL],
+                         ids=lambda sim_data_returned: 'sim_data_' + sim_data_returned.name)
+def test_lsmc_end_to_end(benchmark, market, num_sims, sim_data_returned):
+    _layer(benchmark, 'end_to_end', _lsmc_group(market, num_sims, sim_data_returned), market, num_sims=num_sims)
+    kwargs = dict(cmdty_storage=market.storage, val_date=market.val_date, inventory=market.inventory,
+                  fwd_curve=market.fwd_curve, interest_rates=market.interest_rates,
+                  settlement_rule=market.settlement_rule, spot_mean_reversion=SPOT_MEAN_REVERSION, spot_vol=SPOT_VOL,
+                  long_term_vol=LONG_TERM_VOL, seasonal_vol=SEASONAL_VOL, num_sims=num_sims,
+                  basis_funcs=BASIS_FUNCS, discount_deltas=True, seed=SEED, fwd_sim_seed=FWD_SIM_SEED,
+                  num_inventory_grid_points=NUM_INVENTORY_GRID_POINTS, numerical_tolerance=NUMERICAL_TOLERANCE,
+                  sim_data_returned=sim_data_returned)
+    benchmark.pedantic(three_factor_seasonal_value, kwargs=kwargs, rounds=LSMC_ROUNDS, warmup_rounds=1)
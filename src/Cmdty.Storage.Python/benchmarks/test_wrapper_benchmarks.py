@@ -0,0 +1,129 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import pandas as pd
+import numpy as np
+from cmdty_storage import utils, intrinsic, CmdtyStorage, DiscountCurve, ForwardCurve
+from benchmarks.utils import create_storage
+
+
+def _group(benchmark, name, market, **extra_info):
+    benchmark.group = 'wrapper: {} freq={}'.format(name, market.freq)
+    benchmark.extra_info.update(layer='wrapper', freq=market.freq, **extra_info)
+
+
+def test_series_to_double_time_series(benchmark, market):
+    _group(benchmark, 'series_to_double_time_series', market)
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[market.freq]
+    benchmark(utils.series_to_double_time_series, market.fwd_curve, time_period_type)
+
+
+def test_interest_rates_to_double_time_series(benchmark, market):
+    _group(benchmark, 'interest rates series_to_double_time_series', market)
+    benchmark(utils.series_to_double_time_series, market.interest_rates, utils.FREQ_TO_PERIOD_TYPE['D'])
+
+
+def test_forward_curve_init(benchmark, market):
+    _group(benchmark, 'ForwardCurve.__init__', market)
+    benchmark(ForwardCurve, market.fwd_curve)
+
+
+def test_forward_curve_shifted(benchmark, market):
+    _group(benchmark, 'ForwardCurve.shifted', market)
+    forward_curve = ForwardCurve(market.fwd_curve)
+    benchmark(forward_curve.shifted, 0.01, market.fwd_curve.index[len(market.fwd_curve) // 2])
+
+
+def test_discount_curve_init(benchmark, market):
+    _group(benchmark, 'DiscountCurve.__init__', market)
+    benchmark(DiscountCurve, market.interest_rates)
+
+
+def _sim_data_frame(market, num_sims):
+    index = pd.period_range(market.val_date, periods=len(market.fwd_curve), freq=market.freq)
+    return pd.DataFrame(np.random.default_rng(12).standard_normal((len(index), num_sims)), index=index)
+
+
+def test_data_frame_to_net_double_panel(benchmark, market, num_sims):
+    _group(benchmark, 'data_frame_to_net_double_panel sims={}'.format(num_sims), market, num_sims=num_sims)
+    sim_data = _sim_data_frame(market, num_sims)
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[market.freq]
+    benchmark(utils.data_frame_to_net_double_panel, sim_data, time_period_type)
+
+
+def test_net_panel_to_data_frame(benchmark, market, num_sims):
+    _group(benchmark, 'net_panel_to_data_frame sims={}'.format(num_sims), market, num_sims=num_sims)
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[market.freq]
+    net_panel = utils.data_frame_to_net_double_panel(_sim_data_frame(market, num_sims), time_period_type)
+    benchmark(utils.net_panel_to_data_frame, net_panel, market.freq)
+
+
+def test_profile_to_data_frame(benchmark, market):
+    _group(benchmark, 'profile_to_data_frame', market)
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[market.freq]
+    net_val_results = intrinsic._net_intrinsic_results(
+        market.storage, utils.from_datetime_like(market.val_date, time_period_type),
+        DiscountCurve(market.interest_rates).net_discounter, market.inventory,
+        utils.series_to_double_time_series(market.fwd_curve, time_period_type),
+        utils.wrap_settle_for_dotnet(market.settlement_rule, market.freq), 100, 1E-12, time_period_type)
+    benchmark(intrinsic.profile_to_data_frame, market.freq, net_val_results.StorageProfile)
+
+
+def test_cmdty_storage_init_scalar_constraints(benchmark, market):
+    _group(benchmark, 'CmdtyStorage.__init__ scalar constraints', market)
+    storage_periods = market.fwd_curve.index[1:]
+    benchmark(create_storage, market.freq, storage_periods[0], storage_periods[-1])
+
+
+def test_cmdty_storage_init_series_constraints(benchmark, market):
+    _group(benchmark, 'CmdtyStorage.__init__ series constraints', market)
+    storage_periods = market.fwd_curve.index[1:]
+    max_inventory = pd.Series(100_000.0, index=storage_periods)
+    rate = pd.Series(1_000.0, index=storage_periods)
+    cost = pd.Series(0.01, index=storage_periods)
+
+    def create_storage_with_series():
+        return CmdtyStorage(market.freq, storage_periods[0], storage_periods[-1], injection_cost=cost,
+                            withdrawal_cost=cost, min_inventory=0.0, max_inventory=max_inventory,
+                            max_injection_rate=rate, max_withdrawal_rate=rate, cmdty_consumed_inject=cost,
+                            cmdty_consumed_withdraw=cost)
+    benchmark(create_storage_with_series)
+
+
+def test_settlement_rule_callbacks(benchmark, market):
+    """Times .NET calling the Python settlement rule once for each period, as the engines do."""
+    _group(benchmark, 'settlement rule callbacks', market)
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[market.freq]
+    net_settlement_rule = utils.wrap_settle_for_dotnet(market.settlement_rule, market.freq)
+    net_periods = [utils.from_datetime_like(period, time_period_type) for period in market.fwd_curve.index]
+
+    def invoke_for_all_periods():
+        for net_period in net_periods:
+            net_settlement_rule.Invoke(net_period)
+    benchmark(invoke_for_all_periods)
+
+
+def test_settlement_rule_to_net_time_series(benchmark, market):
+    _group(benchmark, 'settlement_rule_to_net_time_series', market)
+    benchmark(utils.settlement_rule_to_net_time_series, market.settlement_rule, market.freq,
+              market.fwd_curve.index[0], market.fwd_curve.index[-1])
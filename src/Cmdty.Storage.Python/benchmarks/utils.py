@@ -0,0 +1,72 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import typing as tp
+from datetime import date
+import pandas as pd
+import numpy as np
+from cmdty_storage import CmdtyStorage
+
+FREQS = ('M', 'D', 'H')
+NUM_SIMS = (1_000, 10_000, 100_000)
+NUM_STORAGE_PERIODS = {'M': 12, 'D': 90, 'H': 168}
+PERIODS_PER_YEAR = {'M': 12.0, 'D': 365.0, 'H': 8760.0}
+BASIS_FUNCS = '1 + x_st + x_sw + x_lt + s + s**2 + s**3'
+
+
+class Market(tp.NamedTuple):
+    freq: str
+    storage: CmdtyStorage
+    val_date: pd.Period
+    inventory: float
+    fwd_curve: pd.Series
+    interest_rates: pd.Series
+    settlement_rule: tp.Callable[[pd.Period], date]
+
+
+def twentieth_of_next_month(period: pd.Period) -> pd.Period:
+    return period.asfreq('M').asfreq('D', 'end') + 20
+
+
+def create_storage(freq: str, storage_start: pd.Period, storage_end: pd.Period) -> CmdtyStorage:
+    max_inventory = 100_000.0
+    # Rates such that the storage can be filled in about a quarter of its life
+    max_rate = max_inventory * 4.0 / NUM_STORAGE_PERIODS[freq]
+    return CmdtyStorage(freq, storage_start, storage_end, injection_cost=0.01, withdrawal_cost=0.025,
+                        min_inventory=0.0, max_inventory=max_inventory, max_injection_rate=max_rate,
+                        max_withdrawal_rate=max_rate)
+
+
+def create_market(freq: str) -> Market:
+    val_date = pd.Period('2024-06-03', freq=freq)
+    storage_start = val_date + 1
+    storage_end = storage_start + NUM_STORAGE_PERIODS[freq] - 1
+    storage = create_storage(freq, storage_start, storage_end)
+    fwd_curve_index = pd.period_range(val_date, storage_end, freq=freq)
+    # Seasonal shape, so that the optimal strategy makes use of the storage
+    years = np.arange(len(fwd_curve_index)) / PERIODS_PER_YEAR[freq]
+    fwd_curve = pd.Series(25.0 + 5.0 * np.sin(2.0 * np.pi * years * 4.0), index=fwd_curve_index)
+    interest_rates_index = pd.period_range(val_date.asfreq('D', 's'),
+                                           twentieth_of_next_month(storage_end) + 10, freq='D')
+    interest_rates = pd.Series(0.035, index=interest_rates_index)
+    return Market(freq, storage, val_date, 0.0, fwd_curve, interest_rates, twentieth_of_next_month)
@@ -21,27 +21,95 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 
-import platform
-
-os = platform.system()
-# On non-Windows platform try to load Core CLR, rather than the default behaviour which is to load Mono.
-if os != 'Windows':
-    from pythonnet import load
-
-    try:
-        load('coreclr')
-    except:
-        print('Could not load Core CLR runtime, on non-Windows OS, so falling back to Mono.')
+"""
+Public API of cmdty_storage. Names are imported from their submodules on first access, so that the .NET runtime and
+assemblies are only loaded when something calling .NET is used. Pure Python features, such as MultiFactorModel and
+time_func, can be used without loading .NET at all. Call warm_up to load everything up front.
+"""
 
+import importlib
+import typing as tp
 from cmdty_storage.__version__ import __version__
-from cmdty_storage.cmdty_storage import CmdtyStorage, RatchetInterp
-from cmdty_storage.intrinsic import intrinsic_value
-from cmdty_storage.trinomial import trinomial_value, trinomial_deltas
-from cmdty_storage.multi_factor import three_factor_seasonal_value, multi_factor_value, value_from_sims, SimulationDataReturned
-from cmdty_storage.multi_factor_diffusion_model import MultiFactorModel
-from cmdty_storage.multi_factor_spot_sim import MultiFactorSpotSim
-from cmdty_storage.utils import FREQ_TO_PERIOD_TYPE, numerics_provider
 import logging
 
+_LAZY_ATTRIBUTE_MODULES = {
+    'CmdtyStorage': 'cmdty_storage.cmdty_storage',
+    'RatchetInterp': 'cmdty_storage.cmdty_storage',
+    'InventoryValueLadder': 'cmdty_storage.cmdty_storage',
+    'intrinsic_value': 'cmdty_storage.intrinsic',
+    'intrinsic_value_scenarios': 'cmdty_storage.intrinsic',
+    'IntrinsicValuer': 'cmdty_storage.intrinsic',
+    'intrinsic_value_ladder': 'cmdty_storage.intrinsic',
+    'trinomial_value': 'cmdty_storage.trinomial',
+    'trinomial_deltas': 'cmdty_storage.trinomial',
+    'trinomial_value_with_deltas': 'cmdty_storage.trinomial',
+    'TrinomialTree': 'cmdty_storage.trinomial',
+    'trinomial_value_ladder': 'cmdty_storage.trinomial',
+    'three_factor_seasonal_value': 'cmdty_storage.multi_factor',
+    'multi_factor_value': 'cmdty_storage.multi_factor',
+    'value_from_sims': 'cmdty_storage.multi_factor',
+    'SimulationDataReturned': 'cmdty_storage.multi_factor',
+    'scenario_grid': 'cmdty_storage.multi_factor',
+    'LsmcPolicy': 'cmdty_storage.multi_factor',
+    'value_with_policy': 'cmdty_storage.multi_factor',
+    'PolicyCache': 'cmdty_storage.policy_cache',
+    'DiscountCurve': 'cmdty_storage.curves',
+    'ForwardCurve': 'cmdty_storage.curves',
+    'MultiFactorModel': 'cmdty_storage.multi_factor_diffusion_model',
+    'MultiFactorSpotSim': 'cmdty_storage.multi_factor_spot_sim',
+    'FREQ_TO_PERIOD_TYPE': 'cmdty_storage.utils',
+    'numerics_provider': 'cmdty_storage.utils',
+    'Instrumentation': 'cmdty_storage.instrumentation',
+    'LoggingInstrumentation': 'cmdty_storage.instrumentation',
+    'OpenTelemetryInstrumentation': 'cmdty_storage.instrumentation',
+    'set_instrumentation': 'cmdty_storage.instrumentation',
+    'get_instrumentation': 'cmdty_storage.instrumentation',
+    'CancellationToken': 'cmdty_storage.cancellation',
+    'ValuationCancelledError': 'cmdty_storage.cancellation',
+    'AsyncValuation': 'cmdty_storage.async_valuation',
+    'multi_factor_value_async': 'cmdty_storage.async_valuation',
+    'three_factor_seasonal_value_async': 'cmdty_storage.async_valuation',
+    'set_async_executor': 'cmdty_storage.async_valuation',
+    'get_async_executor': 'cmdty_storage.async_valuation',
+    'warm_up': 'cmdty_storage._warm_up',
+    'WarmUpTimings': 'cmdty_storage._warm_up',
+}
+
+__all__ = ['__version__'] + list(_LAZY_ATTRIBUTE_MODULES)
+
+if tp.TYPE_CHECKING:
+    from cmdty_storage.cmdty_storage import CmdtyStorage, RatchetInterp, InventoryValueLadder
+    from cmdty_storage.intrinsic import intrinsic_value, intrinsic_value_scenarios, IntrinsicValuer, \
+        intrinsic_value_ladder
+    from cmdty_storage.trinomial import trinomial_value, trinomial_deltas, trinomial_value_with_deltas, \
+        TrinomialTree, trinomial_value_ladder
+    from cmdty_storage.multi_factor import three_factor_seasonal_value, multi_factor_value, value_from_sims, \
+        SimulationDataReturned, scenario_grid, LsmcPolicy, value_with_policy
+    from cmdty_storage.policy_cache import PolicyCache
+    from cmdty_storage.curves import DiscountCurve, ForwardCurve
+    from cmdty_storage.multi_factor_diffusion_model import MultiFactorModel
+    from cmdty_storage.multi_factor_spot_sim import MultiFactorSpotSim
+    from cmdty_storage.utils import FREQ_TO_PERIOD_TYPE, numerics_provider
+    from cmdty_storage.instrumentation import Instrumentation, LoggingInstrumentation, OpenTelemetryInstrumentation, \
+        set_instrumentation, get_instrumentation
+    from cmdty_storage.cancellation import CancellationToken, ValuationCancelledError
+    from cmdty_storage.async_valuation import AsyncValuation, multi_factor_value_async, \
+        three_factor_seasonal_value_async, set_async_executor, get_async_executor
+    from cmdty_storage._warm_up import warm_up, WarmUpTimings
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTE_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # So __getattr__ isn't called again for name
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTE_MODULES))
+
+
 logger: logging.Logger = logging.getLogger('cmdty.storage')
 logger.addHandler(logging.NullHandler())
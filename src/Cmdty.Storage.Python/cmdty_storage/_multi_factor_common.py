@@ -22,20 +22,22 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 
 
-import clr
-import System.Collections.Generic as dotnet_cols_gen
 import pathlib as pl
-clr.AddReference(str(pl.Path('cmdty_storage/lib/Cmdty.Core.Simulation')))
-import Cmdty.Core.Simulation as net_sim
 import typing as tp
 import numpy as np
-from cmdty_storage import utils
+from cmdty_storage import _typing as ctp
 
 
 FactorCorrsType = tp.Optional[tp.Union[float, np.ndarray]]
 
 
 def create_net_multi_factor_params(factor_corrs, factors, time_period_type):
+    # .NET imported here, rather than module level, so MultiFactorModel can be used without loading the .NET runtime
+    from cmdty_storage import utils
+    import clr
+    clr.AddReference(str(pl.Path('cmdty_storage/lib/Cmdty.Core.Simulation')))
+    import System.Collections.Generic as dotnet_cols_gen
+    import Cmdty.Core.Simulation as net_sim
     net_factors = dotnet_cols_gen.List[net_sim.MultiFactor.Factor[time_period_type]]()
     for mean_reversion, vol_curve in factors:
         net_vol_curve = utils.curve_to_net_dict(vol_curve, time_period_type)
@@ -47,7 +49,7 @@ def create_net_multi_factor_params(factor_corrs, factors, time_period_type):
 
 
 def validate_multi_factor_params(  # TODO unit test validation fails
-        factors: tp.Collection[tp.Tuple[float, utils.CurveType]],
+        factors: tp.Collection[tp.Tuple[float, ctp.CurveType]],
         factor_corrs: FactorCorrsType) -> np.ndarray:
     factors_len = len(factors)
     if factors_len == 0:
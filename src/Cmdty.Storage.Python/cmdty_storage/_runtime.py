@@ -0,0 +1,48 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Loads the .NET runtime on first use of a module which calls .NET, rather than on import of cmdty_storage."""
+
+import platform
+import threading
+
+_load_lock = threading.Lock()
+_loaded = False
+
+
+def load() -> None:
+    """Loads the .NET runtime used by pythonnet, if not already loaded. Modules which call .NET must call this before
+    importing clr. On non-Windows OS tries to load Core CLR, rather than the pythonnet default of Mono."""
+    global _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if _loaded:
+            return
+        if platform.system() != 'Windows':
+            from pythonnet import load as load_clr
+            try:
+                load_clr('coreclr')
+            except:
+                print('Could not load Core CLR runtime, on non-Windows OS, so falling back to Mono.')
+        _loaded = True
@@ -0,0 +1,39 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Type aliases used in the public API, defined without importing .NET so pure Python modules can use them."""
+
+import typing as tp
+from datetime import date, datetime
+import pandas as pd
+
+# TODO get rid of TimePeriodSpecType or ForwardPointType?
+# TODO check that each type definition is correct still
+TimePeriodSpecType = tp.Union[str, datetime, date, pd.Period]
+ForwardPointType = tp.Union[str, date, datetime, pd.Period]
+CurveType = tp.Union[pd.Series, tp.Dict[ForwardPointType, float]]
+TimeFunctionType = tp.Callable[[tp.Union[date, datetime], tp.Union[date, datetime]], float]
+FwdContractType = tp.Union[date, datetime, pd.Period, float,
+                           tp.Tuple[date, date], tp.Tuple[datetime, datetime],
+                           tp.Tuple[pd.Period, pd.Period]]
+FwdContractsType = tp.Iterable[FwdContractType]
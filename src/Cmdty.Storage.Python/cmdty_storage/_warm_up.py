@@ -0,0 +1,134 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import importlib
+import logging
+import time
+import typing as tp
+from cmdty_storage import _runtime
+
+logger: logging.Logger = logging.getLogger('cmdty.storage')
+
+_NET_MODULES = ('cmdty_storage.utils', 'cmdty_storage.cmdty_storage', 'cmdty_storage.intrinsic',
+                'cmdty_storage.trinomial', 'cmdty_storage.multi_factor', 'cmdty_storage.multi_factor_spot_sim',
+                'cmdty_storage.policy_cache')
+
+_ENGINES = ('intrinsic', 'lsmc', 'tree')
+_NUM_STORAGE_PERIODS = 4
+_NUM_SIMS = 32
+_BASIS_FUNCS = '1 + x_st + x_sw + x_lt + x_st**2 + x_sw**2 + x_lt**2'
+
+
+class WarmUpTimings(tp.NamedTuple):
+    """
+    Seconds taken by warm_up. load is the time to load the .NET runtime and import modules, and valuations contains
+    the time of each synthetic valuation, keyed by (freq, engine) tuple.
+    """
+    load: float
+    valuations: tp.Dict[tp.Tuple[str, str], float]
+    total: float
+
+
+def warm_up(freqs: tp.Iterable[str] = ('D',),
+            engines: tp.Iterable[str] = ('intrinsic', 'lsmc', 'tree')) -> WarmUpTimings:
+    """
+    Loads the .NET runtime and assemblies, imports all cmdty_storage modules, then runs tiny valuations on synthetic
+    data to JIT compile the .NET code of each engine for each freq. Without this, these costs are paid by the first
+    valuation in a process, which is several times slower than later ones. For services which would rather pay this
+    start up cost before handling requests.
+
+    Args:
+        freqs (iterable of str): Frequencies to warm up, each of which must be a key of FREQ_TO_PERIOD_TYPE. The .NET
+            code is generic in the time period type, so is compiled separately for each frequency.
+        engines (iterable of str): Valuation engines to warm up, each of 'intrinsic', 'lsmc' (three_factor_seasonal_value)
+            or 'tree' (trinomial_value).
+
+    Returns:
+        WarmUpTimings: Time taken in seconds, which is also logged at INFO level.
+    """
+    freqs = tuple(freqs)
+    engines = tuple(engines)
+    for engine in engines:
+        if engine not in _ENGINES:
+            raise ValueError("engine '{}' not supported. Allowable values are {}.".format(engine, _ENGINES))
+    start = time.perf_counter()
+    _runtime.load()
+    for module_name in _NET_MODULES:
+        importlib.import_module(module_name)
+    from cmdty_storage import utils
+    for freq in freqs:
+        if freq not in utils.FREQ_TO_PERIOD_TYPE:
+            raise ValueError("freq '{}' not supported. The allowable values can be found in the keys of "
+                             "FREQ_TO_PERIOD_TYPE.".format(freq))
+    load_seconds = time.perf_counter() - start
+    logger.info('Loaded .NET runtime and modules in %.3f seconds.', load_seconds)
+
+    valuation_seconds = {}
+    for freq in freqs:
+        for engine in engines:
+            valuation_start = time.perf_counter()
+            _value_synthetic_storage(freq, engine)
+            valuation_seconds[(freq, engine)] = seconds = time.perf_counter() - valuation_start
+            logger.info('Warmed up %s engine for freq %s in %.3f seconds.', engine, freq, seconds)
+
+    total_seconds = time.perf_counter() - start
+    logger.info('Warm up completed in %.3f seconds.', total_seconds)
+    return WarmUpTimings(load=load_seconds, valuations=valuation_seconds, total=total_seconds)
+
+
+def _value_synthetic_storage(freq: str, engine: str) -> None:
+    import pandas as pd
+    from cmdty_storage.cmdty_storage import CmdtyStorage
+
+    val_period = pd.Period('2024-01-01', freq=freq)
+    storage_start = val_period + 1
+    storage_end = storage_start + _NUM_STORAGE_PERIODS
+    storage = CmdtyStorage(freq, storage_start, storage_end, injection_cost=0.01, withdrawal_cost=0.01,
+                           min_inventory=0.0, max_inventory=100.0, max_injection_rate=50.0,
+                           max_withdrawal_rate=50.0)
+    fwd_curve_index = pd.period_range(val_period, storage_end, freq=freq)
+    fwd_curve = pd.Series([10.0 + (i % 2) for i in range(len(fwd_curve_index))], index=fwd_curve_index)
+    interest_rates_index = pd.period_range(val_period.start_time.date(), storage_end.end_time.date() +
+                                           pd.Timedelta(days=60), freq='D')
+    interest_rates = pd.Series(0.02, index=interest_rates_index)
+
+    def settlement_rule(period):
+        return period.asfreq('D', 'start')
+
+    if engine == 'intrinsic':
+        from cmdty_storage.intrinsic import intrinsic_value
+        intrinsic_value(storage, val_period, 0.0, fwd_curve, interest_rates, settlement_rule,
+                        num_inventory_grid_points=10)
+    elif engine == 'lsmc':
+        from cmdty_storage.multi_factor import three_factor_seasonal_value
+        three_factor_seasonal_value(storage, val_period, 0.0, fwd_curve, interest_rates, settlement_rule,
+                                    spot_mean_reversion=10.0, spot_vol=0.5, long_term_vol=0.2, seasonal_vol=0.1,
+                                    num_sims=_NUM_SIMS, basis_funcs=_BASIS_FUNCS, discount_deltas=True, seed=12,
+                                    num_inventory_grid_points=10)
+    else:
+        from cmdty_storage.trinomial import trinomial_value
+        period_length = val_period.end_time - val_period.start_time + pd.Timedelta(1, 'ns')
+        time_step = period_length / pd.Timedelta(days=365)
+        spot_volatility = pd.Series(0.5, index=fwd_curve_index)
+        trinomial_value(storage, val_period, 0.0, fwd_curve, spot_volatility, 10.0, time_step, interest_rates,
+                        settlement_rule, num_inventory_grid_points=10)
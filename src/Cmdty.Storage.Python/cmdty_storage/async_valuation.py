@@ -0,0 +1,158 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Asyncio versions of the Monte Carlo valuation functions, for use in event loop based applications. Valuations run on
+an executor, which defaults to a thread pool managed by this module and can be replaced with set_async_executor. The
+.NET calculation runs without holding the GIL, so the event loop remains responsive.
+
+Each function returns an AsyncValuation, which is awaited for the results, and whose progress method is an
+asynchronous generator of progress updates. Cancelling the task awaiting an AsyncValuation, or calling its cancel
+method, cancels the .NET calculation with a CancellationToken, so it stops rather than carrying on in the background.
+"""
+
+import asyncio
+import concurrent.futures as cf
+import threading
+import typing as tp
+from cmdty_storage import multi_factor
+from cmdty_storage.cancellation import CancellationToken
+
+_executor: tp.Optional[cf.Executor] = None
+_default_executor: tp.Optional[cf.ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def set_async_executor(executor: tp.Optional[cf.Executor]) -> None:
+    """
+    Sets the executor which async valuations run on. None resets to the default, a ThreadPoolExecutor created on first
+    use.
+    """
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+
+def get_async_executor() -> cf.Executor:
+    global _default_executor
+    with _executor_lock:
+        if _executor is not None:
+            return _executor
+        if _default_executor is None:
+            _default_executor = cf.ThreadPoolExecutor(thread_name_prefix='cmdty_storage')
+        return _default_executor
+
+
+class AsyncValuation:
+    """
+    Valuation running on an executor, which is awaited for the results. Awaiting raises asyncio.CancelledError if the
+    valuation is cancelled. If the awaiting task is cancelled, the .NET calculation is cancelled too, and the task
+    waits for it to stop before the asyncio.CancelledError propagates.
+    """
+
+    def __init__(self, valuation_func: tp.Callable, args: tp.Sequence, kwargs: tp.Dict[str, tp.Any],
+                 executor: tp.Optional[cf.Executor] = None):
+        loop = asyncio.get_running_loop()
+        self._progress_updates = asyncio.Queue()
+        cancellation_token = kwargs.pop('cancellation_token', None)
+        self._cancellation_token = CancellationToken() if cancellation_token is None else cancellation_token
+        on_progress_update = kwargs.pop('on_progress_update', None)
+
+        def put_progress(progress):
+            if on_progress_update is not None:
+                on_progress_update(progress)
+            try:
+                loop.call_soon_threadsafe(self._progress_updates.put_nowait, progress)
+            except RuntimeError:
+                pass  # Event loop closed, so there is nothing to stream progress to
+
+        def value():
+            return valuation_func(*args, on_progress_update=put_progress,
+                                  cancellation_token=self._cancellation_token, **kwargs)
+
+        self._future = loop.run_in_executor(get_async_executor() if executor is None else executor, value)
+        self._future.add_done_callback(lambda _: self._progress_updates.put_nowait(None))
+
+    @property
+    def cancellation_token(self) -> CancellationToken:
+        return self._cancellation_token
+
+    def cancel(self) -> None:
+        """Requests cancellation of the .NET calculation."""
+        self._cancellation_token.cancel()
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    async def progress(self) -> tp.AsyncIterator[float]:
+        """
+        Asynchronous generator of the progress updates of the valuation, which are between 0.0 and 1.0. Finishes when
+        the valuation finishes. Each update is only yielded once, so there should only be one consumer.
+        """
+        while True:
+            progress = await self._progress_updates.get()
+            if progress is None:
+                return
+            yield progress
+
+    def __await__(self):
+        return self._result().__await__()
+
+    async def _result(self):
+        try:
+            return await asyncio.shield(self._future)
+        except asyncio.CancelledError:
+            if not self._future.done():
+                self.cancel()
+                await asyncio.wait([self._future])
+            if not self._future.cancelled():
+                self._future.exception()  # Marks the cancellation exception as retrieved
+            raise
+        except Exception as e:
+            if self._cancellation_token.cancelled:
+                raise asyncio.CancelledError() from e
+            raise
+
+
+def multi_factor_value_async(*args, executor: tp.Optional[cf.Executor] = None, **kwargs) -> AsyncValuation:
+    """
+    Asyncio version of multi_factor_value, taking the same arguments, which must be called from a running event loop.
+    Returns an AsyncValuation, which is awaited for the MultiFactorValuationResults.
+
+    Args:
+        executor (concurrent.futures.Executor, optional): Executor to run the valuation on. Defaults to that set with
+            set_async_executor.
+    """
+    return AsyncValuation(multi_factor.multi_factor_value, args, kwargs, executor)
+
+
+def three_factor_seasonal_value_async(*args, executor: tp.Optional[cf.Executor] = None, **kwargs) -> AsyncValuation:
+    """
+    Asyncio version of three_factor_seasonal_value, taking the same arguments, which must be called from a running
+    event loop. Returns an AsyncValuation, which is awaited for the MultiFactorValuationResults.
+
+    Args:
+        executor (concurrent.futures.Executor, optional): Executor to run the valuation on. Defaults to that set with
+            set_async_executor.
+    """
+    return AsyncValuation(multi_factor.three_factor_seasonal_value, args, kwargs, executor)
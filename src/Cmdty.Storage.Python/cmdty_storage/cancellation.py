@@ -0,0 +1,72 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+from cmdty_storage import _runtime
+_runtime.load()
+import clr
+import System as dotnet
+import System.Threading as dotnet_threading
+import contextlib
+import typing as tp
+
+
+class ValuationCancelledError(Exception):
+    """Raised by a valuation which was stopped because cancellation was requested with its CancellationToken."""
+
+
+class CancellationToken:
+    """
+    Token used to cancel a running valuation from another thread. Wraps a .NET CancellationTokenSource, so
+    cancellation is observed by the .NET calculation itself, which stops at the next point it checks the token, and
+    the valuation raises ValuationCancelledError.
+    """
+
+    def __init__(self):
+        self._net_source = dotnet_threading.CancellationTokenSource()
+
+    def cancel(self) -> None:
+        """Requests cancellation of valuations using this token."""
+        self._net_source.Cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._net_source.IsCancellationRequested
+
+    @property
+    def net_token(self):
+        return self._net_source.Token
+
+
+def net_cancellation_token(cancellation_token: tp.Optional[CancellationToken]):
+    if cancellation_token is None:
+        return dotnet_threading.CancellationToken(False)
+    return cancellation_token.net_token
+
+
+@contextlib.contextmanager
+def raise_if_cancelled():
+    """Converts the .NET OperationCanceledException thrown when a calculation is cancelled to ValuationCancelledError."""
+    try:
+        yield
+    except dotnet.OperationCanceledException as e:
+        raise ValuationCancelledError("Valuation cancelled.") from e
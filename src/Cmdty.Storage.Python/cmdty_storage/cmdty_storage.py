@@ -21,6 +21,8 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 
+from cmdty_storage import _runtime
+_runtime.load()
 import clr
 import System as dotnet
 import System.Collections.Generic as dotnet_cols_gen
@@ -32,9 +34,11 @@
 from typing import Union, Callable, Iterable, Tuple, NamedTuple, Optional
 from datetime import datetime, date
 import pandas as pd
+import numpy as np
 from enum import Enum
 from cmdty_storage import utils
 import logging
+import hashlib
 
 logger: logging.Logger = logging.getLogger('cmdty.storage')
 
@@ -44,6 +48,25 @@ class InjectWithdrawRange(NamedTuple):
     max_inject_withdraw_rate: float
 
 
+class InventorySpace(NamedTuple):
+    periods: pd.PeriodIndex
+    min_inventory: np.ndarray
+    max_inventory: np.ndarray
+
+
+class InventoryValueLadder(NamedTuple):
+    """Storage value by starting inventory. npvs elements are NaN for inventories from which the storage constraints
+    cannot be fulfilled."""
+    inventories: np.ndarray
+    npvs: np.ndarray
+
+    def interpolate(self, inventory: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """Linearly interpolates the storage value between the ladder inventories."""
+        feasible = ~np.isnan(self.npvs)
+        result = np.interp(inventory, self.inventories[feasible], self.npvs[feasible], left=np.nan, right=np.nan)
+        return float(result) if np.ndim(result) == 0 else result
+
+
 class RatchetInterp(Enum):
     LINEAR = 1
     STEP = 2
@@ -54,6 +77,8 @@ class RatchetInterp(Enum):
                      Iterable[Tuple[datetime, Iterable[Tuple[float, float, float]]]],
                      Iterable[Tuple[pd.Period, Iterable[Tuple[float, float, float]]]]]]
 
+_INVENTORY_SPACE_CACHE_SIZE = 128
+
 
 class CmdtyStorage:
 
@@ -73,7 +98,8 @@ def __init__(self,
                  cmdty_consumed_withdraw: Union[None, float, int, pd.Series] = None,
                  terminal_storage_npv: Union[None, Callable[[float, float], float]] = None,
                  inventory_loss: Union[None, float, int, pd.Series] = None,
-                 inventory_cost: Union[None, float, int, pd.Series] = None):
+                 inventory_cost: Union[None, float, int, pd.Series] = None,
+                 terminal_storage_npv_key: Optional[str] = None):
 
         if freq not in utils.FREQ_TO_PERIOD_TYPE:
             raise ValueError("freq parameter value of '{}' not supported. The allowable values can be found in the keys of the dict curves.FREQ_TO_PERIOD_TYPE.".format(freq))
@@ -83,6 +109,7 @@ def __init__(self,
         builder = net_cs.IBuilder[time_period_type](net_cs.CmdtyStorage[time_period_type].Builder)
         builder = builder.WithActiveTimePeriod(start_period, end_period)
         net_constraints = dotnet_cols_gen.List[net_cs.InjectWithdrawRangeByInventoryAndPeriod[time_period_type]]()
+        ratchets_spec = []
 
         if ratchets is not None:
             utils.raise_if_not_none(min_inventory, "min_inventory parameter should not be provided if ratchets parameter is provided.")
@@ -93,6 +120,8 @@ def __init__(self,
             for period, rates_by_inventory in ratchets:
                 net_period = utils.from_datetime_like(period, time_period_type)
                 net_rates_by_inventory = dotnet_cols_gen.List[net_cs.InjectWithdrawRangeByInventory]()
+                rates_by_inventory = list(rates_by_inventory)
+                ratchets_spec.append((str(net_period), rates_by_inventory))
                 for inventory, min_rate, max_rate in rates_by_inventory:
                     net_rates_by_inventory.Add(net_cs.InjectWithdrawRangeByInventory(inventory, net_cs.InjectWithdrawRange(min_rate, max_rate)))
                 net_constraints.Add(net_cs.InjectWithdrawRangeByInventoryAndPeriod[time_period_type](net_period, net_rates_by_inventory))
@@ -200,6 +229,16 @@ def __init__(self,
 
         self._net_storage = net_cs.IBuildCmdtyStorage[time_period_type](builder).Build()
         self._freq = freq
+        self._has_python_callbacks = terminal_storage_npv is not None
+        self._inventory_space_cache = {}
+        # Digest is only created when first used, so arguments which can't be digested don't fail construction
+        self._missing_terminal_storage_npv_key = terminal_storage_npv is not None and terminal_storage_npv_key is None
+        self._spec = tuple(arg.copy() if isinstance(arg, pd.Series) else arg for arg in
+                           (freq, str(start_period), str(end_period), injection_cost, withdrawal_cost, ratchets_spec,
+                            ratchet_interp, min_inventory, max_inventory, max_injection_rate, max_withdrawal_rate,
+                            cmdty_consumed_inject, cmdty_consumed_withdraw, terminal_storage_npv_key, inventory_loss,
+                            inventory_cost))
+        self._spec_digest = None
 
     def _net_time_period(self, period):
         time_period_type = utils.FREQ_TO_PERIOD_TYPE[self._freq]
@@ -213,6 +252,25 @@ def net_storage(self) -> net_cs.CmdtyStorage:
     def freq(self) -> str:
         return self._freq
 
+    @property
+    def has_python_callbacks(self) -> bool:
+        """True if the .NET storage calls back into Python, in which case it cannot be used from multiple .NET threads."""
+        return self._has_python_callbacks
+
+    @property
+    def spec_digest(self) -> str:
+        """Hex digest of the arguments used to create this instance, which is the same for instances created with
+        equal arguments in any process, so can be used to key persisted results. The terminal_storage_npv function is
+        represented by the terminal_storage_npv_key argument, which must be specified if terminal_storage_npv is."""
+        if self._spec_digest is None:
+            if self._missing_terminal_storage_npv_key:
+                raise ValueError("terminal_storage_npv_key should be specified when the storage was created, to identify "
+                                 "the terminal_storage_npv function in spec_digest.")
+            spec_hasher = hashlib.sha256()
+            utils.update_digest(spec_hasher, self._spec)
+            self._spec_digest = spec_hasher.hexdigest()
+        return self._spec_digest
+
     @property
     def empty_at_end(self) -> bool:
         return self._net_storage.MustBeEmptyAtEnd
@@ -276,3 +334,45 @@ def inventory_cost(self, period, inventory) -> float:
             return net_inventory_cost[0].Amount
         return 0.0
 
+    def inventory_space(self, val_date: utils.TimePeriodSpecType, inventory: float) -> InventorySpace:
+        """
+        Calculates the range of feasible inventory for each period from the one after val_date until the storage end,
+        given inventory held at val_date. The results are cached on this instance, keyed on val_date and inventory,
+        with the arrays returned being read-only.
+        """
+        val_period = val_date.asfreq(self._freq, 's') if isinstance(val_date, pd.Period) \
+                                    else pd.Period(val_date, freq=self._freq)
+        cache_key = (val_period, float(inventory))
+        inventory_space = self._inventory_space_cache.get(cache_key)
+        if inventory_space is None:
+            inventory_space = self._calc_inventory_space(val_period, inventory)
+            if len(self._inventory_space_cache) >= _INVENTORY_SPACE_CACHE_SIZE:
+                del self._inventory_space_cache[next(iter(self._inventory_space_cache))]
+            self._inventory_space_cache[cache_key] = inventory_space
+        return inventory_space
+
+    def _calc_inventory_space(self, val_period: pd.Period, inventory: float) -> InventorySpace:
+        if val_period >= self.end:
+            empty = np.empty(0)
+            empty.flags.writeable = False
+            return InventorySpace(pd.PeriodIndex([], freq=self._freq), empty, empty)
+        time_period_type = utils.FREQ_TO_PERIOD_TYPE[self._freq]
+        net_inventory_space = net_cs.StorageHelper.CalculateInventorySpace[time_period_type](self._net_storage,
+                                                                    inventory, self._net_time_period(val_period))
+        inventory_space_array = utils.as_numpy_array(
+            net_cs.PythonHelpers.ArrayExport.InventorySpace[time_period_type](net_inventory_space))
+        inventory_space_array.flags.writeable = False
+        start_period = utils.net_time_period_to_pandas_period(net_inventory_space.Start, self._freq)
+        periods = pd.period_range(start=start_period, periods=net_inventory_space.Count, freq=self._freq)
+        return InventorySpace(periods, inventory_space_array[:, 0], inventory_space_array[:, 1])
+
+    def _ladder_inventories(self, val_date: utils.TimePeriodSpecType, inventories: Optional[Iterable[float]],
+                            num_points: int) -> np.ndarray:
+        """Sorted unique ladder inventories, defaulting to evenly spaced points from the minimum to maximum inventory
+        of the first active storage period."""
+        if inventories is not None:
+            return np.unique(np.asarray(inventories, dtype=np.float64))
+        val_period = val_date.asfreq(self._freq, 's') if isinstance(val_date, pd.Period) \
+                                    else pd.Period(val_date, freq=self._freq)
+        first_period = max(val_period, self.start)
+        return np.linspace(self.min_inventory(first_period), self.max_inventory(first_period), num_points)
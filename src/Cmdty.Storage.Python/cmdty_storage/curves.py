@@ -0,0 +1,224 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+from cmdty_storage import _runtime
+_runtime.load()
+import clr
+from cmdty_storage import utils
+from pathlib import Path
+import typing as tp
+import pandas as pd
+import numpy as np
+
+clr.AddReference(str(Path('cmdty_storage/lib/Cmdty.Storage')))
+import Cmdty.Storage as net_cs
+
+_DISCOUNT_FACTORS_CACHE_SIZE = 128
+
+
+class DiscountCurve:
+    """
+    Act/365 continuously compounded interest rate curve used to discount cash flows. Can be passed as the
+    interest_rates argument of any valuation function in place of a pandas Series, in which case the rates are
+    validated and converted to .NET once when the curve is created, rather than on every valuation.
+
+    Args:
+        interest_rates (pandas.Series): Interest rates indexed by cash flow date, with contiguous daily periods or dates.
+    """
+
+    def __init__(self, interest_rates: pd.Series):
+        index = interest_rates.index
+        if isinstance(index, pd.PeriodIndex):
+            if index.freqstr != 'D':
+                raise ValueError("interest_rates should have daily frequency, but has frequency '{}'."
+                                 .format(index.freqstr))
+        else:
+            index = pd.PeriodIndex(index, freq='D')
+        if len(index) == 0:
+            raise ValueError("interest_rates should not be empty.")
+        if not index.is_monotonic_increasing or index[-1].ordinal - index[0].ordinal != len(index) - 1:
+            raise ValueError("interest_rates should be indexed by contiguous days in ascending order.")
+        self._start = index[0]
+        self._rates = np.array(interest_rates.values, dtype=np.float64)
+        self._rates.flags.writeable = False
+        self._discount_factors = {}
+        self._net_interest_rates = utils.array_to_double_time_series(self._start, self._rates,
+                                                                     utils.FREQ_TO_PERIOD_TYPE['D'])
+        self._net_discounter = net_cs.StorageHelper.CreateAct65ContCompDiscounterFromSeries(
+            self._net_interest_rates)
+
+    @property
+    def start(self) -> pd.Period:
+        return self._start
+
+    @property
+    def end(self) -> pd.Period:
+        return self._start + (len(self._rates) - 1)
+
+    @property
+    def interest_rates(self) -> pd.Series:
+        return pd.Series(self._rates, index=pd.period_range(start=self._start, periods=len(self._rates), freq='D'))
+
+    @property
+    def net_interest_rates(self):
+        return self._net_interest_rates
+
+    @property
+    def net_discounter(self):
+        """Cached .NET discount factor function, taking the present and cash flow days as arguments."""
+        return self._net_discounter
+
+    def discount_factors(self, val_date: utils.TimePeriodSpecType) -> pd.Series:
+        """
+        Discount factors from val_date of cash flows on each date of the curve, with 1.0 for dates on or before
+        val_date. Calculated with NumPy and cached for up to 128 val_dates.
+        """
+        val_day = _to_day(val_date)
+        discount_factors = self._discount_factors.get(val_day)
+        if discount_factors is None:
+            days_from_val_date = np.maximum(np.arange(len(self._rates)) + (self._start.ordinal - val_day.ordinal), 0)
+            discount_factors = np.exp(-days_from_val_date / 365.0 * self._rates)
+            discount_factors.flags.writeable = False
+            if len(self._discount_factors) >= _DISCOUNT_FACTORS_CACHE_SIZE:
+                del self._discount_factors[next(iter(self._discount_factors))]
+            self._discount_factors[val_day] = discount_factors
+        return pd.Series(discount_factors, index=pd.period_range(start=self._start, periods=len(self._rates), freq='D'))
+
+    def discount_factor(self, val_date: utils.TimePeriodSpecType, cash_flow_date: utils.TimePeriodSpecType) -> float:
+        """Discount factor from val_date of a cash flow on cash_flow_date."""
+        val_day = _to_day(val_date)
+        cash_flow_day = _to_day(cash_flow_date)
+        if cash_flow_day <= val_day:
+            return 1.0
+        if cash_flow_day < self._start or cash_flow_day > self.end:
+            raise ValueError("No interest rate provided for {}.".format(cash_flow_day))
+        interest_rate = self._rates[cash_flow_day.ordinal - self._start.ordinal]
+        return float(np.exp(-(cash_flow_day.ordinal - val_day.ordinal) / 365.0 * interest_rate))
+
+
+class ForwardCurve:
+    """
+    Forward prices for contiguous periods. Can be passed as the forward curve argument of any valuation function in
+    place of a pandas Series, in which case the frequency and contiguity are checked and the prices converted to .NET
+    once when the curve is created, rather than on every valuation. Use shifted to create curves with bumped prices,
+    such as for delta calculations, without repeating the checks.
+
+    Args:
+        prices (pandas.Series): Forward prices indexed by pandas.PeriodIndex, with contiguous periods of a frequency
+            in the keys of utils.FREQ_TO_PERIOD_TYPE.
+    """
+
+    def __init__(self, prices: pd.Series):
+        index = prices.index
+        if not isinstance(index, pd.PeriodIndex):
+            raise ValueError("prices should be indexed by pandas.PeriodIndex.")
+        if index.freqstr not in utils.FREQ_TO_PERIOD_TYPE:
+            raise ValueError("prices frequency of '{}' not supported. The allowable values can be found in the "
+                             "keys of the dict utils.FREQ_TO_PERIOD_TYPE.".format(index.freqstr))
+        if len(index) == 0:
+            raise ValueError("prices should not be empty.")
+        if not index.equals(pd.period_range(start=index[0], periods=len(index), freq=index.freq)):
+            raise ValueError("prices should be indexed by contiguous periods in ascending order.")
+        self._init(index.freqstr, index[0], np.array(prices.values, dtype=np.float64))
+
+    def _init(self, freq: str, start: pd.Period, prices: np.ndarray):
+        self._freq = freq
+        self._start = start
+        self._prices = prices
+        self._prices.flags.writeable = False
+        self._net_forward_curve = utils.array_to_double_time_series(start, prices, utils.FREQ_TO_PERIOD_TYPE[freq])
+
+    @property
+    def freq(self) -> str:
+        return self._freq
+
+    @property
+    def start(self) -> pd.Period:
+        return self._start
+
+    @property
+    def end(self) -> pd.Period:
+        return self._start + (len(self._prices) - 1)
+
+    @property
+    def index(self) -> pd.PeriodIndex:
+        return pd.period_range(start=self._start, periods=len(self._prices), freq=self._freq)
+
+    @property
+    def values(self) -> np.ndarray:
+        """Read-only array of the forward prices."""
+        return self._prices
+
+    @property
+    def series(self) -> pd.Series:
+        return pd.Series(self._prices, index=self.index)
+
+    @property
+    def net_forward_curve(self):
+        return self._net_forward_curve
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    def shifted(self, shift: float, fwd_contract: tp.Optional[utils.FwdContractType] = None) -> 'ForwardCurve':
+        """
+        Creates a forward curve with the prices of all periods in the delivery period of fwd_contract increased by
+        shift, or all prices if fwd_contract is None. Prices are copied with NumPy and converted to .NET in bulk,
+        without repeating the checks made when the curve was created.
+        """
+        prices = self._prices.copy()
+        if fwd_contract is None:
+            prices += shift
+        else:
+            contract_start, contract_end = utils.to_period_range(self._freq, fwd_contract)
+            index = self.index
+            start_idx = index.searchsorted(contract_start, side='left')
+            end_idx = index.searchsorted(contract_end, side='right')
+            if start_idx >= end_idx:
+                raise ValueError("fwd_contract {} is not within the forward curve.".format(fwd_contract))
+            prices[start_idx:end_idx] += shift
+        shifted_curve = ForwardCurve.__new__(ForwardCurve)
+        shifted_curve._init(self._freq, self._start, prices)
+        return shifted_curve
+
+
+InterestRatesType = tp.Union[pd.Series, DiscountCurve]
+ForwardCurveType = tp.Union[pd.Series, ForwardCurve]
+
+
+def as_forward_curve(forward_curve: ForwardCurveType) -> ForwardCurve:
+    """Returns forward_curve if already a ForwardCurve, otherwise a ForwardCurve created from it."""
+    if isinstance(forward_curve, ForwardCurve):
+        return forward_curve
+    return ForwardCurve(forward_curve)
+
+
+def as_discount_curve(interest_rates: InterestRatesType) -> DiscountCurve:
+    """Returns interest_rates if already a DiscountCurve, otherwise a DiscountCurve created from it."""
+    if isinstance(interest_rates, DiscountCurve):
+        return interest_rates
+    return DiscountCurve(interest_rates)
+
+
+def _to_day(date_like: utils.TimePeriodSpecType) -> pd.Period:
+    return date_like.asfreq('D', 's') if isinstance(date_like, pd.Period) else pd.Period(date_like, freq='D')
@@ -0,0 +1,160 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Hooks for tracing the stages of valuations. Each stage of intrinsic_value, trinomial_value and the Monte Carlo
+valuations emits a start and end event to the Instrumentation set with set_instrumentation, which defaults to a no-op.
+Stages are nested, with the outermost stage of each valuation being one of 'intrinsic_valuation',
+'trinomial_valuation' or 'multi_factor_valuation'.
+
+Event attributes contain the sizes of the valuation, as far as known by the stage: 'freq', 'num_periods', the number of
+forward curve periods, 'num_inventory_grid_points' and 'num_sims'. End events also contain 'peak_rss_bytes', the
+process peak resident set size, which includes memory used by .NET, or None on Windows, and 'error', the exception type
+name if the stage raised.
+"""
+
+import contextlib
+import logging
+import sys
+import threading
+import time
+import typing as tp
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class Instrumentation:
+    """Base class of valuation instrumentation, which does nothing. Override on_start and on_end to receive events."""
+
+    def on_start(self, stage: str, attributes: tp.Dict[str, tp.Any]) -> None:
+        pass
+
+    def on_end(self, stage: str, duration: float, attributes: tp.Dict[str, tp.Any]) -> None:
+        """duration is in seconds."""
+        pass
+
+
+class LoggingInstrumentation(Instrumentation):
+    """Logs the end event of each stage, with its duration and attributes."""
+
+    def __init__(self, logger: tp.Optional[logging.Logger] = None, level: int = logging.INFO):
+        self._logger = logger if logger is not None else logging.getLogger('cmdty.storage.instrumentation')
+        self._level = level
+
+    def on_end(self, stage: str, duration: float, attributes: tp.Dict[str, tp.Any]) -> None:
+        self._logger.log(self._level, 'Stage %s completed in %.6f seconds. %s', stage, duration, attributes)
+
+
+class OpenTelemetryInstrumentation(Instrumentation):
+    """
+    Records each stage as an OpenTelemetry span, nested in the current span, with the event attributes as span
+    attributes. If meter is specified, stage durations are also recorded in a histogram named
+    'cmdty_storage.stage.duration', with the stage name as attribute. Requires the opentelemetry-api package.
+    """
+
+    def __init__(self, tracer=None, meter=None):
+        try:
+            from opentelemetry import trace, context
+        except ImportError as e:
+            raise ImportError('OpenTelemetryInstrumentation requires the opentelemetry-api package.') from e
+        self._trace = trace
+        self._context = context
+        self._tracer = tracer if tracer is not None else trace.get_tracer('cmdty_storage')
+        self._duration_histogram = None if meter is None else meter.create_histogram(
+            'cmdty_storage.stage.duration', unit='s', description='Duration of cmdty_storage valuation stages.')
+        self._local = threading.local()
+
+    def _span_stack(self) -> list:
+        if not hasattr(self._local, 'spans'):
+            self._local.spans = []
+        return self._local.spans
+
+    def on_start(self, stage: str, attributes: tp.Dict[str, tp.Any]) -> None:
+        span = self._tracer.start_span(stage, attributes=_span_attributes(attributes))
+        token = self._context.attach(self._trace.set_span_in_context(span))
+        self._span_stack().append((span, token))
+
+    def on_end(self, stage: str, duration: float, attributes: tp.Dict[str, tp.Any]) -> None:
+        span, token = self._span_stack().pop()
+        span.set_attributes(_span_attributes(attributes))
+        if 'error' in attributes:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, attributes['error']))
+        span.end()
+        self._context.detach(token)
+        if self._duration_histogram is not None:
+            self._duration_histogram.record(duration, {'stage': stage})
+
+
+def _span_attributes(attributes: tp.Dict[str, tp.Any]) -> tp.Dict[str, tp.Any]:
+    # OpenTelemetry attribute values cannot be None
+    return {key: value for key, value in attributes.items() if value is not None}
+
+
+_NO_OP = Instrumentation()
+_instrumentation: Instrumentation = _NO_OP
+
+
+def set_instrumentation(instrumentation: tp.Optional[Instrumentation]) -> None:
+    """Sets the Instrumentation which receives valuation stage events. None resets to the default, which does nothing."""
+    global _instrumentation
+    _instrumentation = _NO_OP if instrumentation is None else instrumentation
+
+
+def get_instrumentation() -> Instrumentation:
+    return _instrumentation
+
+
+def peak_rss_bytes() -> tp.Optional[int]:
+    """Peak resident set size of the process in bytes, or None if not available."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024  # Linux reports kilobytes, macOS bytes
+
+
+@contextlib.contextmanager
+def stage(name: str, durations: tp.Optional[tp.Dict[str, float]] = None, **attributes) -> tp.Iterator[dict]:
+    """
+    Context manager which emits the start and end events of a valuation stage. Yields the attributes dict, to which
+    attributes can be added before the end event. If durations is specified, the stage duration in seconds is stored
+    in it, keyed by name.
+    """
+    instrumentation = _instrumentation
+    if instrumentation is not _NO_OP:
+        instrumentation.on_start(name, attributes)
+    start_time = time.perf_counter()
+    try:
+        yield attributes
+    except BaseException as e:
+        attributes['error'] = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start_time
+        if durations is not None:
+            durations[name] = duration
+        if instrumentation is not _NO_OP:
+            attributes['peak_rss_bytes'] = peak_rss_bytes()
+            instrumentation.on_end(name, duration, attributes)
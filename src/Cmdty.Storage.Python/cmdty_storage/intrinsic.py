@@ -22,10 +22,17 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 
 import pandas as pd
+import numpy as np
+from cmdty_storage import _runtime
+_runtime.load()
 import clr
 import System as dotnet
 from cmdty_storage import utils, CmdtyStorage
-from typing import NamedTuple, Union, Callable
+from cmdty_storage.cmdty_storage import InventoryValueLadder
+from cmdty_storage import instrumentation as instr
+from cmdty_storage.curves import InterestRatesType, as_discount_curve, ForwardCurveType, as_forward_curve
+from cmdty_storage.cancellation import CancellationToken, net_cancellation_token, raise_if_cancelled
+from typing import NamedTuple, Union, Callable, Optional, Iterable
 from datetime import date
 from pathlib import Path
 clr.AddReference(str(Path('cmdty_storage/lib/Cmdty.Storage')))
@@ -39,73 +46,279 @@ class IntrinsicValuationResults(NamedTuple):
     profile: pd.DataFrame
 
 
+class IntrinsicScenarioResults(NamedTuple):
+    npvs: np.ndarray
+    profiles: Optional[pd.DataFrame]
+
+
+_PROFILE_COLUMNS = ['inventory', 'inject_withdraw_volume', 'cmdty_consumed', 'inventory_loss', 'net_volume', 'period_pv']
+
+
 def intrinsic_value(cmdty_storage: CmdtyStorage,
                     val_date: utils.TimePeriodSpecType,
                     inventory: Union[float, int],
-                    forward_curve: pd.Series,
-                    interest_rates: pd.Series, # TODO change this to function which returns discount factor, i.e. delegate DF calc to caller.
+                    forward_curve: ForwardCurveType,
+                    interest_rates: InterestRatesType,
                     settlement_rule: Callable[[pd.Period], date],
                     num_inventory_grid_points: int = 100,
-                    numerical_tolerance: float = 1E-12) -> IntrinsicValuationResults:
+                    numerical_tolerance: float = 1E-12,
+                    cancellation_token: Optional[CancellationToken] = None) -> IntrinsicValuationResults:
     """
     Calculates the intrinsic value of commodity storage.
 
     Args:
         settlement_rule (callable): Mapping function from pandas.Period type to the date on which the cmdty delivered in
             this period is settled. The pandas.Period parameter will have freq equal to the cmdty_storage parameter's freq property.
+        cancellation_token (CancellationToken, optional): Used to cancel the valuation from another thread, which
+            stops at the end of the current backward induction period and raises ValuationCancelledError.
+    """
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[cmdty_storage.freq]
+    with instr.stage('intrinsic_valuation', freq=cmdty_storage.freq, num_periods=len(forward_curve),
+                     num_inventory_grid_points=num_inventory_grid_points):
+        with instr.stage('input_conversion'):
+            forward_curve = as_forward_curve(forward_curve)
+            if cmdty_storage.freq != forward_curve.freq:
+                raise ValueError("cmdty_storage and forward_curve have different frequencies.")
+            current_period = utils.from_datetime_like(val_date, time_period_type)
+            net_forward_curve = forward_curve.net_forward_curve
+            net_settlement_rule = utils.wrap_settle_for_dotnet(settlement_rule, cmdty_storage.freq)
+            net_discounter = as_discount_curve(interest_rates).net_discounter
+        with instr.stage('calculation'), raise_if_cancelled():
+            net_val_results = _net_intrinsic_results(cmdty_storage, current_period, net_discounter,
+                                                     inventory, net_forward_curve, net_settlement_rule,
+                                                     num_inventory_grid_points, numerical_tolerance, time_period_type,
+                                                     cancellation_token)
+        with instr.stage('results_conversion'):
+            return IntrinsicValuationResults(net_val_results.Npv,
+                                             profile_to_data_frame(cmdty_storage.freq, net_val_results.StorageProfile))
+
+
+def intrinsic_value_scenarios(cmdty_storage: CmdtyStorage,
+                              val_date: utils.TimePeriodSpecType,
+                              inventory: Union[float, int],
+                              fwd_curves: np.ndarray,
+                              fwd_curve_start: utils.TimePeriodSpecType,
+                              interest_rates: InterestRatesType,
+                              settlement_rule: Callable[[pd.Period], date],
+                              num_inventory_grid_points: int = 100,
+                              numerical_tolerance: float = 1E-12,
+                              return_profiles: bool = False,
+                              max_workers: Optional[int] = None,
+                              cancellation_token: Optional[CancellationToken] = None) -> IntrinsicScenarioResults:
+    """
+    Calculates the intrinsic value of commodity storage for many forward curve scenarios, with inputs common to all
+    scenarios converted to .NET once, and scenarios valued on multiple .NET threads.
+
+    Args:
+        fwd_curves (numpy.ndarray): 2-dimensional array of forward prices, with one row per scenario and one column per
+            period, the first of which is fwd_curve_start.
+        fwd_curve_start: The period of the first column of fwd_curves.
+        settlement_rule (callable): Mapping function from pandas.Period type to the date on which the cmdty delivered in
+            this period is settled. The pandas.Period parameter will have freq equal to the cmdty_storage parameter's freq property.
+        return_profiles (bool): If True the storage profiles of all scenarios are returned stacked in one DataFrame, indexed
+            by scenario number and period.
+        max_workers (int, optional): Maximum number of threads used. Defaults to no limit, unless cmdty_storage calls back
+            into Python, in which case only one thread is used.
+        cancellation_token (CancellationToken, optional): Used to cancel the valuation from another thread, which
+            stops each running scenario at the end of its current backward induction period and raises
+            ValuationCancelledError.
+    """
+    if fwd_curves.ndim != 2:
+        raise ValueError("fwd_curves should be a 2-dimensional array with scenarios in rows and periods in columns.")
+    freq = cmdty_storage.freq
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[freq]
+    max_degree_of_parallelism = utils.max_degree_of_parallelism(max_workers, cmdty_storage.has_python_callbacks)
+    current_period = utils.from_datetime_like(val_date, time_period_type)
+    net_fwd_curve_start = utils.from_datetime_like(fwd_curve_start, time_period_type)
+    net_fwd_curves = utils.as_net_array(np.ascontiguousarray(fwd_curves, dtype=np.float64))
+    val_period = val_date.asfreq(freq, 's') if isinstance(val_date, pd.Period) else pd.Period(val_date, freq=freq)
+    net_settlement_dates = utils.settlement_rule_to_net_time_series(settlement_rule, freq,
+                                                                    max(val_period, cmdty_storage.start), cmdty_storage.end)
+    net_discounter = as_discount_curve(interest_rates).net_discounter
+
+    with raise_if_cancelled():
+        net_scenario_results = net_cs.PythonHelpers.ScenarioValuation.IntrinsicValuation[time_period_type](
+            cmdty_storage.net_storage, current_period, inventory, net_fwd_curve_start, net_fwd_curves,
+            net_settlement_dates, net_discounter, num_inventory_grid_points, numerical_tolerance, return_profiles,
+            max_degree_of_parallelism, net_cancellation_token(cancellation_token))
+
+    npvs = utils.as_numpy_array(net_scenario_results.Npvs)
+    profiles = None
+    if return_profiles:
+        num_scenarios = fwd_curves.shape[0]
+        if net_scenario_results.Profiles is None:
+            period_index = pd.PeriodIndex(data=[], freq=freq)
+            profiles_data = np.empty((0, len(_PROFILE_COLUMNS)))
+        else:
+            profile_start = utils.net_time_period_to_pandas_period(net_scenario_results.ProfileStart, freq)
+            period_index = pd.period_range(start=profile_start, freq=freq, periods=net_scenario_results.NumProfilePeriods)
+            profiles_data = utils.as_numpy_array(net_scenario_results.Profiles)
+        index = pd.MultiIndex.from_product([range(num_scenarios), period_index], names=['scenario', 'period'])
+        profiles = pd.DataFrame(data=profiles_data, index=index, columns=_PROFILE_COLUMNS)
+    return IntrinsicScenarioResults(npvs, profiles)
+
+
+def intrinsic_value_ladder(cmdty_storage: CmdtyStorage,
+                           val_date: utils.TimePeriodSpecType,
+                           forward_curve: ForwardCurveType,
+                           interest_rates: InterestRatesType,
+                           settlement_rule: Callable[[pd.Period], date],
+                           inventories: Optional[Iterable[float]] = None,
+                           num_inventory_grid_points: int = 100,
+                           numerical_tolerance: float = 1E-12,
+                           cancellation_token: Optional[CancellationToken] = None) -> InventoryValueLadder:
+    """
+    Calculates the intrinsic value of commodity storage for many starting inventories from a single backward
+    induction. The values are taken from the storage value function at val_date, so can differ slightly from the NPV
+    returned by intrinsic_value for the same inventory.
+
+    Args:
+        settlement_rule (callable): Mapping function from pandas.Period type to the date on which the cmdty delivered in
+            this period is settled. The pandas.Period parameter will have freq equal to the cmdty_storage parameter's freq property.
+        inventories (iterable of float, optional): Starting inventories to value, which are returned sorted without
+            duplicates. Defaults to num_inventory_grid_points evenly spaced from the minimum to maximum inventory of the
+            first active storage period.
+        cancellation_token (CancellationToken, optional): Used to cancel the valuation from another thread, which
+            stops at the end of the current backward induction period and raises ValuationCancelledError.
     """
-    if cmdty_storage.freq != forward_curve.index.freqstr:
+    forward_curve = as_forward_curve(forward_curve)
+    if cmdty_storage.freq != forward_curve.freq:
         raise ValueError("cmdty_storage and forward_curve have different frequencies.")
+    ladder_inventories = cmdty_storage._ladder_inventories(val_date, inventories, num_inventory_grid_points)
     time_period_type = utils.FREQ_TO_PERIOD_TYPE[cmdty_storage.freq]
     current_period = utils.from_datetime_like(val_date, time_period_type)
-    net_forward_curve = utils.series_to_double_time_series(forward_curve, time_period_type)
+    net_forward_curve = forward_curve.net_forward_curve
     net_settlement_rule = utils.wrap_settle_for_dotnet(settlement_rule, cmdty_storage.freq)
-    interest_rate_time_series = utils.series_to_double_time_series(interest_rates, utils.FREQ_TO_PERIOD_TYPE['D'])
-    return net_intrinsic_calc(cmdty_storage, current_period, interest_rate_time_series, inventory, net_forward_curve,
-                                 net_settlement_rule, num_inventory_grid_points, numerical_tolerance, time_period_type)
+    net_discounter = as_discount_curve(interest_rates).net_discounter
+    net_grid_calc_factory = net_cs.InventorySpaceGrid.FixedNumberOfPointsOnGlobalInventoryRangeFactory[time_period_type](
+        num_inventory_grid_points)
+    with raise_if_cancelled():
+        net_npvs = net_cs.IntrinsicStorageValuation[time_period_type].CalculateInventoryLadder(
+            cmdty_storage.net_storage, current_period, utils.as_net_array(ladder_inventories), net_forward_curve,
+            net_settlement_rule, net_discounter, net_grid_calc_factory, net_cs.LinearInterpolatorFactory(),
+            numerical_tolerance, net_cancellation_token(cancellation_token))
+    return InventoryValueLadder(ladder_inventories, utils.as_numpy_array(net_npvs))
 
 
-def net_intrinsic_calc(cmdty_storage, current_period, interest_rate_time_series, inventory, net_forward_curve,
-                       net_settlement_rule, num_inventory_grid_points, numerical_tolerance, time_period_type):
+class IntrinsicValuer:
+    """
+    Stateful intrinsic valuation which keeps the storage value functions from the backward induction between
+    revaluations. After a change to the forward curve only the backward induction stages on or before the last period
+    with a changed price are recalculated, with the stages after it reused. Changes near the front of the curve are
+    therefore much quicker than a full revaluation, whereas a change near the back recalculates almost every stage.
+
+    Args:
+        settlement_rule (callable): Mapping function from pandas.Period type to the date on which the cmdty delivered in
+            this period is settled. The pandas.Period parameter will have freq equal to the cmdty_storage parameter's freq property.
+        cancellation_token (CancellationToken, optional): Used to cancel the initial valuation from another thread,
+            which raises ValuationCancelledError.
+    """
+
+    def __init__(self,
+                 cmdty_storage: CmdtyStorage,
+                 val_date: utils.TimePeriodSpecType,
+                 inventory: Union[float, int],
+                 forward_curve: ForwardCurveType,
+                 interest_rates: InterestRatesType,
+                 settlement_rule: Callable[[pd.Period], date],
+                 num_inventory_grid_points: int = 100,
+                 numerical_tolerance: float = 1E-12,
+                 cancellation_token: Optional[CancellationToken] = None):
+        forward_curve = as_forward_curve(forward_curve)
+        if cmdty_storage.freq != forward_curve.freq:
+            raise ValueError("cmdty_storage and forward_curve have different frequencies.")
+        self._freq = cmdty_storage.freq
+        self._time_period_type = utils.FREQ_TO_PERIOD_TYPE[self._freq]
+        current_period = utils.from_datetime_like(val_date, self._time_period_type)
+        net_forward_curve = forward_curve.net_forward_curve
+        net_settlement_rule = utils.wrap_settle_for_dotnet(settlement_rule, self._freq)
+        net_discounter = as_discount_curve(interest_rates).net_discounter
+        with raise_if_cancelled():
+            self._net_valuation = net_cs.IncrementalIntrinsicStorageValuation[self._time_period_type](
+                cmdty_storage.net_storage, current_period, inventory, net_forward_curve, net_settlement_rule,
+                net_discounter, num_inventory_grid_points, numerical_tolerance,
+                net_cancellation_token(cancellation_token))
+        self._results = self._convert_results()
+
+    @property
+    def results(self) -> IntrinsicValuationResults:
+        """Results of the most recent valuation."""
+        return self._results
+
+    @property
+    def forward_curve(self) -> pd.Series:
+        """The forward curve used for the most recent valuation, including all updates."""
+        return utils.net_time_series_to_pandas_series(self._net_valuation.ForwardCurve, self._freq)
+
+    @property
+    def num_stages_recalculated(self) -> int:
+        """Number of backward induction stages recalculated by the most recent valuation."""
+        return self._net_valuation.NumStagesRecalculated
+
+    def update_curve(self, changes: pd.Series,
+                     cancellation_token: Optional[CancellationToken] = None) -> IntrinsicValuationResults:
+        """
+        Changes forward prices and revalues, reusing the backward induction stages after the last changed period.
+
+        Args:
+            changes (pandas.Series): New forward prices indexed by period, or anything else accepted as a val_date. All periods must be within the forward curve
+                the valuer was created with. The periods do not have to be contiguous.
+            cancellation_token (CancellationToken, optional): Used to cancel the revaluation from another thread, which
+                raises ValuationCancelledError. The changes are still applied to forward_curve, but results are left
+                unchanged, with the stages not recalculated being recalculated by the next call to update_curve.
+        """
+        num_changes = len(changes)
+        net_periods = dotnet.Array.CreateInstance(self._time_period_type, num_changes)
+        for i, period in enumerate(changes.index):
+            net_periods[i] = utils.from_datetime_like(period, self._time_period_type)
+        net_prices = utils.as_net_array(np.ascontiguousarray(changes.values, dtype=np.float64))
+        with raise_if_cancelled():
+            self._net_valuation.UpdateForwardCurve(net_periods, net_prices, net_cancellation_token(cancellation_token))
+        self._results = self._convert_results()
+        return self._results
+
+    def _convert_results(self) -> IntrinsicValuationResults:
+        net_val_results = self._net_valuation.Results
+        return IntrinsicValuationResults(net_val_results.Npv,
+                                         profile_to_data_frame(self._freq, net_val_results.StorageProfile))
+
+
+def net_intrinsic_calc(cmdty_storage, current_period, net_discounter, inventory, net_forward_curve,
+                       net_settlement_rule, num_inventory_grid_points, numerical_tolerance, time_period_type,
+                       cancellation_token=None):
+    net_val_results = _net_intrinsic_results(cmdty_storage, current_period, net_discounter, inventory,
+                                             net_forward_curve, net_settlement_rule, num_inventory_grid_points,
+                                             numerical_tolerance, time_period_type, cancellation_token)
+    data_frame = profile_to_data_frame(cmdty_storage.freq, net_val_results.StorageProfile)
+    results = IntrinsicValuationResults(net_val_results.Npv, data_frame)
+    return results
+
+
+def _net_intrinsic_results(cmdty_storage, current_period, net_discounter, inventory, net_forward_curve,
+                           net_settlement_rule, num_inventory_grid_points, numerical_tolerance, time_period_type,
+                           cancellation_token=None):
     intrinsic_calc = net_cs.IntrinsicStorageValuation[time_period_type].ForStorage(cmdty_storage.net_storage)
     net_cs.IIntrinsicAddStartingInventory[time_period_type](intrinsic_calc).WithStartingInventory(inventory)
     net_cs.IIntrinsicAddCurrentPeriod[time_period_type](intrinsic_calc).ForCurrentPeriod(current_period)
     net_cs.IIntrinsicAddForwardCurve[time_period_type](intrinsic_calc).WithForwardCurve(net_forward_curve)
     net_cs.IIntrinsicAddCmdtySettlementRule[time_period_type](intrinsic_calc).WithCmdtySettlementRule(
         net_settlement_rule)
-    net_cs.IntrinsicStorageValuationExtensions.WithAct365ContinuouslyCompoundedInterestRateCurve[time_period_type](
-        intrinsic_calc, interest_rate_time_series)
+    net_cs.IIntrinsicAddDiscountFactorFunc[time_period_type](intrinsic_calc).WithDiscountFactorFunc(net_discounter)
     net_cs.IntrinsicStorageValuationExtensions.WithFixedNumberOfPointsOnGlobalInventoryRange[time_period_type](
         intrinsic_calc, num_inventory_grid_points)
     net_cs.IntrinsicStorageValuationExtensions.WithLinearInventorySpaceInterpolation[time_period_type](intrinsic_calc)
     net_cs.IIntrinsicAddNumericalTolerance[time_period_type](intrinsic_calc).WithNumericalTolerance(numerical_tolerance)
-    net_val_results = net_cs.IIntrinsicCalculate[time_period_type](intrinsic_calc).Calculate()
-    data_frame = profile_to_data_frame(cmdty_storage.freq, net_val_results.StorageProfile)
-    results = IntrinsicValuationResults(net_val_results.Npv, data_frame)
-    return results
+    return net_cs.IIntrinsicCalculate[time_period_type](intrinsic_calc).Calculate(
+        net_cancellation_token(cancellation_token))
 
 
 def profile_to_data_frame(freq, net_profile):
     if net_profile.Count == 0:
         index = pd.PeriodIndex(data=[], freq=freq)
+        data = np.empty((0, len(_PROFILE_COLUMNS)))
     else:
-        profile_start = utils.net_datetime_to_py_datetime(net_profile.Indices[0].Start)
+        profile_start = utils.net_time_period_to_pandas_period(net_profile.Start, freq)
         index = pd.period_range(start=profile_start, freq=freq, periods=net_profile.Count)
-    inventories = [None] * net_profile.Count
-    inject_withdraw_volumes = [None] * net_profile.Count
-    cmdty_consumed = [None] * net_profile.Count
-    inventory_loss = [None] * net_profile.Count
-    net_volume = [None] * net_profile.Count
-    period_pv = [None] * net_profile.Count
-    for i, profile_data in enumerate(net_profile.Data):
-        inventories[i] = profile_data.Inventory
-        inject_withdraw_volumes[i] = profile_data.InjectWithdrawVolume
-        cmdty_consumed[i] = profile_data.CmdtyConsumed
-        inventory_loss[i] = profile_data.InventoryLoss
-        net_volume[i] = profile_data.NetVolume
-        period_pv[i] = profile_data.PeriodPv
-    data_frame_data = {'inventory': inventories, 'inject_withdraw_volume': inject_withdraw_volumes,
-                       'cmdty_consumed': cmdty_consumed, 'inventory_loss': inventory_loss, 'net_volume': net_volume,
-                       'period_pv': period_pv}
-    data_frame = pd.DataFrame(data=data_frame_data, index=index)
-    return data_frame
+        time_period_type = utils.FREQ_TO_PERIOD_TYPE[freq]
+        data = utils.as_numpy_array(net_cs.PythonHelpers.ArrayExport.StorageProfiles[time_period_type](net_profile))
+    return pd.DataFrame(data=data, index=index, columns=_PROFILE_COLUMNS)
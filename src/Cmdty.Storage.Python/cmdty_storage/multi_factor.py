@@ -21,6 +21,8 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 
+from cmdty_storage import _runtime
+_runtime.load()
 import clr
 import System as dotnet
 import System.Collections.Generic as dotnet_cols_gen
@@ -28,23 +30,35 @@
 clr.AddReference(str(pl.Path('cmdty_storage/lib/Cmdty.Storage')))
 import Cmdty.Storage as net_cs
 clr.AddReference(str(pl.Path('cmdty_storage/lib/Cmdty.Core.Simulation')))
+import Cmdty.Core.Simulation as net_sim
 import Cmdty.Core.Simulation.MultiFactor as net_mf
 clr.AddReference(str(pl.Path('cmdty_storage/lib/Cmdty.Core.Common')))
 import Cmdty.Core.Common as net_cc
 
 import pandas as pd
+import numpy as np
 from datetime import date
 import typing as tp
 from cmdty_storage import utils, CmdtyStorage
 import cmdty_storage.intrinsic as cs_intrinsic
 from cmdty_storage import _multi_factor_common as mfc
+from cmdty_storage import instrumentation as instr
+from cmdty_storage.curves import InterestRatesType, as_discount_curve, ForwardCurveType, as_forward_curve
+from cmdty_storage.cancellation import CancellationToken, raise_if_cancelled
 import logging
 from enum import Flag
 
+if tp.TYPE_CHECKING:
+    from cmdty_storage.policy_cache import PolicyCache
+
 logger: logging.Logger = logging.getLogger('cmdty.storage.multi-factor')
 
 
 class SimulationDataReturned(Flag):
+    """
+    Simulation data returned in MultiFactorValuationResults. Panels not specified are never allocated by the .NET
+    valuation, and are returned as empty DataFrames. Use NONE, or None, to minimise memory use of large valuations.
+    """
     NONE = 0
     SPOT_REGRESS = 1
     SPOT_VALUATION = 1 << 2
@@ -61,14 +75,40 @@ class SimulationDataReturned(Flag):
     ALL = SPOT_ALL | FACTORS_ALL | INVENTORY | INJECT_WITHDRAW_VOLUME | CMDTY_CONSUMED | INVENTORY_LOSS | NET_VOLUME | PV
 
 
-class TriggerPricePoint(tp.NamedTuple):
-    volume: float
-    price: float
-
-
-class TriggerPriceProfile(tp.NamedTuple):
-    inject_triggers: tp.List[TriggerPricePoint]
-    withdraw_triggers: tp.List[TriggerPricePoint]
+class LsmcPolicy(tp.NamedTuple):
+    """
+    Decision policy fitted by the backward induction of a Monte Carlo valuation, which can be passed to
+    value_with_policy to value storage on a new simulation without repeating the backward induction. All data is held
+    in NumPy arrays and pandas indices, so instances can be pickled.
+
+    The inventory grids are concatenated in grid_values, with grid_counts containing the number of points for each
+    period of grid_periods. The regression coefficients of all periods in regression_periods are concatenated in
+    the rows of regression_coeffs, with one row per inventory grid point of the following period and one column per
+    basis function.
+    """
+    freq: str
+    val_period: pd.Period
+    inventory: float
+    basis_funcs: str
+    grid_periods: pd.PeriodIndex
+    grid_counts: np.ndarray
+    grid_values: np.ndarray
+    regression_periods: pd.PeriodIndex
+    regression_coeffs: np.ndarray
+    current_period_continuation_values: np.ndarray
+
+    def inventory_grid(self, period: utils.TimePeriodSpecType) -> np.ndarray:
+        period_idx = self.grid_periods.get_loc(_to_period(period, self.freq))
+        grid_start = self.grid_counts[:period_idx].sum()
+        return self.grid_values[grid_start:grid_start + self.grid_counts[period_idx]]
+
+    def regression_coefficients(self, period: utils.TimePeriodSpecType) -> np.ndarray:
+        regression_idx = self.regression_periods.get_loc(_to_period(period, self.freq))
+        # Coefficients approximate continuation value for the inventory grid of the following period
+        grid_period_idxs = self.grid_periods.get_indexer(self.regression_periods[:regression_idx + 1]) + 1
+        row_counts = self.grid_counts[grid_period_idxs]
+        row_start = row_counts[:-1].sum()
+        return self.regression_coeffs[row_start:row_start + row_counts[-1]]
 
 
 class MultiFactorValuationResults(tp.NamedTuple):
@@ -90,7 +130,11 @@ class MultiFactorValuationResults(tp.NamedTuple):
     sim_net_volume: pd.DataFrame
     sim_pv: pd.DataFrame
     trigger_prices: pd.DataFrame
-    trigger_profiles: pd.Series
+    trigger_profiles: pd.DataFrame
+    policy: tp.Optional[LsmcPolicy] = None
+    sim_inventory_stats: tp.Optional[pd.DataFrame] = None
+    sim_pv_stats: tp.Optional[pd.DataFrame] = None
+    timings: tp.Optional[tp.Dict[str, float]] = None
 
     @property
     def extrinsic_npv(self):
@@ -100,8 +144,8 @@ def extrinsic_npv(self):
 def three_factor_seasonal_value(cmdty_storage: CmdtyStorage,
                                 val_date: utils.TimePeriodSpecType,
                                 inventory: float,
-                                fwd_curve: pd.Series,
-                                interest_rates: pd.Series, # TODO change this to function which returns discount factor, i.e. delegate DF calc to caller.
+                                fwd_curve: ForwardCurveType,
+                                interest_rates: InterestRatesType,
                                 settlement_rule: tp.Callable[[pd.Period], date],
                                 spot_mean_reversion: float,
                                 spot_vol: float,
@@ -116,31 +160,41 @@ def three_factor_seasonal_value(cmdty_storage: CmdtyStorage,
                                 num_inventory_grid_points: int = 100,
                                 numerical_tolerance: float = 1E-12,
                                 on_progress_update: tp.Optional[tp.Callable[[float], None]] = None,
-                                sim_data_returned: tp.Optional[SimulationDataReturned] = SimulationDataReturned.ALL # TODO on next major version increment change this to default to NONE
+                                sim_data_returned: tp.Optional[SimulationDataReturned] = SimulationDataReturned.ALL, # TODO on next major version increment change this to default to NONE
+                                policy_cache: tp.Optional['PolicyCache'] = None,
+                                sim_data_dtype: tp.Union[str, np.dtype] = np.float64,
+                                sim_statistics_quantiles: tp.Optional[tp.Iterable[float]] = None,
+                                cancellation_token: tp.Optional[CancellationToken] = None
                                 ) -> MultiFactorValuationResults:
     time_period_type = utils.FREQ_TO_PERIOD_TYPE[cmdty_storage.freq]
     net_current_period = utils.from_datetime_like(val_date, time_period_type)
     net_multi_factor_params = net_mf.MultiFactorParameters.For3FactorSeasonal[time_period_type](
         spot_mean_reversion, spot_vol, long_term_vol, seasonal_vol, net_current_period,
         cmdty_storage.net_storage.EndPeriod)
-    # Transform factors x_st -> x0, x_lt -> x1, x_sw -> x2
-    basis_func_transformed = basis_funcs.replace('x_st', 'x0').replace('x_lt', 'x1').replace('x_sw', 'x2')
+    basis_func_transformed = _transform_three_factor_basis_funcs(basis_funcs)
 
     def add_multi_factor_sim(net_lsmc_params_builder):
         net_lsmc_params_builder.SimulateWithMultiFactorModelAndMersenneTwister(net_multi_factor_params, num_sims, seed,
                                                                                fwd_sim_seed)
 
-    return _net_multi_factor_calc(cmdty_storage, fwd_curve, interest_rates, inventory, add_multi_factor_sim,
-                                  num_inventory_grid_points, numerical_tolerance, on_progress_update,
-                                  basis_func_transformed, settlement_rule, time_period_type,
-                                  val_date, discount_deltas, extra_decisions, sim_data_returned)
+    def calc(net_policy):
+        return _net_multi_factor_calc(cmdty_storage, fwd_curve, interest_rates, inventory, add_multi_factor_sim,
+                                      num_inventory_grid_points, numerical_tolerance, on_progress_update,
+                                      basis_func_transformed, settlement_rule, time_period_type,
+                                      val_date, discount_deltas, extra_decisions, sim_data_returned, net_policy,
+                                      sim_data_dtype, sim_statistics_quantiles, num_sims, cancellation_token)
+
+    model_params = ('three_factor_seasonal', spot_mean_reversion, spot_vol, long_term_vol, seasonal_vol)
+    return _read_through_policy_cache(policy_cache, calc, cmdty_storage, val_date, inventory, model_params,
+                                      basis_func_transformed, num_sims, seed, fwd_sim_seed, extra_decisions,
+                                      num_inventory_grid_points, numerical_tolerance)
 
 
 def multi_factor_value(cmdty_storage: CmdtyStorage,
                        val_date: utils.TimePeriodSpecType,
                        inventory: float,
-                       fwd_curve: pd.Series,
-                       interest_rates: pd.Series,  # TODO change this to function which returns discount factor, i.e. delegate DF calc to caller.
+                       fwd_curve: ForwardCurveType,
+                       interest_rates: InterestRatesType,
                        settlement_rule: tp.Callable[[pd.Period], date],
                        factors: tp.Collection[tp.Tuple[float, utils.CurveType]],
                        factor_corrs: mfc.FactorCorrsType,
@@ -153,8 +207,40 @@ def multi_factor_value(cmdty_storage: CmdtyStorage,
                        num_inventory_grid_points: int = 100,
                        numerical_tolerance: float = 1E-12,
                        on_progress_update: tp.Optional[tp.Callable[[float], None]] = None,
-                       sim_data_returned: tp.Optional[SimulationDataReturned] = SimulationDataReturned.ALL # TODO on next major version increment change this to default to NONE
+                       sim_data_returned: tp.Optional[SimulationDataReturned] = SimulationDataReturned.ALL, # TODO on next major version increment change this to default to NONE
+                       policy_cache: tp.Optional['PolicyCache'] = None,
+                       sim_data_dtype: tp.Union[str, np.dtype] = np.float64,
+                       sim_statistics_quantiles: tp.Optional[tp.Iterable[float]] = None,
+                       cancellation_token: tp.Optional[CancellationToken] = None
                        ) -> MultiFactorValuationResults:
+    """
+    Values storage using Least Squares Monte Carlo with simulations from the multi-factor model. If policy_cache is
+    specified and contains a policy fitted with the same storage, val_date, inventory, model parameters, basis
+    functions and simulation settings, this is used for valuation so only the forward simulation runs. Otherwise the
+    policy fitted by the valuation is saved in policy_cache. With fwd_sim_seed specified, valuation with a cached
+    policy gives the same results as the valuation which fitted it, as long as the market data is unchanged. If
+    fwd_sim_seed is None the valuation simulation continues the random number sequence of the regression simulation,
+    which a cached policy can't reproduce, so policy_cache is only written to and the full valuation always runs.
+
+    Simulation data DataFrames, as specified by sim_data_returned, have data type sim_data_dtype, which can be float32
+    to halve their memory use. The valuation itself always uses double precision.
+
+    If sim_statistics_quantiles is specified, the sim_inventory_stats and sim_pv_stats attributes of the results
+    contain the mean, standard deviation and these quantiles of simulated inventory and PV for each period, in columns
+    labelled 'mean', 'std' and percentages such as '5%'. These are calculated during the forward simulation without
+    holding per-simulation data, so can be used with sim_data_returned of NONE to keep memory use small.
+
+    The timings attribute of the results is a dict of the seconds taken by each phase of the valuation. The Python
+    phases are 'input_conversion' to .NET types, 'basis_function_compilation', 'intrinsic', 'lsmc', which is the .NET
+    LSMC calculation, and 'results_conversion' to pandas types, with 'total' the sum of these. The .NET breakdown of
+    'lsmc' is in 'lsmc_regression_sim', 'lsmc_backward_induction', of which 'lsmc_pseudo_inverse' is a part,
+    'lsmc_valuation_sim' and 'lsmc_forward_sim'. The .NET timings are zero if the storage has expired or val_date is
+    the storage end, as no simulation is required.
+
+    If cancellation_token is specified, calling its cancel method from another thread stops the intrinsic or LSMC
+    calculation at the end of the current backward induction or forward simulation period, or at the end of the
+    current spot price simulation, and ValuationCancelledError is raised.
+    """
     factor_corrs = mfc.validate_multi_factor_params(factors, factor_corrs)
     time_period_type = utils.FREQ_TO_PERIOD_TYPE[cmdty_storage.freq]
     net_multi_factor_params = mfc.create_net_multi_factor_params(factor_corrs, factors, time_period_type)
@@ -163,17 +249,23 @@ def add_multi_factor_sim(net_lsmc_params_builder):
         net_lsmc_params_builder.SimulateWithMultiFactorModelAndMersenneTwister(net_multi_factor_params, num_sims,
                                                                                seed, fwd_sim_seed)
 
-    return _net_multi_factor_calc(cmdty_storage, fwd_curve, interest_rates, inventory, add_multi_factor_sim,
-                                  num_inventory_grid_points, numerical_tolerance, on_progress_update,
-                                  basis_funcs, settlement_rule, time_period_type,
-                                  val_date, discount_deltas, extra_decisions, sim_data_returned)
+    def calc(net_policy):
+        return _net_multi_factor_calc(cmdty_storage, fwd_curve, interest_rates, inventory, add_multi_factor_sim,
+                                      num_inventory_grid_points, numerical_tolerance, on_progress_update,
+                                      basis_funcs, settlement_rule, time_period_type,
+                                      val_date, discount_deltas, extra_decisions, sim_data_returned, net_policy,
+                                      sim_data_dtype, sim_statistics_quantiles, num_sims, cancellation_token)
+
+    return _read_through_policy_cache(policy_cache, calc, cmdty_storage, val_date, inventory,
+                                      ('multi_factor', factors, factor_corrs), basis_funcs, num_sims, seed,
+                                      fwd_sim_seed, extra_decisions, num_inventory_grid_points, numerical_tolerance)
 
 
 def value_from_sims(cmdty_storage: CmdtyStorage,
                     val_date: utils.TimePeriodSpecType,
                     inventory: float,
-                    fwd_curve: pd.Series,
-                    interest_rates: pd.Series,  # TODO change this to function which returns discount factor, i.e. delegate DF calc to caller.
+                    fwd_curve: ForwardCurveType,
+                    interest_rates: InterestRatesType,
                     settlement_rule: tp.Callable[[pd.Period], date],
                     sim_spot_regress: pd.DataFrame,
                     sim_spot_valuation: pd.DataFrame,
@@ -186,7 +278,10 @@ def value_from_sims(cmdty_storage: CmdtyStorage,
                     numerical_tolerance: float = 1E-12,
                     on_progress_update: tp.Optional[tp.Callable[[float], None]] = None,
                     sim_data_returned: tp.Optional[SimulationDataReturned] = SimulationDataReturned.ALL, # TODO on next major version increment change this to default to NONE
-                    val_sim_antithetic: tp.Optional[bool] = False
+                    val_sim_antithetic: tp.Optional[bool] = False,
+                    sim_data_dtype: tp.Union[str, np.dtype] = np.float64,
+                    sim_statistics_quantiles: tp.Optional[tp.Iterable[float]] = None,
+                    cancellation_token: tp.Optional[CancellationToken] = None
                     ) -> MultiFactorValuationResults:
     time_period_type = utils.FREQ_TO_PERIOD_TYPE[cmdty_storage.freq]
     net_sim_results_regress = _create_net_spot_sim_results(sim_spot_regress, sim_factors_regress, time_period_type)
@@ -198,7 +293,218 @@ def add_sim_results(net_lsmc_params_builder):
     return _net_multi_factor_calc(cmdty_storage, fwd_curve, interest_rates, inventory, add_sim_results,
                                   num_inventory_grid_points, numerical_tolerance, on_progress_update,
                                   basis_funcs, settlement_rule, time_period_type,
-                                  val_date, discount_deltas, extra_decisions, sim_data_returned)
+                                  val_date, discount_deltas, extra_decisions, sim_data_returned,
+                                  sim_data_dtype=sim_data_dtype, sim_statistics_quantiles=sim_statistics_quantiles,
+                                  num_sims=len(sim_spot_valuation.columns), cancellation_token=cancellation_token)
+
+
+def value_with_policy(cmdty_storage: CmdtyStorage,
+                      val_date: utils.TimePeriodSpecType,
+                      inventory: float,
+                      fwd_curve: ForwardCurveType,
+                      interest_rates: InterestRatesType,
+                      settlement_rule: tp.Callable[[pd.Period], date],
+                      policy: LsmcPolicy,
+                      factors: tp.Collection[tp.Tuple[float, utils.CurveType]],
+                      factor_corrs: mfc.FactorCorrsType,
+                      num_sims: int,
+                      discount_deltas: bool,
+                      seed: tp.Optional[int] = None,
+                      extra_decisions: tp.Optional[int] = None,
+                      num_inventory_grid_points: int = 100,
+                      numerical_tolerance: float = 1E-12,
+                      on_progress_update: tp.Optional[tp.Callable[[float], None]] = None,
+                      sim_data_returned: tp.Optional[SimulationDataReturned] = SimulationDataReturned.NONE,
+                      sim_data_dtype: tp.Union[str, np.dtype] = np.float64,
+                      sim_statistics_quantiles: tp.Optional[tp.Iterable[float]] = None,
+                      cancellation_token: tp.Optional[CancellationToken] = None
+                      ) -> MultiFactorValuationResults:
+    """
+    Values storage by simulating with the multi-factor model and making decisions using policy, the policy attribute of
+    the results of an earlier Monte Carlo valuation, so only the forward simulation runs. The storage, val_date and
+    inventory must be the same as those used to fit the policy. Results are only as good as the policy is for the
+    current market data, so this is intended for revaluation after small changes, such as intraday remarks.
+    """
+    if policy.freq != cmdty_storage.freq:
+        raise ValueError("cmdty_storage and policy have different frequencies.")
+    factor_corrs = mfc.validate_multi_factor_params(factors, factor_corrs)
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[cmdty_storage.freq]
+    net_multi_factor_params = mfc.create_net_multi_factor_params(factor_corrs, factors, time_period_type)
+
+    def add_multi_factor_sim(net_lsmc_params_builder):
+        # Only valuation simulation is run with a policy, so use seed for it
+        net_lsmc_params_builder.SimulateWithMultiFactorModelAndMersenneTwister(net_multi_factor_params, num_sims,
+                                                                               seed, seed)
+
+    return _net_multi_factor_calc(cmdty_storage, fwd_curve, interest_rates, inventory, add_multi_factor_sim,
+                                  num_inventory_grid_points, numerical_tolerance, on_progress_update,
+                                  policy.basis_funcs, settlement_rule, time_period_type,
+                                  val_date, discount_deltas, extra_decisions, sim_data_returned,
+                                  net_policy=_lsmc_policy_to_net(policy, time_period_type), sim_data_dtype=sim_data_dtype,
+                                  sim_statistics_quantiles=sim_statistics_quantiles, num_sims=num_sims,
+                                  cancellation_token=cancellation_token)
+
+
+def _read_through_policy_cache(policy_cache, calc, cmdty_storage, val_date, inventory, model_params, basis_funcs,
+                               num_sims, seed, fwd_sim_seed, extra_decisions, num_inventory_grid_points,
+                               numerical_tolerance):
+    if policy_cache is None:
+        return calc(None)
+    cache_key = policy_cache.key(cmdty_storage, val_date, inventory, model_params, basis_funcs, num_sims, seed,
+                                 extra_decisions, num_inventory_grid_points, numerical_tolerance)
+    # Without fwd_sim_seed the valuation sim uses the regression generator, so with a cached policy it would start at
+    # the first draw of seed and value on the same paths the policy was regressed on, giving an in-sample NPV
+    policy = policy_cache.get(cache_key) if fwd_sim_seed is not None else None
+    if policy is not None:
+        logger.info('Valuing with policy %s from policy cache.', cache_key)
+        return calc(_lsmc_policy_to_net(policy, utils.FREQ_TO_PERIOD_TYPE[cmdty_storage.freq]))
+    results = calc(None)
+    if results.policy is not None:
+        policy_cache.put(cache_key, results.policy)
+    return results
+
+
+def _transform_three_factor_basis_funcs(basis_funcs: str) -> str:
+    # Transform factors x_st -> x0, x_lt -> x1, x_sw -> x2
+    return basis_funcs.replace('x_st', 'x0').replace('x_lt', 'x1').replace('x_sw', 'x2')
+
+
+_SCENARIO_OVERRIDE_KEYS = ('fwd_curve', 'spot_mean_reversion', 'spot_vol', 'long_term_vol', 'seasonal_vol')
+
+
+def scenario_grid(cmdty_storage: CmdtyStorage,
+                  val_date: utils.TimePeriodSpecType,
+                  inventory: float,
+                  fwd_curve: ForwardCurveType,
+                  interest_rates: InterestRatesType,
+                  settlement_rule: tp.Callable[[pd.Period], date],
+                  spot_mean_reversion: float,
+                  spot_vol: float,
+                  long_term_vol: float,
+                  seasonal_vol: float,
+                  num_sims: int,
+                  basis_funcs: str,
+                  discount_deltas: bool,
+                  scenarios: tp.Sequence[tp.Mapping[str, tp.Any]],
+                  seed: int,
+                  fwd_sim_seed: tp.Optional[int] = None,
+                  extra_decisions: tp.Optional[int] = None,
+                  num_inventory_grid_points: int = 100,
+                  numerical_tolerance: float = 1E-12,
+                  cancellation_token: tp.Optional[CancellationToken] = None) -> pd.DataFrame:
+    """
+    Values storage with the three-factor seasonal model for each of a list of scenarios, using common random numbers.
+
+    Each scenario is a mapping overriding any of the parameters fwd_curve, spot_mean_reversion, spot_vol,
+    long_term_vol and seasonal_vol, with an empty mapping giving the base valuation. The standard normals are generated
+    from seed and fwd_sim_seed once, by the first valuation, and replayed by the other scenarios, so all use common
+    random numbers and give the same results as three_factor_seasonal_value with these seeds. Scenarios which only
+    override fwd_curve also reuse the factor paths of a single base simulation, with simulated spot prices rescaled by
+    the ratio of scenario to base forward price, which for this model gives the same spot prices as simulating with the
+    scenario forward curve.
+
+    If cancellation_token is specified, calling its cancel method from another thread stops the valuation of the
+    current scenario, as for three_factor_seasonal_value, and ValuationCancelledError is raised.
+
+    Returns:
+        DataFrame in long format with one row per scenario and delta period, and columns scenario (the position in
+        scenarios), period, npv, npv_standard_error, delta and delta_standard_error.
+    """
+    if seed is None:
+        raise ValueError("seed must be specified so that scenarios use common random numbers.")
+    fwd_curve = as_forward_curve(fwd_curve)
+    scenarios = [dict(scenario) for scenario in scenarios]
+    for scenario in scenarios:
+        invalid_keys = set(scenario) - set(_SCENARIO_OVERRIDE_KEYS)
+        if invalid_keys:
+            raise ValueError("Scenario override keys {} not valid. Valid keys are {}.".format(
+                sorted(invalid_keys), list(_SCENARIO_OVERRIDE_KEYS)))
+        if 'fwd_curve' in scenario:
+            scenario['fwd_curve'] = as_forward_curve(scenario['fwd_curve'])
+            if scenario['fwd_curve'].freq != cmdty_storage.freq:
+                raise ValueError("cmdty_storage and scenario fwd_curve have different frequencies.")
+
+    base_params = dict(fwd_curve=fwd_curve, spot_mean_reversion=spot_mean_reversion, spot_vol=spot_vol,
+                       long_term_vol=long_term_vol, seasonal_vol=seasonal_vol)
+
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[cmdty_storage.freq]
+    net_current_period = utils.from_datetime_like(val_date, time_period_type)
+    # As for SimulateWithMultiFactorModelAndMersenneTwister, without fwd_sim_seed the valuation sim continues the
+    # regression sim normals
+    regress_normal_generator = net_cs.ReplayableStandardNormalGenerator(net_sim.MersenneTwisterGenerator(seed, True))
+    valuation_normal_generator = regress_normal_generator if fwd_sim_seed is None else \
+        net_cs.ReplayableStandardNormalGenerator(net_sim.MersenneTwisterGenerator(fwd_sim_seed, True))
+
+    def value_with_sims(scenario_params, sim_data_returned):
+        net_multi_factor_params = net_mf.MultiFactorParameters.For3FactorSeasonal[time_period_type](
+            scenario_params['spot_mean_reversion'], scenario_params['spot_vol'], scenario_params['long_term_vol'],
+            scenario_params['seasonal_vol'], net_current_period, cmdty_storage.net_storage.EndPeriod)
+
+        def add_multi_factor_sim(net_lsmc_params_builder):
+            net_lsmc_params_builder.SimulateWithMultiFactorModel(regress_normal_generator, valuation_normal_generator,
+                                                                 net_multi_factor_params, num_sims)
+
+        regress_normal_generator.Rewind()
+        valuation_normal_generator.Rewind()
+        return _net_multi_factor_calc(cmdty_storage, scenario_params['fwd_curve'], interest_rates, inventory,
+                                      add_multi_factor_sim, num_inventory_grid_points, numerical_tolerance, None,
+                                      _transform_three_factor_basis_funcs(basis_funcs), settlement_rule,
+                                      time_period_type, val_date, discount_deltas, extra_decisions, sim_data_returned,
+                                      num_sims=num_sims, cancellation_token=cancellation_token)
+
+    base_results = None
+    if any(set(scenario) <= {'fwd_curve'} for scenario in scenarios):
+        logger.info('Simulating base factor paths for curve only scenarios.')
+        base_results = value_with_sims(base_params, SimulationDataReturned.SPOT_ALL | SimulationDataReturned.FACTORS_ALL)
+
+    scenario_frames = []
+    for scenario_idx, scenario in enumerate(scenarios):
+        logger.info('Valuing scenario %d of %d.', scenario_idx + 1, len(scenarios))
+        if not scenario:
+            val_results = base_results
+        elif set(scenario) == {'fwd_curve'}:
+            val_results = _value_curve_scenario(cmdty_storage, val_date, inventory, fwd_curve, scenario['fwd_curve'],
+                                                interest_rates, settlement_rule, basis_funcs, discount_deltas,
+                                                base_results, extra_decisions, num_inventory_grid_points,
+                                                numerical_tolerance, cancellation_token)
+        else:
+            val_results = value_with_sims({**base_params, **scenario}, SimulationDataReturned.NONE)
+        scenario_frames.append(pd.DataFrame({
+            'scenario': scenario_idx,
+            'period': val_results.deltas.index,
+            'npv': val_results.npv,
+            'npv_standard_error': val_results.val_sim_standard_error,
+            'delta': val_results.deltas.values,
+            'delta_standard_error': val_results.deltas_standard_errors.values
+        }))
+    if len(scenario_frames) == 0:
+        return pd.DataFrame(columns=['scenario', 'period', 'npv', 'npv_standard_error', 'delta',
+                                     'delta_standard_error'])
+    return pd.concat(scenario_frames, ignore_index=True)
+
+
+def _value_curve_scenario(cmdty_storage, val_date, inventory, base_fwd_curve, scenario_fwd_curve, interest_rates,
+                          settlement_rule, basis_funcs, discount_deltas, base_results, extra_decisions,
+                          num_inventory_grid_points, numerical_tolerance, cancellation_token):
+    def rescale(sim_spot):
+        fwd_ratio = _fwd_prices(scenario_fwd_curve, sim_spot.index) / _fwd_prices(base_fwd_curve, sim_spot.index)
+        return sim_spot.mul(fwd_ratio, axis=0)
+
+    # MersenneTwister generators used by three_factor_seasonal_value are antithetic
+    return value_from_sims(cmdty_storage, val_date, inventory, scenario_fwd_curve, interest_rates, settlement_rule,
+                           rescale(base_results.sim_spot_regress), rescale(base_results.sim_spot_valuation),
+                           _transform_three_factor_basis_funcs(basis_funcs), discount_deltas,
+                           base_results.sim_factors_regress, base_results.sim_factors_valuation,
+                           extra_decisions=extra_decisions, num_inventory_grid_points=num_inventory_grid_points,
+                           numerical_tolerance=numerical_tolerance, sim_data_returned=SimulationDataReturned.NONE,
+                           val_sim_antithetic=True, cancellation_token=cancellation_token)
+
+
+def _fwd_prices(fwd_curve, periods):
+    positions = fwd_curve.index.get_indexer(periods)
+    if (positions < 0).any():
+        raise ValueError("Forward curve does not contain prices for all simulated periods.")
+    return fwd_curve.values[positions]
 
 
 def _create_net_spot_sim_results(sim_spot, sim_factors, time_period_type):
@@ -213,36 +519,115 @@ def _create_net_spot_sim_results(sim_spot, sim_factors, time_period_type):
 def _net_multi_factor_calc(cmdty_storage, fwd_curve, interest_rates, inventory, add_sim_to_val_params,
                            num_inventory_grid_points, numerical_tolerance, on_progress_update,
                            basis_funcs, settlement_rule, time_period_type,
-                           val_date, discount_deltas, extra_decisions, sim_data_returned):
-    if cmdty_storage.freq != fwd_curve.index.freqstr:
-        raise ValueError("cmdty_storage and forward_curve have different frequencies.")
-    # Convert inputs to .NET types
-    net_forward_curve = utils.series_to_double_time_series(fwd_curve, time_period_type)
-    net_current_period = utils.from_datetime_like(val_date, time_period_type)
-    net_grid_calc = net_cs.FixedSpacingStateSpaceGridCalc.CreateForFixedNumberOfPointsOnGlobalInventoryRange[
-        time_period_type](cmdty_storage.net_storage, num_inventory_grid_points)
-    net_settlement_rule = utils.wrap_settle_for_dotnet(settlement_rule, cmdty_storage.freq)
-    net_interest_rate_time_series = utils.series_to_double_time_series(interest_rates, utils.FREQ_TO_PERIOD_TYPE['D'])
-    net_discount_func = net_cs.StorageHelper.CreateAct65ContCompDiscounterFromSeries(net_interest_rate_time_series)
-    net_on_progress = utils.wrap_on_progress_for_dotnet(on_progress_update)
-
-    logger.info('Compiling basis functions. Takes a few seconds on the first run.')
-    net_basis_functions = net_cs.BasisFunctionsBuilder.Parse(basis_funcs)
-    logger.info('Compilation of basis functions complete.')
-
-    # Intrinsic calc
-    logger.info('Calculating intrinsic value.')
-    intrinsic_result = cs_intrinsic.net_intrinsic_calc(cmdty_storage, net_current_period, net_interest_rate_time_series,
-                                                       inventory, net_forward_curve, net_settlement_rule,
-                                                       num_inventory_grid_points,
-                                                       numerical_tolerance, time_period_type)
-    logger.info('Calculation of intrinsic value complete.')
-
-    # Multi-factor calc
-    # TODO: pass sim_data_returned through to .NET API do avoid this simulation data even getting allocated
-    logger.info('Calculating LSMC value.')
-    net_logger = utils.create_net_log_adapter(logger, net_cs.LsmcStorageValuation)
-    lsmc = net_cs.LsmcStorageValuation(net_logger)
+                           val_date, discount_deltas, extra_decisions, sim_data_returned, net_policy=None,
+                           sim_data_dtype=np.float64, sim_statistics_quantiles=None, num_sims=None,
+                           cancellation_token=None):
+    if np.dtype(sim_data_dtype) not in (np.float32, np.float64):
+        raise ValueError("sim_data_dtype should be float32 or float64.")
+    if sim_statistics_quantiles is not None:
+        sim_statistics_quantiles = np.asarray(list(sim_statistics_quantiles), dtype=np.float64)
+        if ((sim_statistics_quantiles < 0.0) | (sim_statistics_quantiles > 1.0)).any():
+            raise ValueError("sim_statistics_quantiles should be between 0 and 1.")
+    if sim_data_returned is None:
+        sim_data_returned = SimulationDataReturned.NONE
+    freq = cmdty_storage.freq
+    durations = {}
+    with instr.stage('multi_factor_valuation', durations, freq=freq, num_periods=len(fwd_curve),
+                     num_inventory_grid_points=num_inventory_grid_points, num_sims=num_sims):
+        with instr.stage('basis_function_compilation', durations):
+            logger.info('Compiling basis functions. Takes a few seconds on the first run.')
+            net_basis_functions = net_cs.BasisFunctionsBuilder.Parse(basis_funcs)
+            logger.info('Compilation of basis functions complete.')
+
+        with instr.stage('input_conversion', durations):
+            fwd_curve = as_forward_curve(fwd_curve)
+            if cmdty_storage.freq != fwd_curve.freq:
+                raise ValueError("cmdty_storage and forward_curve have different frequencies.")
+            net_forward_curve = fwd_curve.net_forward_curve
+            net_current_period = utils.from_datetime_like(val_date, time_period_type)
+            net_grid_calc = net_cs.FixedSpacingStateSpaceGridCalc.CreateForFixedNumberOfPointsOnGlobalInventoryRange[
+                time_period_type](cmdty_storage.net_storage, num_inventory_grid_points)
+            net_settlement_rule = utils.wrap_settle_for_dotnet(settlement_rule, freq)
+            net_discount_func = as_discount_curve(interest_rates).net_discounter
+            net_on_progress = utils.wrap_on_progress_for_dotnet(on_progress_update)
+            net_cancellation_token = None if cancellation_token is None else cancellation_token.net_token
+            net_lsmc_params = _create_net_lsmc_params(cmdty_storage, net_current_period, inventory, net_forward_curve,
+                                                      net_settlement_rule, net_discount_func, net_grid_calc,
+                                                      numerical_tolerance, net_basis_functions, sim_data_returned,
+                                                      sim_statistics_quantiles, net_on_progress, discount_deltas,
+                                                      extra_decisions, add_sim_to_val_params, time_period_type,
+                                                      net_cancellation_token)
+
+        with instr.stage('intrinsic', durations), raise_if_cancelled():
+            logger.info('Calculating intrinsic value.')
+            intrinsic_result = cs_intrinsic.net_intrinsic_calc(cmdty_storage, net_current_period,
+                                                               net_discount_func, inventory,
+                                                               net_forward_curve, net_settlement_rule,
+                                                               num_inventory_grid_points, numerical_tolerance,
+                                                               time_period_type, cancellation_token)
+            logger.info('Calculation of intrinsic value complete.')
+
+        with instr.stage('lsmc', durations), raise_if_cancelled():
+            logger.info('Calculating LSMC value.')
+            net_logger = utils.create_net_log_adapter(logger, net_cs.LsmcStorageValuation)
+            lsmc = net_cs.LsmcStorageValuation(net_logger)
+            if net_policy is None:
+                net_val_results = lsmc.Calculate[time_period_type](net_lsmc_params)
+            else:
+                net_val_results = lsmc.CalculateWithPolicy[time_period_type](net_lsmc_params, net_policy)
+            logger.info('Calculation of LSMC value complete.')
+
+        with instr.stage('results_conversion', durations):
+            deltas = utils.net_time_series_to_pandas_series(net_val_results.Deltas, freq)
+            deltas_standard_errors = utils.net_time_series_to_pandas_series(net_val_results.DeltasStandardErrors, freq)
+            expected_profile = cs_intrinsic.profile_to_data_frame(freq, net_val_results.ExpectedStorageProfile)
+            trigger_prices = _trigger_prices_to_data_frame(freq, net_val_results.TriggerPrices)
+            trigger_profiles = _trigger_profiles_to_data_frame(freq, net_val_results.TriggerPriceVolumeProfiles)
+            sim_spot_regress = utils.net_panel_to_data_frame(net_val_results.RegressionSpotPriceSim, freq, sim_data_dtype)
+            sim_spot_valuation = utils.net_panel_to_data_frame(net_val_results.ValuationSpotPriceSim, freq, sim_data_dtype)
+            sim_inventory = utils.net_panel_to_data_frame(net_val_results.InventoryBySim, freq, sim_data_dtype)
+            sim_inject_withdraw = utils.net_panel_to_data_frame(net_val_results.InjectWithdrawVolumeBySim, freq, sim_data_dtype)
+            sim_cmdty_consumed = utils.net_panel_to_data_frame(net_val_results.CmdtyConsumedBySim, freq, sim_data_dtype)
+            sim_inventory_loss = utils.net_panel_to_data_frame(net_val_results.InventoryLossBySim, freq, sim_data_dtype)
+            sim_net_volume = utils.net_panel_to_data_frame(net_val_results.NetVolumeBySim, freq, sim_data_dtype)
+            sim_pv = utils.net_panel_to_data_frame(net_val_results.PvByPeriodAndSim, freq, sim_data_dtype)
+            sim_factors_regress = _net_panel_enumerable_to_data_frame_tuple(net_val_results.RegressionMarkovFactors,
+                                                                            freq, sim_data_dtype)
+            sim_factors_valuation = _net_panel_enumerable_to_data_frame_tuple(net_val_results.ValuationMarkovFactors,
+                                                                              freq, sim_data_dtype)
+            policy = _net_policy_to_lsmc_policy(net_val_results.Policy, freq, basis_funcs)
+            sim_inventory_stats = _sim_statistics_to_data_frame(net_val_results.InventoryStatistics, freq,
+                                                                sim_statistics_quantiles)
+            sim_pv_stats = _sim_statistics_to_data_frame(net_val_results.PvStatistics, freq, sim_statistics_quantiles)
+
+    net_timings = net_val_results.Timings
+    timings = {
+        'input_conversion': durations['input_conversion'],
+        'basis_function_compilation': durations['basis_function_compilation'],
+        'intrinsic': durations['intrinsic'],
+        'lsmc': durations['lsmc'],
+        'lsmc_regression_sim': net_timings.RegressionPriceSimulation.TotalSeconds,
+        'lsmc_backward_induction': net_timings.BackwardInduction.TotalSeconds,
+        'lsmc_pseudo_inverse': net_timings.PseudoInverse.TotalSeconds,
+        'lsmc_valuation_sim': net_timings.ValuationPriceSimulation.TotalSeconds,
+        'lsmc_forward_sim': net_timings.ForwardSimulation.TotalSeconds,
+        'results_conversion': durations['results_conversion'],
+        'total': durations['multi_factor_valuation'],
+    }
+
+    return MultiFactorValuationResults(net_val_results.Npv, net_val_results.ValuationSimStandardError, deltas, deltas_standard_errors,
+                                       expected_profile, intrinsic_result.npv, intrinsic_result.profile, sim_spot_regress,
+                                       sim_spot_valuation, sim_factors_regress, sim_factors_valuation,
+                                       sim_inventory, sim_inject_withdraw,
+                                       sim_cmdty_consumed, sim_inventory_loss, sim_net_volume, sim_pv,
+                                       trigger_prices, trigger_profiles, policy, sim_inventory_stats, sim_pv_stats,
+                                       timings)
+
+
+def _create_net_lsmc_params(cmdty_storage, net_current_period, inventory, net_forward_curve, net_settlement_rule,
+                            net_discount_func, net_grid_calc, numerical_tolerance, net_basis_functions,
+                            sim_data_returned, sim_statistics_quantiles, net_on_progress, discount_deltas,
+                            extra_decisions, add_sim_to_val_params, time_period_type, net_cancellation_token=None):
     net_lsmc_params_builder = net_cs.PythonHelpers.ObjectFactory.CreateLsmcValuationParamsBuilder[time_period_type]()
     net_lsmc_params_builder.CurrentPeriod = net_current_period
     net_lsmc_params_builder.Inventory = inventory
@@ -254,81 +639,105 @@ def _net_multi_factor_calc(cmdty_storage, fwd_curve, interest_rates, inventory,
     net_lsmc_params_builder.NumericalTolerance = numerical_tolerance
     net_lsmc_params_builder.BasisFunctions = net_basis_functions
     net_lsmc_params_builder.SimulationDataReturned = net_cs.SimulationDataReturned(sim_data_returned.value)
+    if sim_statistics_quantiles is not None:
+        net_lsmc_params_builder.SimulationStatisticsQuantiles = utils.as_net_array(sim_statistics_quantiles)
     if net_on_progress is not None:
         net_lsmc_params_builder.OnProgressUpdate = net_on_progress
+    if net_cancellation_token is not None:
+        net_lsmc_params_builder.CancellationToken = net_cancellation_token
     net_lsmc_params_builder.DiscountDeltas = discount_deltas
     if extra_decisions is not None:
         net_lsmc_params_builder.ExtraDecisions = extra_decisions
     add_sim_to_val_params(net_lsmc_params_builder)
 
-    net_lsmc_params = net_lsmc_params_builder.Build()
-    net_val_results = lsmc.Calculate[time_period_type](net_lsmc_params)
-    logger.info('Calculation of LSMC value complete.')
-
-    deltas = utils.net_time_series_to_pandas_series(net_val_results.Deltas, cmdty_storage.freq)
-    deltas_standard_errors = utils.net_time_series_to_pandas_series(net_val_results.DeltasStandardErrors, cmdty_storage.freq)
-    expected_profile = cs_intrinsic.profile_to_data_frame(cmdty_storage.freq, net_val_results.ExpectedStorageProfile)
-    trigger_prices = _trigger_prices_to_data_frame(cmdty_storage.freq, net_val_results.TriggerPrices)
-    trigger_profiles = _trigger_profiles_to_data_frame(cmdty_storage.freq, net_val_results.TriggerPriceVolumeProfiles)
-    sim_spot_regress = utils.net_panel_to_data_frame(net_val_results.RegressionSpotPriceSim, cmdty_storage.freq)
-    sim_spot_valuation = utils.net_panel_to_data_frame(net_val_results.ValuationSpotPriceSim, cmdty_storage.freq)
-    sim_inventory = utils.net_panel_to_data_frame(net_val_results.InventoryBySim, cmdty_storage.freq)
-    sim_inject_withdraw = utils.net_panel_to_data_frame(net_val_results.InjectWithdrawVolumeBySim, cmdty_storage.freq)
-    sim_cmdty_consumed = utils.net_panel_to_data_frame(net_val_results.CmdtyConsumedBySim, cmdty_storage.freq)
-    sim_inventory_loss = utils.net_panel_to_data_frame(net_val_results.InventoryLossBySim, cmdty_storage.freq)
-    sim_net_volume = utils.net_panel_to_data_frame(net_val_results.NetVolumeBySim, cmdty_storage.freq)
-    sim_pv = utils.net_panel_to_data_frame(net_val_results.PvByPeriodAndSim, cmdty_storage.freq)
-    sim_factors_regress = _net_panel_enumerable_to_data_frame_tuple(net_val_results.RegressionMarkovFactors, cmdty_storage.freq)
-    sim_factors_valuation = _net_panel_enumerable_to_data_frame_tuple(net_val_results.ValuationMarkovFactors, cmdty_storage.freq)
+    return net_lsmc_params_builder.Build()
 
-    return MultiFactorValuationResults(net_val_results.Npv, net_val_results.ValuationSimStandardError, deltas, deltas_standard_errors,
-                                       expected_profile, intrinsic_result.npv, intrinsic_result.profile, sim_spot_regress,
-                                       sim_spot_valuation, sim_factors_regress, sim_factors_valuation,
-                                       sim_inventory, sim_inject_withdraw,
-                                       sim_cmdty_consumed, sim_inventory_loss, sim_net_volume, sim_pv,
-                                       trigger_prices, trigger_profiles)
+
+def _sim_statistics_to_data_frame(net_statistics, freq, quantiles) -> tp.Optional[pd.DataFrame]:
+    if quantiles is None:
+        return None
+    columns = ['mean', 'std'] + ['{:g}%'.format(quantile * 100.0) for quantile in quantiles]
+    if net_statistics.IsEmpty:
+        return pd.DataFrame(columns=columns, dtype=np.float64)
+    statistics = utils.net_panel_to_data_frame(net_statistics, freq)
+    statistics.columns = columns
+    return statistics
 
 
-def _net_panel_enumerable_to_data_frame_tuple(net_panel_enumerable, freq) -> tp.Tuple[pd.DataFrame, ...]:
-    return tuple(utils.net_panel_to_data_frame(net_panel, freq) for net_panel in net_panel_enumerable)
+def _net_policy_to_lsmc_policy(net_policy, freq, basis_funcs) -> tp.Optional[LsmcPolicy]:
+    if net_policy is None:
+        return None
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[freq]
+    net_policy_arrays = net_cs.PythonHelpers.ArrayExport.LsmcPolicy[time_period_type](net_policy)
+    grid_counts = utils.as_numpy_array(net_policy_arrays.GridCounts)
+    grids_start = utils.net_time_period_to_pandas_period(net_policy.InventorySpaceGrids.Start, freq)
+    grid_periods = pd.period_range(start=grids_start, periods=len(grid_counts), freq=freq)
+    regression_periods = grid_periods[utils.as_numpy_array(net_policy_arrays.RegressionPeriodOffsets)]
+    return LsmcPolicy(freq, utils.net_time_period_to_pandas_period(net_policy.CurrentPeriod, freq),
+                      net_policy.Inventory, basis_funcs, grid_periods, grid_counts,
+                      utils.as_numpy_array(net_policy_arrays.GridValues), regression_periods,
+                      utils.as_numpy_array(net_policy_arrays.RegressionCoefficients),
+                      utils.as_numpy_array(net_policy_arrays.CurrentPeriodContinuationValues))
+
+
+def _lsmc_policy_to_net(policy: LsmcPolicy, time_period_type):
+    regression_period_offsets = np.asarray(policy.grid_periods.get_indexer(policy.regression_periods), dtype=np.int32)
+    return net_cs.PythonHelpers.ObjectFactory.CreateLsmcValuationPolicy[time_period_type](
+        utils.from_datetime_like(policy.val_period, time_period_type), policy.inventory,
+        utils.from_datetime_like(policy.grid_periods[0], time_period_type),
+        utils.as_net_array(np.asarray(policy.grid_counts, dtype=np.int32)),
+        utils.as_net_array(np.asarray(policy.grid_values, dtype=np.float64)),
+        utils.as_net_array(regression_period_offsets),
+        utils.as_net_array(np.asarray(policy.regression_coeffs, dtype=np.float64)),
+        utils.as_net_array(np.asarray(policy.current_period_continuation_values, dtype=np.float64)))
+
+
+def _to_period(period: utils.TimePeriodSpecType, freq: str) -> pd.Period:
+    return period.asfreq(freq, 's') if isinstance(period, pd.Period) else pd.Period(period, freq=freq)
+
+
+def _net_panel_enumerable_to_data_frame_tuple(net_panel_enumerable, freq,
+                                               dtype=np.float64) -> tp.Tuple[pd.DataFrame, ...]:
+    return tuple(utils.net_panel_to_data_frame(net_panel, freq, dtype) for net_panel in net_panel_enumerable)
+
+
+_TRIGGER_PRICES_COLUMNS = ['inject_volume', 'inject_trigger_price', 'withdraw_volume', 'withdraw_trigger_price']
+_TRIGGER_PROFILE_SIDES = ['inject', 'withdraw']
 
 
 def _trigger_prices_to_data_frame(freq, net_trigger_prices) -> pd.DataFrame:
     index = _create_period_index(freq, net_trigger_prices)
-    inject_volume = _create_empty_list(net_trigger_prices.Count)
-    inject_trigger_price = _create_empty_list(net_trigger_prices.Count)
-    withdraw_volume = _create_empty_list(net_trigger_prices.Count)
-    withdraw_trigger_price = _create_empty_list(net_trigger_prices.Count)
-    for i, trig in enumerate(net_trigger_prices.Data):
-        if trig.HasInjectPrice:
-            inject_volume[i] = trig.MaxInjectVolume
-            inject_trigger_price[i] = trig.MaxInjectTriggerPrice
-        if trig.HasWithdrawPrice:
-            withdraw_volume[i] = trig.MaxWithdrawVolume
-            withdraw_trigger_price[i] = trig.MaxWithdrawTriggerPrice
-    data_frame_data = {'inject_volume': inject_volume, 'inject_trigger_price': inject_trigger_price,
-                       'withdraw_volume': withdraw_volume, 'withdraw_trigger_price': withdraw_trigger_price}
-    data_frame = pd.DataFrame(data=data_frame_data, index=index)
-    return data_frame
+    if net_trigger_prices.Count == 0:
+        data = np.empty((0, len(_TRIGGER_PRICES_COLUMNS)))
+    else:
+        time_period_type = utils.FREQ_TO_PERIOD_TYPE[freq]
+        data = utils.as_numpy_array(
+            net_cs.PythonHelpers.ArrayExport.TriggerPricesByPeriod[time_period_type](net_trigger_prices))
+    return pd.DataFrame(data=data, index=index, columns=_TRIGGER_PRICES_COLUMNS)
 
 
 def _create_period_index(freq, net_time_series):
     if net_time_series.Count == 0:
         return pd.PeriodIndex(data=[], freq=freq)
     else:
-        profile_start = utils.net_datetime_to_py_datetime(net_time_series.Indices[0].Start)
+        profile_start = utils.net_time_period_to_pandas_period(net_time_series.Start, freq)
         return pd.period_range(start=profile_start, freq=freq, periods=net_time_series.Count)
 
 
-def _create_empty_list(count: int) -> tp.List:
-    return [None] * count
-
-
-def _trigger_profiles_to_data_frame(freq, net_trigger_profiles) -> pd.Series:
-    index = _create_period_index(freq, net_trigger_profiles)
-    profiles_list = _create_empty_list(net_trigger_profiles.Count)
-    for i, prof in enumerate(net_trigger_profiles.Data):
-        inject_triggers = [TriggerPricePoint(x.Volume, x.Price) for x in prof.InjectTriggerPrices]
-        withdraw_triggers = [TriggerPricePoint(x.Volume, x.Price) for x in prof.WithdrawTriggerPrices]
-        profiles_list[i] = TriggerPriceProfile(inject_triggers, withdraw_triggers)
-    return pd.Series(data=profiles_list, index=index)
+def _trigger_profiles_to_data_frame(freq, net_trigger_profiles) -> pd.DataFrame:
+    """Returns trigger profiles in long format, with one row per trigger price point."""
+    period_index = _create_period_index(freq, net_trigger_profiles)
+    if net_trigger_profiles.Count == 0:
+        period_offsets = sides = np.empty(0, dtype=np.int32)
+        volumes = prices = np.empty(0)
+    else:
+        time_period_type = utils.FREQ_TO_PERIOD_TYPE[freq]
+        net_arrays = net_cs.PythonHelpers.ArrayExport.TriggerProfiles[time_period_type](net_trigger_profiles)
+        period_offsets = utils.as_numpy_array(net_arrays.PeriodOffsets)
+        sides = utils.as_numpy_array(net_arrays.Sides)
+        volumes = utils.as_numpy_array(net_arrays.Volumes)
+        prices = utils.as_numpy_array(net_arrays.Prices)
+    return pd.DataFrame({'period': period_index[period_offsets],
+                         'side': pd.Categorical.from_codes(sides, categories=_TRIGGER_PROFILE_SIDES),
+                         'volume': volumes,
+                         'price': prices})
@@ -26,31 +26,31 @@
 import pandas as pd
 from cmdty_storage import time_func as tf
 import math
-from cmdty_storage import utils
+from cmdty_storage import _typing as ctp
 from cmdty_storage import _multi_factor_common as mfc
 
 
 # TODO convert to common key types for vol curve and fwd contracts
 class MultiFactorModel:
     _corr_tolerance = 1E-10  # TODO more scientific way of finding this.
-    _factors: tp.List[tp.Tuple[float, utils.CurveType]]
+    _factors: tp.List[tp.Tuple[float, ctp.CurveType]]
     _factor_corrs: mfc.FactorCorrsType
-    _time_func: utils.TimeFunctionType
+    _time_func: ctp.TimeFunctionType
 
     def __init__(self,
                  freq: str,
-                 factors: tp.Collection[tp.Tuple[float, utils.CurveType]],
+                 factors: tp.Collection[tp.Tuple[float, ctp.CurveType]],
                  factor_corrs: mfc.FactorCorrsType = None,
-                 time_func: tp.Optional[utils.TimeFunctionType] = None):
+                 time_func: tp.Optional[ctp.TimeFunctionType] = None):
         self._factor_corrs = mfc.validate_multi_factor_params(factors, factor_corrs)
         self._factors = list(factors)
         self._time_func = tf.act_365 if time_func is None else time_func
 
     def integrated_covar(self,
-                         obs_start: utils.TimePeriodSpecType,
-                         obs_end: utils.TimePeriodSpecType,
-                         fwd_contract_1: utils.ForwardPointType,
-                         fwd_contract_2: utils.ForwardPointType) -> float:
+                         obs_start: ctp.TimePeriodSpecType,
+                         obs_end: ctp.TimePeriodSpecType,
+                         fwd_contract_1: ctp.ForwardPointType,
+                         fwd_contract_2: ctp.ForwardPointType) -> float:
         obs_start_t = 0.0
         obs_end_t = self._time_func(obs_start, obs_end)
         if obs_end_t < 0.0:
@@ -70,31 +70,31 @@ def integrated_covar(self,
         return cov
 
     def integrated_variance(self,
-                            obs_start: utils.TimePeriodSpecType,
-                            obs_end: utils.TimePeriodSpecType,
-                            fwd_contract: utils.ForwardPointType) -> float:
+                            obs_start: ctp.TimePeriodSpecType,
+                            obs_end: ctp.TimePeriodSpecType,
+                            fwd_contract: ctp.ForwardPointType) -> float:
         return self.integrated_covar(obs_start, obs_end, fwd_contract, fwd_contract)
 
     def integrated_stan_dev(self,
-                            obs_start: utils.TimePeriodSpecType,
-                            obs_end: utils.TimePeriodSpecType,
-                            fwd_contract: utils.ForwardPointType) -> float:
+                            obs_start: ctp.TimePeriodSpecType,
+                            obs_end: ctp.TimePeriodSpecType,
+                            fwd_contract: ctp.ForwardPointType) -> float:
         return math.sqrt(self.integrated_covar(obs_start, obs_end, fwd_contract, fwd_contract))
 
     def integrated_vol(self,
-                       val_date: utils.TimePeriodSpecType,
-                       expiry: utils.TimePeriodSpecType,
-                       fwd_contract: utils.ForwardPointType) -> float:
+                       val_date: ctp.TimePeriodSpecType,
+                       expiry: ctp.TimePeriodSpecType,
+                       fwd_contract: ctp.ForwardPointType) -> float:
         time_to_expiry = self._time_func(val_date, expiry)
         if time_to_expiry <= 0:
             raise ValueError("val_date must be before expiry.")
         return math.sqrt(self.integrated_covar(val_date, expiry, fwd_contract, fwd_contract) / time_to_expiry)
 
     def integrated_corr(self,
-                        obs_start: utils.TimePeriodSpecType,
-                        obs_end: utils.TimePeriodSpecType,
-                        fwd_contract_1: utils.ForwardPointType,
-                        fwd_contract_2: utils.ForwardPointType) -> float:
+                        obs_start: ctp.TimePeriodSpecType,
+                        obs_end: ctp.TimePeriodSpecType,
+                        fwd_contract_1: ctp.ForwardPointType,
+                        fwd_contract_2: ctp.ForwardPointType) -> float:
         covariance = self.integrated_covar(obs_start, obs_end, fwd_contract_1, fwd_contract_2)
         variance_1 = self.integrated_variance(obs_start, obs_end, fwd_contract_1)
         variance_2 = self.integrated_variance(obs_start, obs_end, fwd_contract_2)
@@ -126,9 +126,9 @@ def for_3_factor_seasonal(freq: str,
                               spot_vol: float,
                               long_term_vol: float,
                               seasonal_vol: float,
-                              start: utils.ForwardPointType,
-                              end: utils.ForwardPointType,
-                              time_func: tp.Optional[utils.TimeFunctionType] = None) -> 'MultiFactorModel':
+                              start: ctp.ForwardPointType,
+                              end: ctp.ForwardPointType,
+                              time_func: tp.Optional[ctp.TimeFunctionType] = None) -> 'MultiFactorModel':
         factors, factor_corrs = _create_3_factor_season_params(freq, spot_mean_reversion, spot_vol, long_term_vol,
                                                               seasonal_vol, start, end)
         return MultiFactorModel(freq, factors, factor_corrs, time_func)
@@ -144,8 +144,8 @@ def _create_3_factor_season_params(
         spot_vol: float,
         long_term_vol: float,
         seasonal_vol: float,
-        start: utils.ForwardPointType,
-        end: utils.ForwardPointType) -> tp.Tuple[tp.Collection[tp.Tuple[float, utils.CurveType]], np.ndarray]:
+        start: ctp.ForwardPointType,
+        end: ctp.ForwardPointType) -> tp.Tuple[tp.Collection[tp.Tuple[float, ctp.CurveType]], np.ndarray]:
     factor_corrs = np.array([
         [1.0, 0.0, 0.0],
         [0.0, 1.0, 0.0],
@@ -0,0 +1,189 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import pathlib as pl
+import hashlib
+import tempfile
+import zipfile
+import logging
+import typing as tp
+import numpy as np
+import pandas as pd
+from cmdty_storage import utils, CmdtyStorage
+from cmdty_storage.multi_factor import LsmcPolicy, _to_period
+
+logger: logging.Logger = logging.getLogger('cmdty.storage.policy-cache')
+
+# Increment when the saved arrays change, so that files written by other versions are treated as cache misses
+_FORMAT_VERSION = 1
+_FILE_SUFFIX = '.npz'
+
+
+class PolicyCache:
+    """
+    Disk cache of LSMC policies, so that a restarted process can value storage without repeating the backward
+    induction of the Monte Carlo valuation. Pass an instance as the policy_cache argument of multi_factor_value or
+    three_factor_seasonal_value to read through the cache, or use key, get and put directly with value_with_policy.
+
+    Each policy is saved as a compressed NumPy .npz file in directory. When the total size of the files exceeds
+    max_bytes the least recently used are deleted. Files are written atomically, so a directory can be shared by
+    multiple processes.
+    """
+
+    def __init__(self, directory: tp.Union[str, os.PathLike], max_bytes: int = 1 << 30):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes should be positive.")
+        self._directory = pl.Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+
+    @property
+    def directory(self) -> pl.Path:
+        return self._directory
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def key(self,
+            cmdty_storage: CmdtyStorage,
+            val_date: utils.TimePeriodSpecType,
+            inventory: float,
+            model_params: tp.Any,
+            basis_funcs: str,
+            num_sims: int,
+            seed: tp.Optional[int],
+            extra_decisions: tp.Optional[int] = None,
+            num_inventory_grid_points: int = 100,
+            numerical_tolerance: float = 1E-12) -> str:
+        """
+        Creates the cache key for the policy fitted with the arguments, which must be values such as numbers, strings,
+        pandas Series and NumPy arrays, or tuples, lists and dicts of these. The forward curve, interest rates and
+        settlement rule are deliberately not part of the key, so a policy cached earlier on val_date is reused after
+        remarks of market data, with the same trade-off as value_with_policy.
+
+        Raises ValueError if cmdty_storage was created with a terminal_storage_npv function but no
+        terminal_storage_npv_key, as the function can't otherwise be identified in the key.
+        """
+        hasher = hashlib.sha256()
+        utils.update_digest(hasher, (_FORMAT_VERSION, cmdty_storage.spec_digest,
+                                     str(_to_period(val_date, cmdty_storage.freq)), float(inventory), model_params,
+                                     basis_funcs, num_sims, seed, extra_decisions, num_inventory_grid_points,
+                                     float(numerical_tolerance)))
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> tp.Optional[LsmcPolicy]:
+        """Returns the policy saved with key, or None if there is none."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                if int(npz['format_version']) != _FORMAT_VERSION:
+                    return None
+                policy = _npz_to_policy(npz)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            logger.warning('Deleting unreadable policy cache file %s.', path)
+            _remove(path)
+            return None
+        try:
+            os.utime(path)  # Marks file as recently used for eviction
+        except OSError:
+            pass
+        return policy
+
+    def put(self, key: str, policy: LsmcPolicy) -> None:
+        """Saves policy with key, replacing any policy already saved with the same key, then evicts the least
+        recently used files over max_bytes."""
+        arrays = _policy_to_arrays(policy)
+        file_descriptor, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self._directory)
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                np.savez_compressed(file, **arrays)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            _remove(temp_path)
+            raise
+        self._evict()
+
+    def clear(self) -> None:
+        """Deletes all saved policies."""
+        for path in self._directory.glob('*' + _FILE_SUFFIX):
+            _remove(path)
+
+    def _path(self, key: str) -> pl.Path:
+        return self._directory / (key + _FILE_SUFFIX)
+
+    def _evict(self) -> None:
+        files = []
+        for path in self._directory.glob('*' + _FILE_SUFFIX):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # Deleted by another process
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total_bytes = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files, key=lambda file: file[0]):
+            if total_bytes <= self._max_bytes:
+                break
+            logger.debug('Evicting policy cache file %s.', path)
+            _remove(path)
+            total_bytes -= size
+
+
+def _remove(path) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _policy_to_arrays(policy: LsmcPolicy) -> tp.Dict[str, np.ndarray]:
+    grids_start = policy.grid_periods[0] if len(policy.grid_periods) > 0 else policy.val_period
+    return {
+        'format_version': np.array(_FORMAT_VERSION),
+        'freq': np.array(policy.freq),
+        'val_period': np.array(str(policy.val_period)),
+        'inventory': np.array(policy.inventory, dtype=np.float64),
+        'basis_funcs': np.array(policy.basis_funcs),
+        'grids_start': np.array(str(grids_start)),
+        'grid_counts': np.asarray(policy.grid_counts, dtype=np.int32),
+        'grid_values': np.asarray(policy.grid_values, dtype=np.float64),
+        'regression_period_offsets': np.asarray(policy.grid_periods.get_indexer(policy.regression_periods),
+                                                dtype=np.int32),
+        'regression_coeffs': np.asarray(policy.regression_coeffs, dtype=np.float64),
+        'current_period_continuation_values': np.asarray(policy.current_period_continuation_values,
+                                                         dtype=np.float64),
+    }
+
+
+def _npz_to_policy(npz) -> LsmcPolicy:
+    freq = str(npz['freq'])
+    grid_counts = npz['grid_counts']
+    grid_periods = pd.period_range(start=pd.Period(str(npz['grids_start']), freq=freq), periods=len(grid_counts),
+                                   freq=freq)
+    return LsmcPolicy(freq, pd.Period(str(npz['val_period']), freq=freq), float(npz['inventory']),
+                      str(npz['basis_funcs']), grid_periods, grid_counts, npz['grid_values'],
+                      grid_periods[npz['regression_period_offsets']], npz['regression_coeffs'],
+                      npz['current_period_continuation_values'])
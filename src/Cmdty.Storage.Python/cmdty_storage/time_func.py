@@ -21,19 +21,19 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 
-from cmdty_storage import utils
+from cmdty_storage import _typing as ctp
 import dateutil.parser as dt_parser
 from datetime import date
 import pandas as pd
 
 
-def act_365(start: utils.ForwardPointType, end: utils.ForwardPointType) -> float:
+def act_365(start: ctp.ForwardPointType, end: ctp.ForwardPointType) -> float:
     start = _to_date(start)
     end = _to_date(end)
     return (end - start).days / 365
 
 
-def _to_date(date_like: utils.ForwardPointType) -> date:
+def _to_date(date_like: ctp.ForwardPointType) -> date:
     if isinstance(date_like, str):
         date_like = dt_parser.parse(date_like)
     else:
@@ -21,40 +21,249 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 
+from cmdty_storage import _runtime
+_runtime.load()
 import clr
 import System as dotnet
 from cmdty_storage import utils, CmdtyStorage
+from cmdty_storage.cmdty_storage import InventoryValueLadder
+from cmdty_storage import instrumentation as instr
+from cmdty_storage.curves import InterestRatesType, as_discount_curve, ForwardCurveType, as_forward_curve
+from cmdty_storage.cancellation import CancellationToken, net_cancellation_token, raise_if_cancelled
 from pathlib import Path
 import typing as tp
 from datetime import date
 import pandas as pd
+import numpy as np
 
 clr.AddReference(str(Path('cmdty_storage/lib/Cmdty.Storage')))
 import Cmdty.Storage as net_cs
 
 
+class TrinomialDeltaResults(tp.NamedTuple):
+    npv: float
+    deltas: pd.Series
+
+
+class TrinomialTree:
+    """
+    One-factor trinomial tree of spot prices which can be reused for valuations with different forward curves,
+    inventories or storage. The tree is built for a forward curve of ones, and the node prices are multiplied by the
+    forward price of their period at valuation, which is much quicker than building the tree.
+
+    Args:
+        freq (str): Frequency of the tree periods, which must equal the freq property of the storage valued.
+        start: First period of the tree, which must equal the valuation date used with the tree.
+        end: Last period of the tree, which must be on or after the end of the storage valued. Forward curves used
+            with the tree must include all periods from start to end.
+    """
+
+    def __init__(self,
+                 freq: str,
+                 start: utils.TimePeriodSpecType,
+                 end: utils.TimePeriodSpecType,
+                 spot_volatility: pd.Series,
+                 mean_reversion: float,
+                 time_step: float):
+        if freq not in utils.FREQ_TO_PERIOD_TYPE:
+            raise ValueError("freq parameter value of '{}' not supported. The allowable values can be found in the "
+                             "keys of the dict curves.FREQ_TO_PERIOD_TYPE.".format(freq))
+        if freq != spot_volatility.index.freqstr:
+            raise ValueError("freq and spot_volatility have different frequencies.")
+        self._freq = freq
+        self._start = start.asfreq(freq, 's') if isinstance(start, pd.Period) else pd.Period(start, freq=freq)
+        self._end = end.asfreq(freq, 'e') if isinstance(end, pd.Period) else pd.Period(end, freq=freq)
+        time_period_type = utils.FREQ_TO_PERIOD_TYPE[freq]
+        net_spot_volatility = utils.series_to_double_time_series(spot_volatility, time_period_type)
+        self._net_tree = net_cs.ScaledTree.CreateUnitForwardOneFactorTrinomialTree[time_period_type](
+            utils.from_datetime_like(self._start, time_period_type), utils.from_datetime_like(self._end, time_period_type),
+            net_spot_volatility, mean_reversion, time_step)
+
+    @property
+    def freq(self) -> str:
+        return self._freq
+
+    @property
+    def start(self) -> pd.Period:
+        return self._start
+
+    @property
+    def end(self) -> pd.Period:
+        return self._end
+
+    @property
+    def net_tree(self):
+        return self._net_tree
+
+    def _validate_for_valuation(self, cmdty_storage: CmdtyStorage, val_date: utils.TimePeriodSpecType):
+        if self._freq != cmdty_storage.freq:
+            raise ValueError("tree and cmdty_storage have different frequencies.")
+        val_period = val_date.asfreq(self._freq, 's') if isinstance(val_date, pd.Period) \
+            else pd.Period(val_date, freq=self._freq)
+        if val_period != self._start:
+            raise ValueError("tree start {} does not equal the valuation period {}.".format(self._start, val_period))
+        if self._end < cmdty_storage.end:
+            raise ValueError("tree end {} is before the storage end {}.".format(self._end, cmdty_storage.end))
+
+
 def trinomial_value(cmdty_storage: CmdtyStorage,
                     val_date: utils.TimePeriodSpecType,
                     inventory: float,
-                    forward_curve: pd.Series,
-                    spot_volatility: pd.Series,
-                    mean_reversion: float,
-                    time_step: float,
-                    interest_rates: pd.Series,  # TODO change this to function which returns discount factor, i.e. delegate DF calc to caller.
+                    forward_curve: ForwardCurveType,
+                    spot_volatility: tp.Optional[pd.Series],
+                    mean_reversion: tp.Optional[float],
+                    time_step: tp.Optional[float],
+                    interest_rates: InterestRatesType,
                     settlement_rule: tp.Callable[[pd.Period], date],
                     num_inventory_grid_points: int = 100,
-                    numerical_tolerance: float = 1E-12) -> float:
+                    numerical_tolerance: float = 1E-12,
+                    tree: tp.Optional[TrinomialTree] = None,
+                    cancellation_token: tp.Optional[CancellationToken] = None) -> float:
     """
     Calculates the value of commodity storage using a one-factor trinomial tree.
 
     Args:
         settlement_rule (callable): Mapping function from pandas.Period type to the date on which the cmdty delivered in
             this period is settled. The pandas.Period parameter will have freq equal to the cmdty_storage parameter's freq property.
+        tree (TrinomialTree, optional): Prebuilt tree, which must start on val_date. If specified, spot_volatility,
+            mean_reversion and time_step are not used and can be None.
+        cancellation_token (CancellationToken, optional): Used to cancel the valuation from another thread, which
+            stops at the end of the current backward induction period and raises ValuationCancelledError.
     """
-    if cmdty_storage.freq != forward_curve.index.freqstr:
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[cmdty_storage.freq]
+    with instr.stage('trinomial_valuation', freq=cmdty_storage.freq, num_periods=len(forward_curve),
+                     num_inventory_grid_points=num_inventory_grid_points):
+        with instr.stage('input_conversion'):
+            trinomial_calc = _create_net_trinomial_calc(cmdty_storage, val_date, inventory, forward_curve,
+                                                        spot_volatility, mean_reversion, time_step, interest_rates,
+                                                        settlement_rule, num_inventory_grid_points,
+                                                        numerical_tolerance, tree)
+        with instr.stage('calculation'), raise_if_cancelled():
+            npv = net_cs.ITreeCalculate[time_period_type](trinomial_calc).Calculate(
+                net_cancellation_token(cancellation_token))
+        return npv.NetPresentValue
+
+
+def trinomial_value_with_deltas(cmdty_storage: CmdtyStorage,
+                                val_date: utils.TimePeriodSpecType,
+                                inventory: float,
+                                forward_curve: ForwardCurveType,
+                                spot_volatility: tp.Optional[pd.Series],
+                                mean_reversion: tp.Optional[float],
+                                time_step: tp.Optional[float],
+                                interest_rates: InterestRatesType,
+                                settlement_rule: tp.Callable[[pd.Period], date],
+                                num_inventory_grid_points: int = 100,
+                                numerical_tolerance: float = 1E-12,
+                                tree: tp.Optional[TrinomialTree] = None,
+                                cancellation_token: tp.Optional[CancellationToken] = None) -> TrinomialDeltaResults:
+    """
+    Calculates the value of commodity storage using a one-factor trinomial tree, and the discounted delta with respect
+    to the forward price of each period, from a single valuation.
+
+    The deltas are calculated by propagating the probability of each tree node and inventory forward through the
+    optimal decisions found by the backward induction, so are the derivatives of the tree value with the decisions held
+    fixed. Tree node prices are taken to be proportional to the forward price of their period.
+
+    Args:
+        settlement_rule (callable): Mapping function from pandas.Period type to the date on which the cmdty delivered in
+            this period is settled. The pandas.Period parameter will have freq equal to the cmdty_storage parameter's freq property.
+        tree (TrinomialTree, optional): Prebuilt tree, which must start on val_date. If specified, spot_volatility,
+            mean_reversion and time_step are not used and can be None.
+        cancellation_token (CancellationToken, optional): Used to cancel the valuation from another thread, which
+            stops at the end of the current backward induction period and raises ValuationCancelledError.
+
+    Returns:
+        TrinomialDeltaResults with the NPV and a pandas.Series of deltas indexed by period. Periods before the start of
+        storage are not included.
+    """
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[cmdty_storage.freq]
+    trinomial_calc = _create_net_trinomial_calc(cmdty_storage, val_date, inventory, forward_curve, spot_volatility,
+                                                mean_reversion, time_step, interest_rates, settlement_rule,
+                                                num_inventory_grid_points, numerical_tolerance, tree)
+    with raise_if_cancelled():
+        net_results = net_cs.ITreeCalculate[time_period_type](trinomial_calc).CalculateWithDeltas(
+            net_cancellation_token(cancellation_token))
+    npv = net_results.Item1.NetPresentValue
+    net_deltas = net_results.Item2
+    if net_deltas.IsEmpty:
+        deltas = pd.Series(index=pd.PeriodIndex(data=[], freq=cmdty_storage.freq), dtype='float64')
+    else:
+        deltas = utils.net_time_series_to_pandas_series(net_deltas, cmdty_storage.freq)
+    return TrinomialDeltaResults(npv, deltas)
+
+
+def trinomial_value_ladder(cmdty_storage: CmdtyStorage,
+                           val_date: utils.TimePeriodSpecType,
+                           forward_curve: ForwardCurveType,
+                           spot_volatility: tp.Optional[pd.Series],
+                           mean_reversion: tp.Optional[float],
+                           time_step: tp.Optional[float],
+                           interest_rates: InterestRatesType,
+                           settlement_rule: tp.Callable[[pd.Period], date],
+                           inventories: tp.Optional[tp.Iterable[float]] = None,
+                           num_inventory_grid_points: int = 100,
+                           numerical_tolerance: float = 1E-12,
+                           tree: tp.Optional[TrinomialTree] = None,
+                           cancellation_token: tp.Optional[CancellationToken] = None) -> InventoryValueLadder:
+    """
+    Calculates the value of commodity storage using a one-factor trinomial tree for many starting inventories from a
+    single backward induction.
+
+    Args:
+        settlement_rule (callable): Mapping function from pandas.Period type to the date on which the cmdty delivered in
+            this period is settled. The pandas.Period parameter will have freq equal to the cmdty_storage parameter's freq property.
+        inventories (iterable of float, optional): Starting inventories to value, which are returned sorted without
+            duplicates. Defaults to num_inventory_grid_points evenly spaced from the minimum to maximum inventory of the
+            first active storage period.
+        tree (TrinomialTree, optional): Prebuilt tree, which must start on val_date. If specified, spot_volatility,
+            mean_reversion and time_step are not used and can be None.
+        cancellation_token (CancellationToken, optional): Used to cancel the valuation from another thread, which
+            stops at the end of the current backward induction period and raises ValuationCancelledError.
+    """
+    forward_curve = as_forward_curve(forward_curve)
+    if cmdty_storage.freq != forward_curve.freq:
         raise ValueError("cmdty_storage and forward_curve have different frequencies.")
-    if cmdty_storage.freq != spot_volatility.index.freqstr:
-        raise ValueError("cmdty_storage and spot_volatility have different frequencies.")
+    _validate_tree_inputs(cmdty_storage, val_date, spot_volatility, tree)
+    ladder_inventories = cmdty_storage._ladder_inventories(val_date, inventories, num_inventory_grid_points)
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[cmdty_storage.freq]
+    if tree is None:
+        tree_start = val_date.asfreq(cmdty_storage.freq, 's') if isinstance(val_date, pd.Period) \
+            else pd.Period(val_date, freq=cmdty_storage.freq)
+        tree = TrinomialTree(cmdty_storage.freq, tree_start, max(tree_start, cmdty_storage.end), spot_volatility,
+                             mean_reversion, time_step)
+    current_period = utils.from_datetime_like(val_date, time_period_type)
+    net_forward_curve = forward_curve.net_forward_curve
+    net_settlement_rule = utils.wrap_settle_for_dotnet(settlement_rule, cmdty_storage.freq)
+    net_discounter = as_discount_curve(interest_rates).net_discounter
+    net_grid_calc_factory = net_cs.InventorySpaceGrid.FixedNumberOfPointsOnGlobalInventoryRangeFactory[time_period_type](
+        num_inventory_grid_points)
+    with raise_if_cancelled():
+        net_npvs = net_cs.TreeStorageValuation[time_period_type].CalculateInventoryLadder(cmdty_storage.net_storage,
+                        current_period, utils.as_net_array(ladder_inventories), net_forward_curve,
+                        net_cs.ScaledTree.CreateTreeFactory[time_period_type](tree.net_tree), net_settlement_rule,
+                        net_discounter, net_grid_calc_factory, net_cs.LinearInterpolatorFactory(),
+                        numerical_tolerance, net_cancellation_token(cancellation_token))
+    return InventoryValueLadder(ladder_inventories, utils.as_numpy_array(net_npvs))
+
+
+def _validate_tree_inputs(cmdty_storage, val_date, spot_volatility, tree):
+    if tree is None:
+        if spot_volatility is None:
+            raise ValueError("spot_volatility must be specified if tree is not.")
+        if cmdty_storage.freq != spot_volatility.index.freqstr:
+            raise ValueError("cmdty_storage and spot_volatility have different frequencies.")
+    else:
+        tree._validate_for_valuation(cmdty_storage, val_date)
+
+
+def _create_net_trinomial_calc(cmdty_storage, val_date, inventory, forward_curve, spot_volatility, mean_reversion,
+                               time_step, interest_rates, settlement_rule, num_inventory_grid_points,
+                               numerical_tolerance, tree):
+    forward_curve = as_forward_curve(forward_curve)
+    if cmdty_storage.freq != forward_curve.freq:
+        raise ValueError("cmdty_storage and forward_curve have different frequencies.")
+    _validate_tree_inputs(cmdty_storage, val_date, spot_volatility, tree)
     time_period_type = utils.FREQ_TO_PERIOD_TYPE[cmdty_storage.freq]
 
     trinomial_calc = net_cs.TreeStorageValuation[time_period_type].ForStorage(cmdty_storage.net_storage)
@@ -63,56 +272,116 @@ def trinomial_value(cmdty_storage: CmdtyStorage,
     current_period = utils.from_datetime_like(val_date, time_period_type)
     net_cs.ITreeAddCurrentPeriod[time_period_type](trinomial_calc).ForCurrentPeriod(current_period)
 
-    net_forward_curve = utils.series_to_double_time_series(forward_curve, time_period_type)
+    net_forward_curve = forward_curve.net_forward_curve
     net_cs.ITreeAddForwardCurve[time_period_type](trinomial_calc).WithForwardCurve(net_forward_curve)
 
-    net_spot_volatility = utils.series_to_double_time_series(spot_volatility, time_period_type)
-    net_cs.TreeStorageValuationExtensions.WithOneFactorTrinomialTree[time_period_type](
-        trinomial_calc, net_spot_volatility, mean_reversion, time_step)
+    if tree is None:
+        net_spot_volatility = utils.series_to_double_time_series(spot_volatility, time_period_type)
+        net_cs.TreeStorageValuationExtensions.WithOneFactorTrinomialTree[time_period_type](
+            trinomial_calc, net_spot_volatility, mean_reversion, time_step)
+    else:
+        net_cs.TreeStorageValuationExtensions.WithUnitForwardPriceTree[time_period_type](trinomial_calc, tree.net_tree)
 
     net_settlement_rule = utils.wrap_settle_for_dotnet(settlement_rule, cmdty_storage.freq)
     net_cs.ITreeAddCmdtySettlementRule[time_period_type](trinomial_calc).WithCmdtySettlementRule(net_settlement_rule)
 
-    interest_rate_time_series = utils.series_to_double_time_series(interest_rates, utils.FREQ_TO_PERIOD_TYPE['D'])
-    net_cs.TreeStorageValuationExtensions.WithAct365ContinuouslyCompoundedInterestRateCurve[time_period_type](
-        trinomial_calc, interest_rate_time_series)
+    net_discounter = as_discount_curve(interest_rates).net_discounter
+    net_cs.ITreeAddDiscountFactorFunc[time_period_type](trinomial_calc).WithDiscountFactorFunc(net_discounter)
 
     net_cs.TreeStorageValuationExtensions.WithFixedNumberOfPointsOnGlobalInventoryRange[time_period_type](
         trinomial_calc, num_inventory_grid_points)
     net_cs.TreeStorageValuationExtensions.WithLinearInventorySpaceInterpolation[time_period_type](trinomial_calc)
     net_cs.ITreeAddNumericalTolerance[time_period_type](trinomial_calc).WithNumericalTolerance(numerical_tolerance)
-    npv = net_cs.ITreeCalculate[time_period_type](trinomial_calc).Calculate()
-    return npv.NetPresentValue
+    return trinomial_calc
 
 
 def trinomial_deltas(cmdty_storage: CmdtyStorage,
                      val_date: utils.TimePeriodSpecType,
                      inventory: float,
-                     forward_curve: pd.Series,
-                     spot_volatility: pd.Series,
-                     mean_reversion: float,
-                     time_step: float,
-                     interest_rates: pd.Series,
+                     forward_curve: ForwardCurveType,
+                     spot_volatility: tp.Optional[pd.Series],
+                     mean_reversion: tp.Optional[float],
+                     time_step: tp.Optional[float],
+                     interest_rates: InterestRatesType,
                      settlement_rule: tp.Callable[[pd.Period], date],
                      fwd_contracts: utils.FwdContractsType,
                      num_inventory_grid_points: int = 100,
                      numerical_tolerance: float = 1E-12,
-                     delta_shift=0.00001  # TODO Improve this!
+                     delta_shift=0.00001,  # TODO Improve this!
+                     method: str = 'bump',
+                     max_workers: tp.Optional[int] = None,
+                     tree: tp.Optional[TrinomialTree] = None,
+                     cancellation_token: tp.Optional[CancellationToken] = None
                      ) -> tp.List[float]:
-    fwd_curve_copy = forward_curve.copy()
-    deltas = []
-    for fwd_contract in fwd_contracts:
-        start, end = utils.to_period_range(cmdty_storage.freq, fwd_contract)
-        fwd_curve_copy[start:end] = fwd_curve_copy[start:end] + delta_shift # TODO JF improve this!
-        value_up_shift = trinomial_value(cmdty_storage, val_date, inventory, fwd_curve_copy,
-                                         spot_volatility, mean_reversion, time_step, interest_rates, settlement_rule,
-                                         num_inventory_grid_points, numerical_tolerance)
-        fwd_curve_copy[start:end] = forward_curve[start:end] - delta_shift  # TODO JF improve this!
-        value_down_shift = trinomial_value(cmdty_storage, val_date, inventory, fwd_curve_copy,
-                                           spot_volatility, mean_reversion, time_step, interest_rates, settlement_rule,
-                                           num_inventory_grid_points, numerical_tolerance)
-        delta = (value_up_shift - value_down_shift) / (2.0 * delta_shift)
-        fwd_curve_copy[start:end] = forward_curve[start:end]
-        deltas.append(delta)
+    """
+    Calculates the discounted deltas of commodity storage valued with a one-factor trinomial tree, with respect to the
+    price of each forward contract.
+
+    Args:
+        method (str): 'bump', the default, to revalue with each contract's forward prices shifted up and down by
+            delta_shift, or 'pathwise' to calculate the deltas of all contracts from one valuation, as in
+            trinomial_value_with_deltas.
+        max_workers (int, optional): Maximum number of threads used to value the shifted curves when method is 'bump'.
+            Defaults to no limit, unless cmdty_storage calls back into Python, in which case only one thread is used.
+        tree (TrinomialTree, optional): Prebuilt tree, which must start on val_date. If specified, spot_volatility,
+            mean_reversion and time_step are not used and can be None.
+        cancellation_token (CancellationToken, optional): Used to cancel the valuations from another thread, which
+            stop at the end of their current backward induction period and raise ValuationCancelledError.
+    """
+    fwd_contracts = list(fwd_contracts)
+    if method == 'pathwise':
+        period_deltas = trinomial_value_with_deltas(cmdty_storage, val_date, inventory, forward_curve, spot_volatility,
+                                                    mean_reversion, time_step, interest_rates, settlement_rule,
+                                                    num_inventory_grid_points, numerical_tolerance, tree,
+                                                    cancellation_token).deltas
+        deltas = []
+        for fwd_contract in fwd_contracts:
+            start, end = utils.to_period_range(cmdty_storage.freq, fwd_contract)
+            deltas.append(float(period_deltas[start:end].sum()))
+        return deltas
+    if method != 'bump':
+        raise ValueError("method should be either 'pathwise' or 'bump'.")
+    if len(fwd_contracts) == 0:
+        return []
+    forward_curve = as_forward_curve(forward_curve)
+    if cmdty_storage.freq != forward_curve.freq:
+        raise ValueError("cmdty_storage and forward_curve have different frequencies.")
+    _validate_tree_inputs(cmdty_storage, val_date, spot_volatility, tree)
+    freq = cmdty_storage.freq
+    time_period_type = utils.FREQ_TO_PERIOD_TYPE[freq]
+    max_degree_of_parallelism = utils.max_degree_of_parallelism(max_workers, cmdty_storage.has_python_callbacks)
+
+    # Rows 2i and 2i+1 hold the up and down shifted curves for fwd_contracts[i]
+    base_prices = np.asarray(forward_curve.values, dtype=np.float64)
+    bumped_curves = np.tile(base_prices, (2 * len(fwd_contracts), 1))
+    for i, fwd_contract in enumerate(fwd_contracts):
+        start, end = utils.to_period_range(freq, fwd_contract)
+        start_idx = forward_curve.index.searchsorted(start, side='left')
+        end_idx = forward_curve.index.searchsorted(end, side='right')
+        bumped_curves[2 * i, start_idx:end_idx] += delta_shift
+        bumped_curves[2 * i + 1, start_idx:end_idx] -= delta_shift
+
+    current_period = utils.from_datetime_like(val_date, time_period_type)
+    net_fwd_curve_start = utils.from_datetime_like(forward_curve.index[0], time_period_type)
+    if tree is None:
+        net_tree = None
+        net_spot_volatility = utils.series_to_double_time_series(spot_volatility, time_period_type)
+    else:
+        net_tree = tree.net_tree
+        net_spot_volatility = None
+    val_period = val_date.asfreq(freq, 's') if isinstance(val_date, pd.Period) else pd.Period(val_date, freq=freq)
+    net_settlement_dates = utils.settlement_rule_to_net_time_series(settlement_rule, freq,
+                                                                    max(val_period, cmdty_storage.start), cmdty_storage.end)
+    net_discounter = as_discount_curve(interest_rates).net_discounter
+
+    with raise_if_cancelled():
+        net_npvs = net_cs.PythonHelpers.ScenarioValuation.TrinomialValuation[time_period_type](
+            cmdty_storage.net_storage, current_period, inventory, net_fwd_curve_start, utils.as_net_array(bumped_curves),
+            net_tree, net_spot_volatility, 0.0 if mean_reversion is None else mean_reversion,
+            0.0 if time_step is None else time_step, net_settlement_dates, net_discounter,
+            num_inventory_grid_points, numerical_tolerance, max_degree_of_parallelism,
+            net_cancellation_token(cancellation_token))
+    npvs = utils.as_numpy_array(net_npvs)
+    deltas = ((npvs[0::2] - npvs[1::2]) / (2.0 * delta_shift)).tolist()
     # TODO undiscount deltas
     return deltas
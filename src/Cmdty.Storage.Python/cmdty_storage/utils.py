@@ -24,6 +24,9 @@
 import pandas as pd
 import numpy as np
 import ctypes
+import functools
+from cmdty_storage import _runtime
+_runtime.load()
 import clr
 import System as dotnet
 import System.Collections.Generic as dotnet_cols_gen
@@ -45,14 +48,48 @@
 import dateutil
 import typing as tp
 import re
+from enum import Enum
+from cmdty_storage._typing import TimePeriodSpecType, ForwardPointType, CurveType, TimeFunctionType, \
+    FwdContractType, FwdContractsType
+
+
+_TIME_PERIOD_CACHE_SIZE = 65536
 
 
 def from_datetime_like(datetime_like: tp.Union[datetime, date, str, pd.Period], time_period_type):
-    """ Converts either a pandas Period, str, datetime or date to a .NET Time Period"""
+    """
+    Converts either a pandas Period, str, datetime or date to a .NET Time Period. Conversions are cached, so repeated
+    conversions of the same value only cost a dict lookup.
+    """
+    try:
+        return _cached_from_datetime_like(datetime_like, time_period_type)
+    except TypeError:  # Unhashable, so cannot be cached
+        return _from_datetime_like(datetime_like, time_period_type)
+
+
+@functools.lru_cache(maxsize=_TIME_PERIOD_CACHE_SIZE)
+def _cached_from_datetime_like(datetime_like, time_period_type):
+    return _from_datetime_like(datetime_like, time_period_type)
+
+
+def _from_datetime_like(datetime_like, time_period_type):
+    if isinstance(datetime_like, pd.Period) and datetime_like.freq.n == 1 and \
+            FREQ_TO_PERIOD_TYPE.get(datetime_like.freqstr) is time_period_type:
+        # Offset from a period of the same freq, rather than converting to .NET DateTime from the period's components.
+        # Only for freq multiple of 1, as the ordinal of a multiple freq such as 15min is in units of the base freq.
+        base_ordinal, net_base_period = _ordinal_base_period(datetime_like.freqstr, time_period_type)
+        return net_base_period.Offset(datetime_like.ordinal - base_ordinal)
     date_time = py_date_like_to_net_datetime(datetime_like)
     return net_tp.TimePeriodFactory.FromDateTime[time_period_type](date_time)
 
 
+@functools.lru_cache(maxsize=None)
+def _ordinal_base_period(freq: str, time_period_type):
+    base_period = pd.Period('2000-01-01', freq=freq)
+    net_base_period = net_tp.TimePeriodFactory.FromDateTime[time_period_type](py_date_like_to_net_datetime(base_period))
+    return base_period.ordinal, net_base_period
+
+
 def py_date_like_to_net_datetime(datetime_like: tp.Union[datetime, date, str, pd.Period]):
     """Converts either a pandas Period, str, datetime or date to a .NET DateTime."""
     if isinstance(datetime_like, str):
@@ -79,6 +116,16 @@ def series_to_double_time_series(series, time_period_type):
     return series_to_time_series(series, time_period_type, dotnet.Double, lambda x: x)
 
 
+def array_to_double_time_series(start, values: np.ndarray, time_period_type):
+    """
+    Converts a numpy.ndarray of values for contiguous periods, the first of which is start, to a
+    Cmdty.TimeSeries.TimeSeries type with Double data type. Quicker than series_to_double_time_series as the values
+    are copied in bulk, with no per-period conversion.
+    """
+    net_values = as_net_array(np.ascontiguousarray(values, dtype=np.float64))
+    return ts.TimeSeries[time_period_type, dotnet.Double](from_datetime_like(start, time_period_type), net_values)
+
+
 def series_to_time_series(series, time_period_type, net_data_type, data_selector):
     """Converts an instance of pandas Series to a Cmdty.TimeSeries.TimeSeries."""
     series_len = len(series)
@@ -99,7 +146,7 @@ def data_frame_to_net_double_panel(data_frame: pd.DataFrame, time_period_type):
     net_indices = dotnet.Array.CreateInstance(time_period_type, num_periods)
     for i in range(num_periods):
         net_indices[i] = from_datetime_like(data_frame.index[i], time_period_type)
-    net_values = as_net_array(data_frame.values.flatten(order='C'))
+    net_values = as_net_array(np.asarray(data_frame.values, dtype=np.float64).flatten(order='C'))
     return net_cc.Panel[time_period_type, dotnet.Double](net_values, net_indices, num_cols)
 
 
@@ -160,24 +207,39 @@ def wrapped_function(net_time_period):
     return dotnet.Func[time_period_type, net_tp.Day](wrapped_function)
 
 
+def settlement_rule_to_net_time_series(settlement_rule, freq: str, start: pd.Period, end: pd.Period):
+    """
+    Evaluates settlement_rule for each period from start to end, returning a .NET TimeSeries<T, Day>. Unlike
+    wrap_settle_for_dotnet, settlement dates can then be looked up on .NET threads without calling back into Python.
+    """
+    periods = pd.period_range(start=start, end=end, freq=freq)
+    time_period_type = FREQ_TO_PERIOD_TYPE[freq]
+    net_indices = dotnet.Array.CreateInstance(time_period_type, len(periods))
+    net_settle_days = dotnet.Array.CreateInstance(net_tp.Day, len(periods))
+    for i, period in enumerate(periods):
+        net_indices[i] = from_datetime_like(period, time_period_type)
+        net_settle_days[i] = from_datetime_like(settlement_rule(period), net_tp.Day)
+    return ts.TimeSeries[time_period_type, net_tp.Day](net_indices, net_settle_days)
+
+
+def max_degree_of_parallelism(max_workers: tp.Optional[int], calls_python: bool) -> int:
+    """Converts max_workers argument to the maximum degree of parallelism used by .NET, where -1 means no limit."""
+    if max_workers is not None and max_workers < 1:
+        raise ValueError("max_workers must be a positive integer.")
+    if calls_python:
+        if max_workers is not None and max_workers > 1:
+            raise ValueError("max_workers cannot be greater than 1 when cmdty_storage calls back into Python, "
+                             "for example with terminal_storage_npv specified.")
+        return 1
+    return -1 if max_workers is None else max_workers
+
+
 def wrap_on_progress_for_dotnet(py_on_progress):
     if py_on_progress is None:
         return None
     return dotnet.Action[dotnet.Double](py_on_progress)
 
 
-# TODO get rid of TimePeriodSpecType or ForwardPointType?
-# TODO check that each type definition is correct still
-TimePeriodSpecType = tp.Union[str, datetime, date, pd.Period]
-ForwardPointType = tp.Union[str, date, datetime, pd.Period]
-CurveType = tp.Union[pd.Series, tp.Dict[ForwardPointType, float]]
-TimeFunctionType = tp.Callable[[tp.Union[date, datetime], tp.Union[date, datetime]], float]
-FwdContractType = tp.Union[date, datetime, pd.Period, float,
-                           tp.Tuple[date, date], tp.Tuple[datetime, datetime],
-                           tp.Tuple[pd.Period, pd.Period]]
-FwdContractsType = tp.Iterable[FwdContractType]
-
-
 def curve_to_net_dict(curve: CurveType, time_period_type):
     """Creates a .NET Dictionary<T, Double> instance from a Python curve, with type defined by CurveType."""
     ret = dotnet_cols_gen.Dictionary[time_period_type, dotnet.Double]()
@@ -310,11 +372,16 @@ def numerics_provider() -> str:
     return net_cs.StorageHelper.LinearAlgebraProvider()
 
 
-def net_panel_to_data_frame(net_panel, freq: str) -> pd.DataFrame:
+def net_panel_to_data_frame(net_panel, freq: str, dtype: tp.Union[str, np.dtype] = np.float64) -> pd.DataFrame:
+    """Converts a .NET Panel<T, double> to a DataFrame with float64 or float32 data. For float32 the data is converted
+    in .NET, so only single precision data is copied into NumPy."""
     if net_panel.IsEmpty:
         return pd.DataFrame()
-    np_array = as_numpy_array(net_panel.RawData)
-    np_array.resize((net_panel.NumRows, net_panel.NumCols))
+    if np.dtype(dtype) == np.float32:
+        np_array = as_numpy_array(net_cs.PythonHelpers.ArrayExport.PanelAsSingle[FREQ_TO_PERIOD_TYPE[freq]](net_panel))
+    else:
+        np_array = as_numpy_array(net_panel.RawData)
+        np_array.resize((net_panel.NumRows, net_panel.NumCols))
     sim_periods = [net_time_period_to_pandas_period(p, freq) for p in net_panel.RowKeys]
     period_index = pd.PeriodIndex(data=sim_periods, freq=freq)
     return pd.DataFrame(data=np_array, index=period_index)
@@ -327,3 +394,30 @@ def log(level, msg):
     is_enabled = dotnet.Func[dotnet.Int32, dotnet.Boolean](lambda level: logger.isEnabledFor(level))
     py_log = dotnet.Action[dotnet.Int32, dotnet.String](log)
     return net_cs.PythonHelpers.PythonLoggerAdapter[net_logger_type](is_enabled, py_log)
+
+
+def update_digest(hasher, value) -> None:
+    """Feeds value into hashlib object hasher such that values which are equal, including pandas and NumPy objects
+    with equal data, give equal digests in any process. Functions are not supported, as their behaviour can't be
+    reliably digested."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (bool, int, float, str, date, pd.Period)):
+        hasher.update('{}:{!r};'.format(type(value).__name__, value).encode())
+    elif isinstance(value, (pd.Series, pd.DataFrame)):
+        hasher.update(b'pandas:')
+        update_digest(hasher, [str(idx) for idx in value.index])
+        update_digest(hasher, np.asarray(value.values, dtype=np.float64))
+    elif isinstance(value, np.ndarray):
+        hasher.update('ndarray:{}:{};'.format(value.dtype.str, value.shape).encode())
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        update_digest(hasher, sorted(value.items(), key=lambda item: repr(item[0])))
+    elif isinstance(value, (list, tuple)):
+        hasher.update('seq:{};'.format(len(value)).encode())
+        for item in value:
+            update_digest(hasher, item)
+    elif isinstance(value, Enum):
+        update_digest(hasher, (type(value).__name__, value.name))
+    else:
+        raise TypeError("Cannot create digest of value of type {}.".format(type(value).__name__))
@@ -0,0 +1,84 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import asyncio
+import pandas as pd
+from cmdty_storage import CmdtyStorage, three_factor_seasonal_value, three_factor_seasonal_value_async, \
+    SimulationDataReturned
+from tests import utils
+
+
+def _twentieth_of_next_month(period):
+    return period.asfreq('M').asfreq('D', 'end') + 20
+
+
+class TestAsyncValuation(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                                    max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        self.val_date = '2019-11-01'
+        self.forward_curve = utils.create_piecewise_flat_series([23.87, 35.32, 35.32],
+                                                                [self.val_date, '2020-01-12', '2020-02-01'], freq='D')
+        self.interest_rates = pd.Series(0.03, index=pd.period_range(self.val_date, '2020-04-01', freq='D'))
+
+    def _args(self, num_sims):
+        return (self.storage, self.val_date, 0.0, self.forward_curve, self.interest_rates, _twentieth_of_next_month,
+                16.2, 1.15, 0.14, 0.18, num_sims, '1 + x_st + x_sw + x_lt + x_st**2 + x_sw**2 + x_lt**2', False)
+
+    def test_awaited_results_equal_sync_results_and_progress_streamed(self):
+        args = self._args(200)
+        kwargs = dict(seed=11, fwd_sim_seed=12, sim_data_returned=SimulationDataReturned.NONE)
+        sync_results = three_factor_seasonal_value(*args, **kwargs)
+
+        async def value_async():
+            valuation = three_factor_seasonal_value_async(*args, **kwargs)
+            progresses = [progress async for progress in valuation.progress()]
+            return await valuation, progresses
+
+        async_results, progresses = asyncio.run(value_async())
+        self.assertEqual(sync_results.npv, async_results.npv)
+        self.assertGreater(len(progresses), 0)
+        self.assertEqual(sorted(progresses), progresses)
+        self.assertAlmostEqual(1.0, progresses[-1], places=10)
+
+    def test_cancelling_task_stops_net_calculation(self):
+        async def value_and_cancel():
+            valuation = three_factor_seasonal_value_async(*self._args(200000), seed=11,
+                                                          sim_data_returned=SimulationDataReturned.NONE)
+            task = asyncio.ensure_future(valuation)
+            async for _ in valuation.progress():
+                task.cancel()
+                break
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return valuation
+
+        valuation = asyncio.run(value_and_cancel())
+        self.assertTrue(valuation.cancellation_token.cancelled)
+        self.assertTrue(valuation.done())
+
+
+if __name__ == '__main__':
+    unittest.main()
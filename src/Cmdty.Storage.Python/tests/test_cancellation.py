@@ -0,0 +1,82 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import pandas as pd
+from cmdty_storage import CmdtyStorage, CancellationToken, ValuationCancelledError, intrinsic_value, \
+    IntrinsicValuer, trinomial_value, three_factor_seasonal_value
+from tests import utils
+
+
+def _twentieth_of_next_month(period):
+    return period.asfreq('M').asfreq('D', 'end') + 20
+
+
+class TestCancellation(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                                    max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        self.val_date = '2019-11-01'
+        self.forward_curve = utils.create_piecewise_flat_series([23.87, 35.32, 35.32],
+                                                                [self.val_date, '2020-01-12', '2020-02-01'], freq='D')
+        self.interest_rates = pd.Series(0.03, index=pd.period_range(self.val_date, '2020-04-01', freq='D'))
+        self.cancelled_token = CancellationToken()
+        self.cancelled_token.cancel()
+
+    def test_intrinsic_value_cancelled_raises_valuation_cancelled_error(self):
+        with self.assertRaises(ValuationCancelledError):
+            intrinsic_value(self.storage, self.val_date, 0.0, self.forward_curve, self.interest_rates,
+                            _twentieth_of_next_month, cancellation_token=self.cancelled_token)
+
+    def test_trinomial_value_cancelled_raises_valuation_cancelled_error(self):
+        spot_volatility = pd.Series(0.95, index=self.forward_curve.index)
+        with self.assertRaises(ValuationCancelledError):
+            trinomial_value(self.storage, self.val_date, 0.0, self.forward_curve, spot_volatility, 12.5, 1.0 / 365.0,
+                            self.interest_rates, _twentieth_of_next_month, cancellation_token=self.cancelled_token)
+
+    def test_three_factor_seasonal_value_cancelled_raises_valuation_cancelled_error(self):
+        with self.assertRaises(ValuationCancelledError):
+            three_factor_seasonal_value(self.storage, self.val_date, 0.0, self.forward_curve, self.interest_rates,
+                                        _twentieth_of_next_month, 16.2, 1.15, 0.14, 0.18, 200,
+                                        '1 + x_st + x_sw + x_lt', False, seed=11,
+                                        cancellation_token=self.cancelled_token)
+
+    def test_intrinsic_valuer_update_after_cancelled_update_equals_full_revaluation(self):
+        valuer = IntrinsicValuer(self.storage, self.val_date, 0.0, self.forward_curve, self.interest_rates,
+                                 _twentieth_of_next_month)
+        changes = self.forward_curve[pd.Period('2020-01-05', freq='D'):pd.Period('2020-01-10', freq='D')] + 5.5
+        with self.assertRaises(ValuationCancelledError):
+            valuer.update_curve(changes, cancellation_token=self.cancelled_token)
+
+        # The second update doesn't change prices, but recalculates the stages not recalculated by the cancelled update
+        updated_results = valuer.update_curve(changes)
+        new_curve = self.forward_curve.copy()
+        new_curve[changes.index] = changes
+        full_results = intrinsic_value(self.storage, self.val_date, 0.0, new_curve, self.interest_rates,
+                                       _twentieth_of_next_month)
+        self.assertAlmostEqual(full_results.npv, updated_results.npv, places=8)
+
+
+if __name__ == '__main__':
+    unittest.main()
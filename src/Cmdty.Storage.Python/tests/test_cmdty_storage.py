@@ -434,6 +434,33 @@ def test_inventory_cost_series_init_parameter(self):
                 inventory_cost = storage.inventory_cost(dt, inventory)
                 self.assertEqual(expected_inventory_cost * inventory, inventory_cost)
 
+    def test_inventory_space_as_expected(self):
+        storage = self._create_storage(ratchets=None, ratchet_interp=None, min_inventory=self._constant_min_inventory,
+                        max_inventory=self._constant_max_inventory, max_injection_rate=self._constant_max_injection_rate,
+                        max_withdrawal_rate=self._constant_max_withdrawal_rate, inventory_loss=None)
+        inventory_space = storage.inventory_space(datetime(2019, 8, 28), 100.0)
+        self.assertEqual(pd.Period(datetime(2019, 8, 29), freq='D'), inventory_space.periods[0])
+        self.assertEqual(storage.end, inventory_space.periods[-1])
+        self.assertEqual(len(inventory_space.periods), len(inventory_space.min_inventory))
+        self.assertEqual(len(inventory_space.periods), len(inventory_space.max_inventory))
+        self.assertAlmostEqual(self._constant_min_inventory, inventory_space.min_inventory[0], places=12)
+        self.assertAlmostEqual(100.0 + self._constant_max_injection_rate, inventory_space.max_inventory[0], places=12)
+        self.assertAlmostEqual(100.0 + self._constant_max_injection_rate * 2, inventory_space.max_inventory[1], places=12)
+
+    def test_inventory_space_cached_per_val_date_and_inventory(self):
+        storage = self._create_storage()
+        inventory_space = storage.inventory_space(datetime(2019, 8, 28), 100.0)
+        self.assertIs(inventory_space, storage.inventory_space(pd.Period(datetime(2019, 8, 28), freq='D'), 100.0))
+        self.assertIsNot(inventory_space, storage.inventory_space(datetime(2019, 8, 28), 150.0))
+        with self.assertRaises(ValueError):
+            inventory_space.max_inventory[0] = 0.0
+
+    def test_inventory_space_empty_when_val_date_is_storage_end(self):
+        storage = self._create_storage()
+        inventory_space = storage.inventory_space(self._default_storage_end, 100.0)
+        self.assertEqual(0, len(inventory_space.periods))
+        self.assertEqual(0, len(inventory_space.min_inventory))
+
 
 class TestUtils(unittest.TestCase):
     def test_numerics_provider_mkl(self):
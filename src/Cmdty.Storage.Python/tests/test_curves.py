@@ -0,0 +1,148 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import pandas as pd
+import numpy as np
+import cmdty_storage as cs
+from datetime import date
+from tests import utils
+
+
+class TestDiscountCurve(unittest.TestCase):
+
+    def setUp(self):
+        self.interest_rates = pd.Series(np.linspace(0.02, 0.05, 120),
+                                        index=pd.period_range(date(2019, 9, 1), periods=120, freq='D'))
+
+    def test_discount_factors_equal_act365_continuously_compounded(self):
+        discount_curve = cs.DiscountCurve(self.interest_rates)
+        val_date = date(2019, 9, 11)
+        discount_factors = discount_curve.discount_factors(val_date)
+        days = np.maximum(np.arange(120) - 10, 0)
+        expected = np.exp(-days / 365.0 * self.interest_rates.values)
+        np.testing.assert_allclose(expected, discount_factors.values, rtol=1E-14)
+        self.assertTrue((discount_factors[:pd.Period('2019-09-11', freq='D')] == 1.0).all())
+        self.assertAlmostEqual(discount_factors[pd.Period(date(2019, 10, 20), freq='D')],
+                               discount_curve.discount_factor(val_date, date(2019, 10, 20)), places=14)
+
+    def test_discount_factors_many_val_dates_cache_bounded_and_values_unchanged(self):
+        discount_curve = cs.DiscountCurve(self.interest_rates)
+        first_discount_factors = discount_curve.discount_factors(date(2019, 9, 1)).values.copy()
+        for val_date in pd.period_range(date(2019, 9, 2), periods=200, freq='D'):
+            discount_curve.discount_factors(val_date)
+        self.assertLessEqual(len(discount_curve._discount_factors), 128)
+        np.testing.assert_array_equal(first_discount_factors, discount_curve.discount_factors(date(2019, 9, 1)).values)
+
+    def test_discount_factor_without_interest_rate_raises(self):
+        discount_curve = cs.DiscountCurve(self.interest_rates)
+        with self.assertRaises(ValueError):
+            discount_curve.discount_factor(date(2019, 9, 1), date(2020, 1, 1))
+
+    def test_non_daily_interest_rates_raises(self):
+        monthly_rates = pd.Series(0.03, index=pd.period_range('2019-09', periods=6, freq='M'))
+        with self.assertRaises(ValueError):
+            cs.DiscountCurve(monthly_rates)
+
+    def test_non_contiguous_interest_rates_raises(self):
+        with self.assertRaises(ValueError):
+            cs.DiscountCurve(self.interest_rates.drop(self.interest_rates.index[5]))
+
+    def test_valuations_with_discount_curve_equal_valuations_with_series(self):
+        storage_start = date(2019, 9, 2)
+        storage_end = date(2019, 10, 1)
+        cmdty_storage = cs.CmdtyStorage('D', storage_start, storage_end, injection_cost=0.1, withdrawal_cost=0.2,
+                                        min_inventory=0, max_inventory=1000, max_injection_rate=25.5,
+                                        max_withdrawal_rate=30.6)
+        val_date = date(2019, 9, 2)
+        forward_curve = utils.create_piecewise_flat_series([58.89, 61.41, 59.89, 59.89],
+                                            [val_date, date(2019, 9, 12), date(2019, 9, 18), storage_end], freq='D')
+        twentieth_of_next_month = lambda period: period.asfreq('M').asfreq('D', 'end') + 20
+        discount_curve = cs.DiscountCurve(self.interest_rates)
+
+        series_results = cs.intrinsic_value(cmdty_storage, val_date, 120.0, forward_curve, self.interest_rates,
+                                            twentieth_of_next_month)
+        curve_results = cs.intrinsic_value(cmdty_storage, val_date, 120.0, forward_curve, discount_curve,
+                                           twentieth_of_next_month)
+        self.assertEqual(series_results.npv, curve_results.npv)
+        pd.testing.assert_frame_equal(series_results.profile, curve_results.profile)
+
+        spot_vol = pd.Series(0.6, index=forward_curve.index)
+        series_npv = cs.trinomial_value(cmdty_storage, val_date, 120.0, forward_curve, spot_vol, 12.0, 1.0 / 365.0,
+                                        self.interest_rates, twentieth_of_next_month)
+        curve_npv = cs.trinomial_value(cmdty_storage, val_date, 120.0, forward_curve, spot_vol, 12.0, 1.0 / 365.0,
+                                       discount_curve, twentieth_of_next_month)
+        self.assertEqual(series_npv, curve_npv)
+
+
+
+class TestForwardCurve(unittest.TestCase):
+
+    def setUp(self):
+        self.prices = utils.create_piecewise_flat_series([58.89, 61.41, 59.89, 59.89],
+                                                         [date(2019, 9, 2), date(2019, 9, 12), date(2019, 9, 18),
+                                                          date(2019, 10, 1)], freq='D')
+
+    def test_properties_equal_prices(self):
+        forward_curve = cs.ForwardCurve(self.prices)
+        self.assertEqual('D', forward_curve.freq)
+        self.assertEqual(self.prices.index[0], forward_curve.start)
+        self.assertEqual(self.prices.index[-1], forward_curve.end)
+        self.assertEqual(len(self.prices), len(forward_curve))
+        pd.testing.assert_series_equal(self.prices, forward_curve.series, check_freq=False)
+
+    def test_non_contiguous_prices_raises(self):
+        with self.assertRaises(ValueError):
+            cs.ForwardCurve(self.prices.drop(self.prices.index[3]))
+
+    def test_unsupported_freq_raises(self):
+        with self.assertRaises(ValueError):
+            cs.ForwardCurve(pd.Series(1.0, index=pd.period_range('2019-01', periods=4, freq='Q')))
+
+    def test_shifted_shifts_prices_in_fwd_contract_only(self):
+        forward_curve = cs.ForwardCurve(self.prices)
+        shifted_curve = forward_curve.shifted(0.5, (date(2019, 9, 10), date(2019, 9, 14)))
+        expected = self.prices.copy()
+        expected[pd.Period('2019-09-10', freq='D'):pd.Period('2019-09-14', freq='D')] += 0.5
+        np.testing.assert_array_equal(expected.values, shifted_curve.values)
+        np.testing.assert_array_equal(self.prices.values, forward_curve.values)
+
+    def test_valuations_with_forward_curve_equal_valuations_with_series(self):
+        cmdty_storage = cs.CmdtyStorage('D', date(2019, 9, 2), date(2019, 10, 1), injection_cost=0.1,
+                                        withdrawal_cost=0.2, min_inventory=0, max_inventory=1000,
+                                        max_injection_rate=25.5, max_withdrawal_rate=30.6)
+        interest_rates = pd.Series(0.03, index=pd.period_range(date(2019, 9, 2), periods=120, freq='D'))
+        twentieth_of_next_month = lambda period: period.asfreq('M').asfreq('D', 'end') + 20
+        forward_curve = cs.ForwardCurve(self.prices)
+        shifted_curve = forward_curve.shifted(1.5, pd.Period('2019-09', freq='M'))
+
+        for fwd_curve, series in ((forward_curve, self.prices), (shifted_curve, shifted_curve.series)):
+            series_results = cs.intrinsic_value(cmdty_storage, date(2019, 9, 2), 120.0, series, interest_rates,
+                                                twentieth_of_next_month)
+            curve_results = cs.intrinsic_value(cmdty_storage, date(2019, 9, 2), 120.0, fwd_curve, interest_rates,
+                                               twentieth_of_next_month)
+            self.assertEqual(series_results.npv, curve_results.npv)
+
+
+if __name__ == '__main__':
+    unittest.main()
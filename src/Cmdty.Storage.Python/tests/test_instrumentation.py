@@ -0,0 +1,105 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import logging
+import pandas as pd
+import cmdty_storage as cs
+from cmdty_storage import instrumentation
+from tests import utils
+
+
+class RecordingInstrumentation(cs.Instrumentation):
+
+    def __init__(self):
+        self.events = []
+
+    def on_start(self, stage, attributes):
+        self.events.append(('start', stage, dict(attributes)))
+
+    def on_end(self, stage, duration, attributes):
+        self.events.append(('end', stage, dict(attributes), duration))
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self._recording = RecordingInstrumentation()
+        cs.set_instrumentation(self._recording)
+
+    def tearDown(self):
+        cs.set_instrumentation(None)
+
+    def test_stage_emits_nested_start_and_end_events(self):
+        durations = {}
+        with instrumentation.stage('outer', durations, num_sims=10):
+            with instrumentation.stage('inner', durations) as attributes:
+                attributes['extra'] = 1
+        self.assertEqual([('start', 'outer'), ('start', 'inner'), ('end', 'inner'), ('end', 'outer')],
+                         [event[:2] for event in self._recording.events])
+        self.assertEqual(10, self._recording.events[0][2]['num_sims'])
+        self.assertEqual(1, self._recording.events[2][2]['extra'])
+        self.assertIn('peak_rss_bytes', self._recording.events[3][2])
+        self.assertLessEqual(durations['inner'], durations['outer'])
+        self.assertEqual(durations['outer'], self._recording.events[3][3])
+
+    def test_stage_raising_emits_end_event_with_error(self):
+        with self.assertRaises(ValueError):
+            with instrumentation.stage('failing'):
+                raise ValueError('Failed')
+        self.assertEqual('ValueError', self._recording.events[-1][2]['error'])
+
+    def test_set_instrumentation_none_resets_to_no_op(self):
+        cs.set_instrumentation(None)
+        with instrumentation.stage('not_recorded'):
+            pass
+        self.assertEqual([], self._recording.events)
+        self.assertIsInstance(cs.get_instrumentation(), cs.Instrumentation)
+
+    def test_logging_instrumentation_logs_end_of_stage(self):
+        cs.set_instrumentation(cs.LoggingInstrumentation())
+        with self.assertLogs('cmdty.storage.instrumentation', level=logging.INFO) as logs:
+            with instrumentation.stage('logged', num_periods=5):
+                pass
+        self.assertIn('Stage logged completed', logs.output[0])
+
+    def test_intrinsic_value_emits_stages_with_sizes(self):
+        storage = cs.CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                                  max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        val_date = '2019-11-01'
+        forward_curve = utils.create_piecewise_flat_series([23.87, 35.32, 35.32],
+                                                           [val_date, '2020-01-12', '2020-02-01'], freq='D')
+        interest_rate_curve = pd.Series(0.03, index=pd.period_range(val_date, '2020-04-01', freq='D'))
+        cs.intrinsic_value(storage, val_date, 1000.0, forward_curve, interest_rate_curve,
+                           lambda period: period.asfreq('M').asfreq('D', 'end') + 20, num_inventory_grid_points=50)
+        end_events = [event for event in self._recording.events if event[0] == 'end']
+        self.assertEqual(['input_conversion', 'calculation', 'results_conversion', 'intrinsic_valuation'],
+                         [event[1] for event in end_events])
+        valuation_attributes = end_events[-1][2]
+        self.assertEqual('D', valuation_attributes['freq'])
+        self.assertEqual(len(forward_curve), valuation_attributes['num_periods'])
+        self.assertEqual(50, valuation_attributes['num_inventory_grid_points'])
+
+
+if __name__ == '__main__':
+    unittest.main()
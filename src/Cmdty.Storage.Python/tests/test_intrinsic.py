@@ -23,6 +23,7 @@
 
 import unittest
 import pandas as pd
+import numpy as np
 import cmdty_storage as cs
 from datetime import date, timedelta
 from tests import utils
@@ -125,6 +126,132 @@ def test_storage_value_date_equals_storage_end_returns_zero_npv_empty_profile(se
         self.assertEqual(0.0, intrinsic_results.npv)
         self.assertEqual(0, len(intrinsic_results.profile))
 
+    def test_intrinsic_profile_columns_consistent(self):
+        storage_start = date(2019, 8, 28)
+        storage_end = date(2019, 9, 25)
+        cmdty_storage = cs.CmdtyStorage('D', storage_start, storage_end, injection_cost=0.1, withdrawal_cost=0.2, min_inventory=0,
+                                     max_inventory=1000, max_injection_rate=25.5, max_withdrawal_rate=30.6,
+                                     cmdty_consumed_inject=0.001, inventory_loss=0.0005)
+        val_date = date(2019, 9, 2)
+        forward_curve = utils.create_piecewise_flat_series([58.89, 61.41, 59.89, 59.89],
+                                            [val_date, date(2019, 9, 12), date(2019, 9, 18), storage_end], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, storage_end + timedelta(days=60), freq='D'),
+                                        dtype='float64')
+        interest_rate_curve[:] = 0.03
+        twentieth_of_next_month = lambda period: period.asfreq('M').asfreq('D', 'end') + 20
+        intrinsic_results = cs.intrinsic_value(cmdty_storage, val_date, 120.0, forward_curve,
+                                settlement_rule=twentieth_of_next_month, interest_rates=interest_rate_curve)
+        profile = intrinsic_results.profile
+
+        self.assertEqual(['inventory', 'inject_withdraw_volume', 'cmdty_consumed', 'inventory_loss', 'net_volume',
+                          'period_pv'], list(profile.columns))
+        self.assertEqual(pd.Period(val_date, freq='D'), profile.index[0])
+        self.assertEqual(pd.Period(storage_end, freq='D'), profile.index[-1])
+        np.testing.assert_array_almost_equal(-profile['inject_withdraw_volume'] - profile['cmdty_consumed'],
+                                             profile['net_volume'])
+        self.assertAlmostEqual(intrinsic_results.npv, profile['period_pv'].sum(), places=8)
+
+    def test_intrinsic_value_scenarios_equals_intrinsic_value_per_scenario(self):
+        storage_start = date(2019, 8, 28)
+        storage_end = date(2019, 9, 25)
+        cmdty_storage = cs.CmdtyStorage('D', storage_start, storage_end, injection_cost=0.1, withdrawal_cost=0.2, min_inventory=0,
+                                     max_inventory=1000, max_injection_rate=25.5, max_withdrawal_rate=30.6)
+        inventory = 120.0
+        val_date = date(2019, 9, 2)
+        base_forward_curve = utils.create_piecewise_flat_series([58.89, 61.41, 59.89, 59.89],
+                                            [val_date, date(2019, 9, 12), date(2019, 9, 18), storage_end], freq='D')
+        fwd_curves = np.array([base_forward_curve.values, base_forward_curve.values * 1.1,
+                               base_forward_curve.values + np.linspace(-2.0, 2.0, len(base_forward_curve))])
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, storage_end + timedelta(days=60), freq='D'),
+                                        dtype='float64')
+        interest_rate_curve[:] = 0.03
+        twentieth_of_next_month = lambda period: period.asfreq('M').asfreq('D', 'end') + 20
+
+        scenario_results = cs.intrinsic_value_scenarios(cmdty_storage, val_date, inventory, fwd_curves, val_date,
+                                    interest_rate_curve, twentieth_of_next_month, return_profiles=True)
+
+        self.assertEqual(3, len(scenario_results.npvs))
+        for scenario, scenario_prices in enumerate(fwd_curves):
+            forward_curve = pd.Series(data=scenario_prices, index=base_forward_curve.index)
+            intrinsic_results = cs.intrinsic_value(cmdty_storage, val_date, inventory, forward_curve,
+                                    settlement_rule=twentieth_of_next_month, interest_rates=interest_rate_curve)
+            self.assertAlmostEqual(intrinsic_results.npv, scenario_results.npvs[scenario], places=10)
+            scenario_profile = scenario_results.profiles.loc[scenario]
+            pd.testing.assert_frame_equal(intrinsic_results.profile, scenario_profile, check_names=False, check_freq=False)
+
+    def test_intrinsic_valuer_update_curve_equals_intrinsic_value(self):
+        storage_start = date(2019, 8, 28)
+        storage_end = date(2019, 9, 25)
+        cmdty_storage = cs.CmdtyStorage('D', storage_start, storage_end, injection_cost=0.1, withdrawal_cost=0.2, min_inventory=0,
+                                     max_inventory=1000, max_injection_rate=25.5, max_withdrawal_rate=30.6)
+        inventory = 120.0
+        val_date = date(2019, 9, 2)
+        forward_curve = utils.create_piecewise_flat_series([58.89, 61.41, 59.89, 59.89],
+                                            [val_date, date(2019, 9, 12), date(2019, 9, 18), storage_end], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, storage_end + timedelta(days=60), freq='D'),
+                                        dtype='float64')
+        interest_rate_curve[:] = 0.03
+        twentieth_of_next_month = lambda period: period.asfreq('M').asfreq('D', 'end') + 20
+
+        valuer = cs.IntrinsicValuer(cmdty_storage, val_date, inventory, forward_curve, interest_rate_curve,
+                                    twentieth_of_next_month)
+        initial_results = cs.intrinsic_value(cmdty_storage, val_date, inventory, forward_curve,
+                                    settlement_rule=twentieth_of_next_month, interest_rates=interest_rate_curve)
+        self.assertAlmostEqual(initial_results.npv, valuer.results.npv, places=10)
+
+        changes = forward_curve[date(2019, 9, 15):date(2019, 9, 20)] + 3.5
+        updated_results = valuer.update_curve(changes)
+
+        updated_curve = forward_curve.copy()
+        updated_curve[changes.index] = changes
+        expected_results = cs.intrinsic_value(cmdty_storage, val_date, inventory, updated_curve,
+                                    settlement_rule=twentieth_of_next_month, interest_rates=interest_rate_curve)
+        self.assertAlmostEqual(expected_results.npv, updated_results.npv, places=10)
+        pd.testing.assert_frame_equal(expected_results.profile, updated_results.profile)
+        self.assertEqual((pd.Period(date(2019, 9, 20), freq='D') - pd.Period(val_date, freq='D')).n,
+                         valuer.num_stages_recalculated)
+
+    def test_intrinsic_value_ladder_approximately_equals_intrinsic_value(self):
+        storage_start = date(2019, 8, 28)
+        storage_end = date(2019, 9, 25)
+        cmdty_storage = cs.CmdtyStorage('D', storage_start, storage_end, injection_cost=0.1, withdrawal_cost=0.2, min_inventory=0,
+                                     max_inventory=1000, max_injection_rate=25.5, max_withdrawal_rate=30.6)
+        val_date = date(2019, 9, 2)
+        forward_curve = utils.create_piecewise_flat_series([58.89, 61.41, 59.89, 59.89],
+                                            [val_date, date(2019, 9, 12), date(2019, 9, 18), storage_end], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, storage_end + timedelta(days=60), freq='D'),
+                                        dtype='float64')
+        interest_rate_curve[:] = 0.03
+        twentieth_of_next_month = lambda period: period.asfreq('M').asfreq('D', 'end') + 20
+
+        inventories = [500.0, 0.0, 120.0, 850.0]
+        ladder = cs.intrinsic_value_ladder(cmdty_storage, val_date, forward_curve, interest_rate_curve,
+                                           twentieth_of_next_month, inventories=inventories)
+        np.testing.assert_array_equal(np.array([0.0, 120.0, 500.0, 850.0]), ladder.inventories)
+        for inventory in inventories:
+            intrinsic_results = cs.intrinsic_value(cmdty_storage, val_date, inventory, forward_curve,
+                                    settlement_rule=twentieth_of_next_month, interest_rates=interest_rate_curve)
+            self.assertAlmostEqual(intrinsic_results.npv, ladder.interpolate(inventory),
+                                   delta=abs(intrinsic_results.npv) * 1E-3)
+
+    def test_intrinsic_value_ladder_infeasible_inventory_is_nan(self):
+        storage_start = date(2019, 8, 28)
+        storage_end = date(2019, 9, 25)
+        cmdty_storage = cs.CmdtyStorage('D', storage_start, storage_end, injection_cost=0.1, withdrawal_cost=0.2, min_inventory=0,
+                                     max_inventory=1000, max_injection_rate=25.5, max_withdrawal_rate=30.6)
+        val_date = date(2019, 9, 24)
+        forward_curve = utils.create_piecewise_flat_series([58.89, 58.89], [val_date, storage_end], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, storage_end + timedelta(days=60), freq='D'),
+                                        dtype='float64')
+        interest_rate_curve[:] = 0.03
+        twentieth_of_next_month = lambda period: period.asfreq('M').asfreq('D', 'end') + 20
+
+        ladder = cs.intrinsic_value_ladder(cmdty_storage, val_date, forward_curve, interest_rate_curve,
+                                           twentieth_of_next_month, inventories=[0.0, 20.0, 900.0])
+        self.assertFalse(np.isnan(ladder.npvs[0]))
+        self.assertFalse(np.isnan(ladder.npvs[1]))
+        self.assertTrue(np.isnan(ladder.npvs[2]))
+
 
 if __name__ == '__main__':
     unittest.main()
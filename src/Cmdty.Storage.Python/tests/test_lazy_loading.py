@@ -0,0 +1,63 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import subprocess
+import sys
+
+
+class TestLazyLoading(unittest.TestCase):
+
+    @staticmethod
+    def _run_in_new_interpreter(code: str) -> str:
+        completed = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        return completed.stdout.strip()
+
+    def test_pure_python_features_do_not_load_clr(self):
+        code = 'import sys\n' \
+               'import cmdty_storage\n' \
+               'from cmdty_storage import MultiFactorModel, time_func\n' \
+               'print("clr" in sys.modules)'
+        self.assertEqual('False', self._run_in_new_interpreter(code))
+
+    def test_attribute_calling_dotnet_loads_clr(self):
+        code = 'import sys\n' \
+               'from cmdty_storage import CmdtyStorage\n' \
+               'print("clr" in sys.modules)'
+        self.assertEqual('True', self._run_in_new_interpreter(code))
+
+    def test_warm_up_loads_clr(self):
+        code = 'import sys\n' \
+               'import cmdty_storage\n' \
+               'cmdty_storage.warm_up()\n' \
+               'print("clr" in sys.modules)'
+        self.assertEqual('True', self._run_in_new_interpreter(code))
+
+    def test_unknown_attribute_raises_attribute_error(self):
+        import cmdty_storage
+        with self.assertRaises(AttributeError):
+            getattr(cmdty_storage, 'not_an_attribute')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,9 +22,11 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 
 import unittest
+import pickle
 import pandas as pd
+import numpy as np
 from cmdty_storage import CmdtyStorage, three_factor_seasonal_value, \
-    multi_factor_value, value_from_sims, SimulationDataReturned
+    multi_factor_value, value_from_sims, SimulationDataReturned, scenario_grid, value_with_policy, ForwardCurve
 from tests import utils
 from os import path
 
@@ -122,6 +124,10 @@ def on_progress(progress):
         pd.testing.assert_frame_equal(multi_factor_val.expected_profile, regress_expected_profile)
         pd.testing.assert_frame_equal(multi_factor_val.intrinsic_profile, regress_intrinsic_profile)
         pd.testing.assert_frame_equal(multi_factor_val.trigger_prices, regress_trigger_prices)
+        trigger_profiles = multi_factor_val.trigger_profiles
+        self.assertEqual(['period', 'side', 'volume', 'price'], list(trigger_profiles.columns))
+        self.assertTrue(trigger_profiles['side'].isin(['inject', 'withdraw']).all())
+        self.assertTrue(trigger_profiles['period'].isin(multi_factor_val.trigger_prices.index).all())
 
     def test_value_from_sims_using_sims_from_multi_factor_value(self):
         """Test which first runs multi_factor_value, then passes the simulated spot
@@ -283,6 +289,247 @@ def on_progress(progress):
         pd.testing.assert_frame_equal(multi_factor_val.intrinsic_profile, regress_intrinsic_profile)
         pd.testing.assert_frame_equal(multi_factor_val.trigger_prices, regress_trigger_prices)
 
+    def test_scenario_grid_equals_three_factor_seasonal_value_per_scenario(self):
+        storage_start = '2019-12-01'
+        storage_end = '2020-02-01'
+        cmdty_storage = CmdtyStorage('D', storage_start, storage_end, 1.23, 0.98, min_inventory=0.0,
+                                     max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        inventory = 0.0
+        val_date = '2019-11-01'
+        forward_curve = utils.create_piecewise_flat_series([23.87, 35.32, 35.32],
+                                                           [val_date, '2020-01-12', storage_end], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        interest_rate_curve[:] = 0.03
+
+        def twentieth_of_next_month(period):
+            return period.asfreq('M').asfreq('D', 'end') + 20
+
+        spot_mean_reversion = 16.2
+        spot_volatility = 1.15
+        seasonal_volatility = 0.18
+        long_term_vol = 0.14
+        num_sims = 200
+        seed = 11
+        fwd_sim_seed = 12
+        basis_funcs = '1 + x_st + x_sw + x_lt + x_st**2 + x_sw**2 + x_lt**2'
+        shifted_forward_curve = forward_curve + 2.5
+        scenarios = [{}, {'fwd_curve': shifted_forward_curve}, {'spot_vol': 1.3}]
+
+        grid = scenario_grid(cmdty_storage, val_date, inventory, forward_curve, interest_rate_curve,
+                             twentieth_of_next_month, spot_mean_reversion, spot_volatility, long_term_vol,
+                             seasonal_volatility, num_sims, basis_funcs, False, scenarios, seed=seed,
+                             fwd_sim_seed=fwd_sim_seed)
+
+        self.assertEqual(['scenario', 'period', 'npv', 'npv_standard_error', 'delta', 'delta_standard_error'],
+                         list(grid.columns))
+        expected_params = [(forward_curve, spot_volatility), (shifted_forward_curve, spot_volatility),
+                           (forward_curve, 1.3)]
+        for scenario_idx, (scenario_fwd_curve, scenario_spot_vol) in enumerate(expected_params):
+            expected = three_factor_seasonal_value(cmdty_storage, val_date, inventory, scenario_fwd_curve,
+                                                   interest_rate_curve, twentieth_of_next_month,
+                                                   spot_mean_reversion, scenario_spot_vol, long_term_vol,
+                                                   seasonal_volatility, num_sims, basis_funcs, False, seed=seed,
+                                                   fwd_sim_seed=fwd_sim_seed,
+                                                   sim_data_returned=SimulationDataReturned.NONE)
+            scenario_rows = grid[grid['scenario'] == scenario_idx]
+            self.assertAlmostEqual(expected.npv, scenario_rows['npv'].iloc[0], delta=abs(expected.npv) * 1E-6)
+            self.assertEqual(len(expected.deltas), len(scenario_rows))
+            for expected_delta, delta in zip(expected.deltas, scenario_rows['delta']):
+                self.assertAlmostEqual(expected_delta, delta, delta=abs(expected_delta) * 1E-6 + 1E-6)
+
+    def test_scenario_grid_parameter_scenarios_no_fwd_sim_seed_equal_three_factor_seasonal_value(self):
+        cmdty_storage = CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                                     max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        val_date = '2019-11-01'
+        forward_curve = utils.create_piecewise_flat_series([23.87, 35.32, 35.32],
+                                                           [val_date, '2020-01-12', '2020-02-01'], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        interest_rate_curve[:] = 0.03
+
+        def twentieth_of_next_month(period):
+            return period.asfreq('M').asfreq('D', 'end') + 20
+
+        basis_funcs = '1 + x_st + x_sw + x_lt + x_st**2 + x_sw**2 + x_lt**2'
+        # Second scenario replays the normals generated by the first
+        scenario_spot_vols = [1.15, 1.3]
+        grid = scenario_grid(cmdty_storage, val_date, 0.0, forward_curve, interest_rate_curve, twentieth_of_next_month,
+                             16.2, 1.0, 0.14, 0.18, 200, basis_funcs, False,
+                             [{'spot_vol': spot_vol} for spot_vol in scenario_spot_vols], seed=11)
+        for scenario_idx, spot_vol in enumerate(scenario_spot_vols):
+            expected = three_factor_seasonal_value(cmdty_storage, val_date, 0.0, forward_curve, interest_rate_curve,
+                                                   twentieth_of_next_month, 16.2, spot_vol, 0.14, 0.18, 200,
+                                                   basis_funcs, False, seed=11,
+                                                   sim_data_returned=SimulationDataReturned.NONE)
+            scenario_rows = grid[grid['scenario'] == scenario_idx]
+            self.assertAlmostEqual(expected.npv, scenario_rows['npv'].iloc[0], delta=abs(expected.npv) * 1E-6)
+
+    def test_scenario_grid_forward_curve_inputs_equal_series_inputs(self):
+        cmdty_storage = CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                                     max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        val_date = '2019-11-01'
+        forward_curve = utils.create_piecewise_flat_series([23.87, 35.32, 35.32],
+                                                           [val_date, '2020-01-12', '2020-02-01'], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        interest_rate_curve[:] = 0.03
+
+        def twentieth_of_next_month(period):
+            return period.asfreq('M').asfreq('D', 'end') + 20
+
+        def value_grid(base_fwd_curve, scenario_fwd_curve):
+            return scenario_grid(cmdty_storage, val_date, 0.0, base_fwd_curve, interest_rate_curve,
+                                 twentieth_of_next_month, 16.2, 1.15, 0.14, 0.18, 200,
+                                 '1 + x_st + x_sw + x_lt + x_st**2 + x_sw**2 + x_lt**2', False,
+                                 [{}, {'fwd_curve': scenario_fwd_curve}], seed=11, fwd_sim_seed=12)
+
+        series_grid = value_grid(forward_curve, forward_curve + 2.5)
+        forward_curve_grid = value_grid(ForwardCurve(forward_curve), ForwardCurve(forward_curve).shifted(2.5))
+        pd.testing.assert_frame_equal(series_grid, forward_curve_grid)
+
+    def test_value_with_policy_same_seed_equals_multi_factor_value(self):
+        storage_start = '2019-12-01'
+        storage_end = '2020-02-01'
+        cmdty_storage = CmdtyStorage('D', storage_start, storage_end, 1.23, 0.98, min_inventory=0.0,
+                                     max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        inventory = 1000.0
+        val_date = '2019-11-01'
+        forward_curve = utils.create_piecewise_flat_series([23.87, 35.32, 35.32],
+                                                           [val_date, '2020-01-12', storage_end], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        interest_rate_curve[:] = 0.03
+
+        def twentieth_of_next_month(period):
+            return period.asfreq('M').asfreq('D', 'end') + 20
+
+        spot_volatility = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        spot_volatility[:] = 1.15
+        long_term_vol = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        long_term_vol[:] = 0.14
+        factors = [(0.0, long_term_vol), (16.2, spot_volatility)]
+        factor_corrs = 0.64
+        num_sims = 200
+        seed = 11
+        basis_funcs = '1 + x0 + x0**2 + x1 + x1*x1'
+
+        multi_factor_val = multi_factor_value(cmdty_storage, val_date, inventory, forward_curve,
+                                              interest_rate_curve, twentieth_of_next_month, factors, factor_corrs,
+                                              num_sims, basis_funcs, False, seed=seed, fwd_sim_seed=seed,
+                                              sim_data_returned=SimulationDataReturned.NONE)
+        policy = pickle.loads(pickle.dumps(multi_factor_val.policy))
+        self.assertEqual(basis_funcs, policy.basis_funcs)
+        np.testing.assert_array_equal(np.array([inventory]), policy.inventory_grid(policy.grid_periods[0]))
+
+        policy_val = value_with_policy(cmdty_storage, val_date, inventory, forward_curve, interest_rate_curve,
+                                       twentieth_of_next_month, policy, factors, factor_corrs, num_sims, False,
+                                       seed=seed)
+        self.assertAlmostEqual(multi_factor_val.npv, policy_val.npv, places=8)
+        np.testing.assert_array_almost_equal(multi_factor_val.deltas.values, policy_val.deltas.values, decimal=8)
+
+    def test_multi_factor_value_sim_data_returned_none_returns_empty_sim_data_same_npv(self):
+        cmdty_storage = CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                                     max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        val_date = '2019-11-01'
+        forward_curve = utils.create_piecewise_flat_series([23.87, 35.32, 35.32],
+                                                           [val_date, '2020-01-12', '2020-02-01'], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        interest_rate_curve[:] = 0.03
+        spot_volatility = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        spot_volatility[:] = 1.15
+
+        def value(sim_data_returned):
+            return multi_factor_value(cmdty_storage, val_date, 1000.0, forward_curve, interest_rate_curve,
+                                      lambda period: period.asfreq('M').asfreq('D', 'end') + 20,
+                                      [(16.2, spot_volatility)], None, 100, '1 + x0 + x0**2', False, seed=11,
+                                      sim_data_returned=sim_data_returned)
+
+        all_sim_data_val = value(SimulationDataReturned.ALL)
+        no_sim_data_val = value(None)
+        self.assertEqual(all_sim_data_val.npv, no_sim_data_val.npv)
+        for sim_panel in (no_sim_data_val.sim_spot_regress, no_sim_data_val.sim_spot_valuation,
+                          no_sim_data_val.sim_inventory, no_sim_data_val.sim_pv) + \
+                         no_sim_data_val.sim_factors_regress + no_sim_data_val.sim_factors_valuation:
+            self.assertTrue(sim_panel.empty)
+
+    def test_multi_factor_value_sim_data_dtype_float32_returns_float32_sim_data_same_npv(self):
+        cmdty_storage = CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                                     max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        val_date = '2019-11-01'
+        forward_curve = utils.create_piecewise_flat_series([23.87, 35.32, 35.32],
+                                                           [val_date, '2020-01-12', '2020-02-01'], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        interest_rate_curve[:] = 0.03
+        spot_volatility = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        spot_volatility[:] = 1.15
+
+        def value(sim_data_dtype):
+            return multi_factor_value(cmdty_storage, val_date, 1000.0, forward_curve, interest_rate_curve,
+                                      lambda period: period.asfreq('M').asfreq('D', 'end') + 20,
+                                      [(16.2, spot_volatility)], None, 100, '1 + x0 + x0**2', False, seed=11,
+                                      sim_data_dtype=sim_data_dtype)
+
+        float64_val = value(np.float64)
+        float32_val = value(np.float32)
+        self.assertEqual(float64_val.npv, float32_val.npv)
+        for float64_panel, float32_panel in zip((float64_val.sim_spot_valuation, float64_val.sim_inventory,
+                                                 float64_val.sim_pv, float64_val.sim_factors_valuation[0]),
+                                                (float32_val.sim_spot_valuation, float32_val.sim_inventory,
+                                                 float32_val.sim_pv, float32_val.sim_factors_valuation[0])):
+            self.assertTrue((float32_panel.dtypes == np.float32).all())
+            pd.testing.assert_index_equal(float64_panel.index, float32_panel.index)
+            np.testing.assert_allclose(float64_panel.values, float32_panel.values, rtol=1E-6)
+
+    def test_multi_factor_value_sim_statistics_quantiles_equal_statistics_of_sim_data(self):
+        cmdty_storage = CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                                     max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        val_date = '2019-11-01'
+        forward_curve = utils.create_piecewise_flat_series([23.87, 35.32, 35.32],
+                                                           [val_date, '2020-01-12', '2020-02-01'], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        interest_rate_curve[:] = 0.03
+        spot_volatility = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        spot_volatility[:] = 1.15
+        quantiles = [0.05, 0.5, 0.95]
+
+        val_results = multi_factor_value(cmdty_storage, val_date, 1000.0, forward_curve, interest_rate_curve,
+                                         lambda period: period.asfreq('M').asfreq('D', 'end') + 20,
+                                         [(16.2, spot_volatility)], None, 100, '1 + x0 + x0**2', False, seed=11,
+                                         sim_data_returned=SimulationDataReturned.INVENTORY,
+                                         sim_statistics_quantiles=quantiles)
+        inventory_stats = val_results.sim_inventory_stats
+        self.assertEqual(['mean', 'std', '5%', '50%', '95%'], list(inventory_stats.columns))
+        pd.testing.assert_index_equal(val_results.sim_inventory.index, inventory_stats.index)
+        np.testing.assert_allclose(val_results.sim_inventory.mean(axis=1).values, inventory_stats['mean'].values)
+        np.testing.assert_allclose(val_results.sim_inventory.std(axis=1).values, inventory_stats['std'].values,
+                                   atol=1E-8)
+        for quantile, column in zip(quantiles, ['5%', '50%', '95%']):
+            np.testing.assert_allclose(val_results.sim_inventory.quantile(quantile, axis=1).values,
+                                       inventory_stats[column].values)
+        self.assertEqual(len(inventory_stats), len(val_results.sim_pv_stats))
+        self.assertTrue(val_results.sim_pv.empty)
+
+    def test_multi_factor_value_timings_contain_phases_within_total(self):
+        cmdty_storage = CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                                     max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        val_date = '2019-11-01'
+        forward_curve = utils.create_piecewise_flat_series([23.87, 35.32, 35.32],
+                                                           [val_date, '2020-01-12', '2020-02-01'], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        interest_rate_curve[:] = 0.03
+        spot_volatility = pd.Series(index=pd.period_range(val_date, '2020-04-01', freq='D'), dtype='float64')
+        spot_volatility[:] = 1.15
+
+        val_results = multi_factor_value(cmdty_storage, val_date, 1000.0, forward_curve, interest_rate_curve,
+                                         lambda period: period.asfreq('M').asfreq('D', 'end') + 20,
+                                         [(16.2, spot_volatility)], None, 100, '1 + x0 + x0**2', False, seed=11,
+                                         sim_data_returned=None)
+        timings = val_results.timings
+        python_phases = ['input_conversion', 'basis_function_compilation', 'intrinsic', 'lsmc', 'results_conversion']
+        net_phases = ['lsmc_regression_sim', 'lsmc_backward_induction', 'lsmc_valuation_sim', 'lsmc_forward_sim']
+        for phase in python_phases + net_phases + ['lsmc_pseudo_inverse', 'total']:
+            self.assertGreaterEqual(timings[phase], 0.0)
+        self.assertLessEqual(sum(timings[phase] for phase in python_phases), timings['total'])
+        self.assertLessEqual(sum(timings[phase] for phase in net_phases), timings['lsmc'])
+        self.assertLessEqual(timings['lsmc_pseudo_inverse'], timings['lsmc_backward_induction'])
+
     @staticmethod
     def _save_valuation_results_csvs(val_results, root_path: str):
         val_results.deltas.to_csv(path.join(root_path, 'deltas.csv'), header=False)
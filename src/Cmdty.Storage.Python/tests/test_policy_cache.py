@@ -0,0 +1,145 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import os
+import functools
+import tempfile
+import pandas as pd
+import numpy as np
+from cmdty_storage import CmdtyStorage, multi_factor_value, SimulationDataReturned, PolicyCache
+from tests import utils
+
+
+class TestPolicyCache(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._storage = CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                                     max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        self._val_date = '2019-11-01'
+        self._inventory = 1000.0
+        self._fwd_curve = utils.create_piecewise_flat_series([23.87, 35.32, 35.32],
+                                                             [self._val_date, '2020-01-12', '2020-02-01'], freq='D')
+        self._interest_rates = pd.Series(index=pd.period_range(self._val_date, '2020-04-01', freq='D'),
+                                         dtype='float64')
+        self._interest_rates[:] = 0.03
+        spot_volatility = pd.Series(index=pd.period_range(self._val_date, '2020-04-01', freq='D'), dtype='float64')
+        spot_volatility[:] = 1.15
+        self._factors = [(16.2, spot_volatility)]
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _value(self, policy_cache, fwd_sim_seed=12):
+        def twentieth_of_next_month(period):
+            return period.asfreq('M').asfreq('D', 'end') + 20
+        return multi_factor_value(self._storage, self._val_date, self._inventory, self._fwd_curve,
+                                  self._interest_rates, twentieth_of_next_month, self._factors, None, 200,
+                                  '1 + x0 + x0**2', False, seed=11, fwd_sim_seed=fwd_sim_seed,
+                                  sim_data_returned=SimulationDataReturned.NONE, policy_cache=policy_cache)
+
+    def test_multi_factor_value_policy_cache_second_valuation_uses_cached_policy_same_results(self):
+        policy_cache = PolicyCache(self._temp_dir.name)
+        first_val = self._value(policy_cache)
+        self.assertEqual(1, len(list(policy_cache.directory.glob('*.npz'))))
+
+        second_val = self._value(PolicyCache(self._temp_dir.name))  # New instance as if process restarted
+        self.assertAlmostEqual(first_val.npv, second_val.npv, places=8)
+        np.testing.assert_array_almost_equal(first_val.deltas.values, second_val.deltas.values, decimal=8)
+
+    def test_multi_factor_value_policy_cache_no_fwd_sim_seed_second_valuation_same_results(self):
+        policy_cache = PolicyCache(self._temp_dir.name)
+        first_val = self._value(policy_cache, fwd_sim_seed=None)
+        self.assertEqual(1, len(list(policy_cache.directory.glob('*.npz'))))
+
+        # Valuing with the cached policy would reuse the regression paths, giving a different, in-sample, NPV
+        second_val = self._value(PolicyCache(self._temp_dir.name), fwd_sim_seed=None)
+        self.assertAlmostEqual(first_val.npv, second_val.npv, places=8)
+        np.testing.assert_array_almost_equal(first_val.deltas.values, second_val.deltas.values, decimal=8)
+
+    def test_get_after_put_returns_equal_policy(self):
+        policy = self._value(None).policy
+        policy_cache = PolicyCache(self._temp_dir.name)
+        policy_cache.put('key', policy)
+        cached_policy = policy_cache.get('key')
+        self.assertEqual(policy.val_period, cached_policy.val_period)
+        self.assertEqual(policy.basis_funcs, cached_policy.basis_funcs)
+        pd.testing.assert_index_equal(policy.grid_periods, cached_policy.grid_periods)
+        pd.testing.assert_index_equal(policy.regression_periods, cached_policy.regression_periods)
+        np.testing.assert_array_equal(policy.grid_values, cached_policy.grid_values)
+        np.testing.assert_array_equal(policy.regression_coeffs, cached_policy.regression_coeffs)
+
+    def test_get_unknown_key_returns_none(self):
+        self.assertIsNone(PolicyCache(self._temp_dir.name).get('unknown'))
+
+    def test_put_over_max_bytes_evicts_least_recently_used(self):
+        policy = self._value(None).policy
+        policy_cache = PolicyCache(self._temp_dir.name)
+        policy_cache.put('first', policy)
+        file_size = os.path.getsize(os.path.join(self._temp_dir.name, 'first.npz'))
+        os.utime(os.path.join(self._temp_dir.name, 'first.npz'), (0, 0))
+        policy_cache = PolicyCache(self._temp_dir.name, max_bytes=file_size * 3 // 2)
+        policy_cache.put('second', policy)
+        self.assertIsNone(policy_cache.get('first'))
+        self.assertIsNotNone(policy_cache.get('second'))
+
+    def test_key_equal_storage_created_separately_equal(self):
+        other_storage = CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                                     max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0)
+        policy_cache = PolicyCache(self._temp_dir.name)
+        key = policy_cache.key(self._storage, self._val_date, self._inventory, self._factors, '1 + x0', 200, 11)
+        self.assertEqual(key, policy_cache.key(other_storage, self._val_date, self._inventory, self._factors,
+                                               '1 + x0', 200, 11))
+        self.assertNotEqual(key, policy_cache.key(self._storage, self._val_date, self._inventory + 1.0,
+                                                  self._factors, '1 + x0', 200, 11))
+
+    def test_key_storage_with_terminal_storage_npv_function_without_key_raises(self):
+        storage = CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                               max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0,
+                               terminal_storage_npv=functools.partial(_terminal_npv, 0.5))
+        policy_cache = PolicyCache(self._temp_dir.name)
+        with self.assertRaises(ValueError):
+            policy_cache.key(storage, self._val_date, self._inventory, self._factors, '1 + x0', 200, 11)
+
+    def test_key_storage_with_terminal_storage_npv_key_depends_on_key(self):
+        def create_storage(terminal_storage_npv_key):
+            return CmdtyStorage('D', '2019-12-01', '2020-02-01', 1.23, 0.98, min_inventory=0.0,
+                                max_inventory=100000.0, max_injection_rate=700.0, max_withdrawal_rate=700.0,
+                                terminal_storage_npv=functools.partial(_terminal_npv, 0.5),
+                                terminal_storage_npv_key=terminal_storage_npv_key)
+        policy_cache = PolicyCache(self._temp_dir.name)
+        key = policy_cache.key(create_storage('half_price'), self._val_date, self._inventory, self._factors,
+                               '1 + x0', 200, 11)
+        self.assertEqual(key, policy_cache.key(create_storage('half_price'), self._val_date, self._inventory,
+                                               self._factors, '1 + x0', 200, 11))
+        self.assertNotEqual(key, policy_cache.key(create_storage('other'), self._val_date, self._inventory,
+                                                  self._factors, '1 + x0', 200, 11))
+
+
+def _terminal_npv(price_multiplier, cmdty_price, terminal_inventory):
+    return price_multiplier * cmdty_price * terminal_inventory
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -198,6 +198,130 @@ def test_trinomial_delta_deep_itm_equals_intrinsic_delta(self):
         self.assertAlmostEqual(pcnt_error, 0.0, 3)
         self.assertTrue(isinstance(trinomial_deltas, list))
 
+    def test_trinomial_value_with_deltas_consistent_with_bumped_deltas(self):
+        storage_start = '2019-12-01'
+        storage_end = '2020-04-01'
+        cmdty_storage = cs.CmdtyStorage('D', storage_start, storage_end, injection_cost=1.23, withdrawal_cost=0.98,
+                                        min_inventory=0.0, max_inventory=10000.0, max_injection_rate=700.0,
+                                        max_withdrawal_rate=700.0)
+        inventory = 1500.0
+        val_date = '2019-11-15'
+        forward_curve = utils.create_piecewise_flat_series([23.87, 25.5, 29.32, 29.32],
+                                                           [val_date, '2020-01-01', '2020-03-01', storage_end], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, '2020-06-01', freq='D'), dtype='float64')
+        # High rate so deltas discounted to storage start rather than val_date would be outside the tolerance
+        interest_rate_curve[:] = 0.25
+        spot_volatility = pd.Series(index=pd.period_range(val_date, '2020-06-01', freq='D'), dtype='float64')
+        spot_volatility[:] = 0.85
+        mean_reversion = 14.5
+        time_step = 1.0 / 365.0
+        twentieth_of_next_month = lambda period: period.asfreq('M').asfreq('D', 'end') + 20
+
+        value_with_deltas = cs.trinomial_value_with_deltas(cmdty_storage, val_date, inventory, forward_curve,
+                                            spot_volatility, mean_reversion, time_step,
+                                            interest_rates=interest_rate_curve, settlement_rule=twentieth_of_next_month)
+        npv = cs.trinomial_value(cmdty_storage, val_date, inventory, forward_curve, spot_volatility, mean_reversion,
+                                 time_step, interest_rates=interest_rate_curve, settlement_rule=twentieth_of_next_month)
+        self.assertAlmostEqual(npv, value_with_deltas.npv, places=8)
+        self.assertEqual(pd.Period(storage_end, freq='D'), value_with_deltas.deltas.index[-1])
+
+        fwd_contracts = [pd.Period('2019-12', freq='M'), pd.Period('2020-01', freq='M'), pd.Period('2020-03', freq='M')]
+        pathwise_deltas = cs.trinomial_deltas(cmdty_storage, val_date, inventory, forward_curve, spot_volatility,
+                                              mean_reversion, time_step, interest_rates=interest_rate_curve,
+                                              settlement_rule=twentieth_of_next_month, fwd_contracts=fwd_contracts,
+                                              method='pathwise')
+        bumped_deltas = cs.trinomial_deltas(cmdty_storage, val_date, inventory, forward_curve, spot_volatility,
+                                            mean_reversion, time_step, interest_rates=interest_rate_curve,
+                                            settlement_rule=twentieth_of_next_month, fwd_contracts=fwd_contracts,
+                                            delta_shift=0.001, method='bump')
+        for pathwise_delta, bumped_delta in zip(pathwise_deltas, bumped_deltas):
+            self.assertAlmostEqual(pathwise_delta, bumped_delta, delta=abs(bumped_delta) * 0.005 + 1E-6)
+
+        single_thread_bumped_deltas = cs.trinomial_deltas(cmdty_storage, val_date, inventory, forward_curve,
+                                            spot_volatility, mean_reversion, time_step,
+                                            interest_rates=interest_rate_curve, settlement_rule=twentieth_of_next_month,
+                                            fwd_contracts=fwd_contracts, delta_shift=0.001, method='bump', max_workers=1)
+        for single_thread_delta, bumped_delta in zip(single_thread_bumped_deltas, bumped_deltas):
+            self.assertAlmostEqual(single_thread_delta, bumped_delta, places=10)
+
+        for method, expected_deltas in (('pathwise', pathwise_deltas), ('bump', bumped_deltas)):
+            generator_deltas = cs.trinomial_deltas(cmdty_storage, val_date, inventory, forward_curve, spot_volatility,
+                                            mean_reversion, time_step, interest_rates=interest_rate_curve,
+                                            settlement_rule=twentieth_of_next_month,
+                                            fwd_contracts=(fwd_contract for fwd_contract in fwd_contracts),
+                                            delta_shift=0.001, method=method)
+            self.assertEqual(len(expected_deltas), len(generator_deltas))
+            for generator_delta, expected_delta in zip(generator_deltas, expected_deltas):
+                self.assertAlmostEqual(generator_delta, expected_delta, places=10)
+
+    def test_trinomial_value_with_tree_equals_value_without_tree(self):
+        storage_start = '2019-12-01'
+        storage_end = '2020-04-01'
+        cmdty_storage = cs.CmdtyStorage('D', storage_start, storage_end, injection_cost=1.23, withdrawal_cost=0.98,
+                                        min_inventory=0.0, max_inventory=10000.0, max_injection_rate=700.0,
+                                        max_withdrawal_rate=700.0)
+        val_date = '2019-11-15'
+        forward_curve = utils.create_piecewise_flat_series([23.87, 25.5, 29.32, 29.32],
+                                                           [val_date, '2020-01-01', '2020-03-01', storage_end], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, '2020-06-01', freq='D'), dtype='float64')
+        interest_rate_curve[:] = 0.025
+        spot_volatility = pd.Series(index=pd.period_range(val_date, '2020-06-01', freq='D'), dtype='float64')
+        spot_volatility[:] = 0.85
+        mean_reversion = 14.5
+        time_step = 1.0 / 365.0
+        twentieth_of_next_month = lambda period: period.asfreq('M').asfreq('D', 'end') + 20
+
+        tree = cs.TrinomialTree('D', val_date, storage_end, spot_volatility, mean_reversion, time_step)
+        for inventory in [0.0, 1500.0]:
+            npv = cs.trinomial_value(cmdty_storage, val_date, inventory, forward_curve, spot_volatility,
+                                     mean_reversion, time_step, interest_rates=interest_rate_curve,
+                                     settlement_rule=twentieth_of_next_month)
+            npv_with_tree = cs.trinomial_value(cmdty_storage, val_date, inventory, forward_curve, None, None, None,
+                                               interest_rates=interest_rate_curve,
+                                               settlement_rule=twentieth_of_next_month, tree=tree)
+            self.assertAlmostEqual(npv, npv_with_tree, places=8)
+
+    def test_trinomial_value_with_tree_starting_after_val_date_raises(self):
+        cmdty_storage = cs.CmdtyStorage('D', '2019-12-01', '2020-04-01', injection_cost=1.23, withdrawal_cost=0.98,
+                                        min_inventory=0.0, max_inventory=10000.0, max_injection_rate=700.0,
+                                        max_withdrawal_rate=700.0)
+        spot_volatility = pd.Series(index=pd.period_range('2019-11-15', '2020-06-01', freq='D'), dtype='float64')
+        spot_volatility[:] = 0.85
+        forward_curve = pd.Series(index=pd.period_range('2019-11-15', '2020-06-01', freq='D'), dtype='float64')
+        forward_curve[:] = 25.0
+        tree = cs.TrinomialTree('D', '2019-11-16', '2020-04-01', spot_volatility, 14.5, 1.0 / 365.0)
+        with self.assertRaises(ValueError):
+            cs.trinomial_value(cmdty_storage, '2019-11-15', 0.0, forward_curve, None, None, None,
+                               interest_rates=forward_curve * 0.0, settlement_rule=lambda period: period.asfreq('D'),
+                               tree=tree)
+
+    def test_trinomial_value_ladder_approximately_equals_trinomial_value(self):
+        storage_start = '2019-12-01'
+        storage_end = '2020-04-01'
+        cmdty_storage = cs.CmdtyStorage('D', storage_start, storage_end, injection_cost=1.23, withdrawal_cost=0.98,
+                                        min_inventory=0.0, max_inventory=10000.0, max_injection_rate=700.0,
+                                        max_withdrawal_rate=700.0)
+        val_date = '2019-11-15'
+        forward_curve = utils.create_piecewise_flat_series([23.87, 25.5, 29.32, 29.32],
+                                                           [val_date, '2020-01-01', '2020-03-01', storage_end], freq='D')
+        interest_rate_curve = pd.Series(index=pd.period_range(val_date, '2020-06-01', freq='D'), dtype='float64')
+        interest_rate_curve[:] = 0.025
+        spot_volatility = pd.Series(index=pd.period_range(val_date, '2020-06-01', freq='D'), dtype='float64')
+        spot_volatility[:] = 0.85
+        mean_reversion = 14.5
+        time_step = 1.0 / 365.0
+        twentieth_of_next_month = lambda period: period.asfreq('M').asfreq('D', 'end') + 20
+
+        inventories = [0.0, 1500.0, 6000.0]
+        ladder = cs.trinomial_value_ladder(cmdty_storage, val_date, forward_curve, spot_volatility, mean_reversion,
+                                           time_step, interest_rate_curve, twentieth_of_next_month,
+                                           inventories=inventories)
+        for inventory, ladder_npv in zip(inventories, ladder.npvs):
+            npv = cs.trinomial_value(cmdty_storage, val_date, inventory, forward_curve, spot_volatility,
+                                     mean_reversion, time_step, interest_rates=interest_rate_curve,
+                                     settlement_rule=twentieth_of_next_month)
+            self.assertAlmostEqual(npv, ladder_npv, delta=abs(npv) * 1E-3)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,54 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+from datetime import date, datetime
+import pandas as pd
+from cmdty_storage import utils
+
+
+class TestFromDateTimeLike(unittest.TestCase):
+
+    def test_period_same_freq_equals_conversion_from_start_datetime(self):
+        for freq in ('H', 'D', 'M'):
+            time_period_type = utils.FREQ_TO_PERIOD_TYPE[freq]
+            for period in pd.period_range('1999-11-30 22:00', periods=50, freq=freq):
+                expected = utils.from_datetime_like(period.start_time.to_pydatetime(), time_period_type)
+                self.assertEqual(expected, utils.from_datetime_like(period, time_period_type))
+
+    def test_period_different_freq_converts_from_start(self):
+        expected = utils.from_datetime_like(date(2021, 3, 1), utils.FREQ_TO_PERIOD_TYPE['D'])
+        actual = utils.from_datetime_like(pd.Period('2021-03', freq='M'), utils.FREQ_TO_PERIOD_TYPE['D'])
+        self.assertEqual(expected, actual)
+
+    def test_repeated_conversion_uses_cache(self):
+        time_period_type = utils.FREQ_TO_PERIOD_TYPE['D']
+        utils.from_datetime_like('2021-03-04', time_period_type)
+        hits_before = utils._cached_from_datetime_like.cache_info().hits
+        net_day = utils.from_datetime_like('2021-03-04', time_period_type)
+        self.assertEqual(hits_before + 1, utils._cached_from_datetime_like.cache_info().hits)
+        self.assertEqual(utils.from_datetime_like(datetime(2021, 3, 4), time_period_type), net_day)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+# Copyright(c) 2024 Jake Fowler
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, 
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import unittest
+import cmdty_storage as cs
+
+
+class TestWarmUp(unittest.TestCase):
+
+    def test_warm_up_returns_timing_for_each_freq_and_engine(self):
+        timings = cs.warm_up(freqs=('D', 'M'), engines=('intrinsic', 'lsmc', 'tree'))
+        self.assertEqual({(freq, engine) for freq in ('D', 'M') for engine in ('intrinsic', 'lsmc', 'tree')},
+                         set(timings.valuations))
+        self.assertTrue(all(seconds >= 0.0 for seconds in timings.valuations.values()))
+        self.assertGreaterEqual(timings.total, timings.load + sum(timings.valuations.values()) - 1E-9)
+
+    def test_warm_up_no_engines_only_loads(self):
+        timings = cs.warm_up(engines=())
+        self.assertEqual({}, timings.valuations)
+
+    def test_warm_up_unknown_engine_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            cs.warm_up(engines=('intrinsic', 'not_an_engine'))
+
+    def test_warm_up_unknown_freq_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            cs.warm_up(freqs=('not_a_freq',))
+
+
+if __name__ == '__main__':
+    unittest.main()
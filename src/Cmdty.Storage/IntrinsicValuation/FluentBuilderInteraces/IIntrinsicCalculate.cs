@@ -23,6 +23,7 @@
 // OTHER DEALINGS IN THE SOFTWARE.
 #endregion
 
+using System.Threading;
 using Cmdty.TimePeriodValueTypes;
 
 namespace Cmdty.Storage
@@ -30,6 +31,8 @@ namespace Cmdty.Storage
     public interface IIntrinsicCalculate<T>
         where T : ITimePeriod<T>
     {
-        IntrinsicStorageValuationResults<T> Calculate();
+        /// <param name="cancellationToken">Checked before the backward induction of each period, throwing
+        /// <see cref="System.OperationCanceledException"/> if cancellation has been requested.</param>
+        IntrinsicStorageValuationResults<T> Calculate(CancellationToken cancellationToken = default);
     }
 }
\ No newline at end of file
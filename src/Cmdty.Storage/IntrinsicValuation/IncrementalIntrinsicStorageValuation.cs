@@ -0,0 +1,199 @@
+﻿#region License
+// Copyright (c) 2024 Jake Fowler
+//
+// Permission is hereby granted, free of charge, to any person 
+// obtaining a copy of this software and associated documentation 
+// files (the "Software"), to deal in the Software without 
+// restriction, including without limitation the rights to use, 
+// copy, modify, merge, publish, distribute, sublicense, and/or sell 
+// copies of the Software, and to permit persons to whom the 
+// Software is furnished to do so, subject to the following 
+// conditions:
+//
+// The above copyright notice and this permission notice shall be 
+// included in all copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES 
+// OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND 
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT 
+// HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+// WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+// FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR 
+// OTHER DEALINGS IN THE SOFTWARE.
+
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Threading;
+using Cmdty.TimePeriodValueTypes;
+using Cmdty.TimeSeries;
+using JetBrains.Annotations;
+
+namespace Cmdty.Storage
+{
+    /// <summary>
+    /// Intrinsic valuation which keeps the storage value functions from backward induction between calculations, so
+    /// that after changes to the forward curve only the stages affected by the changes are recalculated. The value
+    /// function of each stage depends only on forward prices for its own and later periods, so the stages after the
+    /// last changed period are reused. If a calculation is cancelled, the stages it had not finished recalculating are
+    /// recalculated by the next call to <see cref="UpdateForwardCurve"/>.
+    /// </summary>
+    public sealed class IncrementalIntrinsicStorageValuation<T>
+        where T : ITimePeriod<T>
+    {
+        private readonly ICmdtyStorage<T> _storage;
+        private readonly T _currentPeriod;
+        private readonly double _startingInventory;
+        private readonly Func<T, Day> _settleDateRule;
+        private readonly Func<Day, double> _discountToCurrentDay;
+        private readonly IDoubleStateSpaceGridCalc _gridCalc;
+        private readonly IInterpolatorFactory _interpolatorFactory;
+        private readonly double _numericalTolerance;
+        private readonly TimeSeries<T, InventoryRange> _inventorySpace;
+        private readonly Func<double, double>[] _storageValueByInventory;
+
+        private const int NoStaleStages = -2;
+
+        private TimeSeries<T, double> _forwardCurve;
+        private IntrinsicStorageValuationResults<T> _results;
+        private int _staleFromStage = NoStaleStages;
+
+        public IncrementalIntrinsicStorageValuation([NotNull] ICmdtyStorage<T> storage, [NotNull] T currentPeriod, 
+            double startingInventory, [NotNull] TimeSeries<T, double> forwardCurve, [NotNull] Func<T, Day> settleDateRule, 
+            [NotNull] Func<Day, Day, double> discountFactors, 
+            [NotNull] Func<ICmdtyStorage<T>, IDoubleStateSpaceGridCalc> gridCalcFactory,
+            [NotNull] IInterpolatorFactory interpolatorFactory, double numericalTolerance,
+            CancellationToken cancellationToken = default)
+        {
+            if (currentPeriod == null)
+                throw new ArgumentNullException(nameof(currentPeriod));
+            if (discountFactors == null)
+                throw new ArgumentNullException(nameof(discountFactors));
+            if (gridCalcFactory == null)
+                throw new ArgumentNullException(nameof(gridCalcFactory));
+            if (numericalTolerance <= 0)
+                throw new ArgumentException("Numerical tolerance must be positive.", nameof(numericalTolerance));
+            _storage = storage ?? throw new ArgumentNullException(nameof(storage));
+            _forwardCurve = forwardCurve ?? throw new ArgumentNullException(nameof(forwardCurve));
+            _settleDateRule = settleDateRule ?? throw new ArgumentNullException(nameof(settleDateRule));
+            _interpolatorFactory = interpolatorFactory ?? throw new ArgumentNullException(nameof(interpolatorFactory));
+            _currentPeriod = currentPeriod;
+            _startingInventory = startingInventory;
+            _numericalTolerance = numericalTolerance;
+
+            if (IntrinsicStorageValuation<T>.TryCalculateTrivial(currentPeriod, startingInventory, forwardCurve, storage,
+                    out _results))
+            {
+                NumStagesRecalculated = 0;
+                return;
+            }
+
+            _inventorySpace = StorageHelper.CalculateInventorySpace(storage, startingInventory, currentPeriod);
+            IntrinsicStorageValuation<T>.ValidateForwardCurve(forwardCurve, _inventorySpace);
+            _discountToCurrentDay = IntrinsicStorageValuation<T>.CreateDiscounterToCurrentDay(currentPeriod, discountFactors);
+            _gridCalc = gridCalcFactory(storage);
+            _storageValueByInventory = new Func<double, double>[_inventorySpace.Count];
+            Recalculate(_inventorySpace.Count - 1, cancellationToken);
+        }
+
+        public IncrementalIntrinsicStorageValuation([NotNull] ICmdtyStorage<T> storage, [NotNull] T currentPeriod,
+            double startingInventory, [NotNull] TimeSeries<T, double> forwardCurve, [NotNull] Func<T, Day> settleDateRule,
+            [NotNull] Func<Day, Day, double> discountFactors, int numInventoryGridPoints, double numericalTolerance,
+            CancellationToken cancellationToken = default)
+            : this(storage, currentPeriod, startingInventory, forwardCurve, settleDateRule, discountFactors,
+                InventorySpaceGrid.FixedNumberOfPointsOnGlobalInventoryRangeFactory<T>(numInventoryGridPoints), 
+                new LinearInterpolatorFactory(), numericalTolerance, cancellationToken)
+        {
+        }
+
+        public TimeSeries<T, double> ForwardCurve => _forwardCurve;
+
+        public IntrinsicStorageValuationResults<T> Results => _results;
+
+        /// <summary>
+        /// Number of backward induction stages recalculated by the most recent calculation.
+        /// </summary>
+        public int NumStagesRecalculated { get; private set; }
+
+        /// <summary>
+        /// Updates the prices of forward curve periods and revalues, recalculating the storage value functions only for
+        /// stages on or before the last period with a changed price.
+        /// </summary>
+        /// <param name="periods">Periods with new prices. All must be within the current forward curve.</param>
+        /// <param name="prices">New prices, in the same order as <paramref name="periods"/>.</param>
+        /// <param name="cancellationToken">Checked before the backward induction of each period. If cancelled, the
+        /// forward curve is still updated but <see cref="Results"/> is left unchanged.</param>
+        public IntrinsicStorageValuationResults<T> UpdateForwardCurve([NotNull] IReadOnlyList<T> periods, 
+                                                                      [NotNull] IReadOnlyList<double> prices,
+                                                                      CancellationToken cancellationToken = default)
+        {
+            if (periods == null) throw new ArgumentNullException(nameof(periods));
+            if (prices == null) throw new ArgumentNullException(nameof(prices));
+            if (periods.Count != prices.Count)
+                throw new ArgumentException($"Parameters {nameof(periods)} and {nameof(prices)} must have the same number of elements.");
+
+            double[] newPrices = _forwardCurve.Data.ToArray();
+            T lastChangedPeriod = default(T);
+            bool anyChanged = false;
+            for (int i = 0; i < periods.Count; i++)
+            {
+                T period = periods[i];
+                if (period.CompareTo(_forwardCurve.Start) < 0 || period.CompareTo(_forwardCurve.End) > 0)
+                    throw new ArgumentException($"Period {period} is outside of the forward curve, which runs from " +
+                                                $"{_forwardCurve.Start} to {_forwardCurve.End}.", nameof(periods));
+                int index = period.OffsetFrom(_forwardCurve.Start);
+                // ReSharper disable once CompareOfFloatsByEqualityOperator
+                if (newPrices[index] == prices[i])
+                    continue;
+                newPrices[index] = prices[i];
+                // Prices before the current period or after the storage end do not affect the valuation
+                if (period.CompareTo(_currentPeriod) < 0 || period.CompareTo(_storage.EndPeriod) > 0)
+                    continue;
+                if (!anyChanged || period.CompareTo(lastChangedPeriod) > 0)
+                    lastChangedPeriod = period;
+                anyChanged = true;
+            }
+
+            _forwardCurve = new TimeSeries<T, double>(_forwardCurve.Start, newPrices);
+
+            if (!anyChanged && _staleFromStage == NoStaleStages)
+            {
+                NumStagesRecalculated = 0;
+                return _results;
+            }
+
+            if (_inventorySpace == null)
+            {
+                IntrinsicStorageValuation<T>.TryCalculateTrivial(_currentPeriod, _startingInventory, _forwardCurve, _storage,
+                    out _results);
+                NumStagesRecalculated = 0;
+                return _results;
+            }
+
+            // Stage -1, i.e. a change only to the price of the first period of the profile, requires just the forward pass
+            int fromStage = anyChanged ? Math.Max(lastChangedPeriod.OffsetFrom(_inventorySpace.Start), -1) : -1;
+            Recalculate(Math.Max(fromStage, _staleFromStage), cancellationToken);
+            return _results;
+        }
+
+        private void Recalculate(int fromStage, CancellationToken cancellationToken)
+        {
+            try
+            {
+                IntrinsicStorageValuation<T>.BackwardInduction(_storageValueByInventory, fromStage, _inventorySpace, 
+                    _forwardCurve, _storage, _settleDateRule, _discountToCurrentDay, _gridCalc, _interpolatorFactory, 
+                    _numericalTolerance, cancellationToken);
+            }
+            catch (OperationCanceledException)
+            {
+                _staleFromStage = Math.Max(_staleFromStage, fromStage);
+                throw;
+            }
+            _staleFromStage = NoStaleStages;
+            NumStagesRecalculated = fromStage + 1;
+            _results = IntrinsicStorageValuation<T>.ForwardPass(_storageValueByInventory, _startingInventory, _inventorySpace,
+                _forwardCurve, _storage, _settleDateRule, _discountToCurrentDay, _numericalTolerance);
+        }
+    }
+}
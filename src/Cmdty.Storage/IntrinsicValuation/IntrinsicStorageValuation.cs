@@ -26,6 +26,7 @@
 using System;
 using System.Collections.Generic;
 using System.Linq;
+using System.Threading;
 using Cmdty.TimePeriodValueTypes;
 using Cmdty.TimeSeries;
 using JetBrains.Annotations;
@@ -111,22 +112,128 @@ IIntrinsicCalculate<T> IIntrinsicAddNumericalTolerance<T>.WithNumericalTolerance
             return this;
         }
 
-        IntrinsicStorageValuationResults<T> IIntrinsicCalculate<T>.Calculate()
+        IntrinsicStorageValuationResults<T> IIntrinsicCalculate<T>.Calculate(CancellationToken cancellationToken)
         {
             return Calculate(_currentPeriod, _startingInventory, _forwardCurve, _storage, _settleDateRule, _discountFactors,
-                    _gridCalcFactory, _interpolatorFactory, _numericalTolerance);
+                    _gridCalcFactory, _interpolatorFactory, _numericalTolerance, cancellationToken);
         }
 
         private static IntrinsicStorageValuationResults<T> Calculate(T currentPeriod, double startingInventory,
                 TimeSeries<T, double> forwardCurve, ICmdtyStorage<T> storage, Func<T, Day> settleDateRule,
                 Func<Day, Day, double> discountFactors, Func<ICmdtyStorage<T>, IDoubleStateSpaceGridCalc> gridCalcFactory,
-                IInterpolatorFactory interpolatorFactory, double numericalTolerance)
+                IInterpolatorFactory interpolatorFactory, double numericalTolerance, CancellationToken cancellationToken)
+        {
+            if (TryCalculateTrivial(currentPeriod, startingInventory, forwardCurve, storage, out var trivialResults))
+                return trivialResults;
+
+            TimeSeries<T, InventoryRange> inventorySpace = StorageHelper.CalculateInventorySpace(storage, startingInventory, currentPeriod);
+            ValidateForwardCurve(forwardCurve, inventorySpace);
+
+            Func<Day, double> discountToCurrentDay = CreateDiscounterToCurrentDay(currentPeriod, discountFactors);
+
+            var storageValueByInventory = new Func<double, double>[inventorySpace.Count];
+            BackwardInduction(storageValueByInventory, inventorySpace.Count - 1, inventorySpace, forwardCurve, storage,
+                settleDateRule, discountToCurrentDay, gridCalcFactory(storage), interpolatorFactory, numericalTolerance,
+                cancellationToken);
+
+            return ForwardPass(storageValueByInventory, startingInventory, inventorySpace, forwardCurve, storage,
+                settleDateRule, discountToCurrentDay, numericalTolerance);
+        }
+
+        /// <summary>
+        /// Calculates the storage value for each of <paramref name="startingInventories"/> from a single backward
+        /// induction over the inventory space reachable from any of them. Values are taken from the storage value
+        /// function of the current period, so can differ slightly from the NPV of a valuation for a single inventory,
+        /// which is the sum of the period PVs of the forward pass. Elements for inventories from which the storage
+        /// constraints cannot be fulfilled are NaN.
+        /// </summary>
+        /// <param name="cancellationToken">Checked before the backward induction of each period.</param>
+        public static double[] CalculateInventoryLadder([NotNull] ICmdtyStorage<T> storage, [NotNull] T currentPeriod,
+                [NotNull] double[] startingInventories, [NotNull] TimeSeries<T, double> forwardCurve, 
+                [NotNull] Func<T, Day> settleDateRule, [NotNull] Func<Day, Day, double> discountFactors, 
+                [NotNull] Func<ICmdtyStorage<T>, IDoubleStateSpaceGridCalc> gridCalcFactory,
+                [NotNull] IInterpolatorFactory interpolatorFactory, double numericalTolerance,
+                CancellationToken cancellationToken = default)
+        {
+            if (storage == null) throw new ArgumentNullException(nameof(storage));
+            if (currentPeriod == null) throw new ArgumentNullException(nameof(currentPeriod));
+            if (startingInventories == null) throw new ArgumentNullException(nameof(startingInventories));
+            if (forwardCurve == null) throw new ArgumentNullException(nameof(forwardCurve));
+            if (settleDateRule == null) throw new ArgumentNullException(nameof(settleDateRule));
+            if (discountFactors == null) throw new ArgumentNullException(nameof(discountFactors));
+            if (gridCalcFactory == null) throw new ArgumentNullException(nameof(gridCalcFactory));
+            if (interpolatorFactory == null) throw new ArgumentNullException(nameof(interpolatorFactory));
+            if (numericalTolerance <= 0)
+                throw new ArgumentException("Numerical tolerance must be positive.", nameof(numericalTolerance));
+            if (startingInventories.Any(inventory => inventory < 0))
+                throw new ArgumentException("Inventory cannot be negative.", nameof(startingInventories));
+
+            var npvs = new double[startingInventories.Length];
+            if (startingInventories.Length == 0)
+                return npvs;
+
+            if (currentPeriod.CompareTo(storage.EndPeriod) >= 0)
+            {
+                for (int i = 0; i < startingInventories.Length; i++)
+                {
+                    try
+                    {
+                        TryCalculateTrivial(currentPeriod, startingInventories[i], forwardCurve, storage, out var trivialResults);
+                        npvs[i] = trivialResults.Npv;
+                    }
+                    catch (InventoryConstraintsCannotBeFulfilledException)
+                    {
+                        npvs[i] = double.NaN;
+                    }
+                }
+                return npvs;
+            }
+
+            TimeSeries<T, InventoryRange> inventorySpace = StorageHelper.CalculateInventorySpaceForStartingRange(storage,
+                                        startingInventories.Min(), startingInventories.Max(), currentPeriod);
+            ValidateForwardCurve(forwardCurve, inventorySpace);
+
+            Func<Day, double> discountToCurrentDay = CreateDiscounterToCurrentDay(currentPeriod, discountFactors);
+
+            var storageValueByInventory = new Func<double, double>[inventorySpace.Count];
+            BackwardInduction(storageValueByInventory, inventorySpace.Count - 1, inventorySpace, forwardCurve, storage,
+                settleDateRule, discountToCurrentDay, gridCalcFactory(storage), interpolatorFactory, numericalTolerance,
+                cancellationToken);
+
+            T startActiveStorage = inventorySpace.Start.Offset(-1);
+            double cmdtyPrice = forwardCurve[startActiveStorage];
+            double discountFactorFromCmdtySettlement = discountToCurrentDay(settleDateRule(startActiveStorage));
+            (double nextStepInventorySpaceMin, double nextStepInventorySpaceMax) = inventorySpace[inventorySpace.Start];
+            for (int i = 0; i < startingInventories.Length; i++)
+            {
+                if (!StorageHelper.IsInventoryFeasible(storage, startActiveStorage, startingInventories[i], 
+                        nextStepInventorySpaceMin, nextStepInventorySpaceMax, numericalTolerance))
+                {
+                    npvs[i] = double.NaN;
+                    continue;
+                }
+                npvs[i] = OptimalDecisionAndValue(storage, startActiveStorage, startingInventories[i], nextStepInventorySpaceMin,
+                    nextStepInventorySpaceMax, cmdtyPrice, storageValueByInventory[0], discountFactorFromCmdtySettlement,
+                    discountToCurrentDay, numericalTolerance).StorageNpv;
+            }
+            return npvs;
+        }
+
+        /// <summary>
+        /// Handles the cases where the current period is on or after the storage end period, for which no backward
+        /// induction is required.
+        /// </summary>
+        internal static bool TryCalculateTrivial(T currentPeriod, double startingInventory, TimeSeries<T, double> forwardCurve,
+                        ICmdtyStorage<T> storage, out IntrinsicStorageValuationResults<T> results)
         {
             if (startingInventory < 0)
                 throw new ArgumentException("Inventory cannot be negative.", nameof(startingInventory));
 
             if (currentPeriod.CompareTo(storage.EndPeriod) > 0)
-                return new IntrinsicStorageValuationResults<T>(0.0, TimeSeries<T, StorageProfile>.Empty);
+            {
+                results = new IntrinsicStorageValuationResults<T>(0.0, TimeSeries<T, StorageProfile>.Empty);
+                return true;
+            }
 
             if (currentPeriod.Equals(storage.EndPeriod))
             {
@@ -134,7 +241,8 @@ IntrinsicStorageValuationResults<T> IIntrinsicCalculate<T>.Calculate()
                 {
                     if (startingInventory > 0) // TODO allow some tolerance for floating point numerical error?
                         throw new InventoryConstraintsCannotBeFulfilledException("Storage must be empty at end, but inventory is greater than zero.");
-                    return new IntrinsicStorageValuationResults<T>(0.0, TimeSeries<T, StorageProfile>.Empty);
+                    results = new IntrinsicStorageValuationResults<T>(0.0, TimeSeries<T, StorageProfile>.Empty);
+                    return true;
                 }
 
                 double terminalMinInventory = storage.MinInventory(storage.EndPeriod);
@@ -148,11 +256,16 @@ IntrinsicStorageValuationResults<T> IIntrinsicCalculate<T>.Calculate()
 
                 double cmdtyPrice = forwardCurve[storage.EndPeriod];
                 double npv = storage.TerminalStorageNpv(cmdtyPrice, startingInventory);
-                return new IntrinsicStorageValuationResults<T>(npv, TimeSeries<T, StorageProfile>.Empty);
+                results = new IntrinsicStorageValuationResults<T>(npv, TimeSeries<T, StorageProfile>.Empty);
+                return true;
             }
 
-            TimeSeries<T, InventoryRange> inventorySpace = StorageHelper.CalculateInventorySpace(storage, startingInventory, currentPeriod);
+            results = null;
+            return false;
+        }
 
+        internal static void ValidateForwardCurve(TimeSeries<T, double> forwardCurve, TimeSeries<T, InventoryRange> inventorySpace)
+        {
             // TODO think of method to put in TimeSeries class to perform the validation check below in one line
             if (forwardCurve.IsEmpty)
                 throw new ArgumentException("Forward curve cannot be empty.", nameof(forwardCurve));
@@ -162,10 +275,12 @@ IntrinsicStorageValuationResults<T> IIntrinsicCalculate<T>.Calculate()
 
             if (forwardCurve.End.CompareTo(inventorySpace.End) < 0)
                 throw new ArgumentException("Forward curve does not extend until storage end period.", nameof(forwardCurve));
+        }
 
-            // Calculate discount factor function
+        internal static Func<Day, double> CreateDiscounterToCurrentDay(T currentPeriod, Func<Day, Day, double> discountFactors)
+        {
             Day dayToDiscountTo = currentPeriod.First<Day>(); // TODO IMPORTANT, this needs to change
-            
+
             // Memoize the discount factor
             var discountFactorCache = new Dictionary<Day, double>(); // TODO do this in more elegant way and share with Tree calc
             double DiscountToCurrentDay(Day cashFlowDate)
@@ -177,19 +292,35 @@ IntrinsicStorageValuationResults<T> IIntrinsicCalculate<T>.Calculate()
                 }
                 return discountFactor;
             }
+            return DiscountToCurrentDay;
+        }
 
-            // Perform backward induction
-            var storageValueByInventory = new Func<double, double>[inventorySpace.Count];
-
-            double cmdtyPriceAtEnd = forwardCurve[storage.EndPeriod];
-            storageValueByInventory[inventorySpace.Count - 1] = 
-                finalInventory => storage.TerminalStorageNpv(cmdtyPriceAtEnd, finalInventory) ;
-
-            int backCounter = inventorySpace.Count - 2;
-            IDoubleStateSpaceGridCalc gridCalc = gridCalcFactory(storage);
+        /// <summary>
+        /// Populates <paramref name="storageValueByInventory"/> with the storage value functions of stages
+        /// <paramref name="fromStage"/> down to 0, where stage i corresponds to period inventorySpace.Start.Offset(i).
+        /// The value function of each stage only depends on forward prices for its own and later periods, so elements
+        /// above <paramref name="fromStage"/> must already be populated and are left unchanged. If cancelled, the stages
+        /// from <paramref name="fromStage"/> down to the one being calculated when cancellation was requested have been
+        /// recalculated, and those below this have not.
+        /// </summary>
+        internal static void BackwardInduction(Func<double, double>[] storageValueByInventory, int fromStage,
+                TimeSeries<T, InventoryRange> inventorySpace, TimeSeries<T, double> forwardCurve, ICmdtyStorage<T> storage, 
+                Func<T, Day> settleDateRule, Func<Day, double> discountToCurrentDay, IDoubleStateSpaceGridCalc gridCalc, 
+                IInterpolatorFactory interpolatorFactory, double numericalTolerance, CancellationToken cancellationToken)
+        {
+            int terminalStage = inventorySpace.Count - 1;
+            if (fromStage >= terminalStage)
+            {
+                double cmdtyPriceAtEnd = forwardCurve[storage.EndPeriod];
+                storageValueByInventory[terminalStage] =
+                    finalInventory => storage.TerminalStorageNpv(cmdtyPriceAtEnd, finalInventory);
+                fromStage = terminalStage - 1;
+            }
 
-            foreach (T periodLoop in inventorySpace.Indices.Reverse().Skip(1))
+            for (int backCounter = fromStage; backCounter >= 0; backCounter--)
             {
+                cancellationToken.ThrowIfCancellationRequested();
+                T periodLoop = inventorySpace.Start.Offset(backCounter);
                 (double inventorySpaceMin, double inventorySpaceMax) = inventorySpace[periodLoop];
                 double[] inventorySpaceGrid = gridCalc.GetGridPoints(inventorySpaceMin, inventorySpaceMax)
                                                         .ToArray();
@@ -199,7 +330,7 @@ IntrinsicStorageValuationResults<T> IIntrinsicCalculate<T>.Calculate()
                 Func<double, double> continuationValueByInventory = storageValueByInventory[backCounter + 1];
 
                 Day cmdtySettlementDate = settleDateRule(periodLoop);
-                double discountFactorFromCmdtySettlement = DiscountToCurrentDay(cmdtySettlementDate);
+                double discountFactorFromCmdtySettlement = discountToCurrentDay(cmdtySettlementDate);
 
                 (double nextStepInventorySpaceMin, double nextStepInventorySpaceMax) = inventorySpace[periodLoop.Offset(1)];
                 for (int i = 0; i < inventorySpaceGrid.Length; i++)
@@ -207,15 +338,23 @@ IntrinsicStorageValuationResults<T> IIntrinsicCalculate<T>.Calculate()
                     double inventory = inventorySpaceGrid[i];
                     storageValuesGrid[i] = OptimalDecisionAndValue(storage, periodLoop, inventory, nextStepInventorySpaceMin, 
                                                 nextStepInventorySpaceMax, cmdtyPrice, continuationValueByInventory,
-                                                discountFactorFromCmdtySettlement, DiscountToCurrentDay, numericalTolerance).StorageNpv;
+                                                discountFactorFromCmdtySettlement, discountToCurrentDay, numericalTolerance).StorageNpv;
                 }
 
                 storageValueByInventory[backCounter] =
                     interpolatorFactory.CreateInterpolator(inventorySpaceGrid, storageValuesGrid);
-                backCounter--;
             }
+        }
 
-            // Loop forward from start inventory choosing optimal decisions
+        /// <summary>
+        /// Loops forward from the starting inventory choosing optimal decisions using the storage value functions
+        /// calculated by <see cref="BackwardInduction"/>.
+        /// </summary>
+        internal static IntrinsicStorageValuationResults<T> ForwardPass(Func<double, double>[] storageValueByInventory,
+                double startingInventory, TimeSeries<T, InventoryRange> inventorySpace, TimeSeries<T, double> forwardCurve, 
+                ICmdtyStorage<T> storage, Func<T, Day> settleDateRule, Func<Day, double> discountToCurrentDay, 
+                double numericalTolerance)
+        {
             int numStorageProfiles = inventorySpace.Count + 1;
             var storageProfiles = new StorageProfile[numStorageProfiles];
             var periods = new T[numStorageProfiles];
@@ -235,18 +374,17 @@ IntrinsicStorageValuationResults<T> IIntrinsicCalculate<T>.Calculate()
                 else
                 {
                     Day cmdtySettlementDate = settleDateRule(periodLoop);
-                    double discountFactorFromCmdtySettlement = DiscountToCurrentDay(cmdtySettlementDate);
+                    double discountFactorFromCmdtySettlement = discountToCurrentDay(cmdtySettlementDate);
 
                     Func<double, double> continuationValueByInventory = storageValueByInventory[i];
                     (double nextStepInventorySpaceMin, double nextStepInventorySpaceMax) = inventorySpace[periodLoop.Offset(1)];
                     (double _, double optimalInjectWithdraw, double cmdtyConsumedOnAction, double inventoryLoss, double optimalPeriodPv) =
                         OptimalDecisionAndValue(storage, periodLoop, inventoryLoop, nextStepInventorySpaceMin,
                             nextStepInventorySpaceMax, spotPrice, continuationValueByInventory, discountFactorFromCmdtySettlement,
-                            DiscountToCurrentDay, numericalTolerance);
+                            discountToCurrentDay, numericalTolerance);
 
                     inventoryLoop += optimalInjectWithdraw - inventoryLoss;
 
-                    double netVolume = -optimalInjectWithdraw - cmdtyConsumedOnAction;
                     storageProfile = new StorageProfile(inventoryLoop, optimalInjectWithdraw, cmdtyConsumedOnAction, inventoryLoss, optimalPeriodPv);
 
                 }
@@ -32,6 +32,7 @@
 using Cmdty.Storage.PythonHelpers;
 using Cmdty.TimePeriodValueTypes;
 using Cmdty.TimeSeries;
+using JetBrains.Annotations;
 using MathNet.Numerics.LinearAlgebra;
 using MathNet.Numerics.LinearAlgebra.Double;
 using MathNet.Numerics.LinearAlgebra.Factorization;
@@ -61,41 +62,15 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
             var stopwatches = new Stopwatches();
             stopwatches.All.Start();
 
-            if (lsmcParams.Inventory < 0)
-                throw new ArgumentException("Inventory cannot be negative.", nameof(lsmcParams.Inventory));
-
-            if (lsmcParams.CurrentPeriod.CompareTo(lsmcParams.Storage.EndPeriod) > 0)
-            {
-                lsmcParams.OnProgressUpdate?.Invoke(1.0);
-                return LsmcStorageValuationResults<T>.CreateExpiredResults();
-            }
-
-            if (lsmcParams.CurrentPeriod.Equals(lsmcParams.Storage.EndPeriod))
-            {
-                if (lsmcParams.Storage.MustBeEmptyAtEnd)
-                {
-                    if (lsmcParams.Inventory > 0)
-                        throw new InventoryConstraintsCannotBeFulfilledException("Storage must be empty at end, but inventory is greater than zero.");
-                    lsmcParams.OnProgressUpdate?.Invoke(1.0);
-                    return LsmcStorageValuationResults<T>.CreateExpiredResults();
-                }
-                // Potentially P&L at end
-                double spotPrice = lsmcParams.ForwardCurve[lsmcParams.CurrentPeriod];
-                double npv = lsmcParams.Storage.TerminalStorageNpv(spotPrice, lsmcParams.Inventory);
-                lsmcParams.OnProgressUpdate?.Invoke(1.0);
-                return LsmcStorageValuationResults<T>.CreateEndPeriodResults(npv);
-            }
+            if (TryCreateTrivialResults(lsmcParams, out LsmcStorageValuationResults<T> trivialResults))
+                return trivialResults;
 
             var basisFunctionList = lsmcParams.BasisFunctions.ToList();
 
             TimeSeries<T, InventoryRange> inventorySpace = StorageHelper.CalculateInventorySpace(lsmcParams.Storage, lsmcParams.Inventory, lsmcParams.CurrentPeriod);
             T startActiveStorage = inventorySpace.Start.Offset(-1);
 
-            if (lsmcParams.ForwardCurve.Start.CompareTo(startActiveStorage) > 0)
-                throw new ArgumentException($"Forward curve starts too late. Must start on or before the period {startActiveStorage}.", nameof(lsmcParams.ForwardCurve));
-
-            if (lsmcParams.ForwardCurve.End.CompareTo(inventorySpace.End) < 0)
-                throw new ArgumentException("Forward curve does not extend until storage end period.", nameof(lsmcParams.ForwardCurve));
+            ValidateForwardCurve(lsmcParams.ForwardCurve, inventorySpace, startActiveStorage);
 
             // Perform backward induction
             _logger?.LogInformation("Starting regression spot price simulation.");
@@ -103,6 +78,7 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
             ISpotSimResults<T> regressionSpotSims = lsmcParams.RegressionSpotSimsGenerator();
             stopwatches.RegressionPriceSimulation.Stop();
             _logger?.LogInformation("Spot regression price simulation complete.");
+            lsmcParams.CancellationToken.ThrowIfCancellationRequested();
 
             int numPeriods = inventorySpace.Count + 1; // +1 as inventorySpaceGrid doesn't contain first period
             var inventorySpaceGrids = new double[numPeriods][];
@@ -130,20 +106,7 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                 storageActualValuesNextPeriod[i] = storageValueBySim;
             }
             
-            // Calculate discount factor function
-            Day dayToDiscountTo = lsmcParams.CurrentPeriod.First<Day>(); // TODO add valuation date to LsmcValuationParameters?
-
-            // Memoize the discount factor
-            var discountFactorCache = new Dictionary<Day, double>(); // TODO do this in more elegant way and share with intrinsic calc
-            double DiscountToCurrentDay(Day cashFlowDate)
-            {
-                if (!discountFactorCache.TryGetValue(cashFlowDate, out double discountFactor))
-                {
-                    discountFactor = lsmcParams.DiscountFactors(dayToDiscountTo, cashFlowDate);
-                    discountFactorCache[cashFlowDate] = discountFactor;
-                }
-                return discountFactor;
-            }
+            Func<Day, double> discountToCurrentDay = CreateDiscountToCurrentDay(lsmcParams);
 
             Matrix<double> designMatrix = Matrix<double>.Build.Dense(numSims, basisFunctionList.Count);
             for (int i = 0; i < numSims; i++)
@@ -226,7 +189,7 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                 var storageActualValuesThisPeriod = new Vector<double>[inventorySpaceGrid.Length]; // TODO change type to DenseVector?
 
                 Day cmdtySettlementDate = lsmcParams.SettleDateRule(period);
-                double discountFactorFromCmdtySettlement = DiscountToCurrentDay(cmdtySettlementDate);
+                double discountFactorFromCmdtySettlement = discountToCurrentDay(cmdtySettlementDate);
 
                 ReadOnlySpan<double> simulatedPrices;
                 if (period.Equals(lsmcParams.CurrentPeriod))
@@ -245,7 +208,7 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                     double[] decisionSet = StorageHelper.CalculateBangBangDecisionSet(injectWithdrawRange, inventory, inventoryLoss,
                         nextStepInventorySpaceMin, nextStepInventorySpaceMax, lsmcParams.NumericalTolerance, lsmcParams.ExtraDecisions);
                     IReadOnlyList<DomesticCashFlow> inventoryCostCashFlows = lsmcParams.Storage.CmdtyInventoryCost(period, inventory);
-                    double inventoryCostNpv = inventoryCostCashFlows.Sum(cashFlow => cashFlow.Amount * DiscountToCurrentDay(cashFlow.Date));
+                    double inventoryCostNpv = inventoryCostCashFlows.Sum(cashFlow => cashFlow.Amount * discountToCurrentDay(cashFlow.Date));
 
                     double[] injectWithdrawCostNpvs = new double[decisionSet.Length];
                     double[] cmdtyUsedForInjectWithdrawVolume = new double[decisionSet.Length];
@@ -257,7 +220,7 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                         double decisionVolume = decisionSet[decisionIndex];
 
                         // Inject/Withdraw cost (same for all price sims)
-                        injectWithdrawCostNpvs[decisionIndex] = InjectWithdrawCostNpv(lsmcParams.Storage, decisionVolume, period, inventory, DiscountToCurrentDay);
+                        injectWithdrawCostNpvs[decisionIndex] = InjectWithdrawCostNpv(lsmcParams.Storage, decisionVolume, period, inventory, discountToCurrentDay);
 
                         // Cmdty Used For Inject/Withdraw (same for all price sims)
                         cmdtyUsedForInjectWithdrawVolume[decisionIndex] = CmdtyVolumeConsumedOnDecision(lsmcParams.Storage, decisionVolume, period, inventory);
@@ -347,23 +310,174 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
             stopwatches.BackwardInduction.Stop();
             _logger?.LogInformation("Completed backward induction.");
 
+            // Calculate NPVs for first active period using current inventory
+            // TODO this is unnecessarily introducing floating point error if the val date is during the storage active period and there should not be a Vector of simulated spot prices
+            double backwardNpv = storageActualValuesNextPeriod[0].Average();
+            _logger?.LogInformation("Backward Pv: " + backwardNpv.ToString("N", CultureInfo.InvariantCulture));
+
+            var policy = new LsmcValuationPolicy<T>(lsmcParams.CurrentPeriod, lsmcParams.Inventory,
+                new TimeSeries<T, double[]>(periodsForResultsTimeSeries[0], inventorySpaceGrids), regressCoeffsBuilder.Build(),
+                currentPeriodContinuationValues ?? new double[0], basisFunctionList.Count);
+
+            // Only storage end spot prices are needed from the regression simulation from here on, so unless it is
+            // returned, release it before the valuation simulation to reduce peak memory
+            ReadOnlyMemory<double> terminalSpotPrices = regressionSpotSims.SpotPricesForPeriod(lsmcParams.Storage.EndPeriod).ToArray();
+            if ((lsmcParams.SimulationDataReturned & (SimulationDataReturned.SpotPricesForRegression | SimulationDataReturned.FactorsForRegression)) 
+                                == SimulationDataReturned.None)
+                regressionSpotSims = null;
+
             _logger?.LogInformation("Starting valuation spot price simulation.");
             stopwatches.ValuationPriceSimulation.Start();
             ISpotSimResults<T> valuationSpotSims = lsmcParams.ValuationSpotSimsGenerator();
             stopwatches.ValuationPriceSimulation.Stop();
             _logger?.LogInformation("Valuation spot price simulation complete.");
+            lsmcParams.CancellationToken.ThrowIfCancellationRequested();
+
+            return ForwardSimulation(lsmcParams, policy, basisFunctionList, inventorySpace, regressionSpotSims, valuationSpotSims,
+                terminalSpotPrices, discountToCurrentDay, progress, 1.0 - BackwardPcntTime, stopwatches);
+        }
+
+        /// <summary>
+        /// Values storage using <paramref name="policy"/>, fitted by an earlier call to <see cref="Calculate{T}"/>, to make decisions
+        /// on the valuation simulation of <paramref name="lsmcParams"/>, skipping the regression simulation and backward induction.
+        /// The storage, current period and inventory of <paramref name="lsmcParams"/> should be the same as those used to fit the policy,
+        /// and the basis functions should be the same, in the same order.
+        /// </summary>
+        public LsmcStorageValuationResults<T> CalculateWithPolicy<T>(LsmcValuationParameters<T> lsmcParams, LsmcValuationPolicy<T> policy)
+            where T : ITimePeriod<T>
+        {
+            var stopwatches = new Stopwatches();
+            stopwatches.All.Start();
+
+            if (TryCreateTrivialResults(lsmcParams, out LsmcStorageValuationResults<T> trivialResults))
+                return trivialResults;
+
+            if (policy == null) throw new ArgumentNullException(nameof(policy));
+            if (!policy.CurrentPeriod.Equals(lsmcParams.CurrentPeriod))
+                throw new ArgumentException($"Policy was fitted with current period {policy.CurrentPeriod}, which is not equal to the " +
+                                            $"current period {lsmcParams.CurrentPeriod}.", nameof(policy));
+            if (policy.Inventory != lsmcParams.Inventory)
+                throw new ArgumentException($"Policy was fitted with inventory {policy.Inventory}, which is not equal to the " +
+                                            $"inventory {lsmcParams.Inventory}.", nameof(policy));
+
+            var basisFunctionList = lsmcParams.BasisFunctions.ToList();
+            if (basisFunctionList.Count != policy.NumBasisFunctions)
+                throw new ArgumentException($"Policy was fitted with {policy.NumBasisFunctions} basis functions, but {basisFunctionList.Count} " +
+                                            "basis functions have been specified.", nameof(policy));
+
+            TimeSeries<T, InventoryRange> inventorySpace = StorageHelper.CalculateInventorySpace(lsmcParams.Storage, lsmcParams.Inventory, lsmcParams.CurrentPeriod);
+            T startActiveStorage = inventorySpace.Start.Offset(-1);
+            if (!policy.InventorySpaceGrids.Start.Equals(startActiveStorage) || !policy.InventorySpaceGrids.End.Equals(inventorySpace.End))
+                throw new ArgumentException("Policy inventory grid periods are not consistent with the storage.", nameof(policy));
+
+            ValidateForwardCurve(lsmcParams.ForwardCurve, inventorySpace, startActiveStorage);
+
+            _logger?.LogInformation("Starting valuation spot price simulation.");
+            stopwatches.ValuationPriceSimulation.Start();
+            ISpotSimResults<T> valuationSpotSims = lsmcParams.ValuationSpotSimsGenerator();
+            stopwatches.ValuationPriceSimulation.Stop();
+            _logger?.LogInformation("Valuation spot price simulation complete.");
+            lsmcParams.CancellationToken.ThrowIfCancellationRequested();
+
+            return ForwardSimulation(lsmcParams, policy, basisFunctionList, inventorySpace, null, valuationSpotSims,
+                valuationSpotSims.SpotPricesForPeriod(lsmcParams.Storage.EndPeriod), CreateDiscountToCurrentDay(lsmcParams), 0.0, 1.0, stopwatches);
+        }
+
+        private static bool TryCreateTrivialResults<T>(LsmcValuationParameters<T> lsmcParams, out LsmcStorageValuationResults<T> results)
+            where T : ITimePeriod<T>
+        {
+            if (lsmcParams.Inventory < 0)
+                throw new ArgumentException("Inventory cannot be negative.", nameof(lsmcParams.Inventory));
+
+            if (lsmcParams.CurrentPeriod.CompareTo(lsmcParams.Storage.EndPeriod) > 0)
+            {
+                lsmcParams.OnProgressUpdate?.Invoke(1.0);
+                results = LsmcStorageValuationResults<T>.CreateExpiredResults();
+                return true;
+            }
+
+            if (lsmcParams.CurrentPeriod.Equals(lsmcParams.Storage.EndPeriod))
+            {
+                if (lsmcParams.Storage.MustBeEmptyAtEnd)
+                {
+                    if (lsmcParams.Inventory > 0)
+                        throw new InventoryConstraintsCannotBeFulfilledException("Storage must be empty at end, but inventory is greater than zero.");
+                    lsmcParams.OnProgressUpdate?.Invoke(1.0);
+                    results = LsmcStorageValuationResults<T>.CreateExpiredResults();
+                    return true;
+                }
+                // Potentially P&L at end
+                double spotPrice = lsmcParams.ForwardCurve[lsmcParams.CurrentPeriod];
+                double npv = lsmcParams.Storage.TerminalStorageNpv(spotPrice, lsmcParams.Inventory);
+                lsmcParams.OnProgressUpdate?.Invoke(1.0);
+                results = LsmcStorageValuationResults<T>.CreateEndPeriodResults(npv);
+                return true;
+            }
+            results = null;
+            return false;
+        }
+
+        private static void ValidateForwardCurve<T>(TimeSeries<T, double> forwardCurve, TimeSeries<T, InventoryRange> inventorySpace,
+            T startActiveStorage)
+            where T : ITimePeriod<T>
+        {
+            if (forwardCurve.Start.CompareTo(startActiveStorage) > 0)
+                throw new ArgumentException($"Forward curve starts too late. Must start on or before the period {startActiveStorage}.", nameof(forwardCurve));
+
+            if (forwardCurve.End.CompareTo(inventorySpace.End) < 0)
+                throw new ArgumentException("Forward curve does not extend until storage end period.", nameof(forwardCurve));
+        }
+
+        private static Func<Day, double> CreateDiscountToCurrentDay<T>(LsmcValuationParameters<T> lsmcParams)
+            where T : ITimePeriod<T>
+        {
+            // Calculate discount factor function
+            Day dayToDiscountTo = lsmcParams.CurrentPeriod.First<Day>(); // TODO add valuation date to LsmcValuationParameters?
+
+            // Memoize the discount factor
+            var discountFactorCache = new Dictionary<Day, double>(); // TODO do this in more elegant way and share with intrinsic calc
+            double DiscountToCurrentDay(Day cashFlowDate)
+            {
+                if (!discountFactorCache.TryGetValue(cashFlowDate, out double discountFactor))
+                {
+                    discountFactor = lsmcParams.DiscountFactors(dayToDiscountTo, cashFlowDate);
+                    discountFactorCache[cashFlowDate] = discountFactor;
+                }
+                return discountFactor;
+            }
+            return DiscountToCurrentDay;
+        }
+
+        private LsmcStorageValuationResults<T> ForwardSimulation<T>(LsmcValuationParameters<T> lsmcParams, LsmcValuationPolicy<T> policy,
+            IReadOnlyList<BasisFunction> basisFunctionList, TimeSeries<T, InventoryRange> inventorySpace, 
+            [CanBeNull] ISpotSimResults<T> regressionSpotSims, ISpotSimResults<T> valuationSpotSims, ReadOnlyMemory<double> terminalSpotPrices,
+            Func<Day, double> discountToCurrentDay, double progress, double forwardProgressPcnt, Stopwatches stopwatches)
+            where T : ITimePeriod<T>
+        {
+            T[] periodsForResultsTimeSeries = policy.InventorySpaceGrids.Indices.ToArray();
+            IReadOnlyList<double[]> inventorySpaceGrids = policy.InventorySpaceGrids.Data;
+            int numSims = valuationSpotSims.NumSims;
+            Matrix<double> designMatrix = Matrix<double>.Build.Dense(numSims, basisFunctionList.Count);
 
             (bool returnSimSpotPriceForRegress, bool returnSimSpotPriceForValuation, bool returnSimFactorsForRegression, bool returnSimFactorsForValuation, 
                     bool returnSimInventory, bool returnSimInjectWithdrawVolume, bool returnSimCmdtyConsumed,
                     bool returnSimInventoryLoss, bool returnSimNetVolume, bool returnSimPv) = ParseSimulationDataReturned(lsmcParams.SimulationDataReturned);
 
-            TimeSeries<T, Panel<int, double>> regressCoeffs = regressCoeffsBuilder.Build();
             var inventoryBySim = returnSimInventory ? new Panel<T, double>(periodsForResultsTimeSeries, numSims) : Panel<T, double>.CreateEmpty();
             var injectWithdrawVolumeBySim = returnSimInjectWithdrawVolume ? new Panel<T, double>(periodsForResultsTimeSeries, numSims) : Panel<T, double>.CreateEmpty();
             var cmdtyConsumedBySim = returnSimCmdtyConsumed ? new Panel<T, double>(periodsForResultsTimeSeries, numSims) : Panel<T, double>.CreateEmpty();
             var inventoryLossBySim = returnSimInventoryLoss ? new Panel<T, double>(periodsForResultsTimeSeries, numSims) : Panel<T, double>.CreateEmpty();
             var netVolumeBySim = returnSimNetVolume ? new Panel<T, double>(periodsForResultsTimeSeries, numSims) : Panel<T, double>.CreateEmpty();
             var pvByPeriodAndSim = returnSimPv ? new Panel<T, double>(periodsForResultsTimeSeries, numSims) : Panel<T, double>.CreateEmpty();
+
+            // Statistics are calculated period by period from buffers of length numSims, so per-simulation panels aren't needed
+            IReadOnlyList<double> statisticsQuantiles = lsmcParams.SimulationStatisticsQuantiles;
+            bool calcSimStatistics = statisticsQuantiles != null;
+            int numStatistics = calcSimStatistics ? statisticsQuantiles.Count + 2 : 0;
+            var inventoryStatistics = calcSimStatistics ? new Panel<T, double>(periodsForResultsTimeSeries, numStatistics) : Panel<T, double>.CreateEmpty();
+            var pvStatistics = calcSimStatistics ? new Panel<T, double>(periodsForResultsTimeSeries, numStatistics) : Panel<T, double>.CreateEmpty();
+            double[] pvStatisticsBuffer = calcSimStatistics && !returnSimPv ? new double[numSims] : null;
+            double[] statisticsSortBuffer = calcSimStatistics ? new double[numSims] : null;
             var storageProfiles = new StorageProfile[periodsForResultsTimeSeries.Length];
             var pvBySim = new double[numSims];
 
@@ -385,7 +499,7 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
             var triggerPricesArray = new TriggerPrices[periodsForResultsTimeSeries.Length - 1];
             var spotPriceTimesVolumeByPath = new double[numSims]; // Not memory efficient way to calculate delta standard error, but simpler code
 
-            double forwardStepProgressPcnt = (1.0 - BackwardPcntTime) / periodsForResultsTimeSeries.Length;
+            double forwardStepProgressPcnt = forwardProgressPcnt / periodsForResultsTimeSeries.Length;
             _logger?.LogInformation("Starting calculations of optimal decisions by simulation forward in time.");
             stopwatches.ForwardSimulation.Start();
             for (int periodIndex = 0; periodIndex < periodsForResultsTimeSeries.Length - 1; periodIndex++) // TODO more clearly handle this -1
@@ -400,14 +514,14 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                     // Current period, for which the price isn't random so expected storage values are just the average of the values for all sims
                     for (int i = 0; i < nextPeriodInventorySpaceGrid.Length; i++)
                     {
-                        double expectedStorageValueNextPeriod = currentPeriodContinuationValues[i];
+                        double expectedStorageValueNextPeriod = policy.CurrentPeriodContinuationValues[i];
                         regressContinuationValues[i] = Vector<double>.Build.Dense(numSims, expectedStorageValueNextPeriod); // TODO this is a bit inefficent, review
                     }
                 }
                 else
                 {
                     PopulateDesignMatrix(designMatrix, period, valuationSpotSims, basisFunctionList);
-                    Panel<int, double> regressCoeffsThisPeriod = regressCoeffs[period];
+                    Panel<int, double> regressCoeffsThisPeriod = policy.RegressionCoefficients[period];
                     for (int i = 0; i < nextPeriodInventorySpaceGrid.Length; i++)
                     {
                         Span<double> regressCoeffsSpan = regressCoeffsThisPeriod[i];
@@ -417,7 +531,7 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                 }
 
                 Day cmdtySettlementDate = lsmcParams.SettleDateRule(period);
-                double discountFactorFromCmdtySettlement = DiscountToCurrentDay(cmdtySettlementDate);
+                double discountFactorFromCmdtySettlement = discountToCurrentDay(cmdtySettlementDate);
                 double discountForDeltas = lsmcParams.DiscountDeltas ? discountFactorFromCmdtySettlement : 1.0;
 
                 ReadOnlySpan<double> simulatedPrices;
@@ -436,7 +550,8 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                 Span<double> thisPeriodCmdtyConsumed = returnSimCmdtyConsumed ? cmdtyConsumedBySim[periodIndex] : Span<double>.Empty;
                 Span<double> thisPeriodInventoryLoss = returnSimInventoryLoss ? inventoryLossBySim[periodIndex] : Span<double>.Empty;
                 Span<double> thisPeriodNetVolume = returnSimNetVolume ? netVolumeBySim[periodIndex] : Span<double>.Empty;
-                Span<double> thisPeriodPv = returnSimPv ? pvByPeriodAndSim[periodIndex] : Span<double>.Empty;
+                Span<double> thisPeriodPv = returnSimPv ? pvByPeriodAndSim[periodIndex] : 
+                                            (calcSimStatistics ? pvStatisticsBuffer : Span<double>.Empty);
                 nextPeriodInventories = returnSimInventory ? inventoryBySim[periodIndex + 1] : 
                     thisPeriodInventories == inventoryBuffer1 ? inventoryBuffer2 : inventoryBuffer1;
 
@@ -454,7 +569,7 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                     double[] decisionSet = StorageHelper.CalculateBangBangDecisionSet(injectWithdrawRange, inventory,
                         inventoryLoss, nextStepInventorySpaceMin, nextStepInventorySpaceMax, lsmcParams.NumericalTolerance, lsmcParams.ExtraDecisions);
                     IReadOnlyList<DomesticCashFlow> inventoryCostCashFlows = lsmcParams.Storage.CmdtyInventoryCost(period, inventory);
-                    double inventoryCostNpv = inventoryCostCashFlows.Sum(cashFlow => cashFlow.Amount * DiscountToCurrentDay(cashFlow.Date));
+                    double inventoryCostNpv = inventoryCostCashFlows.Sum(cashFlow => cashFlow.Amount * discountToCurrentDay(cashFlow.Date));
 
                     var decisionNpvsRegress = new double[decisionSet.Length];
                     var cmdtyUsedForInjectWithdrawVolumes = new double[decisionSet.Length];
@@ -470,7 +585,7 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                         double injectWithdrawNpv = -decisionVolume * simulatedSpotPrice * discountFactorFromCmdtySettlement;
                         double cmdtyUsedForInjectWithdrawNpv = -cmdtyUsedForInjectWithdrawVolume * simulatedSpotPrice * discountFactorFromCmdtySettlement;
 
-                        double injectWithdrawCostNpv = InjectWithdrawCostNpv(lsmcParams.Storage, decisionVolume, period, inventory, DiscountToCurrentDay);
+                        double injectWithdrawCostNpv = InjectWithdrawCostNpv(lsmcParams.Storage, decisionVolume, period, inventory, discountToCurrentDay);
 
                         double immediateNpv = injectWithdrawNpv - injectWithdrawCostNpv + cmdtyUsedForInjectWithdrawNpv - inventoryCostNpv;
 
@@ -503,7 +618,7 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                     if (returnSimNetVolume)
                         thisPeriodNetVolume[simIndex] = -optimalDecisionVolume - optimalCmdtyUsedForInjectWithdrawVolume;
                     double optimalImmediatePv = immediatePv[indexOfOptimalDecision];
-                    if (returnSimPv)
+                    if (returnSimPv || calcSimStatistics)
                         thisPeriodPv[simIndex] = optimalImmediatePv;
                     sumOverSimsPv += optimalImmediatePv;
                     pvBySim[simIndex] += optimalImmediatePv;
@@ -512,6 +627,11 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                 double expectedInventory = Average(thisPeriodInventories);
                 storageProfiles[periodIndex] = new StorageProfile(expectedInventory, sumOverSimsInjectWithdrawVolumes/numSims,
                     sumOverSimsCmdtyConsumed/numSims, sumOverSimsInventoryLoss/numSims, sumOverSimsPv/numSims);
+                if (calcSimStatistics)
+                {
+                    CalculateSimulationStatistics(thisPeriodInventories, statisticsQuantiles, statisticsSortBuffer, inventoryStatistics[periodIndex]);
+                    CalculateSimulationStatistics(thisPeriodPv, statisticsQuantiles, statisticsSortBuffer, pvStatistics[periodIndex]);
+                }
                 // Pathwise differentiation calculation makes assumption of a stochastic process where dF(t)/dF(0) = F(t)/F(0)
                 // This is fine for the multi-factor model in Cmdty.Core, but will not be the case for all models.
                 // TODO figure out best way to handle this, and/or document, or just abandon pathwise differentiation as delta calculation method
@@ -544,14 +664,14 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                     {
                         (double alternativeContinuationValue, double alternativeDecisionCost, double alternativeCmdtyConsumed) =
                             CalcAlternatives(lsmcParams.Storage, expectedInventory, alternativeVolume, expectedInventoryInventoryLoss, inventoryGridNexPeriod, 
-                                regressContinuationValues, period, DiscountToCurrentDay, lsmcParams.NumericalTolerance);
+                                regressContinuationValues, period, discountToCurrentDay, lsmcParams.NumericalTolerance);
                         double[] triggerPriceVolumes = CalcInjectTriggerPriceVolumes<T>(triggerPriceMaxInjectVolume, alternativeVolume, numTriggerPriceVolumes);
 
                         foreach (double triggerVolume in triggerPriceVolumes)
                         {
                             double injectTriggerPrice = CalcTriggerPrice(lsmcParams.Storage, expectedInventory, triggerVolume, expectedInventoryInventoryLoss, inventoryGridNexPeriod,
                                 regressContinuationValues, alternativeContinuationValue, alternativeVolume, period, alternativeDecisionCost,
-                                alternativeCmdtyConsumed, discountFactorFromCmdtySettlement, DiscountToCurrentDay, lsmcParams.NumericalTolerance);
+                                alternativeCmdtyConsumed, discountFactorFromCmdtySettlement, discountToCurrentDay, lsmcParams.NumericalTolerance);
                             injectTriggerPrices.Add(new TriggerPricePoint(triggerVolume, injectTriggerPrice));
                         }
 
@@ -572,14 +692,14 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                     {
                         (double alternativeContinuationValue, double alternativeDecisionCost, double alternativeCmdtyConsumed) =
                             CalcAlternatives(lsmcParams.Storage, expectedInventory, alternativeVolume, expectedInventoryInventoryLoss, inventoryGridNexPeriod, 
-                                regressContinuationValues, period, DiscountToCurrentDay, lsmcParams.NumericalTolerance);
+                                regressContinuationValues, period, discountToCurrentDay, lsmcParams.NumericalTolerance);
                         double[] triggerPriceVolumes = CalcWithdrawTriggerPriceVolumes<T>(maxWithdrawVolume, alternativeVolume, numTriggerPriceVolumes);
 
                         foreach (double triggerVolume in triggerPriceVolumes.Reverse())
                         {
                             double withdrawTriggerPrice = CalcTriggerPrice(lsmcParams.Storage, expectedInventory, triggerVolume, expectedInventoryInventoryLoss, inventoryGridNexPeriod,
                                 regressContinuationValues, alternativeContinuationValue, alternativeVolume, period, alternativeDecisionCost,
-                                alternativeCmdtyConsumed, discountFactorFromCmdtySettlement, DiscountToCurrentDay, lsmcParams.NumericalTolerance);
+                                alternativeCmdtyConsumed, discountFactorFromCmdtySettlement, discountToCurrentDay, lsmcParams.NumericalTolerance);
                             withdrawTriggerPrices.Add(new TriggerPricePoint(triggerVolume, withdrawTriggerPrice));
                         }
 
@@ -595,9 +715,10 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
             }
             // Pv on final period
             double endPeriodPv = 0.0;
+            double[] endPeriodPvBySim = calcSimStatistics ? new double[numSims] : null;
             if (!lsmcParams.Storage.MustBeEmptyAtEnd)
             {
-                ReadOnlySpan<double> storageEndPeriodSpotPrices = regressionSpotSims.SpotPricesForPeriod(lsmcParams.Storage.EndPeriod).Span;
+                ReadOnlySpan<double> storageEndPeriodSpotPrices = terminalSpotPrices.Span;
                 Span<double> storageEndInventory = nextPeriodInventories;
                 Span<double> storageEndPv = returnSimPv ? pvByPeriodAndSim[periodsForResultsTimeSeries.Length-1] : Array.Empty<double>();
                 double terminalPv = 0.0;
@@ -605,7 +726,10 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                 {
                     double inventory = storageEndInventory[simIndex];
                     double spotPrice = storageEndPeriodSpotPrices[simIndex];
-                    terminalPv += lsmcParams.Storage.TerminalStorageNpv(spotPrice, inventory);
+                    double simTerminalPv = lsmcParams.Storage.TerminalStorageNpv(spotPrice, inventory);
+                    terminalPv += simTerminalPv;
+                    if (calcSimStatistics)
+                        endPeriodPvBySim[simIndex] = simTerminalPv;
                     if (returnSimPv)
                         storageEndPv[simIndex] = terminalPv;
                     pvBySim[simIndex] += terminalPv;
@@ -613,6 +737,13 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
                 endPeriodPv = terminalPv/numSims;
             }
 
+            if (calcSimStatistics)
+            {
+                int endPeriodIndex = periodsForResultsTimeSeries.Length - 1;
+                CalculateSimulationStatistics(nextPeriodInventories, statisticsQuantiles, statisticsSortBuffer, inventoryStatistics[endPeriodIndex]);
+                CalculateSimulationStatistics(endPeriodPvBySim, statisticsQuantiles, statisticsSortBuffer, pvStatistics[endPeriodIndex]);
+            }
+
             stopwatches.ForwardSimulation.Stop();
             _logger?.LogInformation("Starting calculations of optimal decisions by simulation forward in time.");
 
@@ -620,12 +751,6 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
             double standardError = StorageHelper.StandardError(pvBySim, lsmcParams.SimulationUsesAntithetic);
             _logger?.LogInformation("Forward Pv: " + forwardNpv.ToString("N", CultureInfo.InvariantCulture));
 
-            // Calculate NPVs for first active period using current inventory
-            // TODO this is unnecessarily introducing floating point error if the val date is during the storage active period and there should not be a Vector of simulated spot prices
-            double backwardNpv = storageActualValuesNextPeriod[0].Average();
-
-            _logger?.LogInformation("Backward Pv: " + backwardNpv.ToString("N", CultureInfo.InvariantCulture));
-
             double expectedFinalInventory = Average(nextPeriodInventories);
             // Profile at storage end when no decisions can happen
             storageProfiles[storageProfiles.Length - 1] = new StorageProfile(expectedFinalInventory, 0.0, 0.0, 0.0, endPeriodPv);
@@ -636,12 +761,13 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
             var triggerPriceVolumeProfiles = new TimeSeries<T, TriggerPriceVolumeProfiles>(periodsForResultsTimeSeries.First(), triggerVolumeProfilesArray);
             var triggerPrices = new TimeSeries<T, TriggerPrices>(periodsForResultsTimeSeries.First(), triggerPricesArray);
 
-            Panel<T, double> regressionSpotPricePanel = returnSimSpotPriceForRegress ? ExtractSpotSims(regressionSpotSims) : Panel<T, double>.CreateEmpty();
+            Panel<T, double> regressionSpotPricePanel = returnSimSpotPriceForRegress && regressionSpotSims != null ? 
+                ExtractSpotSims(regressionSpotSims) : Panel<T, double>.CreateEmpty();
             Panel<T, double> valuationSpotPricePanel = returnSimSpotPriceForValuation ? ExtractSpotSims(valuationSpotSims) : Panel<T, double>.CreateEmpty();
 
             // TODO in future refactor ISpotSimResults should make use of Panel type, making this code not necessary
-            Panel<T, double>[] regressionMarkovFactors = returnSimFactorsForRegression ? ExtractMarkovFactorsToPanel(regressionSpotSims) 
-                : Enumerable.Range(0, regressionSpotSims.NumFactors).Select(i => Panel<T, double>.CreateEmpty()).ToArray();
+            Panel<T, double>[] regressionMarkovFactors = returnSimFactorsForRegression && regressionSpotSims != null ? ExtractMarkovFactorsToPanel(regressionSpotSims) 
+                : Enumerable.Range(0, (regressionSpotSims ?? valuationSpotSims).NumFactors).Select(i => Panel<T, double>.CreateEmpty()).ToArray();
             Panel<T, double>[] valuationMarkovFactors = returnSimFactorsForValuation ? ExtractMarkovFactorsToPanel(valuationSpotSims)
                 : Enumerable.Range(0, valuationSpotSims.NumFactors).Select(i => Panel<T, double>.CreateEmpty()).ToArray();
             lsmcParams.OnProgressUpdate?.Invoke(1.0); // Progress with approximately 1.0 should have occurred already, but might have been a bit off because of floating-point error.
@@ -657,7 +783,8 @@ public LsmcStorageValuationResults<T> Calculate<T>(LsmcValuationParameters<T> ls
             return new LsmcStorageValuationResults<T>(forwardNpv, standardError, deltasSeries, deltasStandardErrorSeries, 
                 storageProfileSeries, regressionSpotPricePanel,
                 valuationSpotPricePanel, inventoryBySim, injectWithdrawVolumeBySim, cmdtyConsumedBySim, inventoryLossBySim, netVolumeBySim, 
-                triggerPrices, triggerPriceVolumeProfiles, pvByPeriodAndSim, pvBySim, regressionMarkovFactors, valuationMarkovFactors);
+                triggerPrices, triggerPriceVolumeProfiles, pvByPeriodAndSim, pvBySim, regressionMarkovFactors, valuationMarkovFactors, policy,
+                inventoryStatistics, pvStatistics, stopwatches.ToTimings());
         }
 
         private static (bool ReturnSimSpotPriceForRegress, bool ReturnSimSpotPriceForValuation, bool ReturnSimFactorsForRegression, bool
@@ -777,6 +904,35 @@ private static double CmdtyVolumeConsumedOnDecision<T>(ICmdtyStorage<T> storage,
             return injectWithdrawCostNpv;
         }
 
+        /// <summary>
+        /// Populates <paramref name="statistics"/> with the mean, sample standard deviation and quantiles of <paramref name="simValues"/>.
+        /// Quantiles are calculated by linear interpolation between order statistics, as the NumPy and pandas default.
+        /// </summary>
+        private static void CalculateSimulationStatistics(Span<double> simValues, IReadOnlyList<double> quantiles,
+                                            double[] sortBuffer, Span<double> statistics)
+        {
+            int numSims = simValues.Length;
+            double mean = Average(simValues);
+            double sumSquaredDeviations = 0.0;
+            for (int i = 0; i < numSims; i++)
+            {
+                double deviation = simValues[i] - mean;
+                sumSquaredDeviations += deviation * deviation;
+            }
+            statistics[0] = mean;
+            statistics[1] = numSims > 1 ? Math.Sqrt(sumSquaredDeviations / (numSims - 1)) : 0.0;
+
+            simValues.CopyTo(sortBuffer);
+            Array.Sort(sortBuffer);
+            for (int i = 0; i < quantiles.Count; i++)
+            {
+                double position = quantiles[i] * (numSims - 1);
+                int lowerIndex = (int)Math.Floor(position);
+                int upperIndex = Math.Min(lowerIndex + 1, numSims - 1);
+                statistics[i + 2] = sortBuffer[lowerIndex] + (position - lowerIndex) * (sortBuffer[upperIndex] - sortBuffer[lowerIndex]);
+            }
+        }
+
         private static double Average(Span<double> span)
         {
             double sum = 0.0;
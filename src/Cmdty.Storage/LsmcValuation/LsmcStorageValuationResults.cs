@@ -28,6 +28,7 @@
 using Cmdty.Core.Common;
 using Cmdty.TimePeriodValueTypes;
 using Cmdty.TimeSeries;
+using JetBrains.Annotations;
 
 namespace Cmdty.Storage
 {
@@ -52,6 +53,26 @@ public sealed class LsmcStorageValuationResults<T>
         public TimeSeries<T, TriggerPrices> TriggerPrices { get; }
         public IReadOnlyList<Panel<T, double>> RegressionMarkovFactors { get; }
         public IReadOnlyList<Panel<T, double>> ValuationMarkovFactors { get; }
+        /// <summary>
+        /// Fitted decision policy, which can be reused with <see cref="LsmcStorageValuation.CalculateWithPolicy{T}"/>. Null if
+        /// no backward induction was required because the storage has expired or the current period is the storage end.
+        /// </summary>
+        [CanBeNull]
+        public LsmcValuationPolicy<T> Policy { get; }
+        /// <summary>
+        /// Statistics of simulated inventory by period, with columns mean, standard deviation, then the quantiles of
+        /// <see cref="LsmcValuationParameters{T}.SimulationStatisticsQuantiles"/>. Empty if statistics were not requested.
+        /// </summary>
+        public Panel<T, double> InventoryStatistics { get; }
+        /// <summary>
+        /// Statistics of simulated PV by period, with the same columns as <see cref="InventoryStatistics"/>.
+        /// </summary>
+        public Panel<T, double> PvStatistics { get; }
+        /// <summary>
+        /// Elapsed time of the phases of the valuation. All zero if no simulation was required because the storage has
+        /// expired or the current period is the storage end.
+        /// </summary>
+        public LsmcValuationTimings Timings { get; }
         
         public LsmcStorageValuationResults(double npv, double valuationSimStandardError, DoubleTimeSeries<T> deltas, DoubleTimeSeries<T> deltasStandardErrors, 
             TimeSeries<T, StorageProfile> expectedStorageProfile, Panel<T, double> regressionSpotPriceSim, Panel<T, double> valuationSpotPriceSim,
@@ -59,7 +80,8 @@ public sealed class LsmcStorageValuationResults<T>
             Panel<T, double> inventoryLossBySim, Panel<T, double> netVolumeBySim, TimeSeries<T, TriggerPrices> triggerPrices,
             TimeSeries<T, TriggerPriceVolumeProfiles> triggerPriceVolumeProfiles, Panel<T, double> pvByPeriodAndSim, 
             IEnumerable<double> pvBySim, IEnumerable<Panel<T, double>> regressionMarkovFactors, 
-            IEnumerable<Panel<T, double>> valuationMarkovFactors)
+            IEnumerable<Panel<T, double>> valuationMarkovFactors, LsmcValuationPolicy<T> policy = null,
+            Panel<T, double> inventoryStatistics = null, Panel<T, double> pvStatistics = null, LsmcValuationTimings timings = null)
         {
             Npv = npv;
             ValuationSimStandardError = valuationSimStandardError;
@@ -79,6 +101,10 @@ public sealed class LsmcStorageValuationResults<T>
             PvBySim = pvBySim.ToArray();
             RegressionMarkovFactors = regressionMarkovFactors.ToArray();
             ValuationMarkovFactors = valuationMarkovFactors.ToArray();
+            Policy = policy;
+            InventoryStatistics = inventoryStatistics ?? Panel<T, double>.CreateEmpty();
+            PvStatistics = pvStatistics ?? Panel<T, double>.CreateEmpty();
+            Timings = timings ?? LsmcValuationTimings.Zero;
         }
 
         public static LsmcStorageValuationResults<T> CreateExpiredResults()
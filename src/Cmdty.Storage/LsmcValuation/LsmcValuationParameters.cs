@@ -56,12 +56,18 @@ public sealed class LsmcValuationParameters<T>
         public int ExtraDecisions { get; }
         public SimulationDataReturned SimulationDataReturned { get; }
         public bool SimulationUsesAntithetic { get; }
+        /// <summary>
+        /// Quantiles, between 0 and 1, of the simulated inventory and PV calculated for each period, together with
+        /// their mean and standard deviation, without keeping the per-simulation data. Null if these statistics are not calculated.
+        /// </summary>
+        [CanBeNull]
+        public IReadOnlyList<double> SimulationStatisticsQuantiles { get; }
 
         private LsmcValuationParameters(T currentPeriod, double inventory, TimeSeries<T, double> forwardCurve, 
             ICmdtyStorage<T> storage, Func<T, Day> settleDateRule, Func<Day, Day, double> discountFactors, IDoubleStateSpaceGridCalc gridCalc, 
             double numericalTolerance, SimulateSpotPrice regressionSpotSims, SimulateSpotPrice valuationSpotSims, IEnumerable<BasisFunction> basisFunctions, 
             CancellationToken cancellationToken, bool discountDeltas, int extraDecisions, SimulationDataReturned simulationDataReturned, bool simulationUsesAntithetic, 
-            Action<double> onProgressUpdate = null)
+            IReadOnlyList<double> simulationStatisticsQuantiles, Action<double> onProgressUpdate = null)
         {
             CurrentPeriod = currentPeriod;
             Inventory = inventory;
@@ -80,6 +86,7 @@ public sealed class LsmcValuationParameters<T>
             OnProgressUpdate = onProgressUpdate;
             SimulationDataReturned = simulationDataReturned;
             SimulationUsesAntithetic = simulationUsesAntithetic;
+            SimulationStatisticsQuantiles = simulationStatisticsQuantiles;
         }
 
         public delegate ISpotSimResults<T> SimulateSpotPrice(T currentPeriod, T storageStart, T storageEnd, 
@@ -106,6 +113,7 @@ public sealed class Builder
 
             public bool DiscountDeltas { get; set; }
             public bool? SimulationUsesAntithetic { get; set; }
+            public IEnumerable<double> SimulationStatisticsQuantiles { get; set; }
             private T _currentPeriod;
             private bool _currentPeriodSet;
 
@@ -141,13 +149,16 @@ public LsmcValuationParameters<T> Build()
                 ThrowIfNotSet(SimulationUsesAntithetic, nameof(SimulationUsesAntithetic));
                 if (ExtraDecisions < 0)
                     throw new InvalidOperationException(nameof(ExtraDecisions) + " must be non-negative.");
+                double[] simulationStatisticsQuantiles = SimulationStatisticsQuantiles?.ToArray();
+                if (simulationStatisticsQuantiles != null && simulationStatisticsQuantiles.Any(quantile => quantile < 0.0 || quantile > 1.0))
+                    throw new InvalidOperationException(nameof(SimulationStatisticsQuantiles) + " must be between 0 and 1.");
 
                 // ReSharper disable once PossibleInvalidOperationException
                 return new LsmcValuationParameters<T>(CurrentPeriod, Inventory.Value, ForwardCurve, Storage, SettleDateRule, 
                     DiscountFactors, GridCalc, NumericalTolerance, RegressionSpotSimsGenerator, ValuationSpotSimsGenerator, 
                     BasisFunctions, CancellationToken, DiscountDeltas, ExtraDecisions, SimulationDataReturned,
                     // ReSharper disable once PossibleInvalidOperationException
-                    SimulationUsesAntithetic.Value, OnProgressUpdate);
+                    SimulationUsesAntithetic.Value, simulationStatisticsQuantiles, OnProgressUpdate);
             }
 
             // ReSharper disable once ParameterOnlyUsedForPreconditionCheck.Local
@@ -258,7 +269,8 @@ public Builder Clone()
                     ValuationSpotSimsGenerator = this.ValuationSpotSimsGenerator,
                     Storage = this.Storage,
                     ExtraDecisions = this.ExtraDecisions,
-                    SimulationUsesAntithetic = this.SimulationUsesAntithetic
+                    SimulationUsesAntithetic = this.SimulationUsesAntithetic,
+                    SimulationStatisticsQuantiles = this.SimulationStatisticsQuantiles?.ToList()
                 };
             }
 
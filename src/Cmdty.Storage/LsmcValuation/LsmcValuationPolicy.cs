@@ -0,0 +1,75 @@
+﻿#region License
+// Copyright (c) 2024 Jake Fowler
+//
+// Permission is hereby granted, free of charge, to any person 
+// obtaining a copy of this software and associated documentation 
+// files (the "Software"), to deal in the Software without 
+// restriction, including without limitation the rights to use, 
+// copy, modify, merge, publish, distribute, sublicense, and/or sell 
+// copies of the Software, and to permit persons to whom the 
+// Software is furnished to do so, subject to the following 
+// conditions:
+//
+// The above copyright notice and this permission notice shall be 
+// included in all copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES 
+// OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND 
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT 
+// HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+// WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+// FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR 
+// OTHER DEALINGS IN THE SOFTWARE.
+
+using System;
+using Cmdty.Core.Common;
+using Cmdty.TimePeriodValueTypes;
+using Cmdty.TimeSeries;
+using JetBrains.Annotations;
+
+namespace Cmdty.Storage
+{
+    /// <summary>
+    /// Decision policy fitted by the backward induction of an LSMC valuation, which can be used to value storage with a
+    /// new valuation simulation, without repeating the backward induction. See <see cref="LsmcStorageValuation.CalculateWithPolicy{T}"/>.
+    /// </summary>
+    public sealed class LsmcValuationPolicy<T>
+        where T : ITimePeriod<T>
+    {
+        public T CurrentPeriod { get; }
+        public double Inventory { get; }
+        /// <summary>
+        /// Inventory grid points by period, starting with the period before the first period in which storage is active,
+        /// for which the grid contains only <see cref="Inventory"/>.
+        /// </summary>
+        public TimeSeries<T, double[]> InventorySpaceGrids { get; }
+        /// <summary>
+        /// Continuation value regression coefficients keyed by the period of the regressors, with one row per inventory grid
+        /// point of the following period and one column per basis function.
+        /// </summary>
+        public TimeSeries<T, Panel<int, double>> RegressionCoefficients { get; }
+        /// <summary>
+        /// Expected continuation value by inventory grid point of the period after <see cref="CurrentPeriod"/>, or an empty array if
+        /// the current period is before the period preceding the first active period of storage.
+        /// </summary>
+        public double[] CurrentPeriodContinuationValues { get; }
+        public int NumBasisFunctions { get; }
+
+        public LsmcValuationPolicy(T currentPeriod, double inventory, [NotNull] TimeSeries<T, double[]> inventorySpaceGrids, 
+            [NotNull] TimeSeries<T, Panel<int, double>> regressionCoefficients, [NotNull] double[] currentPeriodContinuationValues, 
+            int numBasisFunctions)
+        {
+            if (numBasisFunctions <= 0)
+                throw new ArgumentOutOfRangeException(nameof(numBasisFunctions), "Number of basis functions must be positive.");
+            CurrentPeriod = currentPeriod;
+            Inventory = inventory;
+            InventorySpaceGrids = inventorySpaceGrids ?? throw new ArgumentNullException(nameof(inventorySpaceGrids));
+            RegressionCoefficients = regressionCoefficients ?? throw new ArgumentNullException(nameof(regressionCoefficients));
+            CurrentPeriodContinuationValues = currentPeriodContinuationValues ?? 
+                                              throw new ArgumentNullException(nameof(currentPeriodContinuationValues));
+            NumBasisFunctions = numBasisFunctions;
+        }
+
+    }
+}
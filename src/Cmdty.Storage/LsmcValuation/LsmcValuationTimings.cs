@@ -0,0 +1,57 @@
+﻿#region License
+// Copyright (c) 2024 Jake Fowler
+//
+// Permission is hereby granted, free of charge, to any person 
+// obtaining a copy of this software and associated documentation 
+// files (the "Software"), to deal in the Software without 
+// restriction, including without limitation the rights to use, 
+// copy, modify, merge, publish, distribute, sublicense, and/or sell 
+// copies of the Software, and to permit persons to whom the 
+// Software is furnished to do so, subject to the following 
+// conditions:
+//
+// The above copyright notice and this permission notice shall be 
+// included in all copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES 
+// OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND 
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT 
+// HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+// WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+// FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR 
+// OTHER DEALINGS IN THE SOFTWARE.
+
+using System;
+
+namespace Cmdty.Storage
+{
+    /// <summary>
+    /// Elapsed time of the phases of an LSMC valuation. <see cref="PseudoInverse"/> is part of <see cref="BackwardInduction"/>,
+    /// and <see cref="Total"/> includes time not attributed to any of the other phases.
+    /// </summary>
+    public sealed class LsmcValuationTimings
+    {
+        public TimeSpan Total { get; }
+        public TimeSpan RegressionPriceSimulation { get; }
+        public TimeSpan ValuationPriceSimulation { get; }
+        public TimeSpan BackwardInduction { get; }
+        public TimeSpan PseudoInverse { get; }
+        public TimeSpan ForwardSimulation { get; }
+
+        public LsmcValuationTimings(TimeSpan total, TimeSpan regressionPriceSimulation, TimeSpan valuationPriceSimulation,
+            TimeSpan backwardInduction, TimeSpan pseudoInverse, TimeSpan forwardSimulation)
+        {
+            Total = total;
+            RegressionPriceSimulation = regressionPriceSimulation;
+            ValuationPriceSimulation = valuationPriceSimulation;
+            BackwardInduction = backwardInduction;
+            PseudoInverse = pseudoInverse;
+            ForwardSimulation = forwardSimulation;
+        }
+
+        public static LsmcValuationTimings Zero { get; } = new LsmcValuationTimings(TimeSpan.Zero, TimeSpan.Zero, TimeSpan.Zero,
+            TimeSpan.Zero, TimeSpan.Zero, TimeSpan.Zero);
+
+    }
+}
@@ -0,0 +1,77 @@
+﻿#region License
+// Copyright (c) 2024 Jake Fowler
+//
+// Permission is hereby granted, free of charge, to any person 
+// obtaining a copy of this software and associated documentation 
+// files (the "Software"), to deal in the Software without 
+// restriction, including without limitation the rights to use, 
+// copy, modify, merge, publish, distribute, sublicense, and/or sell 
+// copies of the Software, and to permit persons to whom the 
+// Software is furnished to do so, subject to the following 
+// conditions:
+//
+// The above copyright notice and this permission notice shall be 
+// included in all copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES 
+// OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND 
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT 
+// HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+// WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+// FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR 
+// OTHER DEALINGS IN THE SOFTWARE.
+#endregion
+
+using System;
+using System.Collections.Generic;
+using Cmdty.Core.Simulation;
+using JetBrains.Annotations;
+
+namespace Cmdty.Storage
+{
+    /// <summary>
+    /// Standard normal generator which records the normals drawn from another generator, so that after <see cref="Rewind"/>
+    /// they are replayed rather than generated again. Used to run simulations with different model parameters on the same
+    /// random numbers.
+    /// </summary>
+    public sealed class ReplayableStandardNormalGenerator : IStandardNormalGenerator
+    {
+        private readonly IStandardNormalGenerator _generator;
+        private readonly List<double> _normals;
+        private int _position;
+
+        public ReplayableStandardNormalGenerator([NotNull] IStandardNormalGenerator generator)
+        {
+            _generator = generator ?? throw new ArgumentNullException(nameof(generator));
+            _normals = new List<double>();
+        }
+
+        public bool Antithetic => _generator.Antithetic;
+
+        public void FillWithStandardNormals(double[] array)
+        {
+            int numReplayed = Math.Min(array.Length, _normals.Count - _position);
+            _normals.CopyTo(_position, array, 0, numReplayed);
+            _position += numReplayed;
+            if (numReplayed == array.Length)
+                return;
+            // Beyond the recorded normals, so draw the remainder from the wrapped generator and record them
+            var generated = new double[array.Length - numReplayed];
+            _generator.FillWithStandardNormals(generated);
+            Array.Copy(generated, 0, array, numReplayed, generated.Length);
+            _normals.AddRange(generated);
+            _position += generated.Length;
+        }
+
+        /// <summary>
+        /// Subsequent normals are replayed from the start of those recorded, with any beyond these drawn from the
+        /// wrapped generator.
+        /// </summary>
+        public void Rewind()
+        {
+            _position = 0;
+        }
+
+    }
+}
@@ -49,6 +49,12 @@ public Stopwatches()
             ForwardSimulation = new Stopwatch();
         }
 
+        public LsmcValuationTimings ToTimings()
+        {
+            return new LsmcValuationTimings(All.Elapsed, RegressionPriceSimulation.Elapsed, ValuationPriceSimulation.Elapsed,
+                BackwardInduction.Elapsed, PseudoInverse.Elapsed, ForwardSimulation.Elapsed);
+        }
+
         public string GenerateProfileReport()
         {
             var stringBuilder = new StringBuilder();
@@ -0,0 +1,265 @@
+﻿#region License
+// Copyright (c) 2024 Jake Fowler
+//
+// Permission is hereby granted, free of charge, to any person 
+// obtaining a copy of this software and associated documentation 
+// files (the "Software"), to deal in the Software without 
+// restriction, including without limitation the rights to use, 
+// copy, modify, merge, publish, distribute, sublicense, and/or sell 
+// copies of the Software, and to permit persons to whom the 
+// Software is furnished to do so, subject to the following 
+// conditions:
+//
+// The above copyright notice and this permission notice shall be 
+// included in all copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES 
+// OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND 
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT 
+// HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+// WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+// FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR 
+// OTHER DEALINGS IN THE SOFTWARE.
+
+using System;
+using System.Collections.Generic;
+using Cmdty.Core.Common;
+using Cmdty.TimePeriodValueTypes;
+using Cmdty.TimeSeries;
+using JetBrains.Annotations;
+
+namespace Cmdty.Storage.PythonHelpers
+{
+    /// <summary>
+    /// Copies results into rectangular primitive arrays, so they can be moved into NumPy with a single memmove,
+    /// rather than Python iterating over .NET objects one item at a time.
+    /// </summary>
+    public static class ArrayExport
+    {
+        /// <summary>
+        /// Returns array with one row per period of <paramref name="inventorySpace"/>, with column 0 containing
+        /// the minimum inventory and column 1 containing the maximum inventory.
+        /// </summary>
+        public static double[,] InventorySpace<T>([NotNull] TimeSeries<T, InventoryRange> inventorySpace)
+            where T : ITimePeriod<T>
+        {
+            if (inventorySpace == null) throw new ArgumentNullException(nameof(inventorySpace));
+            var array = new double[inventorySpace.Count, 2];
+            for (int i = 0; i < inventorySpace.Count; i++)
+            {
+                InventoryRange inventoryRange = inventorySpace.Data[i];
+                array[i, 0] = inventoryRange.MinInventory;
+                array[i, 1] = inventoryRange.MaxInventory;
+            }
+            return array;
+        }
+
+        /// <summary>
+        /// Returns array with one row per row of <paramref name="panel"/>, with data converted to single precision.
+        /// </summary>
+        public static float[,] PanelAsSingle<T>([NotNull] Panel<T, double> panel)
+            where T : ITimePeriod<T>
+        {
+            if (panel == null) throw new ArgumentNullException(nameof(panel));
+            var array = new float[panel.NumRows, panel.NumCols];
+            int i = 0;
+            foreach (T rowKey in panel.RowKeys)
+            {
+                Span<double> row = panel[rowKey];
+                for (int j = 0; j < row.Length; j++)
+                    array[i, j] = (float)row[j];
+                i++;
+            }
+            return array;
+        }
+
+        /// <summary>
+        /// Returns array with one row per period of <paramref name="triggerPrices"/>, with columns in the order MaxInjectVolume,
+        /// MaxInjectTriggerPrice, MaxWithdrawVolume, MaxWithdrawTriggerPrice, and NaN used for missing values.
+        /// </summary>
+        public static double[,] TriggerPricesByPeriod<T>([NotNull] TimeSeries<T, TriggerPrices> triggerPrices)
+            where T : ITimePeriod<T>
+        {
+            if (triggerPrices == null) throw new ArgumentNullException(nameof(triggerPrices));
+            var array = new double[triggerPrices.Count, 4];
+            for (int i = 0; i < triggerPrices.Count; i++)
+            {
+                TriggerPrices periodTriggerPrices = triggerPrices.Data[i];
+                array[i, 0] = periodTriggerPrices.MaxInjectVolume ?? double.NaN;
+                array[i, 1] = periodTriggerPrices.MaxInjectTriggerPrice ?? double.NaN;
+                array[i, 2] = periodTriggerPrices.MaxWithdrawVolume ?? double.NaN;
+                array[i, 3] = periodTriggerPrices.MaxWithdrawTriggerPrice ?? double.NaN;
+            }
+            return array;
+        }
+
+        /// <summary>
+        /// Flattens <paramref name="triggerProfiles"/> into long format, with one item per trigger price point.
+        /// </summary>
+        public static TriggerProfileArrays TriggerProfiles<T>([NotNull] TimeSeries<T, TriggerPriceVolumeProfiles> triggerProfiles)
+            where T : ITimePeriod<T>
+        {
+            if (triggerProfiles == null) throw new ArgumentNullException(nameof(triggerProfiles));
+            int numPoints = 0;
+            foreach (TriggerPriceVolumeProfiles profiles in triggerProfiles.Data)
+                numPoints += profiles.InjectTriggerPrices.Count + profiles.WithdrawTriggerPrices.Count;
+
+            var periodOffsets = new int[numPoints];
+            var sides = new int[numPoints];
+            var volumes = new double[numPoints];
+            var prices = new double[numPoints];
+            int pointIndex = 0;
+
+            void AddPoints(int periodOffset, int side, IReadOnlyList<TriggerPricePoint> points)
+            {
+                foreach (TriggerPricePoint point in points)
+                {
+                    periodOffsets[pointIndex] = periodOffset;
+                    sides[pointIndex] = side;
+                    volumes[pointIndex] = point.Volume;
+                    prices[pointIndex] = point.Price;
+                    pointIndex++;
+                }
+            }
+
+            for (int i = 0; i < triggerProfiles.Count; i++)
+            {
+                TriggerPriceVolumeProfiles profiles = triggerProfiles.Data[i];
+                AddPoints(i, TriggerProfileArrays.InjectSide, profiles.InjectTriggerPrices);
+                AddPoints(i, TriggerProfileArrays.WithdrawSide, profiles.WithdrawTriggerPrices);
+            }
+            return new TriggerProfileArrays(periodOffsets, sides, volumes, prices);
+        }
+
+        internal const int StorageProfileNumColumns = 6;
+
+        /// <summary>
+        /// Returns array with one row per period of <paramref name="storageProfile"/>, with columns in the order Inventory,
+        /// InjectWithdrawVolume, CmdtyConsumed, InventoryLoss, NetVolume, PeriodPv.
+        /// </summary>
+        public static double[,] StorageProfiles<T>([NotNull] TimeSeries<T, StorageProfile> storageProfile)
+            where T : ITimePeriod<T>
+        {
+            if (storageProfile == null) throw new ArgumentNullException(nameof(storageProfile));
+            var array = new double[storageProfile.Count, StorageProfileNumColumns];
+            CopyStorageProfile(storageProfile, array, 0);
+            return array;
+        }
+
+        /// <summary>
+        /// Copies <paramref name="storageProfile"/> into <paramref name="destination"/> starting at row <paramref name="startRow"/>,
+        /// with columns as per <see cref="StorageProfiles{T}"/>.
+        /// </summary>
+        internal static void CopyStorageProfile<T>(TimeSeries<T, StorageProfile> storageProfile, double[,] destination, int startRow)
+            where T : ITimePeriod<T>
+        {
+            for (int i = 0; i < storageProfile.Count; i++)
+            {
+                StorageProfile profile = storageProfile.Data[i];
+                int row = startRow + i;
+                destination[row, 0] = profile.Inventory;
+                destination[row, 1] = profile.InjectWithdrawVolume;
+                destination[row, 2] = profile.CmdtyConsumed;
+                destination[row, 3] = profile.InventoryLoss;
+                destination[row, 4] = profile.NetVolume;
+                destination[row, 5] = profile.PeriodPv;
+            }
+        }
+
+        /// <summary>
+        /// Flattens the inventory grids and regression coefficients of <paramref name="policy"/> into contiguous arrays.
+        /// </summary>
+        public static LsmcPolicyArrays LsmcPolicy<T>([NotNull] LsmcValuationPolicy<T> policy)
+            where T : ITimePeriod<T>
+        {
+            if (policy == null) throw new ArgumentNullException(nameof(policy));
+            TimeSeries<T, double[]> grids = policy.InventorySpaceGrids;
+            var gridCounts = new int[grids.Count];
+            int numGridValues = 0;
+            for (int i = 0; i < grids.Count; i++)
+            {
+                gridCounts[i] = grids.Data[i].Length;
+                numGridValues += gridCounts[i];
+            }
+            var gridValues = new double[numGridValues];
+            int gridValueIndex = 0;
+            foreach (double[] grid in grids.Data)
+            {
+                Array.Copy(grid, 0, gridValues, gridValueIndex, grid.Length);
+                gridValueIndex += grid.Length;
+            }
+
+            TimeSeries<T, Panel<int, double>> regressionCoefficients = policy.RegressionCoefficients;
+            var regressionPeriodOffsets = new int[regressionCoefficients.Count];
+            int numRegressionRows = 0;
+            for (int i = 0; i < regressionCoefficients.Count; i++)
+            {
+                regressionPeriodOffsets[i] = regressionCoefficients.Indices[i].OffsetFrom(grids.Start);
+                numRegressionRows += regressionCoefficients.Data[i].NumRows;
+            }
+            var coefficients = new double[numRegressionRows, policy.NumBasisFunctions];
+            int rowIndex = 0;
+            foreach (Panel<int, double> periodCoefficients in regressionCoefficients.Data)
+            {
+                for (int i = 0; i < periodCoefficients.NumRows; i++)
+                {
+                    Span<double> rowCoefficients = periodCoefficients[i];
+                    for (int j = 0; j < rowCoefficients.Length; j++)
+                        coefficients[rowIndex, j] = rowCoefficients[j];
+                    rowIndex++;
+                }
+            }
+            return new LsmcPolicyArrays(gridCounts, gridValues, regressionPeriodOffsets, coefficients, 
+                policy.CurrentPeriodContinuationValues);
+        }
+
+    }
+
+    public sealed class LsmcPolicyArrays
+    {
+        /// <summary>Number of inventory grid points in each period, starting with the first period of the policy grids.</summary>
+        public int[] GridCounts { get; }
+        /// <summary>Inventory grid points of all periods, concatenated.</summary>
+        public double[] GridValues { get; }
+        /// <summary>Offset from the first period of the policy grids of each period with regression coefficients.</summary>
+        public int[] RegressionPeriodOffsets { get; }
+        /// <summary>
+        /// Regression coefficients of all periods, concatenated, with one row per inventory grid point of the following period, and one
+        /// column per basis function.
+        /// </summary>
+        public double[,] RegressionCoefficients { get; }
+        public double[] CurrentPeriodContinuationValues { get; }
+
+        public LsmcPolicyArrays(int[] gridCounts, double[] gridValues, int[] regressionPeriodOffsets, 
+            double[,] regressionCoefficients, double[] currentPeriodContinuationValues)
+        {
+            GridCounts = gridCounts;
+            GridValues = gridValues;
+            RegressionPeriodOffsets = regressionPeriodOffsets;
+            RegressionCoefficients = regressionCoefficients;
+            CurrentPeriodContinuationValues = currentPeriodContinuationValues;
+        }
+    }
+
+    public sealed class TriggerProfileArrays
+    {
+        public const int InjectSide = 0;
+        public const int WithdrawSide = 1;
+
+        /// <summary>Offset of each point's period from the first period of the trigger profiles.</summary>
+        public int[] PeriodOffsets { get; }
+        /// <summary><see cref="InjectSide"/> or <see cref="WithdrawSide"/> for each point.</summary>
+        public int[] Sides { get; }
+        public double[] Volumes { get; }
+        public double[] Prices { get; }
+
+        public TriggerProfileArrays(int[] periodOffsets, int[] sides, double[] volumes, double[] prices)
+        {
+            PeriodOffsets = periodOffsets;
+            Sides = sides;
+            Volumes = volumes;
+            Prices = prices;
+        }
+    }
+}
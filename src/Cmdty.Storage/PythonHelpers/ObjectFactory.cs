@@ -23,7 +23,12 @@
 // OTHER DEALINGS IN THE SOFTWARE.
 #endregion
 
+using System;
+using System.Linq;
+using Cmdty.Core.Common;
 using Cmdty.TimePeriodValueTypes;
+using Cmdty.TimeSeries;
+using JetBrains.Annotations;
 
 namespace Cmdty.Storage.PythonHelpers
 {
@@ -32,5 +37,54 @@ public static class ObjectFactory
         // Necessary as pythonnet doesn't seem to allow creation of types nested inside other types
         public static LsmcValuationParameters<T>.Builder CreateLsmcValuationParamsBuilder<T>() where T : ITimePeriod<T> 
             => new LsmcValuationParameters<T>.Builder();
+
+        /// <summary>
+        /// Creates an <see cref="LsmcValuationPolicy{T}"/> from arrays in the layout of <see cref="LsmcPolicyArrays"/>.
+        /// </summary>
+        public static LsmcValuationPolicy<T> CreateLsmcValuationPolicy<T>(T currentPeriod, double inventory, T gridsStart, 
+            [NotNull] int[] gridCounts, [NotNull] double[] gridValues, [NotNull] int[] regressionPeriodOffsets, 
+            [NotNull] double[,] regressionCoefficients, [NotNull] double[] currentPeriodContinuationValues)
+            where T : ITimePeriod<T>
+        {
+            if (gridCounts == null) throw new ArgumentNullException(nameof(gridCounts));
+            if (gridValues == null) throw new ArgumentNullException(nameof(gridValues));
+            if (regressionPeriodOffsets == null) throw new ArgumentNullException(nameof(regressionPeriodOffsets));
+            if (regressionCoefficients == null) throw new ArgumentNullException(nameof(regressionCoefficients));
+            if (gridCounts.Sum() != gridValues.Length)
+                throw new ArgumentException("Sum of grid counts is not equal to the number of grid values.", nameof(gridCounts));
+
+            var grids = new double[gridCounts.Length][];
+            int gridValueIndex = 0;
+            for (int i = 0; i < gridCounts.Length; i++)
+            {
+                grids[i] = new double[gridCounts[i]];
+                Array.Copy(gridValues, gridValueIndex, grids[i], 0, gridCounts[i]);
+                gridValueIndex += gridCounts[i];
+            }
+
+            int numBasisFunctions = regressionCoefficients.GetLength(1);
+            var coefficientsBuilder = new TimeSeries<T, Panel<int, double>>.Builder(regressionPeriodOffsets.Length);
+            int rowIndex = 0;
+            foreach (int periodOffset in regressionPeriodOffsets)
+            {
+                // Regressions are for the continuation value by inventory grid point of the following period
+                int numRows = gridCounts[periodOffset + 1];
+                var periodCoefficients = new Panel<int, double>(Enumerable.Range(0, numRows), numBasisFunctions);
+                for (int i = 0; i < numRows; i++)
+                {
+                    Span<double> rowCoefficients = periodCoefficients[i];
+                    for (int j = 0; j < numBasisFunctions; j++)
+                        rowCoefficients[j] = regressionCoefficients[rowIndex, j];
+                    rowIndex++;
+                }
+                coefficientsBuilder.Add(gridsStart.Offset(periodOffset), periodCoefficients);
+            }
+            if (rowIndex != regressionCoefficients.GetLength(0))
+                throw new ArgumentException("Number of regression coefficient rows is not consistent with the grid counts.", 
+                    nameof(regressionCoefficients));
+
+            return new LsmcValuationPolicy<T>(currentPeriod, inventory, new TimeSeries<T, double[]>(gridsStart, grids),
+                coefficientsBuilder.Build(), currentPeriodContinuationValues, numBasisFunctions);
+        }
     }
 }
@@ -0,0 +1,210 @@
+﻿#region License
+// Copyright (c) 2024 Jake Fowler
+//
+// Permission is hereby granted, free of charge, to any person 
+// obtaining a copy of this software and associated documentation 
+// files (the "Software"), to deal in the Software without 
+// restriction, including without limitation the rights to use, 
+// copy, modify, merge, publish, distribute, sublicense, and/or sell 
+// copies of the Software, and to permit persons to whom the 
+// Software is furnished to do so, subject to the following 
+// conditions:
+//
+// The above copyright notice and this permission notice shall be 
+// included in all copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES 
+// OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND 
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT 
+// HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+// WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+// FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR 
+// OTHER DEALINGS IN THE SOFTWARE.
+
+using System;
+using System.Collections.Generic;
+using System.Threading;
+using System.Threading.Tasks;
+using Cmdty.Core.Trees;
+using Cmdty.TimePeriodValueTypes;
+using Cmdty.TimeSeries;
+using JetBrains.Annotations;
+
+namespace Cmdty.Storage.PythonHelpers
+{
+    /// <summary>
+    /// Runs the same valuation for many forward curve scenarios, with inputs shared between scenarios only converted
+    /// from Python once. Forward curve scenarios are held in rows of a rectangular array so they can be populated from a
+    /// NumPy array with a single memmove.
+    /// </summary>
+    public static class ScenarioValuation
+    {
+        /// <param name="maxDegreeOfParallelism">Maximum number of threads used to value scenarios, with -1 meaning no limit.
+        /// Must be 1 if any of the delegates used by <paramref name="storage"/> call back into Python.</param>
+        public static IntrinsicScenarioResults<T> IntrinsicValuation<T>([NotNull] ICmdtyStorage<T> storage, T currentPeriod,
+            double inventory, T forwardCurveStart, [NotNull] double[,] forwardPrices, [NotNull] TimeSeries<T, Day> settlementDates,
+            [NotNull] Func<Day, Day, double> discountFactors, int numInventoryGridPoints, double numericalTolerance,
+            bool returnProfiles, int maxDegreeOfParallelism, CancellationToken cancellationToken = default)
+            where T : ITimePeriod<T>
+        {
+            if (storage == null) throw new ArgumentNullException(nameof(storage));
+            if (forwardPrices == null) throw new ArgumentNullException(nameof(forwardPrices));
+            if (settlementDates == null) throw new ArgumentNullException(nameof(settlementDates));
+            if (discountFactors == null) throw new ArgumentNullException(nameof(discountFactors));
+
+            int numScenarios = forwardPrices.GetLength(0);
+            int numForwardPeriods = forwardPrices.GetLength(1);
+            Day SettleDateRule(T period) => settlementDates[period];
+
+            var npvs = new double[numScenarios];
+            var storageProfiles = new TimeSeries<T, StorageProfile>[returnProfiles ? numScenarios : 0];
+
+            void ValueScenario(int scenarioIndex)
+            {
+                TimeSeries<T, double> forwardCurve = ForwardCurveForScenario(forwardCurveStart, forwardPrices, scenarioIndex, numForwardPeriods);
+                IntrinsicStorageValuationResults<T> valuationResults = IntrinsicStorageValuation<T>.ForStorage(storage)
+                    .WithStartingInventory(inventory)
+                    .ForCurrentPeriod(currentPeriod)
+                    .WithForwardCurve(forwardCurve)
+                    .WithCmdtySettlementRule(SettleDateRule)
+                    .WithDiscountFactorFunc(discountFactors)
+                    .WithFixedNumberOfPointsOnGlobalInventoryRange(numInventoryGridPoints)
+                    .WithLinearInventorySpaceInterpolation()
+                    .WithNumericalTolerance(numericalTolerance)
+                    .Calculate(cancellationToken);
+                npvs[scenarioIndex] = valuationResults.Npv;
+                if (returnProfiles)
+                    storageProfiles[scenarioIndex] = valuationResults.StorageProfile;
+            }
+
+            RunScenarios(numScenarios, maxDegreeOfParallelism, ValueScenario, cancellationToken);
+
+            if (!returnProfiles || numScenarios == 0 || storageProfiles[0].IsEmpty)
+                return new IntrinsicScenarioResults<T>(npvs, null, default, 0);
+
+            // Profiles of all scenarios cover the same periods as they only depend on the storage and current period
+            int numProfilePeriods = storageProfiles[0].Count;
+            var stackedProfiles = new double[numScenarios * numProfilePeriods, ArrayExport.StorageProfileNumColumns];
+            for (int i = 0; i < numScenarios; i++)
+                ArrayExport.CopyStorageProfile(storageProfiles[i], stackedProfiles, i * numProfilePeriods);
+
+            return new IntrinsicScenarioResults<T>(npvs, stackedProfiles, storageProfiles[0].Start, numProfilePeriods);
+        }
+
+        /// <param name="maxDegreeOfParallelism">Maximum number of threads used to value scenarios, with -1 meaning no limit.
+        /// Must be 1 if any of the delegates used by <paramref name="storage"/> call back into Python.</param>
+        /// <param name="unitForwardTree">Tree built for a forward curve of ones, which is scaled for each scenario. If
+        /// null this is built from <paramref name="spotVolatility"/>, <paramref name="meanReversion"/> and
+        /// <paramref name="timeStep"/> over the periods of the scenario forward curves.</param>
+        public static double[] TrinomialValuation<T>([NotNull] ICmdtyStorage<T> storage, T currentPeriod, double inventory, 
+            T forwardCurveStart, [NotNull] double[,] forwardPrices, 
+            [CanBeNull] TimeSeries<T, IReadOnlyList<TreeNode>> unitForwardTree, TimeSeries<T, double> spotVolatility, 
+            double meanReversion, double timeStep, [NotNull] TimeSeries<T, Day> settlementDates,
+            [NotNull] Func<Day, Day, double> discountFactors, int numInventoryGridPoints, double numericalTolerance,
+            int maxDegreeOfParallelism, CancellationToken cancellationToken = default)
+            where T : ITimePeriod<T>
+        {
+            if (storage == null) throw new ArgumentNullException(nameof(storage));
+            if (forwardPrices == null) throw new ArgumentNullException(nameof(forwardPrices));
+            if (unitForwardTree == null && spotVolatility == null)
+                throw new ArgumentNullException(nameof(spotVolatility), $"Parameter {nameof(spotVolatility)} must be specified if {nameof(unitForwardTree)} is null.");
+            if (settlementDates == null) throw new ArgumentNullException(nameof(settlementDates));
+            if (discountFactors == null) throw new ArgumentNullException(nameof(discountFactors));
+
+            int numScenarios = forwardPrices.GetLength(0);
+            int numForwardPeriods = forwardPrices.GetLength(1);
+            Day SettleDateRule(T period) => settlementDates[period];
+
+            // The tree only depends on the forward curve through scaling, so is built once for all scenarios
+            if (unitForwardTree == null)
+                unitForwardTree = numForwardPeriods == 0 ? TimeSeries<T, IReadOnlyList<TreeNode>>.Empty :
+                    ScaledTree.CreateUnitForwardOneFactorTrinomialTree(forwardCurveStart, 
+                        forwardCurveStart.Offset(numForwardPeriods - 1), spotVolatility, meanReversion, timeStep);
+
+            var npvs = new double[numScenarios];
+
+            void ValueScenario(int scenarioIndex)
+            {
+                TimeSeries<T, double> forwardCurve = ForwardCurveForScenario(forwardCurveStart, forwardPrices, scenarioIndex, numForwardPeriods);
+                npvs[scenarioIndex] = TreeStorageValuation<T>.ForStorage(storage)
+                    .WithStartingInventory(inventory)
+                    .ForCurrentPeriod(currentPeriod)
+                    .WithForwardCurve(forwardCurve)
+                    .WithUnitForwardPriceTree(unitForwardTree)
+                    .WithCmdtySettlementRule(SettleDateRule)
+                    .WithDiscountFactorFunc(discountFactors)
+                    .WithFixedNumberOfPointsOnGlobalInventoryRange(numInventoryGridPoints)
+                    .WithLinearInventorySpaceInterpolation()
+                    .WithNumericalTolerance(numericalTolerance)
+                    .CalculateNpv(cancellationToken);
+            }
+
+            RunScenarios(numScenarios, maxDegreeOfParallelism, ValueScenario, cancellationToken);
+            return npvs;
+        }
+
+        private static TimeSeries<T, double> ForwardCurveForScenario<T>(T forwardCurveStart, double[,] forwardPrices,
+            int scenarioIndex, int numForwardPeriods)
+            where T : ITimePeriod<T>
+        {
+            var scenarioForwardPrices = new double[numForwardPeriods];
+            for (int i = 0; i < numForwardPeriods; i++)
+                scenarioForwardPrices[i] = forwardPrices[scenarioIndex, i];
+            return new TimeSeries<T, double>(forwardCurveStart, scenarioForwardPrices);
+        }
+
+        private static void RunScenarios(int numScenarios, int maxDegreeOfParallelism, Action<int> valueScenario,
+            CancellationToken cancellationToken)
+        {
+            if (maxDegreeOfParallelism == 0 || maxDegreeOfParallelism < -1)
+                throw new ArgumentException("Maximum degree of parallelism must be positive, or -1 for no limit.", nameof(maxDegreeOfParallelism));
+            // Run on the calling thread if single-threaded, as delegates which call back into Python will need to acquire the GIL
+            if (maxDegreeOfParallelism == 1)
+            {
+                for (int i = 0; i < numScenarios; i++)
+                {
+                    cancellationToken.ThrowIfCancellationRequested();
+                    valueScenario(i);
+                }
+                return;
+            }
+            var parallelOptions = new ParallelOptions
+            {
+                MaxDegreeOfParallelism = maxDegreeOfParallelism,
+                CancellationToken = cancellationToken
+            };
+            try
+            {
+                Parallel.For(0, numScenarios, parallelOptions, valueScenario);
+            }
+            // Cancellation within a scenario valuation surfaces wrapped in an AggregateException
+            catch (AggregateException) when (cancellationToken.IsCancellationRequested)
+            {
+                throw new OperationCanceledException(cancellationToken);
+            }
+        }
+
+    }
+
+    public sealed class IntrinsicScenarioResults<T>
+        where T : ITimePeriod<T>
+    {
+        public double[] Npvs { get; }
+        /// <summary>
+        /// Storage profiles of all scenarios stacked vertically, with columns as per <see cref="ArrayExport.CopyStorageProfile{T}"/>.
+        /// Null if profiles were not requested or storage has no active periods.
+        /// </summary>
+        public double[,] Profiles { get; }
+        public T ProfileStart { get; }
+        public int NumProfilePeriods { get; }
+
+        public IntrinsicScenarioResults(double[] npvs, double[,] profiles, T profileStart, int numProfilePeriods)
+        {
+            Npvs = npvs;
+            Profiles = profiles;
+            ProfileStart = profileStart;
+            NumProfilePeriods = numProfilePeriods;
+        }
+    }
+}
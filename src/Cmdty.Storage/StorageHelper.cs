@@ -40,6 +40,19 @@ public static class StorageHelper
         public static TimeSeries<T, InventoryRange> CalculateInventorySpace<T>(ICmdtyStorage<T> storage, double startingInventory, T currentPeriod)
             where T : ITimePeriod<T>
         {
+            return CalculateInventorySpaceForStartingRange(storage, startingInventory, startingInventory, currentPeriod);
+        }
+
+        /// <summary>
+        /// Calculates the inventory space which can be reached from any starting inventory between
+        /// <paramref name="minStartingInventory"/> and <paramref name="maxStartingInventory"/>.
+        /// </summary>
+        public static TimeSeries<T, InventoryRange> CalculateInventorySpaceForStartingRange<T>(ICmdtyStorage<T> storage, 
+                            double minStartingInventory, double maxStartingInventory, T currentPeriod)
+            where T : ITimePeriod<T>
+        {
+            if (minStartingInventory > maxStartingInventory)
+                throw new ArgumentException($"Parameter {nameof(minStartingInventory)} value cannot be higher than parameter {nameof(maxStartingInventory)} value.");
             if (currentPeriod.CompareTo(storage.EndPeriod) > 0) // TODO should condition be >= 0?
                 throw new ArgumentException("Storage has expired");// TODO change to return empty TimeSeries?
 
@@ -52,8 +65,8 @@ public static class StorageHelper
             var forwardCalcMaxInventory = new double[numPeriods];
             var forwardCalcMinInventory = new double[numPeriods];
 
-            double minInventoryForwardCalc = startingInventory;
-            double maxInventoryForwardCalc = startingInventory;
+            double minInventoryForwardCalc = minStartingInventory;
+            double maxInventoryForwardCalc = maxStartingInventory;
 
             for (int i = 0; i < numPeriods; i++)
             {
@@ -316,6 +329,19 @@ public static (int LowerIndex, int UpperIndex) BisectInventorySpace(double[] inv
 
         public static bool EqualsWithinTol(double a, double b, double tol) => Math.Abs(a - b) <= tol;
 
+        /// <summary>
+        /// Whether inventory can be held in <paramref name="period"/> while still reaching the inventory range of the
+        /// next period, with the same tolerance as <see cref="CalculateBangBangDecisionSet"/>.
+        /// </summary>
+        internal static bool IsInventoryFeasible<T>(ICmdtyStorage<T> storage, T period, double inventory,
+            double nextStepInventorySpaceMin, double nextStepInventorySpaceMax, double numericalTolerance)
+            where T : ITimePeriod<T>
+        {
+            double inventoryLowerBound = storage.InventorySpaceLowerBound(period, nextStepInventorySpaceMin, nextStepInventorySpaceMax);
+            double inventoryUpperBound = storage.InventorySpaceUpperBound(period, nextStepInventorySpaceMin, nextStepInventorySpaceMax);
+            return inventory >= inventoryLowerBound - numericalTolerance && inventory <= inventoryUpperBound + numericalTolerance;
+        }
+
         /// <summary>
         /// Derives a linear equation from a pair of points (x1, y1) and (x2, y2) and then solves for x, for a known y
         /// </summary>
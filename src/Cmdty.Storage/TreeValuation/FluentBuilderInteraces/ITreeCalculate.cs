@@ -23,15 +23,30 @@
 // OTHER DEALINGS IN THE SOFTWARE.
 #endregion
 
+using System.Threading;
 using Cmdty.TimePeriodValueTypes;
+using Cmdty.TimeSeries;
 
 namespace Cmdty.Storage
 {
     public interface ITreeCalculate<T>
         where T : ITimePeriod<T>
     {
-        TreeStorageValuationResults<T> Calculate();
-        (TreeStorageValuationResults<T> ValuationResults, ITreeDecisionSimulator<T> DecisionSimulator) CalculateWithDecisionSimulator();
-        double CalculateNpv();
+        /// <summary>
+        /// Calculates the valuation. <paramref name="cancellationToken"/> is checked before the backward induction of
+        /// each period, with a <see cref="System.OperationCanceledException"/> thrown if cancellation has been requested.
+        /// </summary>
+        TreeStorageValuationResults<T> Calculate(CancellationToken cancellationToken = default);
+        (TreeStorageValuationResults<T> ValuationResults, ITreeDecisionSimulator<T> DecisionSimulator) CalculateWithDecisionSimulator(
+            CancellationToken cancellationToken = default);
+        double CalculateNpv(CancellationToken cancellationToken = default);
+        /// <summary>
+        /// Calculates the valuation and the discounted delta with respect to the forward price of each period, from one
+        /// forward pass through the tree after the backward induction, rather than revaluing with bumped forward curves.
+        /// Tree node prices are assumed to be proportional to the forward price for their period, and inventory values
+        /// between grid points linearly interpolated.
+        /// </summary>
+        (TreeStorageValuationResults<T> ValuationResults, DoubleTimeSeries<T> Deltas) CalculateWithDeltas(
+            CancellationToken cancellationToken = default);
     }
 }
\ No newline at end of file
@@ -0,0 +1,109 @@
+﻿#region License
+// Copyright (c) 2024 Jake Fowler
+//
+// Permission is hereby granted, free of charge, to any person 
+// obtaining a copy of this software and associated documentation 
+// files (the "Software"), to deal in the Software without 
+// restriction, including without limitation the rights to use, 
+// copy, modify, merge, publish, distribute, sublicense, and/or sell 
+// copies of the Software, and to permit persons to whom the 
+// Software is furnished to do so, subject to the following 
+// conditions:
+//
+// The above copyright notice and this permission notice shall be 
+// included in all copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, 
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES 
+// OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND 
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT 
+// HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+// WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+// FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR 
+// OTHER DEALINGS IN THE SOFTWARE.
+
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using Cmdty.Core.Trees;
+using Cmdty.TimePeriodValueTypes;
+using Cmdty.TimeSeries;
+using JetBrains.Annotations;
+
+namespace Cmdty.Storage
+{
+    /// <summary>
+    /// Creates spot price trees by scaling a tree built for a forward curve of ones. The nodes of a one-factor trinomial
+    /// tree have prices proportional to the forward price of their period, with probabilities which only depend on the
+    /// volatility, mean reversion and time step, so one tree can be built and reused for many forward curves.
+    /// </summary>
+    public static class ScaledTree
+    {
+        public static TimeSeries<T, IReadOnlyList<TreeNode>> CreateUnitForwardOneFactorTrinomialTree<T>(T start, T end,
+            [NotNull] TimeSeries<T, double> spotVolatilityCurve, double meanReversion, double onePeriodTimeDelta)
+            where T : ITimePeriod<T>
+        {
+            if (spotVolatilityCurve == null) throw new ArgumentNullException(nameof(spotVolatilityCurve));
+            if (start.CompareTo(end) > 0)
+                throw new ArgumentException($"Parameter {nameof(start)} cannot be after parameter {nameof(end)}.", nameof(start));
+
+            int numPeriods = end.OffsetFrom(start) + 1;
+            double[] unitForwardPrices = Enumerable.Repeat(1.0, numPeriods).ToArray();
+            var unitForwardCurve = new TimeSeries<T, double>(start, unitForwardPrices);
+            return OneFactorTrinomialTree.CreateTree(unitForwardCurve, meanReversion, spotVolatilityCurve, onePeriodTimeDelta);
+        }
+
+        public static Func<TimeSeries<T, double>, TimeSeries<T, IReadOnlyList<TreeNode>>> CreateTreeFactory<T>(
+                        [NotNull] TimeSeries<T, IReadOnlyList<TreeNode>> unitForwardTree)
+            where T : ITimePeriod<T>
+        {
+            if (unitForwardTree == null) throw new ArgumentNullException(nameof(unitForwardTree));
+            return forwardCurve => ScaleToForwardCurve(unitForwardTree, forwardCurve);
+        }
+
+        /// <summary>
+        /// Creates a new tree with the same structure and probabilities as <paramref name="unitForwardTree"/>, but
+        /// with node prices multiplied by the forward price for their period.
+        /// </summary>
+        public static TimeSeries<T, IReadOnlyList<TreeNode>> ScaleToForwardCurve<T>(
+                        [NotNull] TimeSeries<T, IReadOnlyList<TreeNode>> unitForwardTree, [NotNull] TimeSeries<T, double> forwardCurve)
+            where T : ITimePeriod<T>
+        {
+            if (unitForwardTree == null) throw new ArgumentNullException(nameof(unitForwardTree));
+            if (forwardCurve == null) throw new ArgumentNullException(nameof(forwardCurve));
+            if (unitForwardTree.IsEmpty)
+                return unitForwardTree;
+            if (forwardCurve.IsEmpty || forwardCurve.Start.CompareTo(unitForwardTree.Start) > 0 ||
+                                        forwardCurve.End.CompareTo(unitForwardTree.End) < 0)
+                throw new ArgumentException($"Forward curve must include all tree periods, from {unitForwardTree.Start} " +
+                                            $"to {unitForwardTree.End}.", nameof(forwardCurve));
+
+            int numPeriods = unitForwardTree.Count;
+            var scaledNodes = new IReadOnlyList<TreeNode>[numPeriods];
+            // Build from the back, as transitions refer to the nodes of the next period
+            for (int i = numPeriods - 1; i >= 0; i--)
+            {
+                T period = unitForwardTree.Start.Offset(i);
+                double forwardPrice = forwardCurve[period];
+                IReadOnlyList<TreeNode> unitNodes = unitForwardTree.Data[i];
+                var nodes = new TreeNode[unitNodes.Count];
+                for (int j = 0; j < unitNodes.Count; j++)
+                {
+                    TreeNode unitNode = unitNodes[j];
+                    var transitions = new NodeTransition[unitNode.Transitions.Count];
+                    for (int k = 0; k < transitions.Length; k++)
+                    {
+                        NodeTransition unitTransition = unitNode.Transitions[k];
+                        TreeNode destinationNode = scaledNodes[i + 1][unitTransition.DestinationNode.ValueLevelIndex];
+                        transitions[k] = new NodeTransition(unitTransition.Probability, destinationNode);
+                    }
+                    nodes[j] = new TreeNode(unitNode.Value * forwardPrice, unitNode.Probability, unitNode.ValueLevelIndex, transitions);
+                }
+                scaledNodes[i] = nodes;
+            }
+
+            return new TimeSeries<T, IReadOnlyList<TreeNode>>(unitForwardTree.Start, scaledNodes);
+        }
+
+    }
+}
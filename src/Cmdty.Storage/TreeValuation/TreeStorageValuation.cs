@@ -26,6 +26,7 @@
 using System;
 using System.Collections.Generic;
 using System.Linq;
+using System.Threading;
 using Cmdty.Core.Trees;
 using Cmdty.TimePeriodValueTypes;
 using Cmdty.TimeSeries;
@@ -121,34 +122,122 @@ ITreeCalculate<T> ITreeAddNumericalTolerance<T>.WithNumericalTolerance(double nu
             return this;
         }
 
-        TreeStorageValuationResults<T> ITreeCalculate<T>.Calculate()
+        TreeStorageValuationResults<T> ITreeCalculate<T>.Calculate(CancellationToken cancellationToken)
         {
             return Calculate(_currentPeriod, _startingInventory, _forwardCurve, _treeFactory, _storage,
                 _settleDateRule, _discountFactors, _gridCalcFactory,
-                    _interpolatorFactory, _numericalTolerance);
+                    _interpolatorFactory, _numericalTolerance, cancellationToken);
         }
 
         (TreeStorageValuationResults<T> ValuationResults, ITreeDecisionSimulator<T> DecisionSimulator) 
-                    ITreeCalculate<T>.CalculateWithDecisionSimulator()
+                    ITreeCalculate<T>.CalculateWithDecisionSimulator(CancellationToken cancellationToken)
         {
-            var valuationResults = (this as ITreeCalculate<T>).Calculate();
+            var valuationResults = (this as ITreeCalculate<T>).Calculate(cancellationToken);
             return (valuationResults, new DecisionSimulator(valuationResults, this));
         }
 
-        double ITreeCalculate<T>.CalculateNpv()
+        double ITreeCalculate<T>.CalculateNpv(CancellationToken cancellationToken)
         {
-            return (this as ITreeCalculate<T>).Calculate().NetPresentValue;
+            return (this as ITreeCalculate<T>).Calculate(cancellationToken).NetPresentValue;
+        }
+
+        (TreeStorageValuationResults<T> ValuationResults, DoubleTimeSeries<T> Deltas) ITreeCalculate<T>.CalculateWithDeltas(
+                    CancellationToken cancellationToken)
+        {
+            var valuationResults = (this as ITreeCalculate<T>).Calculate(cancellationToken);
+            DoubleTimeSeries<T> deltas = CalculateDeltas(valuationResults, _currentPeriod, _forwardCurve, _storage, 
+                                            _settleDateRule, _discountFactors, _numericalTolerance);
+            return (valuationResults, deltas);
         }
 
         private static TreeStorageValuationResults<T> Calculate(T currentPeriod, double startingInventory, 
             TimeSeries<T, double> forwardCurve, Func<TimeSeries<T, double>, TimeSeries<T, IReadOnlyList<TreeNode>>> treeFactory, 
             ICmdtyStorage<T> storage, Func<T, Day> settleDateRule, Func<Day, Day, double> discountFactors, 
             Func<ICmdtyStorage<T>, IDoubleStateSpaceGridCalc> gridCalcFactory, IInterpolatorFactory interpolatorFactory, 
-            double numericalTolerance)
+            double numericalTolerance, CancellationToken cancellationToken)
         {
             if (startingInventory < 0)
                 throw new ArgumentException("Inventory cannot be negative.", nameof(startingInventory));
+            return Calculate(currentPeriod, new[] {startingInventory}, false, forwardCurve, treeFactory, storage,
+                settleDateRule, discountFactors, gridCalcFactory, interpolatorFactory, numericalTolerance, cancellationToken);
+        }
 
+        /// <summary>
+        /// Calculates the storage value for each of <paramref name="startingInventories"/> from a single backward
+        /// induction over the inventory space reachable from any of them. Elements for inventories from which the
+        /// storage constraints cannot be fulfilled are NaN.
+        /// </summary>
+        /// <param name="cancellationToken">Checked before the backward induction of each period.</param>
+        public static double[] CalculateInventoryLadder([NotNull] ICmdtyStorage<T> storage, [NotNull] T currentPeriod,
+            [NotNull] double[] startingInventories, [NotNull] TimeSeries<T, double> forwardCurve,
+            [NotNull] Func<TimeSeries<T, double>, TimeSeries<T, IReadOnlyList<TreeNode>>> treeFactory,
+            [NotNull] Func<T, Day> settleDateRule, [NotNull] Func<Day, Day, double> discountFactors,
+            [NotNull] Func<ICmdtyStorage<T>, IDoubleStateSpaceGridCalc> gridCalcFactory,
+            [NotNull] IInterpolatorFactory interpolatorFactory, double numericalTolerance,
+            CancellationToken cancellationToken = default)
+        {
+            if (storage == null) throw new ArgumentNullException(nameof(storage));
+            if (currentPeriod == null) throw new ArgumentNullException(nameof(currentPeriod));
+            if (startingInventories == null) throw new ArgumentNullException(nameof(startingInventories));
+            if (forwardCurve == null) throw new ArgumentNullException(nameof(forwardCurve));
+            if (treeFactory == null) throw new ArgumentNullException(nameof(treeFactory));
+            if (settleDateRule == null) throw new ArgumentNullException(nameof(settleDateRule));
+            if (discountFactors == null) throw new ArgumentNullException(nameof(discountFactors));
+            if (gridCalcFactory == null) throw new ArgumentNullException(nameof(gridCalcFactory));
+            if (interpolatorFactory == null) throw new ArgumentNullException(nameof(interpolatorFactory));
+            if (numericalTolerance <= 0)
+                throw new ArgumentException("Numerical tolerance must be positive.", nameof(numericalTolerance));
+            if (startingInventories.Any(inventory => inventory < 0))
+                throw new ArgumentException("Inventory cannot be negative.", nameof(startingInventories));
+
+            var npvs = new double[startingInventories.Length];
+            if (startingInventories.Length == 0)
+                return npvs;
+
+            double[] sortedInventories = startingInventories.Distinct().OrderBy(inventory => inventory).ToArray();
+            if (currentPeriod.CompareTo(storage.EndPeriod) >= 0)
+            {
+                for (int i = 0; i < startingInventories.Length; i++)
+                {
+                    try
+                    {
+                        npvs[i] = Calculate(currentPeriod, startingInventories[i], forwardCurve, treeFactory, storage, settleDateRule,
+                            discountFactors, gridCalcFactory, interpolatorFactory, numericalTolerance, 
+                            cancellationToken).NetPresentValue;
+                    }
+                    catch (InventoryConstraintsCannotBeFulfilledException)
+                    {
+                        npvs[i] = double.NaN;
+                    }
+                }
+                return npvs;
+            }
+
+            TreeStorageValuationResults<T> valuationResults = Calculate(currentPeriod, sortedInventories, true, forwardCurve,
+                treeFactory, storage, settleDateRule, discountFactors, gridCalcFactory, interpolatorFactory, numericalTolerance,
+                cancellationToken);
+
+            IReadOnlyList<TreeNode> startTreeNodes = valuationResults.Tree[valuationResults.StorageNpvs.Start];
+            IReadOnlyList<IReadOnlyList<double>> startStorageNpvs = valuationResults.StorageNpvs.Data[0];
+            for (int i = 0; i < startingInventories.Length; i++)
+            {
+                int gridIndex = Array.BinarySearch(sortedInventories, startingInventories[i]);
+                double npv = 0.0;
+                for (int j = 0; j < startTreeNodes.Count; j++)
+                    npv += startStorageNpvs[j][gridIndex] * startTreeNodes[j].Probability;
+                npvs[i] = npv;
+            }
+            return npvs;
+        }
+
+        private static TreeStorageValuationResults<T> Calculate(T currentPeriod, double[] startingInventories, 
+            bool infeasibleStartingInventoryAsNaN, TimeSeries<T, double> forwardCurve, 
+            Func<TimeSeries<T, double>, TimeSeries<T, IReadOnlyList<TreeNode>>> treeFactory, ICmdtyStorage<T> storage, 
+            Func<T, Day> settleDateRule, Func<Day, Day, double> discountFactors, 
+            Func<ICmdtyStorage<T>, IDoubleStateSpaceGridCalc> gridCalcFactory, IInterpolatorFactory interpolatorFactory, 
+            double numericalTolerance, CancellationToken cancellationToken)
+        {
+            // startingInventories must be sorted in ascending order, and become the inventory grid of the first period
             if (currentPeriod.CompareTo(storage.EndPeriod) > 0)
                 return TreeStorageValuationResults<T>.CreateExpiredResults();
 
@@ -156,13 +245,14 @@ TreeStorageValuationResults<T> ITreeCalculate<T>.Calculate()
             {
                 if (storage.MustBeEmptyAtEnd)
                 {
-                    if (startingInventory > 0)
+                    if (startingInventories.Any(startingInventory => startingInventory > 0))
                         throw new InventoryConstraintsCannotBeFulfilledException("Storage must be empty at end, but inventory is greater than zero.");
                     return TreeStorageValuationResults<T>.CreateExpiredResults();
                 }
             }
 
-            TimeSeries<T, InventoryRange> inventorySpace = StorageHelper.CalculateInventorySpace(storage, startingInventory, currentPeriod);
+            TimeSeries<T, InventoryRange> inventorySpace = StorageHelper.CalculateInventorySpaceForStartingRange(storage, 
+                                    startingInventories[0], startingInventories[startingInventories.Length - 1], currentPeriod);
 
             // TODO think of method to put in TimeSeries class to perform the validation check below in one line
             if (forwardCurve.IsEmpty)
@@ -219,10 +309,11 @@ TreeStorageValuationResults<T> ITreeCalculate<T>.Calculate()
 
             foreach (T periodLoop in periodsForResultsTimeSeries.Reverse().Skip(1))
             {
+                cancellationToken.ThrowIfCancellationRequested();
                 double[] inventorySpaceGrid;
                 if (periodLoop.Equals(startActiveStorage))
                 {
-                    inventorySpaceGrid = new[] {startingInventory};
+                    inventorySpaceGrid = startingInventories;
                 }
                 else
                 {
@@ -252,6 +343,14 @@ TreeStorageValuationResults<T> ITreeCalculate<T>.Calculate()
                     for (int i = 0; i < inventorySpaceGrid.Length; i++)
                     {
                         double inventory = inventorySpaceGrid[i];
+                        if (infeasibleStartingInventoryAsNaN && periodLoop.Equals(startActiveStorage) &&
+                            !StorageHelper.IsInventoryFeasible(storage, periodLoop, inventory, nextStepInventorySpaceMin, 
+                                nextStepInventorySpaceMax, numericalTolerance))
+                        {
+                            storageValuesGrid[i] = double.NaN;
+                            decisionVolumesGrid[i] = double.NaN;
+                            continue;
+                        }
                         (storageValuesGrid[i], decisionVolumesGrid[i], _, _) = 
                                         OptimalDecisionAndValue(storage, periodLoop, inventory,
                                         nextStepInventorySpaceMin, nextStepInventorySpaceMax, treeNode,
@@ -293,6 +392,106 @@ TreeStorageValuationResults<T> ITreeCalculate<T>.Calculate()
                             inventorySpace);
         }
 
+        private const double TerminalDeltaRelativeShift = 1E-6;
+
+        // By the envelope theorem the derivative of the optimal value with respect to a forward price is the derivative
+        // of the cash flows holding the optimal decisions fixed. The probability mass of being at each node and inventory
+        // grid point is propagated forward through the stored decisions, splitting the mass of an inventory between
+        // grid points using the same weights as linear interpolation, so each period's delta is the expected derivative
+        // of that period's cash flows.
+        private static DoubleTimeSeries<T> CalculateDeltas(TreeStorageValuationResults<T> valuationResults, T currentPeriod,
+            TimeSeries<T, double> forwardCurve, ICmdtyStorage<T> storage, Func<T, Day> settleDateRule, 
+            Func<Day, Day, double> discountFactors, double numericalTolerance)
+        {
+            TimeSeries<T, IReadOnlyList<double>> inventorySpaceGrids = valuationResults.InventorySpaceGrids;
+            if (inventorySpaceGrids.IsEmpty)
+                return DoubleTimeSeries<T>.Empty;
+
+            TimeSeries<T, IReadOnlyList<TreeNode>> tree = valuationResults.Tree;
+            TimeSeries<T, IReadOnlyList<IReadOnlyList<double>>> injectWithdrawDecisions = valuationResults.InjectWithdrawDecisions;
+            int numPeriods = inventorySpaceGrids.Count;
+            var deltas = new double[numPeriods];
+
+            // Same as the day discounted to by the valuation, which is before the start of forward starting storage
+            Day dayToDiscountTo = currentPeriod.First<Day>();
+
+            IReadOnlyList<TreeNode> treeNodes = tree[inventorySpaceGrids.Start];
+            double[][] probabilities = treeNodes.Select(treeNode => new[] {treeNode.Probability}).ToArray();
+
+            for (int periodIndex = 0; periodIndex < numPeriods - 1; periodIndex++)
+            {
+                T period = inventorySpaceGrids.Start.Offset(periodIndex);
+                IReadOnlyList<double> inventoryGrid = inventorySpaceGrids.Data[periodIndex];
+                IReadOnlyList<IReadOnlyList<double>> decisions = injectWithdrawDecisions.Data[periodIndex];
+                double discountFactorFromCmdtySettlement = discountFactors(dayToDiscountTo, settleDateRule(period));
+                double forwardPrice = forwardCurve[period];
+                double inventoryPercentLoss = storage.CmdtyInventoryPercentLoss(period);
+
+                T nextPeriod = period.Offset(1);
+                bool nextPeriodIsEnd = periodIndex + 1 == numPeriods - 1;
+                double nextForwardPrice = forwardCurve[nextPeriod];
+                double[] nextInventoryGrid = nextPeriodIsEnd ? null : inventorySpaceGrids.Data[periodIndex + 1].ToArray();
+                IReadOnlyList<TreeNode> nextTreeNodes = tree[nextPeriod];
+                double[][] nextProbabilities = nextPeriodIsEnd ? null :
+                    nextTreeNodes.Select(treeNode => new double[nextInventoryGrid.Length]).ToArray();
+
+                for (int nodeIndex = 0; nodeIndex < treeNodes.Count; nodeIndex++)
+                {
+                    TreeNode treeNode = treeNodes[nodeIndex];
+                    for (int gridIndex = 0; gridIndex < inventoryGrid.Count; gridIndex++)
+                    {
+                        double probability = probabilities[nodeIndex][gridIndex];
+                        if (probability == 0.0)
+                            continue;
+                        double inventory = inventoryGrid[gridIndex];
+                        double injectWithdrawVolume = decisions[nodeIndex][gridIndex];
+                        double cmdtyConsumed = injectWithdrawVolume > 0.0
+                            ? storage.CmdtyVolumeConsumedOnInject(period, inventory, injectWithdrawVolume)
+                            : storage.CmdtyVolumeConsumedOnWithdraw(period, inventory, -injectWithdrawVolume);
+                        deltas[periodIndex] += probability * -(injectWithdrawVolume + cmdtyConsumed) * 
+                                            discountFactorFromCmdtySettlement * treeNode.Value / forwardPrice;
+
+                        double inventoryAfterDecision = inventory + injectWithdrawVolume - inventoryPercentLoss * inventory;
+                        foreach (NodeTransition transition in treeNode.Transitions)
+                        {
+                            double transitionProbability = probability * transition.Probability;
+                            TreeNode nextTreeNode = transition.DestinationNode;
+                            if (nextPeriodIsEnd)
+                            {
+                                double priceUp = nextTreeNode.Value * (1.0 + TerminalDeltaRelativeShift);
+                                double priceDown = nextTreeNode.Value * (1.0 - TerminalDeltaRelativeShift);
+                                double terminalNpvDerivative = (storage.TerminalStorageNpv(priceUp, inventoryAfterDecision) - 
+                                                                storage.TerminalStorageNpv(priceDown, inventoryAfterDecision)) /
+                                                               (2.0 * TerminalDeltaRelativeShift * nextForwardPrice);
+                                deltas[periodIndex + 1] += transitionProbability * terminalNpvDerivative;
+                            }
+                            else
+                            {
+                                double[] nextNodeProbabilities = nextProbabilities[nextTreeNode.ValueLevelIndex];
+                                (int lowerIndex, int upperIndex) = StorageHelper.BisectInventorySpace(nextInventoryGrid, 
+                                                                        inventoryAfterDecision, numericalTolerance);
+                                if (lowerIndex == upperIndex)
+                                {
+                                    nextNodeProbabilities[lowerIndex] += transitionProbability;
+                                }
+                                else
+                                {
+                                    double upperWeight = (inventoryAfterDecision - nextInventoryGrid[lowerIndex]) / 
+                                                         (nextInventoryGrid[upperIndex] - nextInventoryGrid[lowerIndex]);
+                                    nextNodeProbabilities[lowerIndex] += transitionProbability * (1.0 - upperWeight);
+                                    nextNodeProbabilities[upperIndex] += transitionProbability * upperWeight;
+                                }
+                            }
+                        }
+                    }
+                }
+                treeNodes = nextTreeNodes;
+                probabilities = nextProbabilities;
+            }
+
+            return new DoubleTimeSeries<T>(inventorySpaceGrids.Start, deltas);
+        }
+
         // TODO create class on hold this tuple?
         private static (double StorageNpv, double OptimalInjectWithdraw, double CmdtyConsumedOnAction, double ImmediateNpv) 
             OptimalDecisionAndValue(ICmdtyStorage<T> storage, T period, double inventory,
@@ -101,6 +101,21 @@ public static ITreeAddNumericalTolerance<T> WithCubicSplineInventorySpaceInterpo
                 OneFactorTrinomialTree.CreateTree(forwardCurve, meanReversion, spotVolatilityCurve, onePeriodTimeDelta));
         }
 
+        /// <summary>
+        /// Uses a tree created by scaling <paramref name="unitForwardTree"/>, a tree built for a forward curve of
+        /// ones, such as created by <see cref="ScaledTree.CreateUnitForwardOneFactorTrinomialTree{T}"/>, so that the
+        /// tree does not need to be rebuilt for each valuation.
+        /// </summary>
+        public static ITreeAddCmdtySettlementRule<T> WithUnitForwardPriceTree<T>(
+                [NotNull] this ITreeAddTreeFactory<T> addTreeFactory, [NotNull] TimeSeries<T, IReadOnlyList<TreeNode>> unitForwardTree)
+            where T : ITimePeriod<T>
+        {
+            if (addTreeFactory == null) throw new ArgumentNullException(nameof(addTreeFactory));
+            if (unitForwardTree == null) throw new ArgumentNullException(nameof(unitForwardTree));
+
+            return addTreeFactory.WithTreeFactory(ScaledTree.CreateTreeFactory(unitForwardTree));
+        }
+
         public static ITreeAddCmdtySettlementRule<T> WithIntrinsicTree<T>([NotNull] this ITreeAddTreeFactory<T> addTreeFactory)
             where T : ITimePeriod<T>
         {
@@ -23,7 +23,9 @@
 // OTHER DEALINGS IN THE SOFTWARE.
 #endregion
 
+using System;
 using System.Linq;
+using System.Threading;
 using Cmdty.TimePeriodValueTypes;
 using Cmdty.TimeSeries;
 using Xunit;
@@ -299,6 +301,230 @@ public void Calculate_CurrentPeriodEqualToStorageEndStorageInventoryHasTerminalV
         }
 
 
+        private static CmdtyStorage<Day> CreateStorageForIncrementalValuation()
+        {
+            return CmdtyStorage<Day>.Builder
+                .WithActiveTimePeriod(new Day(2019, 9, 1), new Day(2019, 9, 30))
+                .WithConstantInjectWithdrawRange(-45.5, 56.6)
+                .WithConstantMinInventory(0.0)
+                .WithConstantMaxInventory(1000.0)
+                .WithPerUnitInjectionCost(0.8, injectionDate => injectionDate)
+                .WithNoCmdtyConsumedOnInject()
+                .WithPerUnitWithdrawalCost(1.2, withdrawalDate => withdrawalDate)
+                .WithNoCmdtyConsumedOnWithdraw()
+                .WithNoCmdtyInventoryLoss()
+                .WithNoInventoryCost()
+                .MustBeEmptyAtEnd()
+                .Build();
+        }
+
+        private static TimeSeries<Day, double> GenerateSeasonalCurve(Day start, Day end, double shiftFrom, Day shiftStart)
+        {
+            var forwardCurveBuilder = new TimeSeries<Day, double>.Builder();
+            foreach (Day forwardCurvePoint in start.EnumerateTo(end))
+            {
+                double forwardPrice = 50.0 + 5.0 * System.Math.Sin(forwardCurvePoint.OffsetFrom(start) / 3.0);
+                if (forwardCurvePoint.CompareTo(shiftStart) >= 0)
+                    forwardPrice += shiftFrom;
+                forwardCurveBuilder.Add(forwardCurvePoint, forwardPrice);
+            }
+            return forwardCurveBuilder.Build();
+        }
+
+        private static IntrinsicStorageValuationResults<Day> FullIntrinsicValuation(CmdtyStorage<Day> storage, Day currentPeriod,
+                                                                double startingInventory, TimeSeries<Day, double> forwardCurve)
+        {
+            return IntrinsicStorageValuation<Day>
+                .ForStorage(storage)
+                .WithStartingInventory(startingInventory)
+                .ForCurrentPeriod(currentPeriod)
+                .WithForwardCurve(forwardCurve)
+                .WithCmdtySettlementRule(day => day)
+                .WithDiscountFactorFunc(StorageHelper.CreateAct65ContCompDiscounter(0.05))
+                .WithFixedNumberOfPointsOnGlobalInventoryRange(50)
+                .WithLinearInventorySpaceInterpolation()
+                .WithNumericalTolerance(1E-10)
+                .Calculate();
+        }
+
+        [Fact]
+        public void UpdateForwardCurve_PricesChangedFromPeriod_ResultsEqualFullRevaluationAndOnlyEarlierStagesRecalculated()
+        {
+            CmdtyStorage<Day> storage = CreateStorageForIncrementalValuation();
+            var currentPeriod = new Day(2019, 9, 3);
+            const double startingInventory = 150.0;
+            var shiftStart = new Day(2019, 9, 20);
+            TimeSeries<Day, double> initialCurve = GenerateSeasonalCurve(currentPeriod, storage.EndPeriod, 0.0, shiftStart);
+            TimeSeries<Day, double> shiftedCurve = GenerateSeasonalCurve(currentPeriod, storage.EndPeriod, 2.5, shiftStart);
+
+            var incrementalValuation = new IncrementalIntrinsicStorageValuation<Day>(storage, currentPeriod, startingInventory,
+                initialCurve, day => day, StorageHelper.CreateAct65ContCompDiscounter(0.05), 50, 1E-10);
+
+            Day[] changedPeriods = shiftStart.EnumerateTo(storage.EndPeriod).ToArray();
+            double[] changedPrices = changedPeriods.Select(period => shiftedCurve[period]).ToArray();
+            IntrinsicStorageValuationResults<Day> incrementalResults = incrementalValuation.UpdateForwardCurve(changedPeriods, changedPrices);
+
+            IntrinsicStorageValuationResults<Day> fullResults = FullIntrinsicValuation(storage, currentPeriod, startingInventory, shiftedCurve);
+
+            Assert.Equal(fullResults.Npv, incrementalResults.Npv, 10);
+            Assert.Equal(fullResults.StorageProfile.Count, incrementalResults.StorageProfile.Count);
+            for (int i = 0; i < fullResults.StorageProfile.Count; i++)
+            {
+                Assert.Equal(fullResults.StorageProfile.Data[i].Inventory, incrementalResults.StorageProfile.Data[i].Inventory, 10);
+                Assert.Equal(fullResults.StorageProfile.Data[i].InjectWithdrawVolume, 
+                                incrementalResults.StorageProfile.Data[i].InjectWithdrawVolume, 10);
+            }
+
+            // Stages run from the day after the current period, so the last changed stage is the storage end
+            Assert.Equal(storage.EndPeriod.OffsetFrom(currentPeriod), incrementalValuation.NumStagesRecalculated);
+        }
+
+        [Fact]
+        public void UpdateForwardCurve_PricesChangedBeforeLastPeriod_ResultsEqualFullRevaluation()
+        {
+            CmdtyStorage<Day> storage = CreateStorageForIncrementalValuation();
+            var currentPeriod = new Day(2019, 9, 3);
+            const double startingInventory = 150.0;
+            TimeSeries<Day, double> initialCurve = GenerateSeasonalCurve(currentPeriod, storage.EndPeriod, 0.0, storage.EndPeriod);
+
+            var incrementalValuation = new IncrementalIntrinsicStorageValuation<Day>(storage, currentPeriod, startingInventory,
+                initialCurve, day => day, StorageHelper.CreateAct65ContCompDiscounter(0.05), 50, 1E-10);
+
+            var changedPeriod = new Day(2019, 9, 10);
+            const double newPrice = 20.0;
+            IntrinsicStorageValuationResults<Day> incrementalResults = incrementalValuation.UpdateForwardCurve(
+                                                                new[] { changedPeriod }, new[] { newPrice });
+
+            TimeSeries<Day, double> newCurve = new TimeSeries<Day, double>(initialCurve.Indices.ToArray(), 
+                initialCurve.Indices.Select(period => period.Equals(changedPeriod) ? newPrice : initialCurve[period]).ToArray());
+            IntrinsicStorageValuationResults<Day> fullResults = FullIntrinsicValuation(storage, currentPeriod, startingInventory, newCurve);
+
+            Assert.Equal(fullResults.Npv, incrementalResults.Npv, 10);
+            Assert.Equal(changedPeriod.OffsetFrom(currentPeriod), incrementalValuation.NumStagesRecalculated);
+        }
+
+        [Fact]
+        public void UpdateForwardCurve_PricesUnchanged_NoStagesRecalculated()
+        {
+            CmdtyStorage<Day> storage = CreateStorageForIncrementalValuation();
+            var currentPeriod = new Day(2019, 9, 3);
+            TimeSeries<Day, double> curve = GenerateSeasonalCurve(currentPeriod, storage.EndPeriod, 0.0, storage.EndPeriod);
+
+            var incrementalValuation = new IncrementalIntrinsicStorageValuation<Day>(storage, currentPeriod, 150.0,
+                curve, day => day, StorageHelper.CreateAct65ContCompDiscounter(0.05), 50, 1E-10);
+            IntrinsicStorageValuationResults<Day> initialResults = incrementalValuation.Results;
+
+            var period = new Day(2019, 9, 15);
+            IntrinsicStorageValuationResults<Day> updatedResults = incrementalValuation.UpdateForwardCurve(
+                                                                new[] { period }, new[] { curve[period] });
+
+            Assert.Same(initialResults, updatedResults);
+            Assert.Equal(0, incrementalValuation.NumStagesRecalculated);
+        }
+
+        [Fact]
+        public void CalculateInventoryLadder_ValuesApproximatelyEqualSingleInventoryValuations()
+        {
+            CmdtyStorage<Day> storage = CreateStorageForIncrementalValuation();
+            var currentPeriod = new Day(2019, 9, 3);
+            TimeSeries<Day, double> curve = GenerateSeasonalCurve(currentPeriod, storage.EndPeriod, 0.0, storage.EndPeriod);
+            double[] startingInventories = { 0.0, 150.0, 600.0 };
+
+            double[] ladderNpvs = IntrinsicStorageValuation<Day>.CalculateInventoryLadder(storage, currentPeriod,
+                startingInventories, curve, day => day, StorageHelper.CreateAct65ContCompDiscounter(0.05),
+                InventorySpaceGrid.FixedNumberOfPointsOnGlobalInventoryRangeFactory<Day>(50),
+                new LinearInterpolatorFactory(), 1E-10);
+
+            Assert.Equal(startingInventories.Length, ladderNpvs.Length);
+            for (int i = 0; i < startingInventories.Length; i++)
+            {
+                double singleNpv = FullIntrinsicValuation(storage, currentPeriod, startingInventories[i], curve).Npv;
+                Assert.InRange(ladderNpvs[i], singleNpv - Math.Abs(singleNpv) * 1E-3, singleNpv + Math.Abs(singleNpv) * 1E-3);
+            }
+        }
+
+        [Fact]
+        public void CalculateInventoryLadder_InventoryCannotBeEmptiedByEnd_NaN()
+        {
+            CmdtyStorage<Day> storage = CreateStorageForIncrementalValuation();
+            var currentPeriod = new Day(2019, 9, 28);
+            TimeSeries<Day, double> curve = GenerateSeasonalCurve(currentPeriod, storage.EndPeriod, 0.0, storage.EndPeriod);
+
+            double[] ladderNpvs = IntrinsicStorageValuation<Day>.CalculateInventoryLadder(storage, currentPeriod,
+                new[] { 10.0, 900.0 }, curve, day => day, StorageHelper.CreateAct65ContCompDiscounter(0.05),
+                InventorySpaceGrid.FixedNumberOfPointsOnGlobalInventoryRangeFactory<Day>(50),
+                new LinearInterpolatorFactory(), 1E-10);
+
+            Assert.False(double.IsNaN(ladderNpvs[0]));
+            Assert.True(double.IsNaN(ladderNpvs[1]));
+        }
+
+        [Fact]
+        public void CalculateInventoryLadder_DiscountFactorFuncThrowsArgumentException_ExceptionNotConvertedToNaN()
+        {
+            CmdtyStorage<Day> storage = CreateStorageForIncrementalValuation();
+            var currentPeriod = new Day(2019, 9, 3);
+            TimeSeries<Day, double> curve = GenerateSeasonalCurve(currentPeriod, storage.EndPeriod, 0.0, storage.EndPeriod);
+
+            Assert.Throws<ArgumentException>(() => IntrinsicStorageValuation<Day>.CalculateInventoryLadder(storage, 
+                currentPeriod, new[] { 10.0, 150.0 }, curve, day => day, 
+                (valuationDate, cashFlowDate) => throw new ArgumentException("No interest rate provided."),
+                InventorySpaceGrid.FixedNumberOfPointsOnGlobalInventoryRangeFactory<Day>(50),
+                new LinearInterpolatorFactory(), 1E-10));
+        }
+
+        [Fact]
+        public void Calculate_CancellationRequested_ThrowsOperationCanceledException()
+        {
+            CmdtyStorage<Day> storage = CreateStorageForIncrementalValuation();
+            var currentPeriod = new Day(2019, 9, 3);
+            TimeSeries<Day, double> curve = GenerateSeasonalCurve(currentPeriod, storage.EndPeriod, 0.0, storage.EndPeriod);
+            var cancellationTokenSource = new CancellationTokenSource();
+            cancellationTokenSource.Cancel();
+
+            Assert.ThrowsAny<OperationCanceledException>(() => IntrinsicStorageValuation<Day>
+                .ForStorage(storage)
+                .WithStartingInventory(150.0)
+                .ForCurrentPeriod(currentPeriod)
+                .WithForwardCurve(curve)
+                .WithCmdtySettlementRule(day => day)
+                .WithDiscountFactorFunc(StorageHelper.CreateAct65ContCompDiscounter(0.05))
+                .WithFixedNumberOfPointsOnGlobalInventoryRange(50)
+                .WithLinearInventorySpaceInterpolation()
+                .WithNumericalTolerance(1E-10)
+                .Calculate(cancellationTokenSource.Token));
+        }
+
+        [Fact]
+        public void UpdateForwardCurve_PreviousUpdateCancelled_ResultsEqualFullRevaluation()
+        {
+            CmdtyStorage<Day> storage = CreateStorageForIncrementalValuation();
+            var currentPeriod = new Day(2019, 9, 3);
+            const double startingInventory = 150.0;
+            TimeSeries<Day, double> curve = GenerateSeasonalCurve(currentPeriod, storage.EndPeriod, 0.0, storage.EndPeriod);
+
+            var incrementalValuation = new IncrementalIntrinsicStorageValuation<Day>(storage, currentPeriod, startingInventory,
+                curve, day => day, StorageHelper.CreateAct65ContCompDiscounter(0.05), 50, 1E-10);
+
+            var changedPeriod = new Day(2019, 9, 20);
+            const double newPrice = 20.0;
+            var cancellationTokenSource = new CancellationTokenSource();
+            cancellationTokenSource.Cancel();
+            Assert.ThrowsAny<OperationCanceledException>(() => incrementalValuation.UpdateForwardCurve(
+                                                new[] { changedPeriod }, new[] { newPrice }, cancellationTokenSource.Token));
+
+            // Prices are unchanged by the second update, but the stages not recalculated by the first still need to be
+            IntrinsicStorageValuationResults<Day> incrementalResults = incrementalValuation.UpdateForwardCurve(
+                                                                new[] { changedPeriod }, new[] { newPrice });
+
+            TimeSeries<Day, double> newCurve = new TimeSeries<Day, double>(curve.Indices.ToArray(),
+                curve.Indices.Select(period => period.Equals(changedPeriod) ? newPrice : curve[period]).ToArray());
+            IntrinsicStorageValuationResults<Day> fullResults = FullIntrinsicValuation(storage, currentPeriod, startingInventory, newCurve);
+
+            Assert.Equal(fullResults.Npv, incrementalResults.Npv, 10);
+            Assert.Equal(changedPeriod.OffsetFrom(currentPeriod), incrementalValuation.NumStagesRecalculated);
+        }
+
         // TODO test cases:
         // Empty + spread more than inject + withdraw cost = value is spread minus costs, profile has inject withdraw
         // Inventory + curve backwardated: value is highest part of curve * volume - withdraw cost, profile is in highest part of curve
@@ -29,6 +29,7 @@
 using System.Linq;
 using System.Threading;
 using Cmdty.Core.Common;
+using Cmdty.Core.Simulation;
 using Cmdty.Core.Simulation.MultiFactor;
 using Cmdty.TimePeriodValueTypes;
 using Cmdty.TimeSeries;
@@ -229,6 +230,17 @@ public void Calculate_CurrentPeriodAfterStorageEnd_ResultWithEmptyDeltas()
             LsmcStorageValuationResults<Day> lsmcResults = LsmcStorageValuation.WithNoLogger.Calculate(builder.Build());
             Assert.True(lsmcResults.Deltas.IsEmpty);
         }
+
+        [Fact]
+        [Trait("Category", "Lsmc.AtEndOfStorage")]
+        public void Calculate_CurrentPeriodAfterStorageEnd_ResultWithZeroTimings()
+        {
+            var builder = _1FactorParamsBuilder.Clone();
+            builder.CurrentPeriod = _simpleDailyStorage.EndPeriod + 1;
+            builder.Storage = _simpleDailyStorage;
+            LsmcStorageValuationResults<Day> lsmcResults = LsmcStorageValuation.WithNoLogger.Calculate(builder.Build());
+            Assert.Equal(TimeSpan.Zero, lsmcResults.Timings.Total);
+        }
         // TODO same unit test as above, but testing the other output data, decision, simulated prices etc.
 
         [Fact]
@@ -998,6 +1010,114 @@ public void Calculate_CancelCalls_ThrowsOperationCanceledException()
             });
         }
 
+        [Fact]
+        [Trait("Category", "Lsmc.Policy")]
+        public void CalculateWithPolicy_SameValuationSimulation_ResultsEqualCalculate()
+        {
+            LsmcValuationParameters<Day> lsmcParams = CreatePolicyTestParams(Inventory);
+            LsmcStorageValuationResults<Day> fullResults = LsmcStorageValuation.WithNoLogger.Calculate(lsmcParams);
+
+            LsmcStorageValuationResults<Day> policyResults = LsmcStorageValuation.WithNoLogger.CalculateWithPolicy(
+                                                            CreatePolicyTestParams(Inventory), fullResults.Policy);
+
+            Assert.Equal(fullResults.Npv, policyResults.Npv, 10);
+            Assert.Equal(fullResults.Deltas.Count, policyResults.Deltas.Count);
+            foreach (Day day in fullResults.Deltas.Indices)
+                Assert.Equal(fullResults.Deltas[day], policyResults.Deltas[day], 10);
+            Assert.Same(fullResults.Policy, policyResults.Policy);
+        }
+
+        [Fact]
+        [Trait("Category", "Lsmc.Policy")]
+        public void CalculateWithPolicy_InventoryDifferentToPolicy_ThrowsArgumentException()
+        {
+            LsmcStorageValuationResults<Day> fullResults = LsmcStorageValuation.WithNoLogger.Calculate(CreatePolicyTestParams(Inventory));
+            Assert.Throws<ArgumentException>(() => LsmcStorageValuation.WithNoLogger.CalculateWithPolicy(
+                                                            CreatePolicyTestParams(Inventory + 100.0), fullResults.Policy));
+        }
+
+        [Fact]
+        [Trait("Category", "Lsmc.ReplayableNormals")]
+        public void Calculate_ReplayableGeneratorsRewoundBetweenModelParameters_ResultsEqualMersenneTwisterWithSameSeeds()
+        {
+            const int numSims = 100;
+            var regressionGenerator = new ReplayableStandardNormalGenerator(new MersenneTwisterGenerator(RandomSeed, true));
+            var valuationGenerator = new ReplayableStandardNormalGenerator(new MersenneTwisterGenerator(RandomSeed * 2, true));
+            var higherVolMultiFactorParams = MultiFactorParameters.For1Factor(OneFactorMeanReversion,
+                TimeSeriesFactory.ForConstantData(_oneFactorFlatSpotVols.Start, _oneFactorFlatSpotVols.End, 1.25));
+
+            // The first valuation records the normals, which the second replays with different model parameters
+            foreach (MultiFactorParameters<Day> multiFactorParams in new[] {_oneFactorDailyMultiFactorParams, higherVolMultiFactorParams})
+            {
+                regressionGenerator.Rewind();
+                valuationGenerator.Rewind();
+                var replayParamsBuilder = _1FactorParamsBuilder.Clone();
+                replayParamsBuilder.Storage = _simpleDailyStorage;
+                replayParamsBuilder.SimulateWithMultiFactorModel(regressionGenerator, valuationGenerator, multiFactorParams, numSims);
+                LsmcStorageValuationResults<Day> replayResults = LsmcStorageValuation.WithNoLogger.Calculate(replayParamsBuilder.Build());
+
+                var paramsBuilder = _1FactorParamsBuilder.Clone();
+                paramsBuilder.Storage = _simpleDailyStorage;
+                paramsBuilder.SimulateWithMultiFactorModelAndMersenneTwister(multiFactorParams, numSims, RandomSeed, RandomSeed * 2);
+                LsmcStorageValuationResults<Day> results = LsmcStorageValuation.WithNoLogger.Calculate(paramsBuilder.Build());
+
+                Assert.Equal(results.Npv, replayResults.Npv, 10);
+                foreach (Day day in results.Deltas.Indices)
+                    Assert.Equal(results.Deltas[day], replayResults.Deltas[day], 10);
+            }
+        }
+
+        private LsmcValuationParameters<Day> CreatePolicyTestParams(double inventory)
+        {
+            const int numSims = 50;
+            var paramsBuilder = _1FactorParamsBuilder.Clone();
+            paramsBuilder.Storage = _simpleDailyStorage;
+            paramsBuilder.Inventory = inventory;
+            // Same seed for regression and valuation so the policy valuation uses the same valuation simulation
+            paramsBuilder.SimulateWithMultiFactorModelAndMersenneTwister(_oneFactorDailyMultiFactorParams, numSims, RandomSeed, RandomSeed);
+            return paramsBuilder.Build();
+        }
+
+        [Fact]
+        [Trait("Category", "Lsmc.SimulationStatistics")]
+        public void Calculate_SimulationStatisticsQuantilesSpecified_StatisticsEqualStatisticsOfReturnedSimulationData()
+        {
+            double[] quantiles = { 0.05, 0.5, 0.95 };
+            var paramsBuilder = _1FactorParamsBuilder.Clone();
+            paramsBuilder.Storage = _simpleDailyStorage;
+            paramsBuilder.SimulateWithMultiFactorModelAndMersenneTwister(_oneFactorDailyMultiFactorParams, 100, RandomSeed);
+            paramsBuilder.SimulationDataReturned = SimulationDataReturned.All;
+            paramsBuilder.SimulationStatisticsQuantiles = quantiles;
+            LsmcStorageValuationResults<Day> results = LsmcStorageValuation.WithNoLogger.Calculate(paramsBuilder.Build());
+
+            AssertStatisticsEqualStatisticsOfPanel(results.InventoryBySim, results.InventoryStatistics, quantiles);
+            AssertStatisticsEqualStatisticsOfPanel(results.PvByPeriodAndSim, results.PvStatistics, quantiles);
+        }
+
+        [Fact]
+        [Trait("Category", "Lsmc.SimulationStatistics")]
+        public void Calculate_SimulationStatisticsQuantilesNotSpecified_StatisticsEmpty()
+        {
+            LsmcStorageValuationResults<Day> results = RunWithSimulationDataReturns(SimulationDataReturned.None, 20);
+            Assert.True(results.InventoryStatistics.IsEmpty);
+            Assert.True(results.PvStatistics.IsEmpty);
+        }
+
+        private static void AssertStatisticsEqualStatisticsOfPanel(Panel<Day, double> simPanel, Panel<Day, double> statistics, double[] quantiles)
+        {
+            Assert.Equal(simPanel.NumRows, statistics.NumRows);
+            Assert.Equal(quantiles.Length + 2, statistics.NumCols);
+            foreach (Day period in simPanel.RowKeys)
+            {
+                double[] simValues = simPanel[period].ToArray();
+                Span<double> periodStatistics = statistics[period];
+                Assert.Equal(simValues.Average(), periodStatistics[0], 8);
+                Assert.Equal(simValues.StandardDeviation(), periodStatistics[1], 8);
+                for (int i = 0; i < quantiles.Length; i++)
+                    Assert.Equal(simValues.QuantileCustom(quantiles[i], QuantileDefinition.R7), periodStatistics[i + 2], 8);
+            }
+        }
+
         [Fact]
         [Trait("Category", "Lsmc.SimDataReturned")]
         public void Calculate_SimulationDataReturnedAllAndNone_DoesNotChangeValuationResults()
@@ -1005,6 +1125,14 @@ public void Calculate_SimulationDataReturnedAllAndNone_DoesNotChangeValuationRes
             RunAndAssertSimulationDataReturnedSpecifiedDoesNotChangeValuationResults(SimulationDataReturned.All, SimulationDataReturned.None);
         }
 
+        [Fact]
+        [Trait("Category", "Lsmc.SimDataReturned")]
+        public void Calculate_StorageWithTerminalValueSimulationDataReturnedAllAndNone_DoesNotChangeValuationResults()
+        {
+            RunAndAssertSimulationDataReturnedSpecifiedDoesNotChangeValuationResults(SimulationDataReturned.All, SimulationDataReturned.None,
+                _simpleDailyStorageTerminalInventoryValue);
+        }
+
         [Fact]
         [Trait("Category", "Lsmc.SimDataReturned")]
         public void Calculate_SimulationDataReturnedAllAndSpotPricesForRegression_DoesNotChangeValuationResults()
@@ -1047,18 +1175,20 @@ public void Calculate_SimulationDataReturnedPvAndInventoryLossWithAll_DoesNotCha
             RunAndAssertSimulationDataReturnedSpecifiedDoesNotChangeValuationResults(SimulationDataReturned.Pv | SimulationDataReturned.InventoryLoss, SimulationDataReturned.All);
         }
 
-        private void RunAndAssertSimulationDataReturnedSpecifiedDoesNotChangeValuationResults(SimulationDataReturned simulationDataReturned1, SimulationDataReturned simulationDataReturned2)
+        private void RunAndAssertSimulationDataReturnedSpecifiedDoesNotChangeValuationResults(SimulationDataReturned simulationDataReturned1, 
+                                SimulationDataReturned simulationDataReturned2, CmdtyStorage<Day> storage = null)
         {
             const int numSims = 20;
-            LsmcStorageValuationResults<Day> lsmcResults1 = RunWithSimulationDataReturns(simulationDataReturned1, numSims);
-            LsmcStorageValuationResults<Day> lsmcResults2 = RunWithSimulationDataReturns(simulationDataReturned2, numSims);
+            LsmcStorageValuationResults<Day> lsmcResults1 = RunWithSimulationDataReturns(simulationDataReturned1, numSims, storage);
+            LsmcStorageValuationResults<Day> lsmcResults2 = RunWithSimulationDataReturns(simulationDataReturned2, numSims, storage);
             AssertLsmcStorageValuationResultsEqual(lsmcResults1, lsmcResults2);
         }
 
-        private LsmcStorageValuationResults<Day> RunWithSimulationDataReturns(SimulationDataReturned simulationDataReturned, int numSims)
+        private LsmcStorageValuationResults<Day> RunWithSimulationDataReturns(SimulationDataReturned simulationDataReturned, int numSims, 
+                                CmdtyStorage<Day> storage = null)
         {
             var paramsBuilder = _1FactorParamsBuilder.Clone();
-            paramsBuilder.Storage = _simpleDailyStorage;
+            paramsBuilder.Storage = storage ?? _simpleDailyStorage;
             paramsBuilder.SimulateWithMultiFactorModelAndMersenneTwister(MultiFactorParameters.For1Factor(16.5, _oneFactorFlatSpotVols), numSims, RandomSeed);
             paramsBuilder.SimulationDataReturned = simulationDataReturned;
             LsmcValuationParameters<Day> lsmcParams = paramsBuilder.Build();
@@ -1306,6 +1436,20 @@ public void Calculate_SimpleStorage1Factor_StandardErrorUnChanged()
             TestHelper.AssertWithinPercentTol(6135.66450019358, results.ValuationSimStandardError, 1E-12);
         }
 
+        [Fact]
+        [Trait("Category", "Lsmc.Timings")]
+        public void Calculate_SimpleStorage1Factor_TimingsOfPhasesWithinTotal()
+        {
+            LsmcStorageValuationResults<Day> lsmcResults = RunWithSimulationDataReturns(SimulationDataReturned.None, 100);
+            LsmcValuationTimings timings = lsmcResults.Timings;
+            Assert.True(timings.Total > TimeSpan.Zero);
+            Assert.True(timings.BackwardInduction > TimeSpan.Zero);
+            Assert.True(timings.ForwardSimulation > TimeSpan.Zero);
+            Assert.True(timings.PseudoInverse <= timings.BackwardInduction);
+            Assert.True(timings.RegressionPriceSimulation + timings.BackwardInduction + timings.ValuationPriceSimulation + 
+                        timings.ForwardSimulation <= timings.Total);
+        }
+
         [Fact(Skip = "Used for ad hoc investigations")]
         [Trait("Category", "Lsmc.StandardError")]
         public void Calculate_SimpleStorage1Factor_StandardErrorsCloseToStandardDeviationOfResults()
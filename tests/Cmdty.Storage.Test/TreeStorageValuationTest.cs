@@ -26,6 +26,7 @@
 using System;
 using System.Collections.Generic;
 using System.Linq;
+using System.Threading;
 using Cmdty.TimePeriodValueTypes;
 using Cmdty.TimeSeries;
 using Xunit;
@@ -605,5 +606,145 @@ public void Calculate_CurrentPeriodAfterEndPeriod_ResultsWithZeroNpvAndEmptyTime
             Assert.True(valuationResults.InjectWithdrawDecisions.IsEmpty);
             Assert.True(valuationResults.InventorySpace.IsEmpty);
         }
+
+        [Fact]
+        public void CalculateWithDeltas_StorageLooksLikeCallOptions_DeltasApproximatelyEqualBumpedValuationDeltas()
+        {
+            var currentDate = new Day(2019, 8, 29);
+            (DoubleTimeSeries<Day> forwardCurve, DoubleTimeSeries<Day> spotVolCurve) =
+                TestHelper.CreateDailyTestForwardAndSpotVolCurves(currentDate, new Day(2020, 4, 1));
+            TestHelper.CallOptionLikeTestData testData = TestHelper.CreateThreeCallsLikeStorageTestData(forwardCurve);
+
+            ITreeCalculate<Day> CreateValuation(TimeSeries<Day, double> curve) =>
+                TreeStorageValuation<Day>.ForStorage(testData.Storage)
+                    .WithStartingInventory(testData.Inventory)
+                    .ForCurrentPeriod(currentDate)
+                    .WithForwardCurve(curve)
+                    .WithOneFactorTrinomialTree(spotVolCurve, 16.5, 1.0 / 365.0)
+                    .WithMonthlySettlement(testData.SettleDates)
+                    .WithAct365ContinuouslyCompoundedInterestRate(day => 0.09)
+                    .WithFixedNumberOfPointsOnGlobalInventoryRange(100)
+                    .WithLinearInventorySpaceInterpolation()
+                    .WithNumericalTolerance(1E-10);
+
+            (TreeStorageValuationResults<Day> valuationResults, DoubleTimeSeries<Day> deltas) = 
+                                    CreateValuation(forwardCurve).CalculateWithDeltas();
+
+            Assert.Equal(CreateValuation(forwardCurve).CalculateNpv(), valuationResults.NetPresentValue);
+
+            // Bump the forward prices of each call option expiry in turn
+            const double bumpSize = 0.001;
+            foreach (TestHelper.CallOption option in testData.CallOptions)
+            {
+                TimeSeries<Day, double> BumpedCurve(double bump) => new TimeSeries<Day, double>(forwardCurve.Indices.ToArray(),
+                    forwardCurve.Indices.Select(day => day.Equals(option.ExpiryDate) ? forwardCurve[day] + bump : forwardCurve[day]).ToArray());
+                double valueUp = CreateValuation(BumpedCurve(bumpSize)).CalculateNpv();
+                double valueDown = CreateValuation(BumpedCurve(-bumpSize)).CalculateNpv();
+                double bumpedDelta = (valueUp - valueDown) / (2.0 * bumpSize);
+
+                Assert.InRange(deltas[option.ExpiryDate], bumpedDelta - 0.01 * Math.Abs(bumpedDelta) - 1E-6, 
+                                                        bumpedDelta + 0.01 * Math.Abs(bumpedDelta) + 1E-6);
+            }
+        }
+
+        [Fact]
+        public void CalculateWithDeltas_ForwardStartingStorageHighInterestRate_DeltasApproximatelyEqualBumpedValuationDeltas()
+        {
+            // Storage starts in December, so deltas discounted to the storage start rather than the current period would
+            // be over 10% too high with this interest rate
+            var currentDate = new Day(2019, 8, 29);
+            (DoubleTimeSeries<Day> forwardCurve, DoubleTimeSeries<Day> spotVolCurve) =
+                TestHelper.CreateDailyTestForwardAndSpotVolCurves(currentDate, new Day(2020, 4, 1));
+            TestHelper.CallOptionLikeTestData testData = TestHelper.CreateThreeCallsLikeStorageTestData(forwardCurve);
+            const double interestRate = 0.5;
+
+            ITreeCalculate<Day> CreateValuation(TimeSeries<Day, double> curve) =>
+                TreeStorageValuation<Day>.ForStorage(testData.Storage)
+                    .WithStartingInventory(testData.Inventory)
+                    .ForCurrentPeriod(currentDate)
+                    .WithForwardCurve(curve)
+                    .WithOneFactorTrinomialTree(spotVolCurve, 16.5, 1.0 / 365.0)
+                    .WithMonthlySettlement(testData.SettleDates)
+                    .WithAct365ContinuouslyCompoundedInterestRate(day => interestRate)
+                    .WithFixedNumberOfPointsOnGlobalInventoryRange(100)
+                    .WithLinearInventorySpaceInterpolation()
+                    .WithNumericalTolerance(1E-10);
+
+            DoubleTimeSeries<Day> deltas = CreateValuation(forwardCurve).CalculateWithDeltas().Deltas;
+
+            const double bumpSize = 0.001;
+            foreach (TestHelper.CallOption option in testData.CallOptions)
+            {
+                TimeSeries<Day, double> BumpedCurve(double bump) => new TimeSeries<Day, double>(forwardCurve.Indices.ToArray(),
+                    forwardCurve.Indices.Select(day => day.Equals(option.ExpiryDate) ? forwardCurve[day] + bump : forwardCurve[day]).ToArray());
+                double bumpedDelta = (CreateValuation(BumpedCurve(bumpSize)).CalculateNpv() - 
+                                      CreateValuation(BumpedCurve(-bumpSize)).CalculateNpv()) / (2.0 * bumpSize);
+
+                Assert.InRange(deltas[option.ExpiryDate], bumpedDelta - 0.01 * Math.Abs(bumpedDelta) - 1E-6, 
+                                                        bumpedDelta + 0.01 * Math.Abs(bumpedDelta) + 1E-6);
+            }
+        }
+
+        [Fact]
+        public void Calculate_WithUnitForwardPriceTree_NpvEqualsValuationWithOneFactorTrinomialTree()
+        {
+            var currentDate = new Day(2019, 8, 29);
+            (DoubleTimeSeries<Day> forwardCurve, DoubleTimeSeries<Day> spotVolCurve) =
+                TestHelper.CreateDailyTestForwardAndSpotVolCurves(currentDate, new Day(2020, 4, 1));
+            const double meanReversion = 16.5;
+            const double timeDelta = 1.0 / 365.0;
+            TestHelper.CallOptionLikeTestData testData = TestHelper.CreateThreeCallsLikeStorageTestData(forwardCurve);
+
+            double npvWithTreeBuilt = TreeStorageValuation<Day>.ForStorage(testData.Storage)
+                .WithStartingInventory(testData.Inventory)
+                .ForCurrentPeriod(currentDate)
+                .WithForwardCurve(forwardCurve)
+                .WithOneFactorTrinomialTree(spotVolCurve, meanReversion, timeDelta)
+                .WithMonthlySettlement(testData.SettleDates)
+                .WithAct365ContinuouslyCompoundedInterestRate(day => 0.09)
+                .WithFixedNumberOfPointsOnGlobalInventoryRange(100)
+                .WithLinearInventorySpaceInterpolation()
+                .WithNumericalTolerance(1E-10)
+                .CalculateNpv();
+
+            var unitForwardTree = ScaledTree.CreateUnitForwardOneFactorTrinomialTree(forwardCurve.Start, forwardCurve.End,
+                                        spotVolCurve, meanReversion, timeDelta);
+            double npvWithScaledTree = TreeStorageValuation<Day>.ForStorage(testData.Storage)
+                .WithStartingInventory(testData.Inventory)
+                .ForCurrentPeriod(currentDate)
+                .WithForwardCurve(forwardCurve)
+                .WithUnitForwardPriceTree(unitForwardTree)
+                .WithMonthlySettlement(testData.SettleDates)
+                .WithAct365ContinuouslyCompoundedInterestRate(day => 0.09)
+                .WithFixedNumberOfPointsOnGlobalInventoryRange(100)
+                .WithLinearInventorySpaceInterpolation()
+                .WithNumericalTolerance(1E-10)
+                .CalculateNpv();
+
+            Assert.Equal(npvWithTreeBuilt, npvWithScaledTree, 8);
+        }
+
+        [Fact]
+        public void CalculateNpv_CancellationRequested_ThrowsOperationCanceledException()
+        {
+            var currentDate = new Day(2019, 8, 29);
+            (DoubleTimeSeries<Day> forwardCurve, DoubleTimeSeries<Day> spotVolCurve) =
+                TestHelper.CreateDailyTestForwardAndSpotVolCurves(currentDate, new Day(2020, 4, 1));
+            TestHelper.CallOptionLikeTestData testData = TestHelper.CreateThreeCallsLikeStorageTestData(forwardCurve);
+            var cancellationTokenSource = new CancellationTokenSource();
+            cancellationTokenSource.Cancel();
+
+            Assert.ThrowsAny<OperationCanceledException>(() => TreeStorageValuation<Day>.ForStorage(testData.Storage)
+                .WithStartingInventory(testData.Inventory)
+                .ForCurrentPeriod(currentDate)
+                .WithForwardCurve(forwardCurve)
+                .WithOneFactorTrinomialTree(spotVolCurve, 16.5, 1.0 / 365.0)
+                .WithMonthlySettlement(testData.SettleDates)
+                .WithAct365ContinuouslyCompoundedInterestRate(day => 0.09)
+                .WithFixedNumberOfPointsOnGlobalInventoryRange(100)
+                .WithLinearInventorySpaceInterpolation()
+                .WithNumericalTolerance(1E-10)
+                .CalculateNpv(cancellationTokenSource.Token));
+        }
     }
 }